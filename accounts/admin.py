@@ -5,7 +5,7 @@ from django.contrib.auth.forms import UserCreationForm, UserChangeForm
 from django.core.exceptions import PermissionDenied
 from django.utils.html import format_html
 from django import forms
-from .models import User, ClientProfile, Partner, MAX_PARTNER_VIDEO_SIZE
+from .models import User, ClientProfile, Partner, BalanceTransaction, MAX_PARTNER_VIDEO_SIZE
 
 
 class CustomUserCreationForm(UserCreationForm):
@@ -440,7 +440,8 @@ class ClientProfileAdmin(BaseAdminPermissions):
         'user__email', 'user__first_name', 'user__last_name', 
         'company_name', 'industry'
     ]
-    readonly_fields = ['user', 'date_created', 'date_updated']
+    readonly_fields = ['user', 'account_balance', 'date_created', 'date_updated']
+    list_select_related = ['user']
     
     fieldsets = [
         ('User Information', {
@@ -451,7 +452,7 @@ class ClientProfileAdmin(BaseAdminPermissions):
         }),
         ('Financial Information', {
             'fields': ('account_balance',),
-            'description': 'Client account balance and financial tracking'
+            'description': 'Balance of the client user; changes are recorded in Balance Transactions'
         }),
         ('Timestamps', {
             'fields': ('date_created', 'date_updated'),
@@ -478,7 +479,7 @@ class ClientProfileAdmin(BaseAdminPermissions):
             color, formatted_amount
         )
     formatted_balance.short_description = 'Account Balance'
-    formatted_balance.admin_order_field = 'account_balance'
+    formatted_balance.admin_order_field = 'user__account_balance'
     
     def get_queryset(self, request):
         """Filter queryset based on user role"""
@@ -517,20 +518,26 @@ class ClientProfileAdmin(BaseAdminPermissions):
         if request.user.is_superuser or (hasattr(request.user, 'role') and request.user.role == 'admin'):
             return True
         return False
+
+
+@admin.register(BalanceTransaction)
+class BalanceTransactionAdmin(BaseAdminPermissions):
+    """Read-only view of the balance ledger; balances change through accounts.balances"""
     
-    def get_readonly_fields(self, request, obj=None):
-        """Set readonly fields based on permissions"""
-        readonly_fields = list(self.readonly_fields)
-        
-        if not request.user.is_authenticated:
-            return readonly_fields
-        
-        if hasattr(request.user, 'role') and request.user.role == 'client':
-            # Clients can't change their account balance
-            if 'account_balance' not in readonly_fields:
-                readonly_fields.append('account_balance')
-        
-        return readonly_fields
+    list_display = ['user', 'kind', 'amount', 'balance_after', 'currency', 'created_at']
+    list_filter = ['kind', 'currency', 'created_at']
+    search_fields = ['user__email', 'description', 'idempotency_key']
+    list_select_related = ['user']
+    ordering = ['-created_at']
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
+    
+    def has_delete_permission(self, request, obj=None):
+        return False
 
 
 # Custom admin site configuration removed - now configured in settings.py via Jazzmin
@@ -0,0 +1,96 @@
+# accounts/balances.py
+"""
+Race-free account balance changes backed by the BalanceTransaction ledger.
+
+Every change is one conditional `UPDATE user SET account_balance = account_balance + n`
+(the row lock serializes concurrent top-ups, withdrawals and PayPal captures), a
+read-back of the new balance and one ledger row, all in one transaction. So
+User.account_balance stays an O(1) snapshot of the ledger, and
+`manage.py reconcile_balances` can verify it against the history at any time.
+
+Passing an idempotency key makes a change safe to retry: replaying a key returns
+the transaction recorded the first time instead of moving the balance again.
+"""
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.db.models import Case, F, Sum, Value, When
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import BalanceTransaction, User
+
+
+class InsufficientFunds(Exception):
+    """The debit would take the balance below zero"""
+
+
+def _existing(user, idempotency_key, lock=False):
+    queryset = BalanceTransaction.objects.filter(user=user, idempotency_key=idempotency_key)
+    if lock:
+        # A locking read sees rows committed after this transaction's snapshot
+        queryset = queryset.select_for_update()
+    return queryset.first()
+
+
+def record(user, amount, kind, description='', idempotency_key=None, currency=None, created_by=None):
+    """
+    Apply a signed `amount` to the user's balance and append it to the ledger.
+    Returns (transaction, created); created is False when `idempotency_key` was
+    already recorded. Raises InsufficientFunds for debits larger than the balance.
+    `user.account_balance` and `user.currency` are updated in place.
+    """
+    amount = Decimal(str(amount))
+    if idempotency_key:
+        existing = _existing(user, idempotency_key)
+        if existing is not None:
+            return existing, False
+
+    users = User.objects.filter(pk=user.pk)
+    try:
+        with transaction.atomic():
+            debit_guard = users.filter(account_balance__gte=-amount) if amount < 0 else users
+            changed = debit_guard.update(
+                account_balance=F('account_balance') + amount,
+                currency=Case(When(currency='', then=Value(currency or 'USD')), default=F('currency')),
+                date_updated=timezone.now(),
+            )
+            if not changed:
+                raise InsufficientFunds(f'Balance is lower than {-amount}')
+            balance, user_currency, updated = users.values_list(
+                'account_balance', 'currency', 'date_updated'
+            ).get()
+            entry = BalanceTransaction.objects.create(
+                user_id=user.pk,
+                kind=kind,
+                amount=amount,
+                balance_after=balance,
+                currency=currency or user_currency,
+                description=description,
+                idempotency_key=idempotency_key or None,
+                created_by=created_by,
+            )
+    except IntegrityError:
+        # A concurrent request recorded the same key first; its change stands alone
+        existing = _existing(user, idempotency_key, lock=True) if idempotency_key else None
+        if existing is None:
+            raise
+        return existing, False
+
+    user.account_balance, user.currency, user.date_updated = balance, user_currency, updated
+    return entry, True
+
+
+def deposit(user, amount, **kwargs):
+    return record(user, abs(Decimal(str(amount))), kwargs.pop('kind', 'deposit'), **kwargs)
+
+
+def withdraw(user, amount, **kwargs):
+    return record(user, -abs(Decimal(str(amount))), kwargs.pop('kind', 'withdrawal'), **kwargs)
+
+
+def ledger_balance(user):
+    """Balance recomputed from the full ledger (for reconciliation, not for reads)"""
+    return BalanceTransaction.objects.filter(user=user).aggregate(
+        total=Coalesce(Sum('amount'), Decimal('0'))
+    )['total']
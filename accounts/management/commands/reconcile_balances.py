@@ -0,0 +1,47 @@
+# accounts/management/commands/reconcile_balances.py
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db.models import Q, Sum
+
+from accounts.models import BalanceTransaction, User
+
+
+class Command(BaseCommand):
+    help = 'Compare every account balance with the sum of its ledger (run periodically)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--fix',
+            action='store_true',
+            help='Reset drifted balances to the ledger total'
+        )
+
+    def handle(self, *args, **options):
+        # Balances are read before the ledger: a change committed in between then
+        # shows as drift, but --fix will not apply because the balance moved on
+        balances = dict(
+            User.objects.filter(Q(balance_transactions__isnull=False) | ~Q(account_balance=0)).distinct().values_list(
+                'pk', 'account_balance'
+            )
+        )
+        ledger = dict(
+            BalanceTransaction.objects.order_by().values('user').annotate(total=Sum('amount')).values_list(
+                'user', 'total'
+            )
+        )
+        drifted = [
+            (user_id, actual, ledger.get(user_id) or Decimal('0'))
+            for user_id, actual in balances.items()
+            if actual != (ledger.get(user_id) or Decimal('0'))
+        ]
+
+        for user_id, actual, expected in drifted:
+            self.stdout.write(self.style.WARNING(f'{user_id}: balance {actual}, ledger {expected}'))
+            if options['fix']:
+                # Skip accounts that changed since they were read
+                User.objects.filter(pk=user_id, account_balance=actual).update(account_balance=expected)
+
+        self.stdout.write(
+            self.style.SUCCESS(f'Checked {len(balances)} accounts, {len(drifted)} drifted')
+        )
@@ -0,0 +1,69 @@
+# Generated by Django 5.2.2 on 2026-10-18 16:18
+
+import uuid
+
+from django.db import migrations
+
+
+def record_opening_balances(apps, schema_editor):
+    """
+    Start every user's ledger at their current balance. Balances that were only
+    ever set on the client profile are moved onto the user first. A user whose
+    profile and user balances are both set and differ stops the migration, since
+    0014 drops the profile column and one of the amounts would be lost.
+    """
+    User = apps.get_model("accounts", "User")
+    ClientProfile = apps.get_model("accounts", "ClientProfile")
+    BalanceTransaction = apps.get_model("accounts", "BalanceTransaction")
+
+    profiles = ClientProfile.objects.exclude(account_balance=0).select_related("user")
+    conflicts = [
+        f"{profile.user.email} (user {profile.user.account_balance}, profile {profile.account_balance})"
+        for profile in profiles
+        if profile.user.account_balance and profile.user.account_balance != profile.account_balance
+    ]
+    if conflicts:
+        raise RuntimeError(
+            "Users have different balances on User and ClientProfile; settle them "
+            "before migrating: " + ", ".join(conflicts)
+        )
+
+    for profile in profiles:
+        if not profile.user.account_balance:
+            User.objects.filter(pk=profile.user_id).update(
+                account_balance=profile.account_balance
+            )
+
+    BalanceTransaction.objects.bulk_create(
+        [
+            BalanceTransaction(
+                id=str(uuid.uuid4()),
+                user_id=user_id,
+                kind="opening",
+                amount=balance,
+                balance_after=balance,
+                currency=currency or "USD",
+                description="Balance before the ledger was introduced",
+            )
+            for user_id, balance, currency in User.objects.exclude(
+                account_balance=0
+            ).values_list("pk", "account_balance", "currency")
+        ],
+        batch_size=500,
+    )
+
+
+def remove_opening_balances(apps, schema_editor):
+    BalanceTransaction = apps.get_model("accounts", "BalanceTransaction")
+    BalanceTransaction.objects.filter(kind="opening").delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("accounts", "0012_balancetransaction"),
+    ]
+
+    operations = [
+        migrations.RunPython(record_opening_balances, remove_opening_balances),
+    ]
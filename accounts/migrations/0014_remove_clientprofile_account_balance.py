@@ -0,0 +1,17 @@
+# Generated by Django 5.2.2 on 2026-10-18 16:18
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("accounts", "0013_opening_balances"),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name="clientprofile",
+            name="account_balance",
+        ),
+    ]
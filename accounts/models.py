@@ -171,13 +171,6 @@ class ClientProfile(models.Model):
     company_name = models.CharField(max_length=255, blank=True)
     industry = models.CharField(max_length=100, blank=True)
     
-    # Financial tracking
-    account_balance = models.DecimalField(
-        max_digits=12, 
-        decimal_places=2, 
-        default=0.00
-    )
-    
     # Timestamps
     date_created = models.DateTimeField(default=timezone.now)
     date_updated = models.DateTimeField(auto_now=True)
@@ -190,6 +183,71 @@ class ClientProfile(models.Model):
     
     def __str__(self):
         return self.company_name or self.user.full_name
+    
+    @property
+    def account_balance(self):
+        """The balance lives on the user (see BalanceTransaction)"""
+        return self.user.account_balance
+
+
+class BalanceTransaction(models.Model):
+    """
+    Append-only ledger of account balance changes.
+    User.account_balance is the running snapshot of a user's ledger; both are only
+    written through accounts.balances so they always move together.
+    """
+    
+    KIND_CHOICES = [
+        ('deposit', 'Deposit'),
+        ('withdrawal', 'Withdrawal'),
+        ('paypal_deposit', 'PayPal Deposit'),
+        ('opening', 'Opening Balance'),
+        ('adjustment', 'Adjustment'),
+    ]
+    
+    id = models.CharField(max_length=36, primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='balance_transactions'
+    )
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    amount = models.DecimalField(max_digits=12, decimal_places=2, help_text="Signed change; negative for debits")
+    balance_after = models.DecimalField(max_digits=12, decimal_places=2)
+    currency = models.CharField(max_length=10, default='USD')
+    description = models.CharField(max_length=255, blank=True)
+    idempotency_key = models.CharField(
+        max_length=100,
+        blank=True,
+        null=True,
+        help_text="Client or provider key; replaying it returns the original transaction"
+    )
+    created_by = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        blank=True,
+        null=True,
+        related_name='created_balance_transactions'
+    )
+    created_at = models.DateTimeField(default=timezone.now)
+    
+    class Meta:
+        db_table = 'balance_transaction'
+        verbose_name = 'Balance Transaction'
+        verbose_name_plural = 'Balance Transactions'
+        ordering = ['-created_at']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'idempotency_key'],
+                name='unique_balance_idempotency_key'
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['user', 'created_at']),
+        ]
+    
+    def __str__(self):
+        return f"{self.user.email} {self.get_kind_display()} {self.amount} {self.currency}"
 
 
 # Signal to automatically create ClientProfile for client users
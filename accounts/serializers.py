@@ -184,7 +184,11 @@ class UserDetailSerializer(serializers.ModelSerializer):
             'account_balance', 'currency', 'language_preference', 'user_timezone', 'affiliate_code', 'partner_profile',
             'two_factor_enabled', 'is_social_login', 'can_change_password'
         ]
-        read_only_fields = ['id', 'date_joined', 'date_updated', 'role', 'email', 'is_verified', 'is_social_login', 'can_change_password']
+        # Balances only change through accounts.balances, which records a BalanceTransaction
+        read_only_fields = [
+            'id', 'date_joined', 'date_updated', 'role', 'email', 'is_verified', 'is_social_login', 'can_change_password',
+            'account_balance'
+        ]
 
     def get_partner_profile(self, obj):
         if hasattr(obj, 'partner_profile'):
@@ -252,6 +256,9 @@ class ClientProfileSerializer(serializers.ModelSerializer):
     Client profile serializer with user information
     """
     user = UserBasicSerializer(read_only=True)
+    account_balance = serializers.DecimalField(
+        source='user.account_balance', max_digits=12, decimal_places=2, read_only=True
+    )
     
     class Meta:
         model = ClientProfile
@@ -1,3 +1,159 @@
-from django.test import TestCase
+import threading
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
 
-# Create your tests here.
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, TransactionTestCase, skipUnlessDBFeature
+from rest_framework.test import APIClient
+
+from . import balances
+from .models import BalanceTransaction, Partner, User
+from .serializers import UserDetailSerializer
+
+
+class BalanceLedgerTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email='ledger@example.com', password='pass', role='client')
+
+    def test_changes_are_recorded_with_running_balance(self):
+        balances.deposit(self.user, '100.00')
+        entry, created = balances.withdraw(self.user, '30.50')
+
+        self.assertTrue(created)
+        self.assertEqual(entry.amount, Decimal('-30.50'))
+        self.assertEqual(entry.balance_after, Decimal('69.50'))
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.account_balance, Decimal('69.50'))
+        self.assertEqual(balances.ledger_balance(self.user), Decimal('69.50'))
+
+    def test_overdraft_is_rejected(self):
+        balances.deposit(self.user, '10.00')
+        with self.assertRaises(balances.InsufficientFunds):
+            balances.withdraw(self.user, '10.01')
+        self.assertEqual(BalanceTransaction.objects.filter(user=self.user).count(), 1)
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.account_balance, Decimal('10.00'))
+
+    def test_idempotency_key_replays_original_transaction(self):
+        first, _ = balances.deposit(self.user, '25.00', idempotency_key='paypal:ORDER-1')
+        replay, created = balances.deposit(self.user, '25.00', idempotency_key='paypal:ORDER-1')
+
+        self.assertFalse(created)
+        self.assertEqual(str(replay.pk), str(first.pk))
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.account_balance, Decimal('25.00'))
+
+    def test_add_and_withdraw_funds_endpoints(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        response = client.post(
+            '/api/v1/accounts/users/add_funds/', {'amount': '40.00'}, format='json', HTTP_IDEMPOTENCY_KEY='top-up-1'
+        )
+        self.assertEqual(response.status_code, 200)
+        client.post(
+            '/api/v1/accounts/users/add_funds/', {'amount': '40.00'}, format='json', HTTP_IDEMPOTENCY_KEY='top-up-1'
+        )
+        response = client.post('/api/v1/accounts/users/withdraw_funds/', {'amount': '50.00'}, format='json')
+        self.assertEqual(response.status_code, 400)
+        response = client.post('/api/v1/accounts/users/withdraw_funds/', {'amount': '15.00'}, format='json')
+        self.assertEqual(response.data['available'], 25.0)
+
+    def test_reconcile_fixes_drifted_snapshot(self):
+        balances.deposit(self.user, '12.00')
+        User.objects.filter(pk=self.user.pk).update(account_balance=Decimal('99.00'))
+        call_command('reconcile_balances', '--fix', stdout=StringIO())
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.account_balance, Decimal('12.00'))
+
+    def test_profile_update_cannot_change_balance(self):
+        balances.deposit(self.user, '5.00')
+        client = APIClient()
+        client.force_authenticate(self.user)
+        url = '/api/v1/accounts/users/me/update/'
+        response = client.put(url, {'first_name': 'Led', 'account_balance': '1000000.00'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(Decimal(str(response.data['account_balance'])), Decimal('5.00'))
+        client.patch(url, {'account_balance': '999.00'}, format='json')
+        client.patch('/api/v1/accounts/users/me/', {'account_balance': '999.00'}, format='json')
+
+        serializer = UserDetailSerializer(self.user, data={'account_balance': '999.00'})
+        self.assertTrue(serializer.is_valid())
+        serializer.save()
+
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.first_name, 'Led')
+        self.assertEqual(self.user.account_balance, Decimal('5.00'))
+        self.assertEqual(BalanceTransaction.objects.filter(user=self.user).count(), 1)
+
+
+class PartnerConditionalGetTests(TestCase):
+    """Partner listings revalidate against the partner row and its user"""
+
+    def setUp(self):
+        cache.clear()  # anonymous throttling counts requests across tests
+        self.user = User.objects.create_user(
+            email='partner@example.com', password='pass', role='partner', first_name='Pat', last_name='Ner'
+        )
+        self.partner = Partner.objects.create(user=self.user, professional_title='Engineer')
+        self.client = APIClient()
+
+    def test_user_changes_invalidate(self):
+        for url in ['/api/v1/accounts/partners/', f'/api/v1/accounts/partners/{self.partner.pk}/']:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
+            self.assertEqual(
+                self.client.get(url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified']).status_code, 304
+            )
+
+            # Partner.updated_at is untouched when only the user changes
+            User.objects.filter(pk=self.user.pk).update(
+                first_name=f'Renamed {url}', date_updated=self.user.date_updated + timedelta(minutes=5)
+            )
+            updated = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+            self.assertEqual(updated.status_code, 200)
+            data = updated.data[0] if isinstance(updated.data, list) else updated.data
+            self.assertEqual(data['full_name'], f'Renamed {url} Ner')
+            self.assertEqual(
+                self.client.get(url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified']).status_code, 200
+            )
+            self.user.refresh_from_db()
+
+
+@skipUnlessDBFeature('test_db_allows_multiple_connections')
+class BalanceConcurrencyTests(TransactionTestCase):
+    def test_concurrent_changes_do_not_lose_updates(self):
+        user = User.objects.create_user(email='stress@example.com', password='pass', role='client')
+        balances.deposit(user, '100.00')
+        errors = []
+
+        def worker(index):
+            try:
+                account = User.objects.get(pk=user.pk)
+                for step in range(10):
+                    if (index + step) % 2:
+                        balances.withdraw(account, '1.00')
+                    else:
+                        balances.deposit(account, '2.00', idempotency_key=f'top-up-{index}-{step}')
+                    # Retried on every step, but only the first attempt may count
+                    balances.deposit(account, '1.00', idempotency_key=f'bonus-{index}')
+            except Exception as exc:
+                errors.append(exc)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=worker, args=(index,)) for index in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        user.refresh_from_db()
+        # 8 threads x (5 deposits of 2.00 - 5 withdrawals of 1.00 + one bonus of 1.00)
+        self.assertEqual(user.account_balance, Decimal('148.00'))
+        self.assertEqual(balances.ledger_balance(user), user.account_balance)
+        self.assertEqual(BalanceTransaction.objects.filter(user=user).count(), 89)
@@ -11,7 +11,7 @@ import traceback
 
 # Django core
 from django.contrib.auth import authenticate, login, logout as django_logout
-from django.core.mail import send_mail
+from emails.outbox import enqueue_email
 from django.conf import settings
 from django.core.cache import cache
 from django.db import models
@@ -26,6 +26,7 @@ from rest_framework.permissions import IsAuthenticated, AllowAny
 from rest_framework.views import APIView
 from rest_framework.parsers import MultiPartParser, FormParser, JSONParser
 from rest_framework_simplejwt.tokens import RefreshToken, TokenError
+from wordknox.conditional import ConditionalGetMixin
 
 # Third-party
 from social_django.utils import load_strategy, load_backend
@@ -51,6 +52,7 @@ from .serializers import (
     Toggle2FASerializer,
 )
 from .permissions import IsDeveloperOrAdmin, IsOwnerOrReadOnly
+from . import balances
 
 # Decimal for currency handling
 from decimal import Decimal
@@ -68,6 +70,12 @@ def generate_verification_code():
     return ''.join(random.choices(string.digits, k=6))
 
 
+def _idempotency_key(request):
+    """Client-supplied key that makes a balance change safe to retry."""
+    key = request.headers.get('Idempotency-Key') or request.data.get('idempotency_key')
+    return str(key)[:100] if key else None
+
+
 def send_verification_email(email, code, purpose):
     """
     Send verification code via email with comprehensive error handling.
@@ -164,16 +172,14 @@ Wordknox Team
         logger.info(f"[EMAIL {timestamp}] Subject: {subject}")
         logger.info(f"[EMAIL {timestamp}] To: {email}")
         
-        sent = send_mail(
+        queued = enqueue_email(
             subject=subject,
-            message=message,
-            from_email=settings.DEFAULT_FROM_EMAIL,
-            recipient_list=[email],
-            fail_silently=False
+            body=message,
+            recipients=[email]
         )
         
-        logger.info(f"[EMAIL {timestamp}] send_mail result: {sent}")
-        return bool(sent)
+        logger.info(f"[EMAIL {timestamp}] Queued fallback email {queued.id}")
+        return True
         
     except Exception as e:
         logger.error(f"[EMAIL {timestamp}] FATAL ERROR: {type(e).__name__}: {e}")
@@ -1097,7 +1103,8 @@ class UserViewSet(viewsets.ModelViewSet):
         Expected payload:
         {
             "amount": 100.00,
-            "user_id": "optional_for_staff"
+            "user_id": "optional_for_staff",
+            "idempotency_key": "optional, also read from the Idempotency-Key header"
         }
         """
         amount = request.data.get('amount')
@@ -1125,11 +1132,11 @@ class UserViewSet(viewsets.ModelViewSet):
                 'detail': 'Amount must be positive.'
             }, status=status.HTTP_400_BAD_REQUEST)
 
-        # Update balance
-        target_user.account_balance = (target_user.account_balance or Decimal('0')) + amount_dec
-        if not target_user.currency:
-            target_user.currency = 'USD'
-        target_user.save(update_fields=['account_balance', 'currency', 'date_updated'])
+        balances.deposit(
+            target_user, amount_dec,
+            idempotency_key=_idempotency_key(request),
+            created_by=request.user,
+        )
 
         return Response({
             'available': float(target_user.account_balance or 0),
@@ -1147,7 +1154,8 @@ class UserViewSet(viewsets.ModelViewSet):
         Expected payload:
         {
             "amount": 50.00,
-            "user_id": "optional_for_staff"
+            "user_id": "optional_for_staff",
+            "idempotency_key": "optional, also read from the Idempotency-Key header"
         }
         """
         amount = request.data.get('amount')
@@ -1174,14 +1182,17 @@ class UserViewSet(viewsets.ModelViewSet):
                 'detail': 'Amount must be positive.'
             }, status=status.HTTP_400_BAD_REQUEST)
 
-        if (target_user.account_balance or Decimal('0')) < amount_dec:
+        try:
+            balances.withdraw(
+                target_user, amount_dec,
+                idempotency_key=_idempotency_key(request),
+                created_by=request.user,
+            )
+        except balances.InsufficientFunds:
             return Response({
                 'detail': 'Insufficient funds.'
             }, status=status.HTTP_400_BAD_REQUEST)
 
-        target_user.account_balance = (target_user.account_balance or Decimal('0')) - amount_dec
-        target_user.save(update_fields=['account_balance', 'date_updated'])
-
         return Response({
             'available': float(target_user.account_balance or 0),
             'pending': 0.0,
@@ -1301,7 +1312,7 @@ class ClientProfileViewSet(viewsets.ModelViewSet):
 # PARTNER VIEWSET
 # ============================================================================
 
-class PartnerViewSet(viewsets.ReadOnlyModelViewSet):
+class PartnerViewSet(ConditionalGetMixin, viewsets.ReadOnlyModelViewSet):
     """Public partner listing."""
     
     queryset = Partner.objects.select_related('user').all()
@@ -1309,6 +1320,9 @@ class PartnerViewSet(viewsets.ReadOnlyModelViewSet):
     permission_classes = [AllowAny]
     http_method_names = ['get', 'head', 'options']
     pagination_class = None
+    last_modified_field = 'updated_at'
+    # Names, emails and avatars come from the partner's user
+    related_modified_fields = ('user__date_updated',)
 
     def get_queryset(self):
         """Filter active partners with search."""
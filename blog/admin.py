@@ -120,7 +120,7 @@ class BlogPostAdmin(BaseAdminPermissions):
         'date_created', 
         'date_updated',
         'comments_count',
-        'reading_time',
+        'reading_time_display',
         'image_preview'
     ]
     
@@ -143,7 +143,7 @@ class BlogPostAdmin(BaseAdminPermissions):
         }),
         # Removed 'Tags & Categories' fieldset since tags can't be in fieldsets with through model
         ('Statistics', {
-            'fields': ('view_count', 'comments_count', 'reading_time'),
+            'fields': ('view_count', 'comments_count', 'reading_time_display'),
             'classes': ('collapse',)
         }),
         ('Timestamps', {
@@ -178,13 +178,10 @@ class BlogPostAdmin(BaseAdminPermissions):
         return obj.comments.filter(approved=True).count()
     comments_count.short_description = 'Comments'
     
-    def reading_time(self, obj):
-        """Estimate reading time"""
-        if obj.content:
-            word_count = len(obj.content.split())
-            return f"{max(1, round(word_count / 200))} min"
-        return "0 min"
-    reading_time.short_description = 'Reading Time'
+    def reading_time_display(self, obj):
+        """Stored reading time"""
+        return f"{obj.reading_time} min ({obj.word_count} words)"
+    reading_time_display.short_description = 'Reading Time'
     
     def image_preview(self, obj):
         """Display featured image preview in admin"""
@@ -0,0 +1,50 @@
+# blog/management/commands/render_blog_content.py
+from django.core.management.base import BaseCommand
+
+from blog.models import BlogPost
+from blog.utils import RENDERED_CONTENT_FIELDS, blog_content_hash, render_blog_content
+
+
+class Command(BaseCommand):
+    help = (
+        'Re-render the stored sanitized HTML, excerpt and reading time of blog posts. '
+        'Run after changing ALLOWED_TAGS / ALLOWED_ATTRIBUTES or after bulk content updates.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            dest='force',
+            default=False,
+            help='Re-render every post, even when its content hash is current'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            dest='batch_size',
+            default=100,
+            help='Posts written per UPDATE batch (default: 100)'
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        posts = BlogPost.objects.only('id', 'content', 'content_hash').order_by('pk')
+        
+        stale = []
+        updated = 0
+        for post in posts.iterator(chunk_size=batch_size):
+            if not options['force'] and post.content_hash == blog_content_hash(post.content):
+                continue
+            for field, value in render_blog_content(post.content).items():
+                setattr(post, field, value)
+            stale.append(post)
+            if len(stale) >= batch_size:
+                updated += BlogPost.objects.bulk_update(stale, RENDERED_CONTENT_FIELDS)
+                stale = []
+        if stale:
+            updated += BlogPost.objects.bulk_update(stale, RENDERED_CONTENT_FIELDS)
+        
+        self.stdout.write(
+            self.style.SUCCESS(f'Re-rendered content for {updated} blog post(s)')
+        )
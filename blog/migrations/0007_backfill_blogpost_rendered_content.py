@@ -0,0 +1,104 @@
+# Generated by Django 5.2.2 on 2026-10-18 15:54
+
+import hashlib
+import re
+
+import bleach
+from django.db import migrations
+
+
+# Frozen copy of the blog.utils rendering as of this migration, so later
+# changes to the live sanitizer do not change what this backfill writes.
+# Posts whose rules have since changed get a different content_hash and are
+# re-rendered by BlogPost.save().
+ALLOWED_TAGS = [
+    'p', 'br', 'hr',
+    'h1', 'h2', 'h3', 'h4', 'h5', 'h6',
+    'strong', 'b', 'em', 'i', 'u', 's', 'strike', 'del', 'ins',
+    'a', 'img',
+    'ul', 'ol', 'li',
+    'blockquote', 'q', 'cite',
+    'pre', 'code',
+    'table', 'thead', 'tbody', 'tfoot', 'tr', 'th', 'td', 'caption',
+    'div', 'span',
+    'figure', 'figcaption',
+    'video', 'source', 'iframe',
+    'sub', 'sup',
+    'abbr', 'address',
+    'mark', 'small',
+]
+
+ALLOWED_ATTRIBUTES = {
+    '*': ['class', 'id', 'style', 'title'],
+    'a': ['href', 'target', 'rel', 'name'],
+    'img': ['src', 'alt', 'width', 'height', 'loading'],
+    'iframe': ['src', 'width', 'height', 'frameborder', 'allowfullscreen', 'allow'],
+    'video': ['src', 'controls', 'autoplay', 'loop', 'muted', 'poster', 'width', 'height'],
+    'source': ['src', 'type'],
+    'code': ['class'],
+    'pre': ['class'],
+    'td': ['colspan', 'rowspan'],
+    'th': ['colspan', 'rowspan', 'scope'],
+    'ol': ['start', 'type', 'reversed'],
+}
+
+SANITIZER_FINGERPRINT = hashlib.md5(
+    repr((sorted(ALLOWED_TAGS), sorted((tag, sorted(attrs)) for tag, attrs in ALLOWED_ATTRIBUTES.items()))).encode('utf-8')
+).hexdigest()
+
+RENDERED_CONTENT_FIELDS = ['sanitized_content', 'plain_excerpt', 'word_count', 'reading_time', 'content_hash']
+
+WORDS_PER_MINUTE = 200
+EXCERPT_LENGTH = 200
+
+
+def get_excerpt(content):
+    if not content:
+        return ''
+    text = re.sub(r'<[^>]+>', '', content)
+    excerpt = ''
+    for sentence in text.split('.'):
+        if len(excerpt + sentence) <= EXCERPT_LENGTH:
+            excerpt += sentence + '.'
+        else:
+            break
+    if not excerpt:
+        excerpt = text[:EXCERPT_LENGTH] + '...'
+    return excerpt.strip()
+
+
+def render_content(content):
+    sanitized = bleach.clean(
+        content, tags=ALLOWED_TAGS, attributes=ALLOWED_ATTRIBUTES, strip=True, strip_comments=True
+    ) if content else ''
+    word_count = len(re.sub(r'<[^>]+>', ' ', sanitized).split()) if sanitized else 0
+    return {
+        'sanitized_content': sanitized,
+        'plain_excerpt': get_excerpt(sanitized),
+        'word_count': word_count,
+        'reading_time': max(1, round(word_count / WORDS_PER_MINUTE)),
+        'content_hash': hashlib.sha256(f'{SANITIZER_FINGERPRINT}:{content or ""}'.encode('utf-8')).hexdigest(),
+    }
+
+
+def backfill_rendered_content(apps, schema_editor):
+    """Render sanitized HTML, excerpt and reading time for existing posts"""
+    BlogPost = apps.get_model('blog', 'BlogPost')
+    
+    posts = []
+    for post in BlogPost.objects.only('id', 'content').iterator(chunk_size=100):
+        for field, value in render_content(post.content).items():
+            setattr(post, field, value)
+        posts.append(post)
+    BlogPost.objects.bulk_update(posts, RENDERED_CONTENT_FIELDS, batch_size=100)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("blog", "0006_blogpost_rendered_content"),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_rendered_content, migrations.RunPython.noop),
+    ]
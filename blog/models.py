@@ -8,6 +8,9 @@ from django.core.exceptions import ValidationError
 from django.core.validators import FileExtensionValidator
 from django_ckeditor_5.fields import CKEditor5Field
 
+from wordknox.tracking import FieldTrackerMixin
+from .utils import RENDERED_CONTENT_FIELDS, blog_content_hash, render_blog_content
+
 
 def validate_blog_image_size(file):
     """
@@ -57,7 +60,7 @@ class Tag(models.Model):
         super().save(*args, **kwargs)
 
 
-class BlogPost(models.Model):
+class BlogPost(FieldTrackerMixin, models.Model):
     """
     Blog posts for content publishing system
     """
@@ -95,6 +98,13 @@ class BlogPost(models.Model):
         ]
     )
     
+    # Rendered from `content` on save (see render_blog_content)
+    sanitized_content = models.TextField(blank=True, editable=False)
+    plain_excerpt = models.TextField(blank=True, editable=False)
+    word_count = models.PositiveIntegerField(default=0, editable=False)
+    reading_time = models.PositiveIntegerField(default=1, editable=False, help_text="Minutes")
+    content_hash = models.CharField(max_length=64, blank=True, editable=False)
+    
     # Publishing fields
     date_published = models.DateField(blank=True, null=True)
     category = models.CharField(max_length=100, blank=True)
@@ -142,11 +152,28 @@ class BlogPost(models.Model):
         return self.title
     
     def save(self, *args, **kwargs):
-        """Auto-generate slug from title if not provided"""
+        """Auto-generate slug from title if not provided and re-render changed content"""
         if not self.slug:
             self.slug = slugify(self.title)
+        self.render_content(kwargs)
         super().save(*args, **kwargs)
     
+    def render_content(self, save_kwargs=None):
+        """Refresh the rendered content fields when the content or sanitizer rules changed"""
+        update_fields = (save_kwargs or {}).get('update_fields')
+        if update_fields is not None and 'content' not in update_fields:
+            return False
+        if 'content' in self.get_deferred_fields():
+            return False
+        if self.content_hash == blog_content_hash(self.content):
+            return False
+        
+        for field, value in render_blog_content(self.content).items():
+            setattr(self, field, value)
+        if update_fields is not None:
+            save_kwargs['update_fields'] = set(update_fields) | set(RENDERED_CONTENT_FIELDS)
+        return True
+    
     @property
     def is_published(self):
         """Check if the blog post is published"""
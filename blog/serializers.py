@@ -2,11 +2,24 @@
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
 from django.utils.text import slugify
+from wordknox.comment_tree import load_comment_tree, parse_max_depth
 from .models import Tag, BlogPost, BlogPostTag, BlogComment
 
 User = get_user_model()
 
 
+def blog_comment_tree(post, context):
+    """
+    Approved comments of a post as (top-level comments, approved count),
+    loaded with one query and shared by the comment fields of one serialization
+    """
+    if not hasattr(post, '_comment_tree'):
+        request = context.get('request')
+        max_depth = parse_max_depth(request.query_params.get('max_depth')) if request else None
+        post._comment_tree = load_comment_tree(post.comments.filter(approved=True), max_depth)
+    return post._comment_tree
+
+
 class TagSerializer(serializers.ModelSerializer):
     """
     Serializer for Tag model
@@ -94,6 +107,8 @@ class BlogCommentSerializer(serializers.ModelSerializer):
     
     def get_replies(self, obj):
         """Get approved replies to this comment"""
+        if hasattr(obj, 'thread_replies'):
+            return BlogCommentSerializer(obj.thread_replies, many=True, context=self.context).data
         if obj.replies.exists():
             replies = obj.replies.filter(approved=True).order_by('date_created')
             return BlogCommentSerializer(replies, many=True, context=self.context).data
@@ -101,7 +116,7 @@ class BlogCommentSerializer(serializers.ModelSerializer):
     
     def get_is_reply(self, obj):
         """Check if this comment is a reply"""
-        return obj.parent is not None
+        return obj.parent_id is not None
     
     def validate_message(self, value):
         """Ensure message is not empty and has minimum length"""
@@ -164,7 +179,6 @@ class BlogPostListSerializer(serializers.ModelSerializer):
     author = AuthorSerializer(read_only=True)
     tags = TagListSerializer(many=True, read_only=True)
     comments_count = serializers.SerializerMethodField()
-    reading_time = serializers.SerializerMethodField()
     
     class Meta:
         model = BlogPost
@@ -189,13 +203,6 @@ class BlogPostListSerializer(serializers.ModelSerializer):
     def get_comments_count(self, obj):
         """Return count of approved comments"""
         return obj.comments.filter(approved=True).count()
-    
-    def get_reading_time(self, obj):
-        """Estimate reading time based on content length (200 words per minute)"""
-        if obj.content:
-            word_count = len(obj.content.split())
-            return max(1, round(word_count / 200))  # Minimum 1 minute
-        return 1
 
 
 class BlogPostDetailSerializer(serializers.ModelSerializer):
@@ -209,8 +216,6 @@ class BlogPostDetailSerializer(serializers.ModelSerializer):
     comments = serializers.SerializerMethodField()
     featured_comments = serializers.SerializerMethodField()
     comments_count = serializers.SerializerMethodField()
-    reading_time = serializers.SerializerMethodField()
-    sanitized_content = serializers.SerializerMethodField()
     
     class Meta:
         model = BlogPost
@@ -237,38 +242,21 @@ class BlogPostDetailSerializer(serializers.ModelSerializer):
             'date_updated'
         ]
     
-    def get_sanitized_content(self, obj):
-        """Return sanitized HTML content for safe frontend rendering"""
-        from .utils import sanitize_html
-        return sanitize_html(obj.content) if obj.content else ''
-    
     def get_comments(self, obj):
         """Get approved top-level comments with replies"""
-        top_level_comments = obj.comments.filter(
-            approved=True, 
-            parent=None
-        ).order_by('-featured', 'date_created')
+        top_level_comments, _ = blog_comment_tree(obj, self.context)
+        top_level_comments = sorted(top_level_comments, key=lambda comment: not comment.featured)
         return BlogCommentSerializer(top_level_comments, many=True, context=self.context).data
 
     def get_featured_comments(self, obj):
         """Get featured comments for highlighting"""
-        featured = obj.comments.filter(
-            approved=True,
-            featured=True,
-            parent=None
-        ).order_by('date_created')
+        top_level_comments, _ = blog_comment_tree(obj, self.context)
+        featured = [comment for comment in top_level_comments if comment.featured]
         return BlogCommentSerializer(featured, many=True, context=self.context).data
     
     def get_comments_count(self, obj):
         """Return count of approved comments"""
-        return obj.comments.filter(approved=True).count()
-    
-    def get_reading_time(self, obj):
-        """Estimate reading time based on content length"""
-        if obj.content:
-            word_count = len(obj.content.split())
-            return max(1, round(word_count / 200))
-        return 1
+        return blog_comment_tree(obj, self.context)[1]
 
 
 class BlogPostCreateUpdateSerializer(serializers.ModelSerializer):
@@ -407,7 +395,6 @@ class PublicBlogPostListSerializer(serializers.ModelSerializer):
     author_name = serializers.SerializerMethodField()
     tags = TagListSerializer(many=True, read_only=True)
     comments_count = serializers.SerializerMethodField()
-    reading_time = serializers.SerializerMethodField()
     
     class Meta:
         model = BlogPost
@@ -416,6 +403,7 @@ class PublicBlogPostListSerializer(serializers.ModelSerializer):
             'title',
             'slug',
             'excerpt',
+            'plain_excerpt',
             'featured_image',
             'author_name',
             'tags',
@@ -436,13 +424,6 @@ class PublicBlogPostListSerializer(serializers.ModelSerializer):
     def get_comments_count(self, obj):
         """Return count of approved comments"""
         return obj.comments.filter(approved=True).count()
-    
-    def get_reading_time(self, obj):
-        """Estimate reading time"""
-        if obj.content:
-            word_count = len(obj.content.split())
-            return max(1, round(word_count / 200))
-        return 1
 
 
 class PublicBlogPostDetailSerializer(serializers.ModelSerializer):
@@ -456,8 +437,6 @@ class PublicBlogPostDetailSerializer(serializers.ModelSerializer):
     comments = serializers.SerializerMethodField()
     featured_comments = serializers.SerializerMethodField()
     comments_count = serializers.SerializerMethodField()
-    reading_time = serializers.SerializerMethodField()
-    sanitized_content = serializers.SerializerMethodField()
     
     class Meta:
         model = BlogPost
@@ -466,6 +445,7 @@ class PublicBlogPostDetailSerializer(serializers.ModelSerializer):
             'title',
             'slug',
             'excerpt',
+            'plain_excerpt',
             'content',
             'sanitized_content',
             'featured_image',
@@ -482,11 +462,6 @@ class PublicBlogPostDetailSerializer(serializers.ModelSerializer):
             'date_created'
         ]
     
-    def get_sanitized_content(self, obj):
-        """Return sanitized HTML content for safe frontend rendering"""
-        from .utils import sanitize_html
-        return sanitize_html(obj.content) if obj.content else ''
-    
     def get_author_name(self, obj):
         """Return author's display name"""
         if obj.author.first_name or obj.author.last_name:
@@ -495,31 +470,19 @@ class PublicBlogPostDetailSerializer(serializers.ModelSerializer):
     
     def get_comments(self, obj):
         """Get approved top-level comments with replies"""
-        top_level_comments = obj.comments.filter(
-            approved=True,
-            parent=None
-        ).order_by('-featured', 'date_created')
+        top_level_comments, _ = blog_comment_tree(obj, self.context)
+        top_level_comments = sorted(top_level_comments, key=lambda comment: not comment.featured)
         return BlogCommentSerializer(top_level_comments, many=True, context=self.context).data
 
     def get_featured_comments(self, obj):
         """Get featured comments for highlighting"""
-        featured = obj.comments.filter(
-            approved=True,
-            featured=True,
-            parent=None
-        ).order_by('date_created')
+        top_level_comments, _ = blog_comment_tree(obj, self.context)
+        featured = [comment for comment in top_level_comments if comment.featured]
         return BlogCommentSerializer(featured, many=True, context=self.context).data
     
     def get_comments_count(self, obj):
         """Return count of approved comments"""
-        return obj.comments.filter(approved=True).count()
-    
-    def get_reading_time(self, obj):
-        """Estimate reading time"""
-        if obj.content:
-            word_count = len(obj.content.split())
-            return max(1, round(word_count / 200))
-        return 1
+        return blog_comment_tree(obj, self.context)[1]
 
 
 class BlogPostStatsSerializer(serializers.ModelSerializer):
@@ -530,7 +493,6 @@ class BlogPostStatsSerializer(serializers.ModelSerializer):
     total_comments = serializers.SerializerMethodField()
     approved_comments = serializers.SerializerMethodField()
     pending_comments = serializers.SerializerMethodField()
-    reading_time = serializers.SerializerMethodField()
     author_name = serializers.SerializerMethodField()
     
     class Meta:
@@ -566,11 +528,4 @@ class BlogPostStatsSerializer(serializers.ModelSerializer):
     
     def get_pending_comments(self, obj):
         """Pending comments count"""
-        return obj.comments.filter(approved=False).count()
-    
-    def get_reading_time(self, obj):
-        """Estimate reading time"""
-        if obj.content:
-            word_count = len(obj.content.split())
-            return max(1, round(word_count / 200))
-        return 1
\ No newline at end of file
+        return obj.comments.filter(approved=False).count()
\ No newline at end of file
@@ -1,3 +1,244 @@
-from django.test import TestCase
+from datetime import timedelta
+from types import SimpleNamespace
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from wordknox.comment_tree import build_comment_tree, load_comment_tree, parse_max_depth
+from wordknox.counters import CounterBuffer, counters
+from . import models as blog_models
+from .models import BlogComment, BlogPost
+from .utils import RENDERED_CONTENT_FIELDS, blog_content_hash, render_blog_content
+
+User = get_user_model()
+
+
+def node(pk, parent_id=None):
+    return SimpleNamespace(pk=pk, parent_id=parent_id)
+
+
+def shape(comments):
+    """(pk, depth, [replies...]) for each comment, to compare whole trees at once"""
+    return [(comment.pk, comment.thread_depth, shape(comment.thread_replies)) for comment in comments]
+
+
+class BuildCommentTreeTests(SimpleTestCase):
+    def test_nesting_and_depth(self):
+        comments = [node(1), node(2, 1), node(3), node(4, 2), node(5, 1), node(6, 4)]
+        self.assertEqual(shape(build_comment_tree(comments)), [
+            (1, 0, [
+                (2, 1, [(4, 2, [(6, 3, [])])]),
+                (5, 1, []),
+            ]),
+            (3, 0, []),
+        ])
+
+    def test_input_order_is_kept_at_every_level(self):
+        comments = [node(3), node(9, 3), node(1), node(7, 3), node(8, 3)]
+        roots = build_comment_tree(comments)
+        self.assertEqual([comment.pk for comment in roots], [3, 1])
+        self.assertEqual([reply.pk for reply in roots[0].thread_replies], [9, 7, 8])
+
+    def test_replies_to_missing_parents_are_dropped(self):
+        # 2 is not in the list (e.g. unapproved), so 4 and its reply 5 are unreachable
+        comments = [node(1), node(3, 1), node(4, 2), node(5, 4)]
+        self.assertEqual(shape(build_comment_tree(comments)), [(1, 0, [(3, 1, [])])])
+
+    def test_max_depth(self):
+        comments = [node(1), node(2, 1), node(3, 2), node(4, 3)]
+        self.assertEqual(shape(build_comment_tree(comments, max_depth=0)), [(1, 0, [])])
+        self.assertEqual(shape(build_comment_tree(comments, max_depth=2)), [(1, 0, [(2, 1, [(3, 2, [])])])])
+
+    def test_flat_comments(self):
+        comments = [SimpleNamespace(pk=1), SimpleNamespace(pk=2)]
+        self.assertEqual(shape(build_comment_tree(comments)), [(1, 0, []), (2, 0, [])])
+
+    def test_parse_max_depth(self):
+        self.assertEqual(parse_max_depth('2'), 2)
+        self.assertEqual(parse_max_depth('0'), 0)
+        self.assertIsNone(parse_max_depth(None))
+        self.assertEqual(parse_max_depth('-1', default=5), 5)
+        self.assertEqual(parse_max_depth('deep', default=5), 5)
+
+
+class RenderedContentTests(TestCase):
+    CONTENT = '<p>First sentence. Second one.</p><script>alert(1)</script>'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(email='writer@example.com', password='pass')
+
+    def create_post(self, content=CONTENT):
+        return BlogPost.objects.create(
+            title='Rendered', slug='rendered', excerpt='Excerpt', author=self.author, content=content
+        )
+
+    def stored(self, post):
+        return BlogPost.objects.values(*RENDERED_CONTENT_FIELDS).get(pk=post.pk)
+
+    def test_create_renders(self):
+        post = self.create_post()
+        self.assertEqual(self.stored(post), render_blog_content(self.CONTENT))
+        self.assertNotIn('<script>', post.sanitized_content)
+        self.assertEqual(post.content_hash, blog_content_hash(self.CONTENT))
+
+    def test_unchanged_content_is_not_rerendered(self):
+        post = self.create_post()
+        post.title = 'Renamed'
+        with mock.patch.object(blog_models, 'render_blog_content', wraps=render_blog_content) as render:
+            post.save()
+            BlogPost.objects.get(pk=post.pk).save()
+            post.save(update_fields=['title'])
+        render.assert_not_called()
+        self.assertEqual(self.stored(post)['content_hash'], blog_content_hash(self.CONTENT))
+
+    def test_changed_content_is_rerendered(self):
+        post = self.create_post()
+        post.content = '<p>Rewritten ' + 'word ' * 450 + '</p>'
+        with mock.patch.object(blog_models, 'render_blog_content', wraps=render_blog_content) as render:
+            post.save(update_fields=['content'])
+        render.assert_called_once_with(post.content)
+        stored = self.stored(post)
+        self.assertEqual(stored, render_blog_content(post.content))
+        self.assertEqual(stored['word_count'], 451)
+        self.assertEqual(stored['reading_time'], 2)
+
+    def test_stale_hash_is_rerendered(self):
+        # What a sanitizer rule change looks like to a stored post
+        post = self.create_post()
+        BlogPost.objects.filter(pk=post.pk).update(content_hash='stale', sanitized_content='old')
+        BlogPost.objects.get(pk=post.pk).save()
+        self.assertEqual(self.stored(post), render_blog_content(self.CONTENT))
+
+
+class CommentThreadTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        author = User.objects.create_user(email='author@example.com', password='pass')
+        cls.post = BlogPost.objects.create(
+            title='Threads', slug='threads', excerpt='Excerpt', author=author, status='published',
+            date_published=timezone.localdate()
+        )
+        start = timezone.now() - timedelta(hours=1)
+
+        def comment(name, minutes, parent=None, approved=True, featured=False):
+            return BlogComment.objects.create(
+                blogpost=cls.post, parent=parent, name=name, message=f'Message from {name}',
+                approved=approved, featured=featured, date_created=start + timedelta(minutes=minutes)
+            )
+
+        # Created out of date order on purpose
+        cls.second = comment('second', 20, featured=True)
+        cls.first = comment('first', 10)
+        cls.reply_late = comment('reply-late', 40, parent=cls.first)
+        cls.reply_early = comment('reply-early', 15, parent=cls.first)
+        cls.nested = comment('nested', 50, parent=cls.reply_early)
+        cls.hidden = comment('hidden', 30, parent=cls.first, approved=False)
+        comment('under-hidden', 35, parent=cls.hidden)
+        comment('unapproved-root', 5, approved=False)
+
+    def setUp(self):
+        cache.clear()  # anonymous throttling counts requests across tests
+
+    def names(self, comments, replies='thread_replies'):
+        return [
+            (comment['name'] if isinstance(comment, dict) else comment.name,
+             self.names(comment[replies] if isinstance(comment, dict) else comment.thread_replies, replies))
+            for comment in comments
+        ]
+
+    def test_load_with_one_query(self):
+        with self.assertNumQueries(1):
+            roots, count = load_comment_tree(self.post.comments.filter(approved=True))
+        # The count is of approved rows, like comments.filter(approved=True).count()
+        self.assertEqual(count, 6)
+        # Oldest first at every level; unapproved replies take their subtree with them
+        self.assertEqual(self.names(roots), [
+            ('first', [('reply-early', [('nested', [])]), ('reply-late', [])]),
+            ('second', []),
+        ])
+        self.assertEqual(roots[0].thread_replies[0].thread_replies[0].thread_depth, 2)
+
+    def test_comments_endpoint(self):
+        client = APIClient()
+        url = f'/api/v1/blog/posts/{self.post.slug}/comments/'
+        response = client.get(url)
+        self.assertEqual(response.status_code, 200)
+        results = response.data['results'] if 'results' in response.data else response.data
+        # Featured threads first, then by date
+        self.assertEqual(self.names(results, 'replies'), [
+            ('second', []),
+            ('first', [('reply-early', [('nested', [])]), ('reply-late', [])]),
+        ])
+
+        response = client.get(url, {'max_depth': 1})
+        results = response.data['results'] if 'results' in response.data else response.data
+        self.assertEqual(self.names(results, 'replies')[1], ('first', [('reply-early', []), ('reply-late', [])]))
+
+    def test_endpoint_queries_do_not_grow_with_the_thread(self):
+        client = APIClient()
+        url = f'/api/v1/blog/posts/{self.post.slug}/comments/'
+        client.get(url)
+        with self.assertNumQueries(3):
+            client.get(url)
+        for index in range(5):
+            BlogComment.objects.create(
+                blogpost=self.post, parent=self.nested, name=f'extra-{index}', message='More replies', approved=True
+            )
+        with self.assertNumQueries(3):
+            client.get(url)
+
+
+@override_settings(COUNTER_FLUSH_INTERVAL=60)
+@mock.patch.object(CounterBuffer, '_ensure_worker')
+class BlogConditionalGetTests(TestCase):
+    """ETags follow comments, authors and view counts, and revalidated views still count"""
+
+    def setUp(self):
+        cache.clear()  # anonymous throttling counts requests across tests
+        # Leave no buffered increments behind for other tests to flush
+        counters.flush()
+        self.addCleanup(counters.flush)
+        self.author = User.objects.create_user(email='writer@example.com', password='pass')
+        self.post = BlogPost.objects.create(
+            title='Cached', slug='cached', excerpt='Excerpt', author=self.author, status='published',
+            date_published=timezone.localdate()
+        )
+        self.url = f'/api/v1/blog/posts/{self.post.slug}/'
+
+    def revalidate(self, url, etag):
+        return self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+    def test_revalidated_detail_is_counted_as_view(self, ensure_worker):
+        etag = self.client.get(self.url)['ETag']
+        with self.assertNumQueries(1):
+            self.assertEqual(self.revalidate(self.url, etag).status_code, 304)
+        counters.flush()
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.view_count, 2)
+        self.assertEqual(self.revalidate(self.url, etag).status_code, 200)
+
+    def test_comments_and_author_invalidate_detail(self, ensure_worker):
+        etag = self.client.get(self.url)['ETag']
+        BlogComment.objects.create(blogpost=self.post, name='Reader', message='Nice write-up', approved=True)
+        response = self.revalidate(self.url, etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['comments_count'], 1)
+
+        etag = response['ETag']
+        self.author.first_name = 'Ada'
+        self.author.save()
+        response = self.revalidate(self.url, etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['author_name'], 'Ada')
+
+    def test_list_follows_view_counts(self, ensure_worker):
+        url = '/api/v1/blog/latest/'
+        etag = self.client.get(url)['ETag']
+        self.assertEqual(self.revalidate(url, etag).status_code, 304)
+        BlogPost.objects.filter(pk=self.post.pk).update(view_count=10)
+        self.assertEqual(self.revalidate(url, etag).status_code, 200)
@@ -1,6 +1,7 @@
 # blog/utils.py
 from django.utils.text import slugify
 from django.core.exceptions import ValidationError
+import hashlib
 import re
 import bleach
 
@@ -63,6 +64,41 @@ def sanitize_html(content):
     return cleaned
 
 
+# Changes whenever the sanitizer rules change, so stored renders are invalidated
+SANITIZER_FINGERPRINT = hashlib.md5(
+    repr((sorted(ALLOWED_TAGS), sorted((tag, sorted(attrs)) for tag, attrs in ALLOWED_ATTRIBUTES.items()))).encode('utf-8')
+).hexdigest()
+
+# BlogPost columns written by render_blog_content()
+RENDERED_CONTENT_FIELDS = ['sanitized_content', 'plain_excerpt', 'word_count', 'reading_time', 'content_hash']
+
+
+def blog_content_hash(content):
+    """Hash of the raw content and the sanitizer rules it was rendered with"""
+    return hashlib.sha256(f'{SANITIZER_FINGERPRINT}:{content or ""}'.encode('utf-8')).hexdigest()
+
+
+def render_blog_content(content):
+    """
+    Render everything the serializers need from raw CKEditor content
+    
+    Args:
+        content (str): Raw HTML content
+    
+    Returns:
+        dict: Values for RENDERED_CONTENT_FIELDS
+    """
+    sanitized = sanitize_html(content)
+    word_count = count_words(sanitized)
+    return {
+        'sanitized_content': sanitized,
+        'plain_excerpt': get_excerpt_from_content(sanitized),
+        'word_count': word_count,
+        'reading_time': max(1, round(word_count / BLOG_SETTINGS['DEFAULT_WORDS_PER_MINUTE'])),
+        'content_hash': blog_content_hash(content),
+    }
+
+
 def generate_unique_slug(model_class, title, instance=None):
     """
     Generate a unique slug for a model instance
@@ -110,12 +146,15 @@ def estimate_reading_time(content, words_per_minute=200):
     if not content:
         return 1
     
-    # Remove HTML tags and count words
-    clean_content = re.sub(r'<[^>]+>', '', content)
-    word_count = len(clean_content.split())
-    
     # Calculate reading time (minimum 1 minute)
-    return max(1, round(word_count / words_per_minute))
+    return max(1, round(count_words(content) / words_per_minute))
+
+
+def count_words(content):
+    """Count the words in HTML content, ignoring tags"""
+    if not content:
+        return 0
+    return len(re.sub(r'<[^>]+>', ' ', content).split())
 
 
 def validate_social_media_urls(socials_data):
@@ -2,10 +2,14 @@
 from rest_framework import viewsets, permissions, status, filters
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from django.db.models import Q, F
+from django.db.models import Q
 from django.db import transaction
 from django.utils.decorators import method_decorator
-from django.views.decorators.cache import cache_page
+from wordknox.cache_tags import cache_page_tagged
+from wordknox.conditional import ConditionalGetMixin
+from wordknox.counters import counters
+from wordknox.comment_tree import load_comment_tree, parse_max_depth
+from search.filters import IndexedSearchFilter
 from django.views.decorators.vary import vary_on_headers
 from django_filters.rest_framework import DjangoFilterBackend
 
@@ -51,7 +55,7 @@ class TagViewSet(viewsets.ModelViewSet):
             return [permissions.AllowAny()]
         return [permissions.IsAdminUser()]
     
-    @method_decorator(cache_page(60 * 30))  # Cache for 30 minutes
+    @method_decorator(cache_page_tagged(60 * 30, tags=['blog:*']))  # Cache for 30 minutes
     @action(detail=False, methods=['get'])
     def popular(self, request):
         """Get most popular tags based on published post count"""
@@ -63,7 +67,7 @@ class TagViewSet(viewsets.ModelViewSet):
         return Response(serializer.data)
 
 
-class BlogPostViewSet(viewsets.ModelViewSet):
+class BlogPostViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     """
     ViewSet for managing blog posts
     
@@ -74,11 +78,17 @@ class BlogPostViewSet(viewsets.ModelViewSet):
     
     queryset = BlogPost.objects.all()
     lookup_field = 'slug'
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    filter_backends = [DjangoFilterBackend, IndexedSearchFilter, filters.OrderingFilter]
     filterset_fields = ['category', 'status', 'featured', 'author', 'tags__slug']
     search_fields = ['title', 'excerpt', 'content']
+    search_index_kind = 'blog'  # ?search= goes through the site search index
     ordering_fields = ['date_published', 'date_created', 'view_count', 'title']
     ordering = ['-date_created']
+    # Conditional GET: author names, view counts, and comments and tags (any blog row)
+    related_modified_fields = ('author__date_updated',)
+    counter_fields = ('view_count',)
+    validator_tags = ('blog:*',)
+    revalidation_fields = ('status',)
     
     def get_serializer_class(self):
         """Return appropriate serializer based on action and user"""
@@ -98,7 +108,7 @@ class BlogPostViewSet(viewsets.ModelViewSet):
     
     def get_permissions(self):
         """Set permissions based on action"""
-        if self.action in ['list', 'retrieve', 'featured', 'by_category', 'by_tag']:
+        if self.action in ['list', 'retrieve', 'featured', 'by_category', 'by_tag', 'comments']:
             return [permissions.AllowAny()]
         elif self.action in ['like', 'add_comment']:
             return [permissions.AllowAny()]  # Allow anonymous comments
@@ -116,17 +126,28 @@ class BlogPostViewSet(viewsets.ModelViewSet):
     
     def retrieve(self, request, *args, **kwargs):
         """Override retrieve to increment view count for public users"""
+        # A revalidated copy is answered before loading the post (and counted in revalidated())
+        not_modified = self.lookup_not_modified()
+        if not_modified is not None:
+            return not_modified
+        
         instance = self.get_object()
+        validators = self.object_validators(instance)
         
         # Increment view count for published posts
         if instance.status == 'published':
-            BlogPost.objects.filter(pk=instance.pk).update(view_count=F('view_count') + 1)
-            instance.refresh_from_db()
+            counters.increment(BlogPost, instance.pk, 'view_count')
+            counters.apply_pending(instance, 'view_count')
         
         serializer = self.get_serializer(instance)
-        return Response(serializer.data)
+        return self.add_validators(Response(serializer.data), validators)
+    
+    def revalidated(self, values):
+        """A revalidated copy is still a view"""
+        if values['status'] == 'published':
+            counters.increment(BlogPost, values['pk'], 'view_count')
     
-    @method_decorator(cache_page(60 * 15))  # Cache for 15 minutes
+    @method_decorator(cache_page_tagged(60 * 15, tags=['blog:*']))  # Cache for 15 minutes
     @action(detail=False, methods=['get'])
     def featured(self, request):
         """Get featured blog posts"""
@@ -234,6 +255,25 @@ class BlogPostViewSet(viewsets.ModelViewSet):
         serializer = BlogPostStatsSerializer(posts, many=True)
         return Response(serializer.data)
     
+    @action(detail=True, methods=['get'])
+    def comments(self, request, slug=None):
+        """
+        Approved comment threads of a post, paginated by top-level comment
+        Optional ?max_depth=N cuts off deeper replies
+        """
+        post = self.get_object()
+        max_depth = parse_max_depth(request.query_params.get('max_depth'))
+        top_level_comments, _ = load_comment_tree(post.comments.filter(approved=True), max_depth)
+        top_level_comments = sorted(top_level_comments, key=lambda comment: not comment.featured)
+        
+        page = self.paginate_queryset(top_level_comments)
+        if page is not None:
+            serializer = BlogCommentSerializer(page, many=True, context=self.get_serializer_context())
+            return self.get_paginated_response(serializer.data)
+        
+        serializer = BlogCommentSerializer(top_level_comments, many=True, context=self.get_serializer_context())
+        return Response(serializer.data)
+    
     @action(detail=True, methods=['post'])
     def add_comment(self, request, slug=None):
         """Add a comment to a blog post"""
@@ -396,13 +436,16 @@ class BlogCommentViewSet(viewsets.ModelViewSet):
 from rest_framework import generics
 
 
-class LatestBlogPostsAPIView(generics.ListAPIView):
+class LatestBlogPostsAPIView(ConditionalGetMixin, generics.ListAPIView):
     """
     Get latest published blog posts
     """
     
     serializer_class = PublicBlogPostListSerializer
     permission_classes = [permissions.AllowAny]
+    related_modified_fields = ('author__date_updated',)
+    counter_fields = ('view_count',)
+    validator_tags = ('blog:*',)
     
     def get_queryset(self):
         limit = int(self.request.query_params.get('limit', 5))
@@ -411,13 +454,16 @@ class LatestBlogPostsAPIView(generics.ListAPIView):
         ).select_related('author').prefetch_related('tags')[:limit]
 
 
-class RelatedBlogPostsAPIView(generics.ListAPIView):
+class RelatedBlogPostsAPIView(ConditionalGetMixin, generics.ListAPIView):
     """
     Get related blog posts based on tags
     """
     
     serializer_class = PublicBlogPostListSerializer
     permission_classes = [permissions.AllowAny]
+    related_modified_fields = ('author__date_updated',)
+    counter_fields = ('view_count',)
+    validator_tags = ('blog:*',)
     
     def get_queryset(self):
         post_slug = self.kwargs.get('slug')
@@ -4,9 +4,10 @@ from django.utils.html import format_html
 from django.urls import reverse
 from django.http import HttpResponseRedirect
 from django.contrib import messages
+from django.utils import timezone
 from django.contrib.auth import get_user_model
 from accounts.admin import BaseAdminPermissions
-from .models import ServiceRequest, Order, Testimonial, Notification, Payment, OrderActivity
+from .models import ServiceRequest, Order, Testimonial, Notification, Payment, OrderActivity, PayPalWebhookEvent
 
 User = get_user_model()
 
@@ -275,6 +276,24 @@ class PaymentAdmin(BaseAdminPermissions):
     ordering = ('-date_created',)
 
 
+@admin.register(PayPalWebhookEvent)
+class PayPalWebhookEventAdmin(BaseAdminPermissions):
+    """Inspect stored PayPal webhook events and replay failed ones"""
+    list_display = ('event_id', 'event_type', 'paypal_order_id', 'status', 'attempts', 'next_attempt_at', 'date_created')
+    list_filter = ('status', 'event_type', 'date_created')
+    search_fields = ('event_id', 'paypal_order_id', 'last_error')
+    readonly_fields = ('event_id', 'event_type', 'paypal_order_id', 'payload', 'event_time', 'attempts',
+                       'last_error', 'processed_at', 'date_created', 'date_updated')
+    ordering = ('-date_created',)
+    actions = ['replay_events']
+    
+    def replay_events(self, request, queryset):
+        """Queue the selected events again with a fresh retry budget (processing is idempotent)"""
+        updated = queryset.update(status='pending', attempts=0, next_attempt_at=timezone.now(), last_error='')
+        self.message_user(request, f"Queued {updated} event(s) for replay.")
+    replay_events.short_description = "Replay selected events"
+
+
 @admin.register(OrderActivity)
 class OrderActivityAdmin(BaseAdminPermissions):
     list_display = ('id', 'order', 'activity_type', 'description_short', 'created_by', 'created_at')
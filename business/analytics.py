@@ -0,0 +1,268 @@
+# business/analytics.py
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, Sum, Q, F
+from django.db.models.functions import TruncDate, TruncMonth
+from django.utils import timezone
+
+from .models import Order, DailyOrderRollup
+
+
+DEFAULT_CURRENCY = 'USD'
+
+
+def start_of_day(day):
+    """
+    Return an aware datetime for midnight of `day` in the current timezone.
+    Lets date filters hit the date_created index instead of wrapping the column in DATE().
+    """
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def _next_bucket(day, period):
+    """Return the first day of the bucket following `day`."""
+    if period == 'month':
+        return (day.replace(day=1) + timedelta(days=32)).replace(day=1)
+    return day + timedelta(days=1)
+
+
+def _build_summary(rows):
+    """
+    Fold grouped (currency, status, payment_status) rows into the summary dict
+    shared by summarize_orders and summarize_rollups.
+    """
+    summary = {
+        'total_orders': 0,
+        'total_value': Decimal('0.00'),
+        'average_order_value': Decimal('0.00'),
+        'by_status': {code: 0 for code, _ in Order.STATUS_CHOICES},
+        'by_payment_status': {code: 0 for code, _ in Order.PAYMENT_STATUS_CHOICES},
+        'by_currency': {},
+        'currency': DEFAULT_CURRENCY,
+    }
+
+    for row in rows:
+        count = row['order_count'] or 0
+        summary['total_orders'] += count
+        summary['total_value'] += row['order_total'] or Decimal('0.00')
+        summary['by_currency'][row['currency']] = summary['by_currency'].get(row['currency'], 0) + count
+        summary['by_status'][row['status']] = summary['by_status'].get(row['status'], 0) + count
+        summary['by_payment_status'][row['payment_status']] = (
+            summary['by_payment_status'].get(row['payment_status'], 0) + count
+        )
+
+    if summary['total_orders']:
+        summary['average_order_value'] = summary['total_value'] / summary['total_orders']
+        summary['currency'] = max(summary['by_currency'].items(), key=lambda item: item[1])[0]
+
+    return summary
+
+
+def _fill_histogram(rows, start_date, end_date, period):
+    """Zero-fill grouped {'bucket', 'count', 'revenue'} rows into an ordered histogram."""
+    buckets = {}
+    for row in rows:
+        bucket = row['bucket']
+        if isinstance(bucket, datetime):
+            bucket = timezone.localtime(bucket).date() if timezone.is_aware(bucket) else bucket.date()
+        if period == 'month':
+            bucket = bucket.replace(day=1)
+        buckets[bucket] = row
+
+    histogram = []
+    current = start_date
+    while current <= end_date:
+        row = buckets.get(current)
+        histogram.append({
+            'date': current,
+            'count': (row['count'] or 0) if row else 0,
+            'revenue': (row['revenue'] or Decimal('0.00')) if row else Decimal('0.00'),
+        })
+        current = _next_bucket(current, period)
+
+    return histogram
+
+
+def _histogram_range(start_date, end_date, period):
+    end_date = end_date or timezone.localdate()
+    if period == 'month':
+        return start_date.replace(day=1), end_date.replace(day=1)
+    return start_date, end_date
+
+
+def summarize_orders(queryset):
+    """
+    Compute order totals, averages, per-status counts and the currency mode in one grouped query.
+    Rows are grouped by (currency, status, payment_status), so the result set stays tiny.
+    """
+    rows = queryset.order_by().values('currency', 'status', 'payment_status').annotate(
+        order_count=Count('id'),
+        order_total=Sum('total_amount')
+    )
+    return _build_summary(rows)
+
+
+def order_histogram(queryset, start_date, end_date=None, period='day'):
+    """
+    Count orders and revenue per day (or month) between start_date and end_date inclusive.
+    Runs a single TruncDate/TruncMonth grouped query; empty buckets are filled with zeros.
+    Returns a list of {'date', 'count', 'revenue'} dicts, oldest first.
+    """
+    start_date, end_date = _histogram_range(start_date, end_date, period)
+    trunc = TruncMonth('date_created') if period == 'month' else TruncDate('date_created')
+
+    rows = queryset.filter(
+        date_created__gte=start_of_day(start_date),
+        date_created__lt=start_of_day(_next_bucket(end_date, period)),
+    ).order_by().annotate(bucket=trunc).values('bucket').annotate(
+        count=Count('id'),
+        revenue=Sum('total_amount')
+    )
+    return _fill_histogram(rows, start_date, end_date, period)
+
+
+def order_rollups(client=None, date_from=None, date_to=None):
+    """Return DailyOrderRollup rows, optionally limited to a client and an inclusive date range."""
+    rollups = DailyOrderRollup.objects.all()
+    if client is not None:
+        rollups = rollups.filter(client=client)
+    if date_from:
+        rollups = rollups.filter(date__gte=date_from)
+    if date_to:
+        rollups = rollups.filter(date__lte=date_to)
+    return rollups
+
+
+def summarize_rollups(rollups):
+    """Same result as summarize_orders, read from the daily rollup table in O(days) rows."""
+    rows = rollups.order_by().values('currency', 'status', 'payment_status').annotate(
+        order_count=Sum('order_count'),
+        order_total=Sum('total_amount')
+    )
+    return _build_summary(rows)
+
+
+def rollup_histogram(rollups, start_date, end_date=None, period='day'):
+    """Same result as order_histogram, read from the daily rollup table."""
+    start_date, end_date = _histogram_range(start_date, end_date, period)
+    bucket = TruncMonth('date') if period == 'month' else F('date')
+
+    rows = rollups.filter(
+        date__gte=start_date,
+        date__lt=_next_bucket(end_date, period),
+    ).order_by().annotate(bucket=bucket).values('bucket').annotate(
+        count=Sum('order_count'),
+        revenue=Sum('total_amount')
+    )
+    return _fill_histogram(rows, start_date, end_date, period)
+
+
+def windowed_order_totals(queryset, windows, extra=None):
+    """
+    Count orders and sum revenue for several time windows in one aggregate query.
+
+    `windows` maps a name to the aware datetime the window starts at; `extra` maps
+    a name to a Q object for additional conditional counts (e.g. pending orders).
+    Returns {name: {'orders': int, 'revenue': Decimal}} plus {extra_name: int}.
+    """
+    aggregates = {}
+    for name, since in windows.items():
+        aggregates[f'{name}_orders'] = Count('id', filter=Q(date_created__gte=since))
+        aggregates[f'{name}_revenue'] = Sum('total_amount', filter=Q(date_created__gte=since))
+    for name, condition in (extra or {}).items():
+        aggregates[name] = Count('id', filter=condition)
+
+    data = queryset.order_by().aggregate(**aggregates)
+
+    result = {
+        name: {
+            'orders': data[f'{name}_orders'],
+            'revenue': data[f'{name}_revenue'] or Decimal('0.00'),
+        }
+        for name in windows
+    }
+    for name in (extra or {}):
+        result[name] = data[name]
+    return result
+
+
+def order_rollup_key(order):
+    """Return the DailyOrderRollup lookup for the bucket an order belongs to."""
+    return {
+        'date': timezone.localtime(order.date_created).date(),
+        'client_id': order.client_id,
+        'status': order.status,
+        'payment_status': order.payment_status,
+        'currency': order.currency,
+    }
+
+
+def apply_order_rollup_delta(key, count, amount, create=True):
+    """
+    Add `count` orders and `amount` revenue to a rollup bucket with an F() update,
+    creating the bucket on first use. Pass create=False when only decrementing.
+    """
+    changes = {
+        'order_count': F('order_count') + count,
+        'total_amount': F('total_amount') + amount,
+    }
+    if DailyOrderRollup.objects.filter(**key).update(**changes) or not create:
+        return
+
+    try:
+        with transaction.atomic():
+            DailyOrderRollup.objects.create(order_count=count, total_amount=amount, **key)
+    except IntegrityError:
+        # Another request created the bucket first
+        DailyOrderRollup.objects.filter(**key).update(**changes)
+
+
+def rebuild_daily_order_rollups(dates=None, batch_size=1000):
+    """
+    Recompute rollup rows from the Order table.
+    Rebuilds only the given local dates when `dates` is provided, everything otherwise.
+    Returns the number of rollup rows written.
+    """
+    orders = Order.objects.all()
+    rollups = DailyOrderRollup.objects.all()
+
+    if dates is not None:
+        dates = set(dates)
+        if not dates:
+            return 0
+        day_filter = Q()
+        for day in dates:
+            day_filter |= Q(
+                date_created__gte=start_of_day(day),
+                date_created__lt=start_of_day(day + timedelta(days=1))
+            )
+        orders = orders.filter(day_filter)
+        rollups = rollups.filter(date__in=dates)
+
+    rows = orders.order_by().annotate(day=TruncDate('date_created')).values(
+        'day', 'client_id', 'status', 'payment_status', 'currency'
+    ).annotate(
+        order_count=Count('id'),
+        order_total=Sum('total_amount')
+    )
+
+    objects = [
+        DailyOrderRollup(
+            date=row['day'],
+            client_id=row['client_id'],
+            status=row['status'],
+            payment_status=row['payment_status'],
+            currency=row['currency'],
+            order_count=row['order_count'],
+            total_amount=row['order_total'] or Decimal('0.00'),
+        )
+        for row in rows
+    ]
+
+    with transaction.atomic():
+        rollups.delete()
+        DailyOrderRollup.objects.bulk_create(objects, batch_size=batch_size)
+
+    return len(objects)
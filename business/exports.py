@@ -0,0 +1,220 @@
+# business/exports.py
+import csv
+import json
+import zlib
+import zipfile
+from xml.sax.saxutils import escape
+
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import Order
+
+
+EXPORT_FORMATS = {
+    'csv': ('text/csv', 'csv'),
+    'ndjson': ('application/x-ndjson', 'ndjson'),
+    'xlsx': ('application/vnd.openxmlformats-officedocument.spreadsheetml.sheet', 'xlsx'),
+}
+
+ORDER_EXPORT_HEADERS = [
+    'Order ID', 'Client Name', 'Client Email', 'Service/Product',
+    'Total Amount', 'Currency', 'Status', 'Payment Status',
+    'Order Date', 'Due Date'
+]
+
+ORDER_EXPORT_FIELDS = [
+    'id', 'date_created', 'client__first_name', 'client__last_name', 'client__email',
+    'service__name', 'product__name', 'total_amount', 'currency', 'status',
+    'payment_status', 'due_date',
+]
+
+
+def iter_order_values(queryset, chunk_size=2000):
+    """
+    Yield order value dicts in fixed-size keyset batches ordered by (-date_created, -id).
+    Related names come from the same SELECT, and memory stays flat even on MySQL,
+    where the driver buffers a whole result set regardless of .iterator().
+    """
+    queryset = queryset.order_by('-date_created', '-id').values(*ORDER_EXPORT_FIELDS)
+    last = None
+
+    while True:
+        batch = queryset
+        if last is not None:
+            batch = batch.filter(
+                Q(date_created__lt=last['date_created']) |
+                Q(date_created=last['date_created'], id__lt=last['id'])
+            )
+        rows = list(batch[:chunk_size])
+        if not rows:
+            return
+        yield from rows
+        if len(rows) < chunk_size:
+            return
+        last = rows[-1]
+
+
+def iter_order_export_rows(queryset, chunk_size=2000):
+    """Yield one list per order matching ORDER_EXPORT_HEADERS"""
+    status_labels = dict(Order.STATUS_CHOICES)
+    payment_labels = dict(Order.PAYMENT_STATUS_CHOICES)
+
+    for order in iter_order_values(queryset, chunk_size):
+        full_name = f"{order['client__first_name']} {order['client__last_name']}".strip()
+        yield [
+            order['id'],
+            full_name or order['client__email'],
+            order['client__email'],
+            order['service__name'] or order['product__name'] or 'N/A',
+            str(order['total_amount']),
+            order['currency'],
+            status_labels.get(order['status'], order['status']),
+            payment_labels.get(order['payment_status'], order['payment_status']),
+            timezone.localtime(order['date_created']).strftime('%Y-%m-%d %H:%M'),
+            order['due_date'].strftime('%Y-%m-%d') if order['due_date'] else 'N/A'
+        ]
+
+
+class _Echo:
+    """File-like object whose write() hands back the value instead of storing it"""
+
+    def write(self, value):
+        return value
+
+
+class _ChunkSink:
+    """Unseekable file-like object that collects writes until drained"""
+
+    def __init__(self):
+        self.chunks = []
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b''.join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def stream_csv(headers, rows):
+    """Yield CSV-encoded bytes one row at a time"""
+    writer = csv.writer(_Echo())
+    yield writer.writerow(headers).encode('utf-8')
+    for row in rows:
+        yield writer.writerow(row).encode('utf-8')
+
+
+def stream_ndjson(headers, rows):
+    """Yield one JSON object per line, keyed by the headers"""
+    for row in rows:
+        yield (json.dumps(dict(zip(headers, row)), default=str) + '\n').encode('utf-8')
+
+
+def _xlsx_row(index, values):
+    cells = ''.join(
+        f'<c t="inlineStr"><is><t xml:space="preserve">{escape(str(value))}</t></is></c>'
+        for value in values
+    )
+    return f'<row r="{index}">{cells}</row>'.encode('utf-8')
+
+
+_XLSX_STATIC_PARTS = {
+    '[Content_Types].xml': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Override PartName="/xl/workbook.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+        '<Override PartName="/xl/worksheets/sheet1.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+        '</Types>'
+    ),
+    '_rels/.rels': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+        'Target="xl/workbook.xml"/>'
+        '</Relationships>'
+    ),
+    'xl/workbook.xml': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+        'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+        '<sheets><sheet name="Orders" sheetId="1" r:id="rId1"/></sheets>'
+        '</workbook>'
+    ),
+    'xl/_rels/workbook.xml.rels': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+        'Target="worksheets/sheet1.xml"/>'
+        '</Relationships>'
+    ),
+}
+
+
+def stream_xlsx(headers, rows, flush_every=500):
+    """
+    Yield a single-sheet XLSX workbook as it is written.
+    Cells use inline strings so no shared-string table has to be held in memory,
+    and the zip is written in streaming mode (no seeking), so openpyxl is not needed.
+    """
+    sink = _ChunkSink()
+    with zipfile.ZipFile(sink, 'w', compression=zipfile.ZIP_DEFLATED) as workbook:
+        for name, content in _XLSX_STATIC_PARTS.items():
+            workbook.writestr(name, content)
+
+        with workbook.open('xl/worksheets/sheet1.xml', 'w', force_zip64=True) as sheet:
+            sheet.write(
+                b'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                b'<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+                b'<sheetData>'
+            )
+            sheet.write(_xlsx_row(1, headers))
+            for index, row in enumerate(rows, start=2):
+                sheet.write(_xlsx_row(index, row))
+                if index % flush_every == 0:
+                    yield sink.drain()
+            sheet.write(b'</sheetData></worksheet>')
+        yield sink.drain()
+    yield sink.drain()
+
+
+def gzip_stream(chunks, level=6):
+    """Gzip-compress an iterable of byte chunks on the fly"""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def export_orders(queryset, export_format='csv', compress=False, chunk_size=2000):
+    """
+    Build a streamed order export.
+    Returns (byte chunk iterator, filename, content_type); raises ValueError for unknown formats.
+    """
+    if export_format not in EXPORT_FORMATS:
+        raise ValueError(f"Unsupported export format '{export_format}'. Use one of: {', '.join(EXPORT_FORMATS)}")
+
+    content_type, extension = EXPORT_FORMATS[export_format]
+    writer = {'csv': stream_csv, 'ndjson': stream_ndjson, 'xlsx': stream_xlsx}[export_format]
+    chunks = writer(ORDER_EXPORT_HEADERS, iter_order_export_rows(queryset, chunk_size))
+
+    filename = f"orders_export_{timezone.now().strftime('%Y%m%d_%H%M%S')}.{extension}"
+    if compress:
+        chunks = gzip_stream(chunks)
+        filename = f"{filename}.gz"
+        content_type = 'application/gzip'
+
+    return chunks, filename, content_type
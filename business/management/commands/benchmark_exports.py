@@ -0,0 +1,184 @@
+# business/management/commands/benchmark_exports.py
+import json
+import os
+import resource
+import sys
+import time
+import uuid
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections, transaction
+from django.utils import timezone
+
+from business.analytics import rebuild_daily_order_rollups
+from business.exports import EXPORT_FORMATS, export_orders
+from business.models import Order
+
+
+BENCHMARK_CLIENT_EMAIL = 'export-benchmark@example.com'
+STATUSES = [code for code, _ in Order.STATUS_CHOICES]
+PAYMENT_STATUSES = [code for code, _ in Order.PAYMENT_STATUS_CHOICES]
+
+
+def peak_rss_mb(usage):
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    divisor = 1024 * 1024 if sys.platform == 'darwin' else 1024
+    return usage.ru_maxrss / divisor
+
+
+class Command(BaseCommand):
+    help = 'Export synthetic orders in every format and report time, size and peak RSS of each export'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--orders',
+            type=int,
+            dest='orders',
+            default=100000,
+            help='Number of synthetic orders to export (default: 100000)'
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            dest='chunk_size',
+            default=2000,
+            help='Keyset batch size passed to export_orders (default: 2000)'
+        )
+        parser.add_argument(
+            '--gzip',
+            action='store_true',
+            dest='gzip',
+            help='Also benchmark gzip-compressed output'
+        )
+        parser.add_argument(
+            '--delete',
+            action='store_true',
+            dest='delete',
+            help='Delete the synthetic orders afterwards (slow: the Order delete signals run per row). '
+                 'By default they are kept and reused by the next run'
+        )
+
+    def get_client(self):
+        client, created = get_user_model().objects.get_or_create(
+            email=BENCHMARK_CLIENT_EMAIL,
+            defaults={'first_name': 'Export', 'last_name': 'Benchmark', 'role': 'client', 'is_active': False}
+        )
+        if created:
+            client.set_unusable_password()
+            client.save(update_fields=['password'])
+        return client
+
+    def create_orders(self, client, count, batch_size=5000):
+        """Bulk-insert synthetic orders spread over the last year; rollups are rebuilt for those days"""
+        existing = Order.objects.filter(client=client).count()
+        missing = count - existing
+        if missing <= 0:
+            return
+
+        now = timezone.now()
+        run = uuid.uuid4().hex[:8]
+        days = set()
+        with transaction.atomic():
+            for start in range(0, missing, batch_size):
+                orders = []
+                for index in range(start, min(start + batch_size, missing)):
+                    date_created = now - timedelta(minutes=index * 5)
+                    days.add(timezone.localtime(date_created).date())
+                    orders.append(Order(
+                        order_number=f'BENCH-{run}-{index:07d}',
+                        client=client,
+                        total_amount=Decimal(index % 997) + Decimal('0.99'),
+                        currency='USD',
+                        status=STATUSES[index % len(STATUSES)],
+                        payment_status=PAYMENT_STATUSES[index % len(PAYMENT_STATUSES)],
+                        notes='Synthetic order for benchmark_exports',
+                        date_created=date_created,
+                    ))
+                # bulk_create skips the Order signals, so no conversations or rollup deltas
+                Order.objects.bulk_create(orders, batch_size=batch_size)
+            rebuild_daily_order_rollups(days)
+        self.stdout.write(f'Created {missing} synthetic orders')
+
+    def measure(self, func):
+        """
+        Run func() in a forked child and return (result, RSS in MB when the child started, its peak RSS in MB).
+        A fresh process per export keeps one format's peak from hiding the next one's.
+        """
+        # The child must open its own database connection
+        connections.close_all()
+        read_fd, write_fd = os.pipe()
+        pid = os.fork()
+        if pid == 0:
+            os.close(read_fd)
+            status = 0
+            try:
+                start_rss = peak_rss_mb(resource.getrusage(resource.RUSAGE_SELF))
+                message = json.dumps([func(), start_rss])
+            except Exception as error:
+                message = json.dumps(f'{type(error).__name__}: {error}')
+                status = 1
+            with os.fdopen(write_fd, 'w') as pipe:
+                pipe.write(message)
+            os._exit(status)
+
+        os.close(write_fd)
+        with os.fdopen(read_fd) as pipe:
+            message = pipe.read()
+        _, status, usage = os.wait4(pid, 0)
+        if status:
+            raise CommandError(f'Export failed: {json.loads(message)}')
+        result, start_rss = json.loads(message)
+        return result, start_rss, peak_rss_mb(usage)
+
+    def export(self, queryset, export_format, compress, chunk_size, buffered=False):
+        started = time.perf_counter()
+        chunks, _, _ = export_orders(queryset, export_format, compress=compress, chunk_size=chunk_size)
+        if buffered:
+            # What the export cost when the whole file was built before responding
+            size = len(b''.join(list(chunks)))
+        else:
+            size = sum(len(chunk) for chunk in chunks)
+        return size, time.perf_counter() - started
+
+    def handle(self, *args, **options):
+        if not hasattr(os, 'fork'):
+            raise CommandError('benchmark_exports measures each export in a forked process and needs os.fork')
+
+        client = self.get_client()
+        self.create_orders(client, options['orders'])
+        queryset = Order.objects.filter(client=client)
+        count = queryset.count()
+
+        runs = [(export_format, False, False) for export_format in EXPORT_FORMATS]
+        if options['gzip']:
+            runs += [(export_format, True, False) for export_format in EXPORT_FORMATS]
+        runs.append(('csv', False, True))
+
+        self.stdout.write(f'Exporting {count} orders, chunk size {options["chunk_size"]}')
+        self.stdout.write(
+            f"{'export':<18} {'seconds':>8} {'MB out':>8} {'start RSS MB':>13} {'peak RSS MB':>12} {'growth MB':>10}"
+        )
+        try:
+            for export_format, compress, buffered in runs:
+                (size, seconds), start_rss, peak_rss = self.measure(
+                    lambda: self.export(queryset, export_format, compress, options['chunk_size'], buffered)
+                )
+                label = export_format + (' gzip' if compress else '') + (' buffered' if buffered else '')
+                self.stdout.write(
+                    f'{label:<18} {seconds:>8.2f} {size / 1048576:>8.1f} '
+                    f'{start_rss:>13.1f} {peak_rss:>12.1f} {peak_rss - start_rss:>10.1f}'
+                )
+        finally:
+            if options['delete']:
+                # Signals take each order back out of its rollup bucket
+                deleted, _ = queryset.delete()
+                self.stdout.write(f'Deleted the synthetic orders ({deleted} rows)')
+            else:
+                self.stdout.write(f'Kept the synthetic orders of {BENCHMARK_CLIENT_EMAIL}; --delete removes them')
+
+        self.stdout.write(
+            self.style.SUCCESS('"buffered" joins the whole CSV in memory first, as the export did before streaming')
+        )
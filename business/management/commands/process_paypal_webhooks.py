@@ -0,0 +1,77 @@
+# business/management/commands/process_paypal_webhooks.py
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from business.webhooks import drain_events, replay_events
+
+
+class Command(BaseCommand):
+    help = 'Apply stored PayPal webhook events in batches, retrying failures with backoff'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            dest='batch_size',
+            default=100,
+            help='Events claimed per batch (default: 100)'
+        )
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            dest='loop',
+            default=False,
+            help='Keep running and poll for new events instead of exiting once drained'
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            dest='interval',
+            default=2,
+            help='Seconds to wait between polls with --loop (default: 2)'
+        )
+        parser.add_argument(
+            '--replay',
+            nargs='*',
+            dest='replay',
+            choices=['dead', 'processed', 'pending'],
+            default=None,
+            help='Queue stored events with these statuses again before draining (default: dead)'
+        )
+        parser.add_argument(
+            '--days',
+            type=int,
+            dest='days',
+            default=None,
+            help='With --replay, only events received in the last N days'
+        )
+        parser.add_argument(
+            '--event-type',
+            action='append',
+            dest='event_types',
+            default=None,
+            help='With --replay, only events of this type (repeatable)'
+        )
+
+    def handle(self, *args, **options):
+        if options['replay'] is not None:
+            since = timezone.now() - timedelta(days=options['days']) if options['days'] else None
+            queued = replay_events(options['replay'] or ['dead'], since=since, event_types=options['event_types'])
+            self.stdout.write(self.style.SUCCESS(f'Queued {queued} event(s) for replay'))
+
+        batch_size = options['batch_size']
+        while True:
+            totals = drain_events(batch_size)
+            if totals['claimed'] or not options['loop']:
+                self.stdout.write(
+                    self.style.SUCCESS(
+                        f"Processed {totals['processed']}, retrying {totals['retried']}, "
+                        f"dead-lettered {totals['dead']} event(s)"
+                    )
+                )
+            if not options['loop']:
+                return
+            time.sleep(options['interval'])
@@ -0,0 +1,36 @@
+# business/management/commands/rebuild_order_rollups.py
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from business.analytics import rebuild_daily_order_rollups
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the DailyOrderRollup reporting table from the Order table'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days',
+            type=int,
+            dest='days',
+            default=None,
+            help='Only rebuild the last N days (default: rebuild everything)'
+        )
+
+    def handle(self, *args, **options):
+        days = options.get('days')
+        
+        if days:
+            today = timezone.localdate()
+            dates = [today - timedelta(days=offset) for offset in range(days)]
+            written = rebuild_daily_order_rollups(dates)
+            scope = f'the last {days} day(s)'
+        else:
+            written = rebuild_daily_order_rollups()
+            scope = 'all dates'
+        
+        self.stdout.write(
+            self.style.SUCCESS(f'Rebuilt {written} order rollup rows for {scope}')
+        )
@@ -0,0 +1,51 @@
+# Generated by Django 5.2.2 on 2026-10-18 15:40
+
+from django.db import migrations
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncDate
+
+
+def backfill_daily_order_rollups(apps, schema_editor):
+    """Populate DailyOrderRollup from existing orders"""
+    Order = apps.get_model('business', 'Order')
+    DailyOrderRollup = apps.get_model('business', 'DailyOrderRollup')
+    
+    rows = Order.objects.order_by().annotate(day=TruncDate('date_created')).values(
+        'day', 'client_id', 'status', 'payment_status', 'currency'
+    ).annotate(
+        order_count=Count('id'),
+        order_total=Sum('total_amount')
+    )
+    
+    DailyOrderRollup.objects.bulk_create(
+        [
+            DailyOrderRollup(
+                date=row['day'],
+                client_id=row['client_id'],
+                status=row['status'],
+                payment_status=row['payment_status'],
+                currency=row['currency'],
+                order_count=row['order_count'],
+                total_amount=row['order_total'] or 0,
+            )
+            for row in rows
+        ],
+        batch_size=1000
+    )
+
+
+def reverse_backfill(apps, schema_editor):
+    """Reverse backfill - clear rollup rows"""
+    DailyOrderRollup = apps.get_model('business', 'DailyOrderRollup')
+    DailyOrderRollup.objects.all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("business", "0018_dailyorderrollup"),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_daily_order_rollups, reverse_backfill),
+    ]
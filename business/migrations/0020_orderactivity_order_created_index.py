@@ -0,0 +1,19 @@
+# Generated by Django 5.2.2 on 2026-10-18 15:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("business", "0019_backfill_daily_order_rollups"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="orderactivity",
+            index=models.Index(
+                fields=["order", "created_at"], name="order_activ_order_i_f4e899_idx"
+            ),
+        ),
+    ]
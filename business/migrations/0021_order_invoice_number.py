@@ -0,0 +1,24 @@
+# Generated by Django 5.2.2 on 2026-10-18 16:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("business", "0020_orderactivity_order_created_index"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="order",
+            name="invoice_number",
+            field=models.CharField(
+                blank=True,
+                db_index=True,
+                default="",
+                help_text="Invoice number, allocated from the monthly invoice sequence",
+                max_length=50,
+            ),
+        ),
+    ]
@@ -0,0 +1,95 @@
+# Generated by Django 5.2.2 on 2026-10-18 16:23
+
+import django.utils.timezone
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("business", "0021_order_invoice_number"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="paypalpayment",
+            name="paypal_order_id",
+            field=models.CharField(db_index=True, max_length=255),
+        ),
+        migrations.CreateModel(
+            name="PayPalWebhookEvent",
+            fields=[
+                (
+                    "id",
+                    models.CharField(
+                        default=uuid.uuid4,
+                        editable=False,
+                        max_length=36,
+                        primary_key=True,
+                        serialize=False,
+                    ),
+                ),
+                (
+                    "event_id",
+                    models.CharField(
+                        help_text="PayPal event id; redeliveries share it",
+                        max_length=255,
+                        unique=True,
+                    ),
+                ),
+                ("event_type", models.CharField(max_length=100)),
+                (
+                    "paypal_order_id",
+                    models.CharField(blank=True, db_index=True, max_length=255),
+                ),
+                ("payload", models.JSONField(default=dict)),
+                (
+                    "event_time",
+                    models.DateTimeField(
+                        blank=True,
+                        help_text="create_time reported by PayPal",
+                        null=True,
+                    ),
+                ),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("pending", "Pending"),
+                            ("processing", "Processing"),
+                            ("processed", "Processed"),
+                            ("dead", "Dead Letter"),
+                        ],
+                        default="pending",
+                        max_length=20,
+                    ),
+                ),
+                ("attempts", models.PositiveIntegerField(default=0)),
+                ("max_attempts", models.PositiveIntegerField(default=8)),
+                (
+                    "next_attempt_at",
+                    models.DateTimeField(default=django.utils.timezone.now),
+                ),
+                ("last_error", models.TextField(blank=True)),
+                ("processed_at", models.DateTimeField(blank=True, null=True)),
+                (
+                    "date_created",
+                    models.DateTimeField(default=django.utils.timezone.now),
+                ),
+                ("date_updated", models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                "verbose_name": "PayPal Webhook Event",
+                "verbose_name_plural": "PayPal Webhook Events",
+                "db_table": "paypal_webhook_event",
+                "ordering": ["-date_created"],
+                "indexes": [
+                    models.Index(
+                        fields=["status", "next_attempt_at"],
+                        name="paypal_webh_status_7c4aab_idx",
+                    )
+                ],
+            },
+        ),
+    ]
@@ -11,6 +11,9 @@ from django.utils import timezone
 from django.conf import settings
 from django.core.exceptions import ValidationError
 
+# Local imports
+from wordknox.tracking import FieldTrackerMixin
+
 
 # ServiceRequest model for anonymous or authenticated service leads
 class ServiceRequest(models.Model):
@@ -104,12 +107,15 @@ class ServiceRequest(models.Model):
         return f"{self.service.name} request from {self.email}"
 
 
-class Order(models.Model):
+class Order(FieldTrackerMixin, models.Model):
     """
     Orders for services or products
     Links clients to their purchases
     """
     
+    # Status transitions and DailyOrderRollup buckets are detected from these
+    tracked_fields = ('status', 'payment_status', 'total_amount', 'currency', 'client', 'date_created')
+    
     STATUS_CHOICES = [
         ('pending', 'Pending'),
         ('confirmed', 'Confirmed'),
@@ -141,6 +147,15 @@ class Order(models.Model):
         help_text="Unique order tracking number for customer-facing identification"
     )
     
+    # Assigned on first invoice by generate_invoice_number (e.g., "INV-202601-0001")
+    invoice_number = models.CharField(
+        max_length=50,
+        blank=True,
+        default='',
+        db_index=True,
+        help_text="Invoice number, allocated from the monthly invoice sequence"
+    )
+    
     # Relationships
     client = models.ForeignKey(
         settings.AUTH_USER_MODEL,
@@ -535,7 +550,7 @@ class PayPalPayment(models.Model):
     PayPal specific payment details linked to a Payment record
     """
     payment = models.OneToOneField(Payment, on_delete=models.CASCADE, related_name='paypal_details')
-    paypal_order_id = models.CharField(max_length=255)
+    paypal_order_id = models.CharField(max_length=255, db_index=True)
     paypal_payer_id = models.CharField(max_length=255, blank=True, null=True)
     paypal_payer_email = models.EmailField(blank=True, null=True)
     paypal_payment_id = models.CharField(max_length=255, blank=True, null=True)
@@ -555,6 +570,51 @@ class PayPalPayment(models.Model):
         return f"PayPal: {self.paypal_order_id}"
 
 
+class PayPalWebhookEvent(models.Model):
+    """
+    Raw PayPal webhook event, stored by the webhook view and applied by the
+    process_paypal_webhooks worker (see business/webhooks.py)
+    """
+    
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('processing', 'Processing'),
+        ('processed', 'Processed'),
+        ('dead', 'Dead Letter'),
+    ]
+    
+    id = models.CharField(max_length=36, primary_key=True, default=uuid.uuid4, editable=False)
+    event_id = models.CharField(max_length=255, unique=True, help_text="PayPal event id; redeliveries share it")
+    event_type = models.CharField(max_length=100)
+    paypal_order_id = models.CharField(max_length=255, blank=True, db_index=True)
+    payload = models.JSONField(default=dict)
+    event_time = models.DateTimeField(null=True, blank=True, help_text="create_time reported by PayPal")
+    
+    # Processing state
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=8)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    processed_at = models.DateTimeField(null=True, blank=True)
+    
+    # Timestamps
+    date_created = models.DateTimeField(default=timezone.now)
+    date_updated = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        db_table = 'paypal_webhook_event'
+        verbose_name = 'PayPal Webhook Event'
+        verbose_name_plural = 'PayPal Webhook Events'
+        ordering = ['-date_created']
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at']),
+        ]
+    
+    def __str__(self):
+        return f"{self.event_type} {self.event_id} ({self.status})"
+
+
 ## AccountBalance model removed; balance tracked on accounts.User
 
 
@@ -593,6 +653,48 @@ class OrderActivity(models.Model):
         verbose_name = 'Order Activity'
         verbose_name_plural = 'Order Activities'
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['order', 'created_at']),
+        ]
     
     def __str__(self):
         return f"{self.order.id} - {self.get_activity_type_display()}"
+
+
+class DailyOrderRollup(models.Model):
+    """
+    Materialized per-day order totals used by reporting.
+    One row per (date, client, status, payment status, currency); kept current by
+    business.signals and rebuildable with `manage.py rebuild_order_rollups`.
+    """
+    id = models.CharField(max_length=36, primary_key=True, default=uuid.uuid4, editable=False)
+    date = models.DateField()
+    client = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='order_rollups'
+    )
+    status = models.CharField(max_length=20, choices=Order.STATUS_CHOICES)
+    payment_status = models.CharField(max_length=20, choices=Order.PAYMENT_STATUS_CHOICES)
+    currency = models.CharField(max_length=10)
+    order_count = models.IntegerField(default=0)
+    total_amount = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    
+    class Meta:
+        db_table = 'daily_order_rollup'
+        verbose_name = 'Daily Order Rollup'
+        verbose_name_plural = 'Daily Order Rollups'
+        ordering = ['-date']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['date', 'client', 'status', 'payment_status', 'currency'],
+                name='unique_daily_order_rollup'
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['date']),
+            models.Index(fields=['client', 'date']),
+        ]
+    
+    def __str__(self):
+        return f"{self.date} {self.status}/{self.payment_status} {self.currency}: {self.order_count}"
@@ -4,13 +4,23 @@ PayPal API utilities for handling PayPal integration
 import requests
 import json
 import logging
+import threading
+import time
+import uuid
+from collections import defaultdict
 from datetime import datetime
 from typing import Dict, Any, Optional, Union
 
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
 from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
 from django.utils import timezone
 
 from django.contrib.auth import get_user_model
+from accounts import balances
 from .models import Payment, PayPalPayment, Order
 from django.contrib.auth import get_user_model
 User = get_user_model()
@@ -22,84 +32,172 @@ logger = logging.getLogger(__name__)
 class PayPalClient:
     """
     Client for PayPal API operations
+    
+    Use get_paypal_client() rather than creating instances: the shared client keeps
+    one keep-alive connection pool and one OAuth token for the whole process.
+    - The access token is refreshed PAYPAL_TOKEN_REFRESH_MARGIN seconds before it
+      expires. Only one thread fetches a new token; the others keep using the
+      current one while it is still valid, or wait for the refresh if it is not.
+    - 429 and 5xx responses and connection errors are retried with exponential
+      backoff (honouring Retry-After). POSTs carry a PayPal-Request-Id header that
+      stays the same across retries, so PayPal never executes a retried call twice.
+    - metrics() returns call counts, errors and latency per operation.
     """
+    
+    RETRY_STATUSES = (429, 500, 502, 503, 504)
+    
     def __init__(self):
         self.client_id = settings.PAYPAL_CLIENT_ID
         self.client_secret = settings.PAYPAL_CLIENT_SECRET
         self.base_url = settings.PAYPAL_API_URL
         self.mode = settings.PAYPAL_MODE
+        self.timeout = (
+            getattr(settings, 'PAYPAL_CONNECT_TIMEOUT', 5),
+            getattr(settings, 'PAYPAL_READ_TIMEOUT', 30),
+        )
+        self.refresh_margin = getattr(settings, 'PAYPAL_TOKEN_REFRESH_MARGIN', 300)
         self.access_token = None
-        self.token_expires_at = None
+        self.token_expires_at = None  # time.monotonic() deadline
+        self._token_lock = threading.Lock()
+        self._metrics = defaultdict(lambda: {'calls': 0, 'errors': 0, 'total_ms': 0.0, 'max_ms': 0.0})
+        self._metrics_lock = threading.Lock()
+        self.session = self._build_session()
+    
+    def _build_session(self) -> requests.Session:
+        retry = Retry(
+            total=getattr(settings, 'PAYPAL_MAX_RETRIES', 3),
+            backoff_factor=getattr(settings, 'PAYPAL_RETRY_BACKOFF', 0.5),
+            status_forcelist=self.RETRY_STATUSES,
+            allowed_methods=frozenset(['GET', 'POST', 'PATCH']),
+            raise_on_status=False,
+        )
+        pool_size = getattr(settings, 'PAYPAL_POOL_SIZE', 10)
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=retry)
+        session = requests.Session()
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        session.headers.update({"Accept": "application/json", "Accept-Language": "en_US"})
+        return session
+    
+    def _send(self, operation: str, method: str, url: str, **kwargs) -> requests.Response:
+        """Send one request through the pool and record its latency"""
+        started = time.perf_counter()
+        failed = True
+        try:
+            response = self.session.request(method, url, timeout=self.timeout, **kwargs)
+            failed = response.status_code >= 400
+            return response
+        finally:
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            with self._metrics_lock:
+                stats = self._metrics[operation]
+                stats['calls'] += 1
+                stats['errors'] += failed
+                stats['total_ms'] += elapsed_ms
+                stats['max_ms'] = max(stats['max_ms'], elapsed_ms)
+            logger.debug(f"PayPal {operation} took {elapsed_ms:.1f} ms")
+    
+    def metrics(self) -> Dict[str, Dict[str, float]]:
+        """Per-operation call count, error count and average/max latency in milliseconds"""
+        with self._metrics_lock:
+            return {
+                operation: {
+                    'calls': stats['calls'],
+                    'errors': stats['errors'],
+                    'avg_ms': round(stats['total_ms'] / stats['calls'], 2) if stats['calls'] else 0.0,
+                    'max_ms': round(stats['max_ms'], 2),
+                }
+                for operation, stats in self._metrics.items()
+            }
+    
+    def _token_is_fresh(self) -> bool:
+        return bool(self.access_token) and time.monotonic() < self.token_expires_at - self.refresh_margin
     
     def _get_access_token(self) -> str:
         """
         Get an access token for API requests
         """
-        if self.access_token and self.token_expires_at and self.token_expires_at > timezone.now():
+        if self._token_is_fresh():
             return self.access_token
         
+        still_valid = bool(self.access_token) and time.monotonic() < self.token_expires_at
+        # While the current token still works, callers that lose the race for the
+        # refresh carry on with it instead of waiting
+        if not self._token_lock.acquire(blocking=not still_valid):
+            return self.access_token
+        try:
+            if not self._token_is_fresh():
+                self._fetch_access_token()
+            return self.access_token
+        finally:
+            self._token_lock.release()
+    
+    def _fetch_access_token(self):
         auth_url = f"{self.base_url}/v1/oauth2/token"
-        headers = {
-            "Accept": "application/json",
-            "Accept-Language": "en_US"
-        }
         data = {
             "grant_type": "client_credentials"
         }
         
         try:
-            response = requests.post(
-                auth_url, 
+            response = self._send(
+                'oauth_token', 'post', auth_url,
                 auth=(self.client_id, self.client_secret),
-                headers=headers,
                 data=data
             )
             response.raise_for_status()
             
             token_data = response.json()
+            self.token_expires_at = time.monotonic() + int(token_data['expires_in'])
             self.access_token = token_data['access_token']
-            # Calculate expiry time (subtract 5 minutes for safety)
-            expires_in_seconds = int(token_data['expires_in']) - 300
-            self.token_expires_at = timezone.now() + timezone.timedelta(seconds=expires_in_seconds)
-            
-            return self.access_token
         except Exception as e:
             logger.error(f"Failed to get PayPal access token: {str(e)}")
-            if hasattr(e, 'response') and e.response:
+            if hasattr(e, 'response') and e.response is not None:
                 logger.error(f"Response: {e.response.text}")
             raise
     
-    def _make_request(self, method: str, endpoint: str, data: Optional[Dict] = None, params: Optional[Dict] = None) -> Dict:
+    def _invalidate_token(self, token: str):
+        with self._token_lock:
+            if self.access_token == token:
+                self.access_token = None
+    
+    def _make_request(self, method: str, endpoint: str, data: Optional[Dict] = None, params: Optional[Dict] = None,
+                      operation: Optional[str] = None) -> Dict:
         """
         Make an authenticated API request to PayPal
         """
+        method = method.lower()
+        if method not in ('get', 'post', 'patch'):
+            raise ValueError(f"Unsupported HTTP method: {method}")
+        
         url = f"{self.base_url}/{endpoint}"
-        headers = {
-            "Content-Type": "application/json",
-            "Authorization": f"Bearer {self._get_access_token()}"
-        }
+        headers = {"Content-Type": "application/json"}
+        if method != 'get':
+            headers["PayPal-Request-Id"] = str(uuid.uuid4())
+        body = json.dumps(data) if data else None
         
         try:
-            if method.lower() == 'get':
-                response = requests.get(url, headers=headers, params=params)
-            elif method.lower() == 'post':
-                response = requests.post(url, headers=headers, data=json.dumps(data) if data else None)
-            elif method.lower() == 'patch':
-                response = requests.patch(url, headers=headers, data=json.dumps(data) if data else None)
-            else:
-                raise ValueError(f"Unsupported HTTP method: {method}")
+            for attempt in range(2):
+                token = self._get_access_token()
+                headers["Authorization"] = f"Bearer {token}"
+                response = self._send(
+                    operation or endpoint, method, url, headers=headers, params=params, data=body
+                )
+                # A token revoked before its expiry is refreshed once
+                if response.status_code != 401 or attempt:
+                    break
+                self._invalidate_token(token)
             
             response.raise_for_status()
             return response.json() if response.content else {}
         
         except Exception as e:
             logger.error(f"PayPal API error: {str(e)}")
-            if hasattr(e, 'response') and e.response:
+            if hasattr(e, 'response') and e.response is not None:
                 logger.error(f"Response: {e.response.text}")
                 try:
                     return e.response.json()
-                except:
-                    return {"error": str(e), "details": e.response.text if hasattr(e, 'response') else "No response details"}
+                except ValueError:
+                    return {"error": str(e), "details": e.response.text}
             raise
     
     def create_order(self, amount: float, currency: str = 'USD', reference_id: str = None, description: str = None) -> Dict:
@@ -126,19 +224,19 @@ class PayPalClient:
         if reference_id:
             order_data["purchase_units"][0]["reference_id"] = reference_id
         
-        return self._make_request('post', 'v2/checkout/orders', order_data)
+        return self._make_request('post', 'v2/checkout/orders', order_data, operation='create_order')
     
     def capture_order(self, order_id: str) -> Dict:
         """
         Capture an approved PayPal order
         """
-        return self._make_request('post', f"v2/checkout/orders/{order_id}/capture")
+        return self._make_request('post', f"v2/checkout/orders/{order_id}/capture", operation='capture_order')
     
     def get_order_details(self, order_id: str) -> Dict:
         """
         Get details of a PayPal order
         """
-        return self._make_request('get', f"v2/checkout/orders/{order_id}")
+        return self._make_request('get', f"v2/checkout/orders/{order_id}", operation='get_order')
 
     def verify_webhook_signature(self, headers: Dict[str, str], body: str) -> bool:
         """
@@ -155,19 +253,47 @@ class PayPalClient:
         }
         
         try:
-            response = self._make_request('post', 'v1/notifications/verify-webhook-signature', verification_data)
+            response = self._make_request(
+                'post', 'v1/notifications/verify-webhook-signature', verification_data,
+                operation='verify_webhook_signature'
+            )
             return response.get('verification_status') == 'SUCCESS'
         except Exception as e:
             logger.error(f"Webhook verification error: {str(e)}")
             return False
 
 
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_paypal_client() -> PayPalClient:
+    """Return the process-wide PayPal client"""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = PayPalClient()
+    return _client
+
+
+@receiver(setting_changed)
+def reset_paypal_client(setting, **kwargs):
+    """Rebuild the shared client when PayPal settings change (tests)"""
+    global _client
+    if setting.startswith('PAYPAL_'):
+        with _client_lock:
+            if _client is not None:
+                _client.session.close()
+            _client = None
+
+
 def create_paypal_order(order: Order, amount: float) -> Optional[Dict]:
     """
     Create a PayPal order for a system order
     """
     try:
-        client = PayPalClient()
+        client = get_paypal_client()
         paypal_response = client.create_order(
             amount=amount,
             currency=order.currency or 'USD',
@@ -213,7 +339,7 @@ def create_paypal_order_for_balance(user, amount: float, description: str = 'Acc
     Create a PayPal order for a direct account balance deposit
     """
     try:
-        client = PayPalClient()
+        client = get_paypal_client()
         paypal_response = client.create_order(
             amount=amount,
             currency='USD',  # Default to USD for balance deposits
@@ -256,6 +382,21 @@ def create_paypal_order_for_balance(user, amount: float, description: str = 'Acc
         return None
 
 
+def _credit_deposit(user, payment, paypal_order_id):
+    """
+    Credit a captured PayPal payment to the user's balance once.
+    The capture response and the PAYMENT.CAPTURE.COMPLETED webhook both report the
+    same capture, so the PayPal order id is the idempotency key.
+    """
+    return balances.deposit(
+        user, payment.amount,
+        kind='paypal_deposit',
+        currency=payment.currency or 'USD',
+        description=f'PayPal order {paypal_order_id}',
+        idempotency_key=f'paypal:{paypal_order_id}',
+    )
+
+
 def capture_paypal_payment(paypal_order_id: str, update_balance: bool = False) -> Optional[Dict]:
     """
     Capture an approved PayPal payment
@@ -270,7 +411,7 @@ def capture_paypal_payment(paypal_order_id: str, update_balance: bool = False) -
             return None
         
         # Capture the payment via PayPal API
-        client = PayPalClient()
+        client = get_paypal_client()
         capture_response = client.capture_order(paypal_order_id)
         
         if not capture_response:
@@ -311,12 +452,8 @@ def capture_paypal_payment(paypal_order_id: str, update_balance: bool = False) -
             if update_balance or paypal_payment.is_balance_deposit:
                 user = payment.user or (payment.order.client if payment.order else None)
                 if user:
-                    # Update user's denormalized account_balance
                     try:
-                        user.account_balance = (user.account_balance or 0) + float(payment.amount)
-                        if not user.currency:
-                            user.currency = payment.currency or 'USD'
-                        user.save(update_fields=['account_balance', 'currency', 'date_updated'])
+                        _credit_deposit(user, payment, paypal_order_id)
                         updated_user_record = user
                     except Exception as e:
                         logger.error(f"Failed to update user balance: {e}")
@@ -365,81 +502,3 @@ def capture_paypal_payment(paypal_order_id: str, update_balance: bool = False) -
     except Exception as e:
         logger.error(f"Failed to capture PayPal payment: {str(e)}")
         return None
-
-
-def handle_paypal_webhook(event_type: str, event_data: Dict) -> bool:
-    """
-    Handle PayPal webhook events
-    """
-    logger.info(f"Processing PayPal webhook: {event_type}")
-    
-    try:
-        resource = event_data.get('resource', {})
-        resource_id = resource.get('id')
-        
-        if not resource_id:
-            logger.warning("No resource ID in webhook payload")
-            return False
-        
-        # Handle payment capture completed
-        if event_type == 'PAYMENT.CAPTURE.COMPLETED':
-            # Find the related payment record
-            order_id = None
-            links = resource.get('links', [])
-            for link in links:
-                if link.get('rel') == 'up':
-                    parts = link.get('href', '').split('/')
-                    if len(parts) > 0:
-                        order_id = parts[-1]
-            
-            if order_id:
-                try:
-                    paypal_payment = PayPalPayment.objects.get(paypal_order_id=order_id)
-                    payment = paypal_payment.payment
-                    
-                    # Update payment status
-                    payment.status = 'completed'
-                    payment.save()
-                    
-                    # Update PayPal payment details
-                    paypal_payment.paypal_payment_id = resource_id
-                    paypal_payment.paypal_status = 'COMPLETED'
-                    paypal_payment.paypal_update_time = timezone.now()
-                    paypal_payment.save()
-                    
-                    # Update order status if available
-                    if payment.order:
-                        payment.order.payment_status = 'paid'
-                        payment.order.save()
-                        
-                    # Update account balance if it's a balance deposit
-                    if paypal_payment.is_balance_deposit and payment.user:
-                        try:
-                            u = payment.user
-                            u.account_balance = (u.account_balance or 0) + float(payment.amount)
-                            if not u.currency:
-                                u.currency = payment.currency or 'USD'
-                            u.save(update_fields=['account_balance', 'currency', 'date_updated'])
-                        except Exception as e:
-                            logger.error(f"Failed to update user balance in webhook: {e}")
-                    
-                    return True
-                
-                except PayPalPayment.DoesNotExist:
-                    logger.error(f"No PayPal payment found for order ID: {order_id}")
-                    return False
-            
-            else:
-                logger.warning("Could not determine order ID from webhook payload")
-                return False
-        
-        # Handle payment capture denied or reversed
-        elif event_type in ['PAYMENT.CAPTURE.DENIED', 'PAYMENT.CAPTURE.REVERSED']:
-            # Logic for failed or reversed payments
-            pass
-        
-        return True
-    
-    except Exception as e:
-        logger.error(f"Failed to process PayPal webhook: {str(e)}")
-        return False
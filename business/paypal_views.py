@@ -7,7 +7,6 @@ from typing import Dict, Any
 
 from django.http import HttpRequest, HttpResponse
 from django.views.decorators.csrf import csrf_exempt
-from django.utils.decorators import method_decorator
 from django.conf import settings
 
 from rest_framework import status
@@ -20,12 +19,12 @@ from rest_framework import mixins
 from .models import Order, Payment, PayPalPayment
 from .serializers import PaymentSerializer, PayPalPaymentSerializer
 from .paypal import (
-    PayPalClient,
+    get_paypal_client,
     create_paypal_order,
     capture_paypal_payment,
-    handle_paypal_webhook,
     create_paypal_order_for_balance,
 )
+from .webhooks import record_event
 
 logger = logging.getLogger(__name__)
 
@@ -230,10 +229,10 @@ class PayPalViewSet(mixins.ListModelMixin,
             )
 
 
-@method_decorator(csrf_exempt, name='dispatch')
+@csrf_exempt
 def paypal_webhook(request):
     """
-    Handle PayPal webhook notifications
+    Receive PayPal webhook notifications (processed asynchronously, see business/webhooks.py)
     """
     if request.method != 'POST':
         return HttpResponse(status=405)
@@ -241,10 +240,9 @@ def paypal_webhook(request):
     try:
         # Get the webhook payload
         payload = json.loads(request.body.decode('utf-8'))
-        event_type = payload.get('event_type')
         
         # Verify webhook signature
-        client = PayPalClient()
+        client = get_paypal_client()
         headers = {
             'PAYPAL-AUTH-ALGO': request.headers.get('PAYPAL-AUTH-ALGO', ''),
             'PAYPAL-CERT-URL': request.headers.get('PAYPAL-CERT-URL', ''),
@@ -262,12 +260,16 @@ def paypal_webhook(request):
             logger.warning("Invalid PayPal webhook signature")
             return HttpResponse(status=400)
         
-        # Process the webhook
-        if handle_paypal_webhook(event_type, payload):
-            return HttpResponse(status=200)
-        else:
-            logger.warning(f"Failed to process PayPal webhook: {event_type}")
-            return HttpResponse(status=500)
+        # Store the event for the process_paypal_webhooks worker and answer right away;
+        # PayPal redelivers an event until it gets a 2xx
+        try:
+            event, created = record_event(payload)
+        except ValueError:
+            logger.warning("PayPal webhook without an event id")
+            return HttpResponse(status=400)
+        if not created:
+            logger.info(f"Ignoring redelivered PayPal webhook {event.event_id}")
+        return HttpResponse(status=200)
     
     except Exception as e:
         logger.error(f"Error processing PayPal webhook: {str(e)}")
@@ -1,7 +1,9 @@
 # business/signals.py
-from django.db.models.signals import post_save, pre_save
+from django.db import transaction
+from django.db.models.signals import post_save, pre_save, post_delete
 from django.dispatch import receiver
 from .models import Order, OrderActivity, Payment
+from .analytics import order_rollup_key, apply_order_rollup_delta
 from notifications.models import Conversation, Message
 
 
@@ -35,21 +37,58 @@ def create_order_conversation(sender, instance, created, **kwargs):
         )
 
 
+# Order columns read by order_rollup_key() and the rollup amounts
+ROLLUP_FIELDS = frozenset(['date_created', 'client_id', 'status', 'payment_status', 'currency', 'total_amount'])
+
+
 @receiver(pre_save, sender=Order)
-def track_order_status_changes(sender, instance, **kwargs):
-    """Track order status changes in timeline"""
-    if instance.pk:
-        try:
-            old_order = Order.objects.get(pk=instance.pk)
-            if old_order.status != instance.status:
-                OrderActivity.objects.create(
-                    order=instance,
-                    activity_type='status_change',
-                    description=f'Order status changed from {old_order.status} to {instance.status}',
-                    created_by=None  # System change
-                )
-        except Order.DoesNotExist:
-            pass
+def track_order_status_changes(sender, instance, raw=False, **kwargs):
+    """Track order status changes in timeline and remember the rollup bucket being left"""
+    instance._previous_rollup = None
+    if raw or instance._state.adding:
+        return
+    # The tracker knows the loaded values; only instances that were never loaded
+    # (or loaded with deferred fields) need the row read back
+    previous = instance.as_loaded() or Order.objects.filter(pk=instance.pk).first()
+    if previous is None:
+        return
+
+    instance._previous_rollup = (order_rollup_key(previous), previous.total_amount)
+    if previous.status != instance.status:
+        OrderActivity.objects.create(
+            order=instance,
+            activity_type='status_change',
+            description=f'Order status changed from {previous.status} to {instance.status}',
+            created_by=None  # System change
+        )
+
+
+@receiver(post_save, sender=Order)
+def update_daily_order_rollup(sender, instance, raw=False, **kwargs):
+    """Move the order between DailyOrderRollup buckets when its reporting fields change"""
+    if raw:
+        return
+
+    previous = getattr(instance, '_previous_rollup', None)
+    source = instance
+    if ROLLUP_FIELDS & instance.get_deferred_fields():
+        # Read the saved row once instead of fetching each deferred field separately
+        source = Order.objects.get(pk=instance.pk)
+    current = (order_rollup_key(source), source.total_amount)
+    if previous == current:
+        return
+
+    with transaction.atomic():
+        if previous:
+            apply_order_rollup_delta(previous[0], -1, -previous[1], create=False)
+        apply_order_rollup_delta(current[0], 1, current[1])
+    instance._previous_rollup = current
+
+
+@receiver(post_delete, sender=Order)
+def remove_order_from_rollup(sender, instance, **kwargs):
+    """Take a deleted order out of its DailyOrderRollup bucket"""
+    apply_order_rollup_delta(order_rollup_key(instance), -1, -instance.total_amount, create=False)
 
 
 @receiver(post_save, sender=Payment)
@@ -1,3 +1,693 @@
-from django.test import TestCase
+import csv
+import gzip
+import json
+import threading
+import zipfile
+from datetime import timedelta
+from decimal import Decimal
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from io import BytesIO, StringIO
+from unittest import mock
+from xml.etree import ElementTree
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.db.models import Q
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from .analytics import (
+    order_histogram, rebuild_daily_order_rollups, start_of_day, summarize_orders, windowed_order_totals
+)
+from .exports import ORDER_EXPORT_HEADERS, export_orders, iter_order_values
+from emails.models import EmailOutbox
+from .models import DailyOrderRollup, Order, OrderActivity, Payment, PayPalPayment, PayPalWebhookEvent
+from .paypal import get_paypal_client
+from .utils import bulk_update_order_status, generate_invoice_number, generate_order_number
+from .webhooks import drain_events, record_event, replay_events
+
+User = get_user_model()
+
+
+class OrderAnalyticsQueryCountTests(TestCase):
+    """Order statistics must cost a fixed number of queries however many orders exist"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.client_user = User.objects.create_user(email='client@example.com', password='pass', role='client')
+        cls.admin = User.objects.create_superuser(email='admin@example.com', password='pass')
+        cls.today = timezone.localdate()
+        rows = [
+            # (days ago, amount, currency, status, payment_status)
+            (0, '100.00', 'USD', 'pending', 'pending'),
+            (0, '50.00', 'USD', 'completed', 'paid'),
+            (1, '25.00', 'USD', 'cancelled', 'refunded'),
+            (3, '75.00', 'KSH', 'in_progress', 'paid'),
+            (10, '40.00', 'USD', 'completed', 'paid'),
+            (40, '10.00', 'USD', 'confirmed', 'pending'),
+        ]
+        for days_ago, amount, currency, status, payment_status in rows:
+            Order.objects.create(
+                client=cls.client_user,
+                total_amount=Decimal(amount),
+                currency=currency,
+                status=status,
+                payment_status=payment_status,
+                date_created=start_of_day(cls.today - timedelta(days=days_ago)) + timedelta(hours=12),
+            )
+
+    def test_summarize_orders(self):
+        with self.assertNumQueries(1):
+            summary = summarize_orders(Order.objects.all())
+        self.assertEqual(summary['total_orders'], 6)
+        self.assertEqual(summary['total_value'], Decimal('300.00'))
+        self.assertEqual(summary['average_order_value'], Decimal('50.00'))
+        self.assertEqual(summary['by_status']['completed'], 2)
+        self.assertEqual(summary['by_status']['refunded'], 0)
+        self.assertEqual(summary['by_payment_status']['paid'], 3)
+        self.assertEqual(summary['by_currency'], {'USD': 5, 'KSH': 1})
+        self.assertEqual(summary['currency'], 'USD')
+
+    def test_order_histogram(self):
+        start = self.today - timedelta(days=6)
+        with self.assertNumQueries(1):
+            histogram = order_histogram(Order.objects.all(), start, self.today)
+        self.assertEqual([day['date'] for day in histogram], [start + timedelta(days=i) for i in range(7)])
+        self.assertEqual(histogram[-1]['count'], 2)
+        self.assertEqual(histogram[-1]['revenue'], Decimal('150.00'))
+        self.assertEqual(histogram[-4]['count'], 1)
+        self.assertEqual(histogram[0]['revenue'], Decimal('0.00'))
+
+        with self.assertNumQueries(1):
+            months = order_histogram(Order.objects.all(), self.today - timedelta(days=60), self.today, period='month')
+        self.assertEqual(sum(month['count'] for month in months), 6)
+        self.assertTrue(all(month['date'].day == 1 for month in months))
+
+    def test_windowed_order_totals(self):
+        now = timezone.now()
+        with self.assertNumQueries(1):
+            totals = windowed_order_totals(
+                Order.objects.all(),
+                {'week': now - timedelta(days=7), 'all': start_of_day(self.today - timedelta(days=365))},
+                extra={'pending': Q(status='pending')},
+            )
+        self.assertEqual(totals['week'], {'orders': 4, 'revenue': Decimal('250.00')})
+        self.assertEqual(totals['all'], {'orders': 6, 'revenue': Decimal('300.00')})
+        self.assertEqual(totals['pending'], 1)
+
+    def test_statistics_endpoint(self):
+        client = APIClient()
+        client.force_authenticate(self.admin)
+        with self.assertNumQueries(2):
+            response = client.get('/api/v1/business/orders/statistics/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['total_orders'], 6)
+        self.assertEqual(response.data['completed_orders'], 2)
+        self.assertEqual(response.data['total_value'], 300.0)
+        self.assertEqual(response.data['recent_activity'][-1]['count'], 2)
+
+
+class DailyOrderRollupTests(TestCase):
+    """Signal-maintained rollups must match a recompute from the Order table"""
+
+    def setUp(self):
+        self.client_user = User.objects.create_user(email='client@example.com', password='pass', role='client')
+        self.other_client = User.objects.create_user(email='other@example.com', password='pass', role='client')
+        self.order = self.create_order('120.00')
+
+    def create_order(self, amount, **fields):
+        return Order.objects.create(client=self.client_user, total_amount=Decimal(amount), currency='USD', **fields)
+
+    def rollup_rows(self):
+        # Decrements may leave empty buckets behind; a rebuild does not write them
+        return sorted(
+            DailyOrderRollup.objects.exclude(order_count=0).values_list(
+                'date', 'client_id', 'status', 'payment_status', 'currency', 'order_count', 'total_amount'
+            )
+        )
+
+    def assert_matches_rebuild(self):
+        incremental = self.rollup_rows()
+        rebuild_daily_order_rollups()
+        self.assertEqual(incremental, self.rollup_rows())
+        return incremental
+
+    def test_create(self):
+        self.create_order('30.00')
+        self.create_order('5.00', status='confirmed')
+        rows = self.assert_matches_rebuild()
+        self.assertEqual([(row[2], row[5], row[6]) for row in rows], [
+            ('confirmed', 1, Decimal('5.00')), ('pending', 2, Decimal('150.00')),
+        ])
+
+    def test_status_and_payment_status_change(self):
+        self.create_order('30.00')
+        self.order.status = 'completed'
+        self.order.payment_status = 'paid'
+        self.order.save()
+        self.assert_matches_rebuild()
+
+        order = Order.objects.get(pk=self.order.pk)
+        order.status = 'refunded'
+        order.save(update_fields=['status'])
+        self.assert_matches_rebuild()
+
+    def test_amount_currency_and_client_change(self):
+        self.order.total_amount = Decimal('99.50')
+        self.order.save()
+        self.assert_matches_rebuild()
+
+        self.order.currency = 'KSH'
+        self.order.client = self.other_client
+        self.order.save()
+        self.assert_matches_rebuild()
+
+    def test_moved_to_another_day(self):
+        self.order.date_created -= timedelta(days=3)
+        self.order.save()
+        rows = self.assert_matches_rebuild()
+        self.assertEqual(rows[0][0], timezone.localtime(self.order.date_created).date())
+
+    def test_delete(self):
+        other = self.create_order('30.00')
+        self.order.delete()
+        self.assertEqual(self.assert_matches_rebuild()[0][5:], (1, Decimal('30.00')))
+        other.delete()
+        self.assertEqual(self.assert_matches_rebuild(), [])
+
+    def test_unchanged_save_leaves_rollup_alone(self):
+        self.order.notes = 'Call first'
+        self.order.save()
+        self.assertEqual(self.assert_matches_rebuild()[0][5:], (1, Decimal('120.00')))
+
+
+class OrderChangeTrackingTests(TestCase):
+    """Status changes are detected from the values the order was loaded with"""
+
+    def setUp(self):
+        self.client_user = User.objects.create_user(email='client@example.com', password='pass', role='client')
+        self.order_id = Order.objects.create(
+            client=self.client_user, total_amount=Decimal('40.00'), currency='USD'
+        ).pk
+
+    def save_capturing(self, order, **kwargs):
+        with CaptureQueriesContext(connection) as queries:
+            order.save(**kwargs)
+        return [query['sql'] for query in queries.captured_queries]
+
+    def order_reads(self, statements):
+        return [sql for sql in statements if sql.startswith('SELECT') and 'FROM "order"' in sql]
+
+    def descriptions(self):
+        return list(OrderActivity.objects.filter(
+            order_id=self.order_id, activity_type='status_change'
+        ).order_by('created_at', 'id').values_list('description', flat=True))
+
+    def assert_rollups_match(self):
+        incremental = sorted(DailyOrderRollup.objects.exclude(order_count=0).values_list(
+            'date', 'status', 'order_count', 'total_amount'
+        ))
+        rebuild_daily_order_rollups()
+        self.assertEqual(incremental, sorted(DailyOrderRollup.objects.exclude(order_count=0).values_list(
+            'date', 'status', 'order_count', 'total_amount'
+        )))
+
+    def test_loaded_order_is_not_read_back(self):
+        order = Order.objects.get(pk=self.order_id)
+        order.status = 'confirmed'
+        self.assertEqual(self.order_reads(self.save_capturing(order)), [])
+        order.status = 'in_progress'
+        self.assertEqual(self.order_reads(self.save_capturing(order, update_fields=['status'])), [])
+        self.assertEqual(self.descriptions(), [
+            'Order status changed from pending to confirmed',
+            'Order status changed from confirmed to in_progress',
+        ])
+        self.assert_rollups_match()
+
+    def test_unchanged_status_records_nothing(self):
+        order = Order.objects.get(pk=self.order_id)
+        order.notes = 'Call back on Monday'
+        self.assertEqual(self.order_reads(self.save_capturing(order)), [])
+        self.assertEqual(self.descriptions(), [])
+
+    def test_deferred_load_reads_the_row_back(self):
+        order = Order.objects.only('id', 'status').get(pk=self.order_id)
+        order.status = 'confirmed'
+        # save() reads order_number, then the signals read the row before and after the save
+        self.assertEqual(len(self.order_reads(self.save_capturing(order, update_fields=['status']))), 3)
+        self.assertEqual(self.descriptions(), ['Order status changed from pending to confirmed'])
+        self.assert_rollups_match()
+
+        order = Order.objects.defer('total_amount', 'notes').get(pk=self.order_id)
+        order.status = 'cancelled'
+        self.assertEqual(len(self.order_reads(self.save_capturing(order))), 2)
+        Order.objects.filter(pk=self.order_id).update(notes='Kept')
+        # Deferred fields are still not written by a plain save()
+        order.status = 'pending'
+        order.save()
+        self.assertEqual(Order.objects.get(pk=self.order_id).notes, 'Kept')
+        self.assertEqual(self.descriptions()[-2:], [
+            'Order status changed from confirmed to cancelled',
+            'Order status changed from cancelled to pending',
+        ])
+        self.assert_rollups_match()
+
+
+@override_settings(SEQUENCE_BLOCK_SIZES={})
+class NumberAllocationTests(TestCase):
+    """Order and invoice numbers come from sequences seeded from the numbers already in use"""
+
+    def setUp(self):
+        self.client_user = User.objects.create_user(email='client@example.com', password='pass', role='client')
+        self.today = timezone.localdate().strftime('%Y%m%d')
+
+    def create_order(self, **fields):
+        return Order.objects.create(client=self.client_user, total_amount=Decimal('10.00'), currency='USD', **fields)
+
+    def test_order_numbers_increment(self):
+        numbers = [self.create_order().order_number for _ in range(3)]
+        self.assertEqual(numbers, [f'ORD-{self.today}-{index:04d}' for index in range(1, 4)])
+        self.assertEqual(generate_order_number(), f'ORD-{self.today}-0004')
+
+    def test_order_sequence_is_seeded_from_existing_numbers(self):
+        for suffix in ['0007', '9999', '10000', '0042']:
+            self.create_order(order_number=f'ORD-{self.today}-{suffix}')
+        # Another day's numbers do not count
+        self.create_order(order_number='ORD-20000101-20000')
+        self.assertEqual(generate_order_number(), f'ORD-{self.today}-10001')
+        self.assertEqual(generate_order_number(), f'ORD-{self.today}-10002')
+
+    def test_invoice_number_is_stable(self):
+        order = self.create_order()
+        number = generate_invoice_number(order)
+        self.assertEqual(number, f'INV-{self.today[:6]}-0001')
+        with self.assertNumQueries(0):
+            self.assertEqual(generate_invoice_number(order), number)
+        reloaded = Order.objects.get(pk=order.pk)
+        self.assertEqual(reloaded.invoice_number, number)
+        self.assertEqual(generate_invoice_number(reloaded), number)
+        self.assertEqual(generate_invoice_number(self.create_order()), f'INV-{self.today[:6]}-0002')
+
+    def test_invoice_uses_the_order_month_and_existing_numbers(self):
+        placed = timezone.make_aware(timezone.datetime(2025, 3, 14, 12))
+        self.create_order(invoice_number='INV-202503-0009', date_created=placed)
+        order = self.create_order(date_created=placed)
+        self.assertEqual(generate_invoice_number(order), 'INV-202503-0010')
+
+
+# The status_update email templates are not part of this tree
+@mock.patch('business.utils.render_to_string', lambda template, context: f'{template}: {context["new_status"]}')
+class BulkOrderStatusTests(TestCase):
+    """Bulk status changes are all-or-nothing and leave the same trail as single changes"""
+
+    def setUp(self):
+        self.client_user = User.objects.create_user(email='client@example.com', password='pass', role='client')
+        self.admin = User.objects.create_superuser(email='admin@example.com', password='pass')
+        now = timezone.now()
+        self.orders = [
+            Order.objects.create(
+                client=self.client_user, total_amount=Decimal('10.00'), currency='USD',
+                notes='First note' if index % 2 else '', date_created=now - timedelta(days=index % 3)
+            )
+            for index in range(6)
+        ]
+        self.ids = [str(order.id) for order in self.orders]
+
+    def statuses(self):
+        return set(Order.objects.filter(id__in=self.ids).values_list('status', flat=True))
+
+    def status_activities(self):
+        return OrderActivity.objects.filter(order_id__in=self.ids, activity_type='status_change')
+
+    def assert_nothing_written(self, order_ids, new_status):
+        outbox = EmailOutbox.objects.count()
+        statuses = list(Order.objects.filter(id__in=self.ids).order_by('id').values_list('status', flat=True))
+        with self.captureOnCommitCallbacks(execute=True):
+            orders, errors = bulk_update_order_status(order_ids, new_status, notes='Never', user=self.admin)
+        self.assertTrue(errors)
+        self.assertEqual(
+            list(Order.objects.filter(id__in=self.ids).order_by('id').values_list('status', flat=True)), statuses
+        )
+        self.assertFalse(self.status_activities().exists())
+        self.assertFalse(Order.objects.filter(notes__contains='Never').exists())
+        self.assertEqual(EmailOutbox.objects.count(), outbox)
+        return errors
+
+    def test_missing_order_writes_nothing(self):
+        errors = self.assert_nothing_written([*self.ids, '00000000-missing'], 'confirmed')
+        self.assertEqual(errors, ['Order 00000000: not found'])
+
+    def test_invalid_transition_writes_nothing(self):
+        Order.objects.filter(id=self.ids[0]).update(status='cancelled')
+        errors = self.assert_nothing_written(self.ids, 'confirmed')
+        self.assertEqual(errors, [f'Order {self.ids[0][:8]}: Cannot transition from cancelled to confirmed'])
+        # Every invalid order is reported
+        errors = self.assert_nothing_written(self.ids[1:], 'completed')
+        self.assertEqual(len(errors), 5)
+
+    def test_activities_notes_and_rollups(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            orders, errors = bulk_update_order_status(self.ids, 'confirmed', notes='Kick-off call booked', user=self.admin)
+        self.assertEqual(errors, [])
+        self.assertEqual(len(orders), 6)
+        self.assertEqual(self.statuses(), {'confirmed'})
+
+        activities = self.status_activities()
+        self.assertEqual(activities.count(), 6)
+        self.assertEqual(
+            {(description, str(user)) for description, user in activities.values_list('description', 'created_by')},
+            {('Order status changed from pending to confirmed', str(self.admin.pk))}
+        )
+        notes = dict(Order.objects.filter(id__in=self.ids).values_list('id', 'notes'))
+        self.assertEqual(notes[self.ids[0]], 'Kick-off call booked')
+        self.assertEqual(notes[self.ids[1]], 'First note\nKick-off call booked')
+
+        incremental = sorted(DailyOrderRollup.objects.exclude(order_count=0).values_list(
+            'date', 'status', 'order_count', 'total_amount'
+        ))
+        rebuild_daily_order_rollups()
+        self.assertEqual(incremental, sorted(DailyOrderRollup.objects.exclude(order_count=0).values_list(
+            'date', 'status', 'order_count', 'total_amount'
+        )))
+        self.assertEqual({row[1] for row in incremental}, {'confirmed'})
+
+    def test_emails_are_queued_on_commit(self):
+        outbox = EmailOutbox.objects.count()
+        with self.captureOnCommitCallbacks() as callbacks:
+            bulk_update_order_status(self.ids, 'confirmed', user=self.admin)
+            self.assertEqual(EmailOutbox.objects.count(), outbox)
+        self.assertEqual(len(callbacks), 1)
+        callbacks[0]()
+        self.assertEqual(EmailOutbox.objects.count(), outbox + 6)
+
+    def test_query_count_does_not_grow_with_orders(self):
+        now = timezone.now()
+        ids = self.ids + [
+            str(Order.objects.create(
+                client=self.client_user, total_amount=Decimal('5.00'), currency='USD', date_created=now
+            ).id)
+            for _ in range(44)
+        ]
+        # Lock and load, bulk_update, bulk_create, the rollup rebuild and the outbox insert
+        with self.assertNumQueries(12), self.captureOnCommitCallbacks(execute=True):
+            orders, errors = bulk_update_order_status(ids, 'confirmed', notes='Batch', user=self.admin)
+        self.assertEqual((len(orders), errors), (50, []))
+
+
+class OrderExportTests(TestCase):
+    """Streamed exports cover every order once and produce files the usual readers parse"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser(email='admin@example.com', password='pass')
+        cls.client_user = User.objects.create_user(
+            email='client@example.com', password='pass', role='client', first_name='Ada', last_name='Lovelace'
+        )
+        tie = timezone.now().replace(microsecond=0) - timedelta(days=1)
+        for index in range(11):
+            # Most orders share one timestamp so batches must break ties on id
+            Order.objects.create(
+                client=cls.client_user,
+                total_amount=Decimal(index) + Decimal('0.50'),
+                currency='USD',
+                notes='Comma, "quote" & <tag>',
+                date_created=tie if index < 8 else tie + timedelta(minutes=index),
+            )
+        cls.order_ids = set(Order.objects.values_list('id', flat=True))
+
+    def export(self, export_format, compress=False):
+        chunks, filename, content_type = export_orders(
+            Order.objects.all(), export_format, compress=compress, chunk_size=3
+        )
+        return b''.join(chunks), filename, content_type
+
+    def test_keyset_batches_return_every_order_once(self):
+        for chunk_size in (1, 3, 8, 11, 50):
+            ids = [row['id'] for row in iter_order_values(Order.objects.all(), chunk_size=chunk_size)]
+            self.assertEqual(len(ids), len(self.order_ids), chunk_size)
+            self.assertEqual(set(ids), self.order_ids, chunk_size)
+
+    def test_keyset_batches_follow_export_order(self):
+        rows = list(iter_order_values(Order.objects.all(), chunk_size=3))
+        keys = [(row['date_created'], row['id']) for row in rows]
+        self.assertEqual(keys, sorted(keys, reverse=True))
+
+    def test_keyset_batches_respect_filters(self):
+        queryset = Order.objects.filter(total_amount__lt=Decimal('5.00'))
+        ids = [row['id'] for row in iter_order_values(queryset, chunk_size=2)]
+        self.assertEqual(sorted(ids), sorted(queryset.values_list('id', flat=True)))
+
+    def test_csv(self):
+        body, filename, content_type = self.export('csv')
+        rows = list(csv.reader(StringIO(body.decode('utf-8'))))
+        self.assertEqual(rows[0], ORDER_EXPORT_HEADERS)
+        self.assertEqual({row[0] for row in rows[1:]}, self.order_ids)
+        self.assertEqual(len(rows), 12)
+        self.assertEqual(rows[1][1], 'Ada Lovelace')
+        self.assertTrue(filename.endswith('.csv'))
+        self.assertEqual(content_type, 'text/csv')
+
+    def test_ndjson(self):
+        body, _, _ = self.export('ndjson')
+        records = [json.loads(line) for line in body.decode('utf-8').splitlines()]
+        self.assertEqual({record['Order ID'] for record in records}, self.order_ids)
+        self.assertEqual(len(records), 11)
+        self.assertEqual(set(records[0]), set(ORDER_EXPORT_HEADERS))
+
+    def test_xlsx(self):
+        body, _, _ = self.export('xlsx')
+        with zipfile.ZipFile(BytesIO(body)) as workbook:
+            self.assertIsNone(workbook.testzip())
+            self.assertIn('[Content_Types].xml', workbook.namelist())
+            sheet = ElementTree.fromstring(workbook.read('xl/worksheets/sheet1.xml'))
+        namespace = {'s': 'http://schemas.openxmlformats.org/spreadsheetml/2006/main'}
+        rows = [
+            [cell.text for cell in row.findall('s:c/s:is/s:t', namespace)]
+            for row in sheet.findall('s:sheetData/s:row', namespace)
+        ]
+        self.assertEqual(rows[0], ORDER_EXPORT_HEADERS)
+        self.assertEqual({row[0] for row in rows[1:]}, self.order_ids)
+
+    def test_gzip(self):
+        body, filename, content_type = self.export('ndjson', compress=True)
+        self.assertEqual(content_type, 'application/gzip')
+        self.assertTrue(filename.endswith('.ndjson.gz'))
+        self.assertEqual(len(gzip.decompress(body).decode('utf-8').splitlines()), 11)
+
+    def test_endpoint_streams(self):
+        api = APIClient()
+        api.force_authenticate(self.admin)
+        response = api.get('/api/v1/business/orders/export_csv/', {'export_format': 'csv'})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        self.assertIn('attachment; filename="orders_export_', response['Content-Disposition'])
+        rows = list(csv.reader(StringIO(b''.join(response.streaming_content).decode('utf-8'))))
+        self.assertEqual(len(rows), 12)
+
+        self.assertEqual(api.get('/api/v1/business/orders/export_csv/', {'export_format': 'pdf'}).status_code, 400)
+
+
+class PayPalStubHandler(BaseHTTPRequestHandler):
+    """Mimics the PayPal OAuth and checkout endpoints; failures are scripted per path"""
+
+    def log_message(self, *args):
+        pass
+
+    def _reply(self, status, payload, headers=None):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        stub = self.server.stub
+        length = int(self.headers.get('Content-Length') or 0)
+        self.rfile.read(length)
+        with stub.lock:
+            stub.requests.append((self.path, dict(self.headers)))
+            failures = stub.failures.get(self.path, [])
+            failure = failures.pop(0) if failures else None
+
+        if failure:
+            return self._reply(failure, {'name': 'STUB_FAILURE'}, {'Retry-After': '0'})
+        if self.path == '/v1/oauth2/token':
+            with stub.lock:
+                stub.tokens_issued += 1
+                token = f'token-{stub.tokens_issued}'
+            return self._reply(200, {'access_token': token, 'expires_in': stub.expires_in})
+        if self.headers.get('Authorization') in stub.revoked:
+            return self._reply(401, {'name': 'INVALID_TOKEN'})
+        if self.path == '/v2/checkout/orders':
+            return self._reply(201, {'id': 'PAYPAL-ORDER-1', 'status': 'CREATED', 'links': []})
+        if self.path.endswith('/capture'):
+            return self._reply(201, {'id': self.path.split('/')[-2], 'status': 'COMPLETED'})
+        return self._reply(404, {'name': 'RESOURCE_NOT_FOUND'})
+
+
+class PayPalStub:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.requests = []
+        self.failures = {}
+        self.revoked = set()
+        self.tokens_issued = 0
+        self.expires_in = 32400
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), PayPalStubHandler)
+        self.server.stub = self
+        self.url = f'http://127.0.0.1:{self.server.server_port}'
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def paths(self):
+        return [path for path, _ in self.requests]
+
+
+class PayPalClientTests(SimpleTestCase):
+    def setUp(self):
+        self.stub = PayPalStub()
+        self.stub.thread.start()
+        self.settings_override = override_settings(
+            PAYPAL_API_URL=self.stub.url,
+            PAYPAL_CLIENT_ID='client',
+            PAYPAL_CLIENT_SECRET='secret',
+            PAYPAL_RETRY_BACKOFF=0,
+            PAYPAL_MAX_RETRIES=2,
+        )
+        self.settings_override.enable()
+        self.client = get_paypal_client()
+
+    def tearDown(self):
+        self.settings_override.disable()
+        self.stub.server.shutdown()
+        self.stub.server.server_close()
+
+    def test_client_is_shared_and_token_fetched_once(self):
+        self.assertIs(get_paypal_client(), self.client)
+
+        def checkout():
+            self.client.create_order(10, reference_id='order-1')
+
+        threads = [threading.Thread(target=checkout) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(self.stub.tokens_issued, 1)
+        self.assertEqual(self.stub.paths().count('/v2/checkout/orders'), 8)
+        metrics = self.client.metrics()
+        self.assertEqual(metrics['oauth_token']['calls'], 1)
+        self.assertEqual(metrics['create_order']['calls'], 8)
+        self.assertGreater(metrics['create_order']['avg_ms'], 0)
+
+    def test_token_refreshed_ahead_of_expiry(self):
+        self.stub.expires_in = 200  # inside the default 300 second refresh margin
+        self.client.create_order(10)
+        self.client.create_order(10)
+        self.assertEqual(self.stub.tokens_issued, 2)
+
+    def test_server_errors_are_retried_with_same_request_id(self):
+        self.stub.failures['/v2/checkout/orders'] = [503, 429]
+        response = self.client.create_order(10)
+
+        self.assertEqual(response['id'], 'PAYPAL-ORDER-1')
+        attempts = [headers for path, headers in self.stub.requests if path == '/v2/checkout/orders']
+        self.assertEqual(len(attempts), 3)
+        self.assertEqual(len({headers['PayPal-Request-Id'] for headers in attempts}), 1)
+
+    def test_exhausted_retries_return_error_body(self):
+        self.stub.failures['/v2/checkout/orders/ABC/capture'] = [500, 500, 500]
+        with self.assertLogs('business.paypal', level='ERROR'):
+            response = self.client.capture_order('ABC')
+        self.assertEqual(response, {'name': 'STUB_FAILURE'})
+        self.assertEqual(self.client.metrics()['capture_order']['errors'], 1)
+
+    def test_revoked_token_is_replaced_once(self):
+        self.client.create_order(10)
+        self.stub.revoked.add('Bearer token-1')
+        response = self.client.capture_order('ABC')
+        self.assertEqual(response['status'], 'COMPLETED')
+        self.assertEqual(self.stub.tokens_issued, 2)
+
+
+class PayPalWebhookPipelineTests(TestCase):
+    url = '/api/v1/business/paypal/webhook/'
+
+    def setUp(self):
+        self.user = User.objects.create_user(email='payer@example.com', password='pass', role='client')
+        self.payment = Payment.objects.create(
+            user=self.user, amount=Decimal('20.00'), currency='USD', method='paypal', transaction_id='PP-1'
+        )
+        self.paypal_payment = PayPalPayment.objects.create(
+            payment=self.payment, paypal_order_id='PP-1', is_balance_deposit=True
+        )
+
+    def event(self, event_id, event_type, order_id='PP-1', create_time='2026-01-01T10:00:00Z'):
+        return {
+            'id': event_id,
+            'event_type': event_type,
+            'create_time': create_time,
+            'resource': {
+                'id': f'CAPTURE-{order_id}',
+                'supplementary_data': {'related_ids': {'order_id': order_id}},
+            },
+        }
+
+    def post(self, payload):
+        return self.client.post(self.url, json.dumps(payload), content_type='application/json')
+
+    def test_webhook_is_stored_once_and_processed_by_the_worker(self):
+        payload = self.event('WH-1', 'PAYMENT.CAPTURE.COMPLETED')
+        self.assertEqual(self.post(payload).status_code, 200)
+        self.assertEqual(self.post(payload).status_code, 200)
+        self.assertEqual(PayPalWebhookEvent.objects.count(), 1)
+        self.payment.refresh_from_db()
+        self.assertEqual(self.payment.status, 'pending')
+
+        call_command('process_paypal_webhooks', stdout=StringIO())
+        self.payment.refresh_from_db()
+        self.user.refresh_from_db()
+        self.assertEqual(self.payment.status, 'completed')
+        self.assertEqual(self.user.account_balance, Decimal('20.00'))
+        self.assertEqual(PayPalWebhookEvent.objects.get().status, 'processed')
+
+    def test_replayed_event_does_not_credit_twice(self):
+        record_event(self.event('WH-1', 'PAYMENT.CAPTURE.COMPLETED'))
+        drain_events()
+        self.assertEqual(replay_events(statuses=['processed']), 1)
+        drain_events()
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.account_balance, Decimal('20.00'))
+
+    def test_late_completed_event_does_not_undo_refund(self):
+        record_event(self.event('WH-2', 'PAYMENT.CAPTURE.REFUNDED', create_time='2026-01-02T10:00:00Z'))
+        with self.assertLogs('business.webhooks', level='WARNING'):
+            drain_events()
+        record_event(self.event('WH-1', 'PAYMENT.CAPTURE.COMPLETED'))
+        drain_events()
+
+        self.paypal_payment.refresh_from_db()
+        self.payment.refresh_from_db()
+        self.user.refresh_from_db()
+        self.assertEqual(self.paypal_payment.paypal_status, 'REFUNDED')
+        self.assertEqual(self.payment.status, 'refunded')
+        self.assertEqual(self.user.account_balance, Decimal('0.00'))
+
+    def test_event_for_unknown_order_is_retried(self):
+        record_event(self.event('WH-3', 'PAYMENT.CAPTURE.COMPLETED', order_id='PP-2'))
+        with self.assertLogs('business.webhooks', level='WARNING'):
+            stats = drain_events()
+        self.assertEqual(stats['retried'], 1)
+
+        payment = Payment.objects.create(user=self.user, amount=Decimal('5.00'), method='paypal', transaction_id='PP-2')
+        PayPalPayment.objects.create(payment=payment, paypal_order_id='PP-2', is_balance_deposit=True)
+        PayPalWebhookEvent.objects.update(next_attempt_at=timezone.now())
+        self.assertEqual(drain_events()['processed'], 1)
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.account_balance, Decimal('5.00'))
@@ -18,6 +18,7 @@ router.register(r'paypal', PayPalViewSet, basename='paypal')
 router.register(r'payments', PaymentViewSet, basename='payment')
 
 urlpatterns = [
-    path('', include(router.urls)),
+    # Before the router, whose paypal/<pk>/ route would otherwise swallow it
     path('paypal/webhook/', paypal_webhook, name='paypal_webhook'),
+    path('', include(router.urls)),
 ]
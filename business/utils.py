@@ -3,29 +3,47 @@ import uuid
 import re
 from decimal import Decimal
 from datetime import datetime, timedelta
-from django.core.mail import send_mail
+from emails.outbox import enqueue_email, enqueue_emails
 from django.template.loader import render_to_string
 from django.conf import settings
-from django.db.models import Sum, Count, Avg, Q
+from django.db import transaction
+from django.db.models import Sum, Count, Avg, Q, Min, Max
+from django.db.models.functions import Length
 from django.utils import timezone
 from django.core.cache import cache
 
-from .models import Order, Payment, Notification, Testimonial
+from core.sequences import next_value
+from .models import Order, OrderActivity, Payment, Notification, Testimonial
+from .analytics import (
+    order_rollups, summarize_rollups, rollup_histogram, windowed_order_totals, start_of_day,
+    rebuild_daily_order_rollups
+)
 from django.template.loader import render_to_string
 
 
+def _last_used_number(prefix, field='order_number'):
+    """
+    Highest sequence suffix among `field` values starting with `prefix` (index range scan).
+    Longer suffixes sort first, since '-9999' > '-10000' as strings.
+    """
+    last = Order.objects.filter(**{f'{field}__startswith': prefix}).order_by(
+        Length(field).desc(), f'-{field}'
+    ).values_list(field, flat=True).first()
+    try:
+        return int(last[len(prefix):]) if last else 0
+    except ValueError:
+        return 0
+
+
 def generate_order_number():
     """
     Generate a unique order number with format: ORD-YYYYMMDD-XXXX
+    Numbers come from a per-day sequence, so concurrent checkouts never share one
     """
-    today = datetime.now().strftime('%Y%m%d')
-    # Get count of orders created today
-    today_orders = Order.objects.filter(
-        date_created__date=timezone.now().date()
-    ).count()
-    
-    order_sequence = str(today_orders + 1).zfill(4)
-    return f"ORD-{today}-{order_sequence}"
+    today = timezone.localdate().strftime('%Y%m%d')
+    prefix = f"ORD-{today}-"
+    order_sequence = next_value(f'order:{today}', initial=lambda: _last_used_number(prefix))
+    return f"{prefix}{str(order_sequence).zfill(4)}"
 
 
 def calculate_order_total(order_data):
@@ -293,13 +311,11 @@ def send_order_confirmation_email(order):
         html_message = render_to_string('emails/order_confirmation.html', context)
         plain_message = render_to_string('emails/order_confirmation.txt', context)
         
-        send_mail(
+        enqueue_email(
             subject=subject,
-            message=plain_message,
-            from_email=settings.DEFAULT_FROM_EMAIL,
-            recipient_list=[order.client.email],
-            html_message=html_message,
-            fail_silently=False,
+            body=plain_message,
+            recipients=[order.client.email],
+            html_body=html_message,
         )
         
         return True
@@ -418,27 +434,20 @@ def get_order_stats(date_from=None, date_to=None):
         queryset = queryset.filter(date_created__date__gte=date_from)
     if date_to:
         queryset = queryset.filter(date_created__date__lte=date_to)
+    rollups = order_rollups(date_from=date_from, date_to=date_to)
     
-    # Basic stats
+    # Basic and revenue stats from the daily rollup table
+    summary = summarize_rollups(rollups)
     stats = {
-        'total_orders': queryset.count(),
-        'pending_orders': queryset.filter(status='pending').count(),
-        'confirmed_orders': queryset.filter(status='confirmed').count(),
-        'completed_orders': queryset.filter(status='completed').count(),
-        'cancelled_orders': queryset.filter(status='cancelled').count(),
+        'total_orders': summary['total_orders'],
+        'pending_orders': summary['by_status']['pending'],
+        'confirmed_orders': summary['by_status']['confirmed'],
+        'completed_orders': summary['by_status']['completed'],
+        'cancelled_orders': summary['by_status']['cancelled'],
+        'total_revenue': summary['total_value'],
+        'average_order_value': summary['average_order_value'],
     }
     
-    # Revenue stats
-    revenue_data = queryset.aggregate(
-        total_revenue=Sum('total_amount'),
-        average_order_value=Avg('total_amount')
-    )
-    
-    stats.update({
-        'total_revenue': revenue_data['total_revenue'] or Decimal('0.00'),
-        'average_order_value': revenue_data['average_order_value'] or Decimal('0.00'),
-    })
-    
     # Top services
     top_services = queryset.filter(service__isnull=False).values(
         'service__name'
@@ -450,16 +459,12 @@ def get_order_stats(date_from=None, date_to=None):
     stats['top_services'] = list(top_services)
     
     # Monthly revenue for the last 12 months
-    monthly_revenue = {}
-    for i in range(12):
-        month_date = timezone.now().replace(day=1) - timedelta(days=30*i)
-        month_orders = queryset.filter(
-            date_created__year=month_date.year,
-            date_created__month=month_date.month
-        ).aggregate(total=Sum('total_amount'))
-        
-        month_key = month_date.strftime('%Y-%m')
-        monthly_revenue[month_key] = monthly_revenue['total'] or Decimal('0.00')
+    today = timezone.localdate()
+    first_month = (today.replace(day=1) - timedelta(days=330)).replace(day=1)
+    monthly_revenue = {
+        month['date'].strftime('%Y-%m'): month['revenue']
+        for month in rollup_histogram(rollups, first_month, today, period='month')
+    }
     
     stats['monthly_revenue'] = monthly_revenue
     
@@ -512,19 +517,21 @@ def sanitize_input(text, max_length=None, allow_html=False):
 
 def generate_invoice_number(order):
     """
-    Generate invoice number for an order
+    Return the invoice number of an order, allocating one from the monthly sequence
+    on first use: INV-YYYYMM-XXXX
     """
-    year = order.date_created.year
-    month = order.date_created.month
-    
-    # Count invoices for the month
-    monthly_count = Order.objects.filter(
-        date_created__year=year,
-        date_created__month=month,
-        id__lte=order.id
-    ).count()
+    if order.invoice_number:
+        return order.invoice_number
     
-    return f"INV-{year}{month:02d}-{monthly_count:04d}"
+    # Numbered in the month the order was placed, as before invoice numbers were stored
+    month = timezone.localtime(order.date_created).strftime('%Y%m')
+    prefix = f"INV-{month}-"
+    invoice_sequence = next_value(
+        f'invoice:{month}', initial=lambda: _last_used_number(prefix, field='invoice_number')
+    )
+    order.invoice_number = f"{prefix}{invoice_sequence:04d}"
+    order.save(update_fields=['invoice_number'])
+    return order.invoice_number
 
 
 def calculate_service_rating(service):
@@ -645,26 +652,20 @@ def generate_order_summary_report(start_date, end_date):
     orders = Order.objects.filter(
         date_created__date__range=[start_date, end_date]
     )
+    rollups = order_rollups(date_from=start_date, date_to=end_date)
     
-    # Basic metrics
-    total_orders = orders.count()
-    total_revenue = orders.aggregate(Sum('total_amount'))['total_amount__sum'] or Decimal('0.00')
-    
-    # Status breakdown
-    status_breakdown = {}
-    for status, _ in Order.STATUS_CHOICES:
-        status_breakdown[status] = orders.filter(status=status).count()
-    
-    # Payment status breakdown
-    payment_breakdown = {}
-    for status, _ in Order.PAYMENT_STATUS_CHOICES:
-        payment_breakdown[status] = orders.filter(payment_status=status).count()
+    # Basic metrics and status breakdowns from the daily rollup table
+    summary = summarize_rollups(rollups)
+    total_orders = summary['total_orders']
+    total_revenue = summary['total_value']
+    status_breakdown = summary['by_status']
+    payment_breakdown = summary['by_payment_status']
     
     # Top clients
-    top_clients = orders.values(
+    top_clients = rollups.values(
         'client__first_name', 'client__last_name', 'client__email'
     ).annotate(
-        order_count=Count('id'),
+        order_count=Sum('order_count'),
         total_spent=Sum('total_amount')
     ).order_by('-total_spent')[:10]
     
@@ -685,11 +686,14 @@ def generate_order_summary_report(start_date, end_date):
     ).order_by('-total_revenue')
     
     # Average order value by month
-    monthly_avg = orders.extra(
-        select={'month': "DATE_FORMAT(date_created, '%%Y-%%m')"}
-    ).values('month').annotate(
-        avg_order_value=Avg('total_amount')
-    ).order_by('month')
+    monthly_avg = [
+        {
+            'month': month['date'].strftime('%Y-%m'),
+            'avg_order_value': month['revenue'] / month['count']
+        }
+        for month in rollup_histogram(rollups, start_date, end_date, period='month')
+        if month['count']
+    ]
     
     report = {
         'period': {'start': start_date, 'end': end_date},
@@ -703,7 +707,7 @@ def generate_order_summary_report(start_date, end_date):
         'top_clients': list(top_clients),
         'service_performance': list(service_performance),
         'product_performance': list(product_performance),
-        'monthly_averages': list(monthly_avg)
+        'monthly_averages': monthly_avg
     }
     
     return report
@@ -713,9 +717,14 @@ def calculate_client_lifetime_value(client):
     """
     Calculate customer lifetime value
     """
-    orders = Order.objects.filter(client=client)
+    totals = order_rollups(client=client).filter(order_count__gt=0).aggregate(
+        total_orders=Sum('order_count'),
+        total_spent=Sum('total_amount'),
+        first_order_date=Min('date'),
+        last_order_date=Max('date')
+    )
     
-    if not orders.exists():
+    if not totals['total_orders']:
         return {
             'total_orders': 0,
             'total_spent': Decimal('0.00'),
@@ -725,19 +734,16 @@ def calculate_client_lifetime_value(client):
             'customer_lifespan_days': 0
         }
     
-    total_spent = orders.aggregate(Sum('total_amount'))['total_amount__sum'] or Decimal('0.00')
-    total_orders = orders.count()
-    first_order = orders.earliest('date_created')
-    last_order = orders.latest('date_created')
-    
-    lifespan_days = (last_order.date_created.date() - first_order.date_created.date()).days
+    total_spent = totals['total_spent'] or Decimal('0.00')
+    total_orders = totals['total_orders']
+    lifespan_days = (totals['last_order_date'] - totals['first_order_date']).days
     
     return {
         'total_orders': total_orders,
         'total_spent': total_spent,
         'average_order_value': total_spent / total_orders,
-        'first_order_date': first_order.date_created.date(),
-        'last_order_date': last_order.date_created.date(),
+        'first_order_date': totals['first_order_date'],
+        'last_order_date': totals['last_order_date'],
         'customer_lifespan_days': lifespan_days
     }
 
@@ -750,17 +756,17 @@ def get_order_conversion_funnel():
     # Contact messages (top of funnel)
     total_contacts = ContactMessage.objects.count()
     
-    # Orders created (conversion from contact)
-    total_orders = Order.objects.count()
-    
-    # Orders confirmed (conversion from pending)
-    confirmed_orders = Order.objects.filter(status='confirmed').count()
-    
-    # Orders completed (conversion to completion)
-    completed_orders = Order.objects.filter(status='completed').count()
-    
-    # Paid orders
-    paid_orders = Order.objects.filter(payment_status='paid').count()
+    # Orders created, confirmed, completed and paid from the daily rollup table
+    funnel = order_rollups().aggregate(
+        total_orders=Sum('order_count'),
+        confirmed_orders=Sum('order_count', filter=Q(status='confirmed')),
+        completed_orders=Sum('order_count', filter=Q(status='completed')),
+        paid_orders=Sum('order_count', filter=Q(payment_status='paid'))
+    )
+    total_orders = funnel['total_orders'] or 0
+    confirmed_orders = funnel['confirmed_orders'] or 0
+    completed_orders = funnel['completed_orders'] or 0
+    paid_orders = funnel['paid_orders'] or 0
     
     return {
         'contact_to_order_rate': (total_orders / total_contacts * 100) if total_contacts > 0 else 0,
@@ -799,88 +805,48 @@ def get_dashboard_metrics():
     week_ago = today - timedelta(days=7)
     month_ago = today - timedelta(days=30)
     
-    # Today's metrics
+    # Today's, week and month order metrics plus pending orders in one aggregate query
     from notifications.models import ContactMessage
-    today_orders = Order.objects.filter(date_created__date=today)
-    today_contacts = ContactMessage.objects.filter(date_created__date=today)
-    
-    # Week metrics
-    week_orders = Order.objects.filter(date_created__date__gte=week_ago)
-    week_revenue = week_orders.aggregate(Sum('total_amount'))['total_amount__sum'] or Decimal('0.00')
-    
-    # Month metrics
-    month_orders = Order.objects.filter(date_created__date__gte=month_ago)
-    month_revenue = month_orders.aggregate(Sum('total_amount'))['total_amount__sum'] or Decimal('0.00')
+    order_metrics = windowed_order_totals(
+        Order.objects.all(),
+        windows={
+            'today': start_of_day(today),
+            'week': start_of_day(week_ago),
+            'month': start_of_day(month_ago),
+        },
+        extra={'pending': Q(status='pending')}
+    )
+    today_contacts = ContactMessage.objects.filter(date_created__gte=start_of_day(today))
     
     # Pending items
-    pending_orders = Order.objects.filter(status='pending').count()
     unread_contacts = ContactMessage.objects.filter(is_read=False).count()
     pending_testimonials = Testimonial.objects.filter(approved=False).count()
     
     return {
         'today': {
-            'orders': today_orders.count(),
+            'orders': order_metrics['today']['orders'],
             'contacts': today_contacts.count(),
-            'revenue': today_orders.aggregate(Sum('total_amount'))['total_amount__sum'] or Decimal('0.00')
-        },
-        'week': {
-            'orders': week_orders.count(),
-            'revenue': week_revenue
-        },
-        'month': {
-            'orders': month_orders.count(),
-            'revenue': month_revenue
+            'revenue': order_metrics['today']['revenue']
         },
+        'week': order_metrics['week'],
+        'month': order_metrics['month'],
         'pending': {
-            'orders': pending_orders,
+            'orders': order_metrics['pending'],
             'contacts': unread_contacts,
             'testimonials': pending_testimonials
         }
     }
 
 
-def export_orders_to_csv(queryset, filename=None):
+def export_orders_to_csv(queryset, filename=None, compress=False):
     """
     Export orders to CSV format
+    Returns (iterator of CSV byte chunks, filename); rows are streamed in keyset batches
     """
-    import csv
-    from io import StringIO
-    
-    if not filename:
-        filename = f"orders_export_{timezone.now().strftime('%Y%m%d_%H%M%S')}.csv"
+    from .exports import export_orders
     
-    output = StringIO()
-    writer = csv.writer(output)
-    
-    # Write headers
-    headers = [
-        'Order ID', 'Client Name', 'Client Email', 'Service/Product',
-        'Total Amount', 'Currency', 'Status', 'Payment Status',
-        'Order Date', 'Due Date'
-    ]
-    writer.writerow(headers)
-    
-    # Write data
-    for order in queryset:
-        service_product = order.service.name if order.service else (
-            order.product.name if order.product else 'N/A'
-        )
-        
-        writer.writerow([
-            order.id,
-            order.client.full_name or order.client.email,
-            order.client.email,
-            service_product,
-            str(order.total_amount),
-            order.currency,
-            order.get_status_display(),
-            order.get_payment_status_display(),
-            order.date_created.strftime('%Y-%m-%d %H:%M'),
-            order.due_date.strftime('%Y-%m-%d') if order.due_date else 'N/A'
-        ])
-    
-    output.seek(0)
-    return output.getvalue(), filename
+    chunks, default_filename, _ = export_orders(queryset, 'csv', compress=compress)
+    return chunks, filename or default_filename
 
 
 def validate_order_transition(order, new_status):
@@ -907,34 +873,85 @@ def validate_order_transition(order, new_status):
     return True, "Transition allowed"
 
 
+def bulk_update_order_status(order_ids, new_status, notes='', user=None):
+    """
+    Move many orders to new_status in one transaction.
+    Transitions are validated in memory, then the orders are written with one
+    bulk_update and their timeline rows with one bulk_create. Status emails are
+    queued with one bulk insert once the transaction commits.
+    Returns (orders, errors); nothing is written when errors is not empty.
+    """
+    with transaction.atomic():
+        orders = list(
+            Order.objects.select_for_update().filter(id__in=order_ids).select_related('client')
+        )
+        found = {str(order.id) for order in orders}
+        errors = [f"Order {order_id[:8]}: not found" for order_id in order_ids if str(order_id) not in found]
+        for order in orders:
+            is_valid, message = validate_order_transition(order, new_status)
+            if not is_valid:
+                errors.append(f"Order {order.id[:8]}: {message}")
+        if errors:
+            return orders, errors
+        
+        now = timezone.now()
+        activities = []
+        transitions = []
+        for order in orders:
+            old_status = order.status
+            order.status = new_status
+            order.date_updated = now
+            if notes:
+                order.notes = f"{order.notes}\n{notes}" if order.notes else notes
+            transitions.append((order, old_status))
+            activities.append(OrderActivity(
+                order=order,
+                activity_type='status_change',
+                description=f'Order status changed from {old_status} to {new_status}',
+                created_by=user,
+                created_at=now
+            ))
+        
+        Order.objects.bulk_update(orders, ['status', 'notes', 'date_updated'], batch_size=200)
+        OrderActivity.objects.bulk_create(activities, batch_size=200)
+        # bulk_update skips signals, so refresh the affected rollup days
+        rebuild_daily_order_rollups({timezone.localtime(order.date_created).date() for order in orders})
+        
+        try:
+            emails = [build_status_update_email(order, old_status, new_status) for order, old_status in transitions]
+        except Exception as e:
+            print(f"Failed to send status update notifications: {e}")
+        else:
+            transaction.on_commit(lambda: enqueue_emails(emails))
+    
+    return orders, []
+
+
+def build_status_update_email(order, old_status, new_status):
+    """Render the status update email for an order as enqueue_email() arguments"""
+    context = {
+        'order': order,
+        'old_status': old_status,
+        'new_status': new_status,
+        'client': order.client
+    }
+    return {
+        'subject': f'Order Status Update - {order.id[:8]}',
+        'body': render_to_string('emails/status_update.txt', context),
+        'recipients': [order.client.email],
+        'html_body': render_to_string('emails/status_update.html', context),
+    }
+
+
 def send_status_update_notification(order, old_status, new_status):
     """
     Send notification when order status changes
     """
     try:
-        subject = f'Order Status Update - {order.id[:8]}'
-        
-        context = {
-            'order': order,
-            'old_status': old_status,
-            'new_status': new_status,
-            'client': order.client
-        }
-        
-        html_message = render_to_string('emails/status_update.html', context)
-        plain_message = render_to_string('emails/status_update.txt', context)
-        
-        send_mail(
-            subject=subject,
-            message=plain_message,
-            from_email=settings.DEFAULT_FROM_EMAIL,
-            recipient_list=[order.client.email],
-            html_message=html_message,
-            fail_silently=False,
-        )
+        enqueue_email(**build_status_update_email(order, old_status, new_status))
         
         return True
         
     except Exception as e:
         print(f"Failed to send status update notification: {e}")
-        return False
\ No newline at end of file
+        return False
@@ -5,7 +5,7 @@ from decimal import Decimal
 
 from django.contrib.auth import get_user_model
 from django.db.models import Q, Sum, Count
-from django.http import HttpResponse
+from django.http import StreamingHttpResponse
 from django.utils import timezone
 
 # Django REST Framework imports
@@ -20,6 +20,7 @@ from django_filters.rest_framework import DjangoFilterBackend
 
 # Local imports
 from accounts.permissions import IsDeveloperOrAdmin, IsOwnerOrReadOnly, IsClientOwner
+from wordknox.pagination import NewestFirstKeysetPagination
 from .models import ServiceRequest, Order, Testimonial, Payment, Notification
 from .serializers import (
     ServiceRequestSerializer, OrderCreateSerializer, OrderListSerializer, OrderDetailSerializer,
@@ -32,8 +33,9 @@ from .utils import (
     send_contact_notification_email, auto_prioritize_contact_message,
     check_duplicate_contact, get_order_stats, get_dashboard_metrics,
     export_orders_to_csv, validate_order_transition, send_status_update_notification,
-    mark_notifications_as_read
+    mark_notifications_as_read, bulk_update_order_status
 )
+from .analytics import order_rollups, summarize_rollups, rollup_histogram
 from .filters import OrderFilter, TestimonialFilter
 
 User = get_user_model()
@@ -272,39 +274,23 @@ class OrderViewSet(viewsets.ModelViewSet):
             new_status = serializer.validated_data['status']
             notes = serializer.validated_data.get('notes', '')
             
-            # Validate all orders exist and transitions are valid
-            orders = Order.objects.filter(id__in=order_ids)
+            orders, errors = bulk_update_order_status(order_ids, new_status, notes=notes, user=request.user)
             
-            if orders.count() != len(order_ids):
+            if len(orders) != len(set(order_ids)):
                 return Response(
                     {'error': 'Some orders not found'},
                     status=status.HTTP_400_BAD_REQUEST
                 )
             
-            invalid_transitions = []
-            for order in orders:
-                is_valid, message = validate_order_transition(order, new_status)
-                if not is_valid:
-                    invalid_transitions.append(f"Order {order.id[:8]}: {message}")
-            
-            if invalid_transitions:
+            if errors:
                 return Response(
-                    {'error': 'Invalid transitions', 'details': invalid_transitions},
+                    {'error': 'Invalid transitions', 'details': errors},
                     status=status.HTTP_400_BAD_REQUEST
                 )
             
-            # Update all orders
-            updated_count = orders.update(status=new_status)
-            
-            # Add notes if provided
-            if notes:
-                for order in orders:
-                    order.notes = f"{order.notes}\n{notes}" if order.notes else notes
-                    order.save()
-            
             return Response({
-                'detail': f'Successfully updated {updated_count} orders',
-                'updated_orders': list(orders.values_list('id', flat=True))
+                'detail': f'Successfully updated {len(orders)} orders',
+                'updated_orders': [order.id for order in orders]
             })
         
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
@@ -325,52 +311,29 @@ class OrderViewSet(viewsets.ModelViewSet):
         if date_to:
             date_to = datetime.strptime(date_to, '%Y-%m-%d').date()
         
-        # Filter orders based on user role
-        if user.role == 'client':
-            orders_queryset = Order.objects.filter(client=user)
-        else:
-            orders_queryset = Order.objects.all()
-        
-        # Apply date filters
-        if date_from:
-            orders_queryset = orders_queryset.filter(date_created__gte=date_from)
-        if date_to:
-            orders_queryset = orders_queryset.filter(date_created__lte=date_to)
-        
-        # Calculate statistics
-        from django.db.models import Sum, Avg, Count
-        
-        total_orders = orders_queryset.count()
-        orders_by_status = orders_queryset.values('status').annotate(count=Count('id'))
+        # Read from the daily rollup table, scoped to the user's own orders for clients
+        client = user if user.role == 'client' else None
+        rollups = order_rollups(client=client, date_from=date_from, date_to=date_to)
         
-        # Total value and average
-        total_value = orders_queryset.aggregate(total=Sum('total_amount'))['total'] or 0
-        avg_value = orders_queryset.aggregate(avg=Avg('total_amount'))['avg'] or 0
-        
-        # Get the most common currency
-        currency_data = orders_queryset.values('currency').annotate(count=Count('id')).order_by('-count').first()
-        currency = currency_data['currency'] if currency_data else 'USD'
+        # Totals, per-status counts and currency mode in one grouped query
+        summary = summarize_rollups(rollups)
+        total_value = summary['total_value']
         
         # Recent activity (last 7 days)
-        week_ago = timezone.now() - timedelta(days=7)
-        recent_activity = []
-        for i in range(7):
-            date = (timezone.now() - timedelta(days=i)).date()
-            count = orders_queryset.filter(date_created__date=date).count()
-            recent_activity.append({
-                'date': date.isoformat(),
-                'count': count
-            })
-        recent_activity.reverse()
+        today = timezone.localdate()
+        recent_activity = [
+            {'date': day['date'].isoformat(), 'count': day['count']}
+            for day in rollup_histogram(rollups, today - timedelta(days=6), today)
+        ]
         
         # Determine trend (compare with previous period)
         if date_from and date_to:
             period_days = (date_to - date_from).days
             previous_start = date_from - timedelta(days=period_days)
-            previous_value = Order.objects.filter(
-                client=user if user.role == 'client' else None,
-                date_created__gte=previous_start,
-                date_created__lt=date_from
+            previous_value = order_rollups(
+                client=client,
+                date_from=previous_start,
+                date_to=date_from - timedelta(days=1)
             ).aggregate(total=Sum('total_amount'))['total'] or 0
             
             if previous_value > 0:
@@ -389,16 +352,18 @@ class OrderViewSet(viewsets.ModelViewSet):
             trend_percentage = 0
         
         stats = {
-            'total_orders': total_orders,
-            'pending_orders': orders_queryset.filter(status='pending').count(),
-            'in_progress_orders': orders_queryset.filter(status='in_progress').count(),
-            'completed_orders': orders_queryset.filter(status='completed').count(),
+            'total_orders': summary['total_orders'],
+            'pending_orders': summary['by_status']['pending'],
+            'in_progress_orders': summary['by_status']['in_progress'],
+            'completed_orders': summary['by_status']['completed'],
             'total_value': float(total_value),
-            'average_order_value': float(avg_value),
-            'currency': currency,
+            'average_order_value': float(summary['average_order_value']),
+            'currency': summary['currency'],
             'value_trend': value_trend,
             'trend_percentage': float(trend_percentage) if trend_percentage else 0,
-            'orders_by_status': {item['status']: item['count'] for item in orders_by_status},
+            'orders_by_status': {
+                status_code: count for status_code, count in summary['by_status'].items() if count
+            },
             'recent_activity': recent_activity
         }
         
@@ -407,12 +372,21 @@ class OrderViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['get'], permission_classes=[IsDeveloperOrAdmin])
     def export_csv(self, request):
         """
-        Export orders to CSV
+        Stream an order export.
+        ?export_format=csv|ndjson|xlsx (default csv), ?compress=gzip for gzip output
         """
+        from .exports import export_orders
+        
         queryset = self.filter_queryset(self.get_queryset())
-        csv_data, filename = export_orders_to_csv(queryset)
+        export_format = request.query_params.get('export_format', 'csv')
+        compress = request.query_params.get('compress') == 'gzip'
+        
+        try:
+            chunks, filename, content_type = export_orders(queryset, export_format, compress=compress)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
         
-        response = HttpResponse(csv_data, content_type='text/csv')
+        response = StreamingHttpResponse(chunks, content_type=content_type)
         response['Content-Disposition'] = f'attachment; filename="{filename}"'
         return response
     
@@ -628,9 +602,8 @@ class OrderViewSet(viewsets.ModelViewSet):
         """
         Get minimal timeline of activities for an order.
         Returns key events like order creation, status changes, payments, messages, and file uploads.
+        Newest first, paginated by activity id: ?before=<id> for older events, ?after=<id> for newer ones.
         """
-        from .models import OrderActivity
-        
         order = self.get_object()
         
         # Check if user can access this order
@@ -640,8 +613,12 @@ class OrderViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_403_FORBIDDEN
             )
         
-        # Get all activities for this order
-        activities = order.activities.all()
+        paginator = NewestFirstKeysetPagination()
+        activities = paginator.paginate_queryset(
+            order.activities.select_related('created_by'),
+            request,
+            view=self
+        )
         
         timeline_data = []
         for activity in activities:
@@ -656,7 +633,8 @@ class OrderViewSet(viewsets.ModelViewSet):
         return Response({
             'order_id': str(order.id),
             'timeline': timeline_data,
-            'count': len(timeline_data)
+            'count': len(timeline_data),
+            **paginator.get_cursor_data()
         })
         """
         Custom contact message creation with validation and notifications
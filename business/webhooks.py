@@ -0,0 +1,283 @@
+# business/webhooks.py
+"""
+Queued, idempotent processing of PayPal webhooks.
+
+The webhook view only verifies the signature and stores the raw event with
+record_event(), keyed by PayPal's event id, then answers 200. Redeliveries of an
+event hit the unique key and are dropped there. The process_paypal_webhooks
+worker claims due events in batches (skip_locked, so several workers can drain a
+burst side by side) and applies each one in its own transaction.
+
+Events can arrive out of order:
+- an event for a PayPal order that is not stored yet (the webhook beat the
+  create_paypal_order commit) is retried with backoff instead of being lost
+- PayPal statuses only move forward (see STATUS_RANK), so a late COMPLETED never
+  overwrites a REFUNDED and replaying an event is harmless
+- balance credits use the PayPal order id as idempotency key, shared with
+  capture_paypal_payment(), so a deposit is credited once whichever comes first
+"""
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .models import Payment, PayPalPayment, PayPalWebhookEvent
+from .paypal import _credit_deposit
+
+logger = logging.getLogger(__name__)
+
+
+# Later PayPal states outrank earlier ones; terminal states share a rank
+STATUS_RANK = {
+    'CREATED': 0,
+    'SAVED': 0,
+    'APPROVED': 1,
+    'PAYER_ACTION_REQUIRED': 1,
+    'PENDING': 1,
+    'COMPLETED': 2,
+    'DENIED': 2,
+    'VOIDED': 2,
+    'PARTIALLY_REFUNDED': 3,
+    'REFUNDED': 4,
+    'REVERSED': 4,
+}
+
+
+class EventNotReady(Exception):
+    """The event refers to a PayPal payment this system has not stored yet"""
+
+
+def _link(resource, rel):
+    for link in resource.get('links') or []:
+        if link.get('rel') == rel:
+            return link.get('href', '')
+    return ''
+
+
+def _paypal_order_id(event_type, resource):
+    related = (resource.get('supplementary_data') or {}).get('related_ids') or {}
+    if related.get('order_id'):
+        return related['order_id']
+    if event_type.startswith('CHECKOUT.ORDER.'):
+        return resource.get('id', '')
+    up = _link(resource, 'up')
+    if '/orders/' in up:
+        return up.rstrip('/').split('/')[-1]
+    return ''
+
+
+def record_event(payload):
+    """
+    Store a verified webhook payload for the worker.
+    Returns (event, created); created is False for a redelivered event.
+    """
+    event_id = payload.get('id')
+    if not event_id:
+        raise ValueError('Webhook payload has no event id')
+
+    event_type = payload.get('event_type', '')
+    event = PayPalWebhookEvent(
+        event_id=event_id,
+        event_type=event_type,
+        paypal_order_id=_paypal_order_id(event_type, payload.get('resource') or {}),
+        payload=payload,
+        event_time=parse_datetime(payload.get('create_time') or ''),
+        max_attempts=getattr(settings, 'PAYPAL_WEBHOOK_MAX_ATTEMPTS', 8),
+    )
+    try:
+        with transaction.atomic():
+            event.save(force_insert=True)
+    except IntegrityError:
+        return PayPalWebhookEvent.objects.get(event_id=event_id), False
+    return event, True
+
+
+def retry_delay(attempts):
+    """Exponential backoff: PAYPAL_WEBHOOK_RETRY_DELAY, then x2 per failed attempt"""
+    base = getattr(settings, 'PAYPAL_WEBHOOK_RETRY_DELAY', 30)
+    return timedelta(seconds=base * 2 ** max(attempts - 1, 0))
+
+
+def claim_batch(batch_size=100):
+    """
+    Mark up to batch_size due events as 'processing' and return them, oldest first.
+    Events stuck in 'processing' (a worker died) are picked up again after
+    PAYPAL_WEBHOOK_PROCESSING_TIMEOUT seconds.
+    """
+    now = timezone.now()
+    stale = now - timedelta(seconds=getattr(settings, 'PAYPAL_WEBHOOK_PROCESSING_TIMEOUT', 600))
+
+    with transaction.atomic():
+        events = list(
+            PayPalWebhookEvent.objects.select_for_update(skip_locked=True).filter(
+                Q(status='pending', next_attempt_at__lte=now) |
+                Q(status='processing', date_updated__lt=stale)
+            ).order_by('event_time', 'date_created')[:batch_size]
+        )
+        PayPalWebhookEvent.objects.filter(pk__in=[event.pk for event in events]).update(
+            status='processing',
+            date_updated=now
+        )
+    return events
+
+
+def _locked_paypal_payment(event):
+    resource = event.payload.get('resource') or {}
+    payments = PayPalPayment.objects.select_for_update().select_related('payment')
+    if event.paypal_order_id:
+        payments = payments.filter(paypal_order_id=event.paypal_order_id)
+    else:
+        # Refund resources only link to the capture they refund
+        capture_url = _link(resource, 'up')
+        if '/captures/' not in capture_url:
+            return None
+        payments = payments.filter(paypal_payment_id=capture_url.rstrip('/').split('/')[-1])
+
+    paypal_payment = payments.first()
+    if paypal_payment is None:
+        raise EventNotReady(f'No PayPal payment stored for {event.paypal_order_id or "this capture"} yet')
+    return paypal_payment
+
+
+def _advance_status(paypal_payment, paypal_status, event):
+    """Move to `paypal_status` unless the payment already reached a later state"""
+    current = paypal_payment.paypal_status
+    if paypal_status != current and STATUS_RANK.get(paypal_status, 0) <= STATUS_RANK.get(current, 0):
+        logger.info(f"Skipping {event.event_type} {event.event_id}: payment is already {current}")
+        return False
+    paypal_payment.paypal_status = paypal_status
+    paypal_payment.paypal_update_time = event.event_time or timezone.now()
+    return True
+
+
+def _set_order_payment_status(payment, payment_status):
+    order = payment.order
+    if order is not None and order.payment_status != payment_status:
+        order.payment_status = payment_status
+        order.save(update_fields=['payment_status', 'date_updated'])
+
+
+def _capture_completed(event, paypal_payment):
+    if not _advance_status(paypal_payment, 'COMPLETED', event):
+        return
+    resource = event.payload.get('resource') or {}
+    paypal_payment.paypal_payment_id = resource.get('id') or paypal_payment.paypal_payment_id
+    paypal_payment.save(update_fields=['paypal_status', 'paypal_update_time', 'paypal_payment_id'])
+
+    payment = paypal_payment.payment
+    Payment.objects.filter(pk=payment.pk).exclude(status='completed').update(status='completed')
+    _set_order_payment_status(payment, 'paid')
+    if paypal_payment.is_balance_deposit and payment.user_id:
+        _credit_deposit(payment.user, payment, paypal_payment.paypal_order_id)
+
+
+def _capture_denied(event, paypal_payment):
+    if not _advance_status(paypal_payment, 'DENIED', event):
+        return
+    paypal_payment.save(update_fields=['paypal_status', 'paypal_update_time'])
+    Payment.objects.filter(pk=paypal_payment.payment_id).update(status='failed')
+    _set_order_payment_status(paypal_payment.payment, 'failed')
+
+
+def _capture_reversed(event, paypal_payment):
+    paypal_status = 'REFUNDED' if event.event_type == 'PAYMENT.CAPTURE.REFUNDED' else 'REVERSED'
+    if not _advance_status(paypal_payment, paypal_status, event):
+        return
+    paypal_payment.save(update_fields=['paypal_status', 'paypal_update_time'])
+    Payment.objects.filter(pk=paypal_payment.payment_id).update(status='refunded')
+    _set_order_payment_status(paypal_payment.payment, 'refunded')
+    if paypal_payment.is_balance_deposit:
+        # Taking credited money back may overdraw the account; leave it to staff
+        logger.warning(f"PayPal deposit {paypal_payment.paypal_order_id} was {paypal_status.lower()}; review the balance")
+
+
+HANDLERS = {
+    'PAYMENT.CAPTURE.COMPLETED': _capture_completed,
+    'PAYMENT.CAPTURE.DENIED': _capture_denied,
+    'PAYMENT.CAPTURE.REVERSED': _capture_reversed,
+    'PAYMENT.CAPTURE.REFUNDED': _capture_reversed,
+}
+
+
+def process_event(event):
+    """Apply one event in a single transaction; event types without a handler are just marked processed"""
+    with transaction.atomic():
+        handler = HANDLERS.get(event.event_type)
+        if handler is not None:
+            paypal_payment = _locked_paypal_payment(event)
+            if paypal_payment is None:
+                logger.warning(f"Cannot tell which payment {event.event_type} {event.event_id} belongs to")
+            else:
+                handler(event, paypal_payment)
+        PayPalWebhookEvent.objects.filter(pk=event.pk).update(
+            status='processed',
+            attempts=F('attempts') + 1,
+            last_error='',
+            processed_at=timezone.now()
+        )
+
+
+def _record_failure(event, error, stats):
+    attempts = event.attempts + 1
+    changes = {
+        'attempts': attempts,
+        'last_error': f'{type(error).__name__}: {error}',
+    }
+
+    if attempts >= event.max_attempts:
+        changes['status'] = 'dead'
+        stats['dead'] += 1
+        logger.error(f"Giving up on PayPal webhook {event.event_id} after {attempts} attempt(s): {error}")
+    else:
+        changes['status'] = 'pending'
+        changes['next_attempt_at'] = timezone.now() + retry_delay(attempts)
+        stats['retried'] += 1
+        logger.warning(f"PayPal webhook {event.event_id} attempt {attempts} failed, retrying later: {error}")
+
+    PayPalWebhookEvent.objects.filter(pk=event.pk).update(**changes)
+
+
+def process_batch(batch_size=100):
+    """
+    Apply one batch of due events.
+    Returns {'claimed', 'processed', 'retried', 'dead'} counts.
+    """
+    events = claim_batch(batch_size)
+    stats = {'claimed': len(events), 'processed': 0, 'retried': 0, 'dead': 0}
+    for event in events:
+        try:
+            process_event(event)
+        except Exception as e:
+            _record_failure(event, e, stats)
+        else:
+            stats['processed'] += 1
+    return stats
+
+
+def drain_events(batch_size=100):
+    """Process batches until no due event is left; returns the summed counts"""
+    totals = {'claimed': 0, 'processed': 0, 'retried': 0, 'dead': 0}
+    while True:
+        stats = process_batch(batch_size)
+        for key, value in stats.items():
+            totals[key] += value
+        if stats['claimed'] < batch_size:
+            return totals
+
+
+def replay_events(statuses=('dead',), since=None, event_types=None):
+    """
+    Queue stored events again, e.g. dead-lettered ones after a fix or a whole day
+    after restoring a backup. Processing is idempotent, so replaying processed
+    events is safe. Returns the number of events queued.
+    """
+    events = PayPalWebhookEvent.objects.filter(status__in=statuses)
+    if since is not None:
+        events = events.filter(date_created__gte=since)
+    if event_types:
+        events = events.filter(event_type__in=event_types)
+    return events.update(status='pending', attempts=0, next_attempt_at=timezone.now(), last_error='')
@@ -0,0 +1,14 @@
+# core/management/commands/build_site_snapshot.py
+from django.core.management.base import BaseCommand
+
+from core.snapshot import build_snapshot
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the public site snapshot now (after deploys or writes that bypass model signals)'
+
+    def handle(self, *args, **options):
+        snapshot, changed = build_snapshot()
+        sizes = ', '.join(f'{encoding} {len(body)} bytes' for encoding, body in snapshot['bodies'].items())
+        state = 'Built' if changed else 'Unchanged'
+        self.stdout.write(self.style.SUCCESS(f"{state} site snapshot {snapshot['version']} ({sizes})"))
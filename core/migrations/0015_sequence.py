@@ -0,0 +1,28 @@
+# Generated by Django 5.2.2 on 2026-10-18 16:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0014_alter_workexperience_end_year_and_more"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Sequence",
+            fields=[
+                (
+                    "name",
+                    models.CharField(max_length=100, primary_key=True, serialize=False),
+                ),
+                ("value", models.BigIntegerField(default=0)),
+            ],
+            options={
+                "verbose_name": "Sequence",
+                "verbose_name_plural": "Sequences",
+                "db_table": "sequence",
+            },
+        ),
+    ]
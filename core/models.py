@@ -527,4 +527,20 @@ class FAQ(models.Model):
     
     def __str__(self):
         return f"{self.question[:50]}..." if len(self.question) > 50 else self.question
-    
\ No newline at end of file
+    
+
+class Sequence(models.Model):
+    """
+    Named counters behind human-readable numbers (order, invoice, license).
+    Allocated through core.sequences; never edit `value` by hand.
+    """
+    name = models.CharField(max_length=100, primary_key=True)
+    value = models.BigIntegerField(default=0)
+    
+    class Meta:
+        db_table = 'sequence'
+        verbose_name = 'Sequence'
+        verbose_name_plural = 'Sequences'
+    
+    def __str__(self):
+        return f"{self.name}: {self.value}"
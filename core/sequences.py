@@ -0,0 +1,94 @@
+# core/sequences.py
+"""
+Gap-tolerant, race-free number allocation for order, invoice and license numbers.
+
+Each named sequence is one row of core.Sequence. A reservation is a single
+`UPDATE sequence SET value = value + n WHERE name = ...` followed by a primary-key
+read of the new value. The UPDATE takes the row lock, so concurrent checkouts get
+distinct numbers and the read sees this transaction's own write (an emulation of
+UPDATE ... RETURNING that works on MySQL). A missing row is created on first use
+with INSERT IGNORE / ON CONFLICT DO NOTHING, seeded by the caller's `initial`.
+
+The row lock is held until the surrounding transaction commits. For sequences with
+high allocation rates SEQUENCE_BLOCK_SIZES = {'<kind>': n} reserves n values at a
+time and hands them out from process memory. Numbers are then unique but no longer
+strictly in creation order across workers, and unused values of a block are
+skipped when the worker exits. `<kind>` is the part of the name before the first
+colon, e.g. 'order' for 'order:20260101'.
+"""
+import os
+import threading
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+
+from .models import Sequence
+
+
+_blocks = {}
+_blocks_lock = threading.Lock()
+_blocks_pid = None
+
+
+def block_size(name):
+    sizes = getattr(settings, 'SEQUENCE_BLOCK_SIZES', {})
+    return max(int(sizes.get(name.split(':', 1)[0], 1)), 1)
+
+
+def reserve(name, count=1, initial=None):
+    """
+    Advance sequence `name` by `count` and return the first reserved value.
+    `initial` is called when the sequence does not exist yet and returns the last
+    value already in use (default 0).
+    """
+    with transaction.atomic():
+        rows = Sequence.objects.filter(name=name)
+        if not rows.update(value=F('value') + count):
+            # bulk_create sends no signals and ignores a row created concurrently
+            start = initial() if initial else 0
+            Sequence.objects.bulk_create([Sequence(name=name, value=start)], ignore_conflicts=True)
+            rows.update(value=F('value') + count)
+        value = rows.values_list('value', flat=True).get()
+    return value - count + 1
+
+
+def _take_cached(name):
+    global _blocks_pid
+    with _blocks_lock:
+        if _blocks_pid != os.getpid():
+            # Blocks reserved before a fork must not be handed out twice
+            _blocks.clear()
+            _blocks_pid = os.getpid()
+        block = _blocks.get(name)
+        if not block:
+            return None
+        value, end = block
+        if value + 1 > end:
+            del _blocks[name]
+        else:
+            _blocks[name] = (value + 1, end)
+        return value
+
+
+def _store_block(name, start, end):
+    with _blocks_lock:
+        if start <= end:
+            _blocks[name] = (start, end)
+
+
+def next_value(name, initial=None):
+    """Return the next value of sequence `name`, from this worker's block when one is configured"""
+    size = block_size(name)
+    if size == 1:
+        return reserve(name, initial=initial)
+
+    value = _take_cached(name)
+    if value is not None:
+        return value
+    value = reserve(name, size, initial=initial)
+    # Only hand out the rest of the block once the reservation is committed;
+    # a rolled-back reservation would otherwise be reserved again by another worker
+    end = value + size - 1
+    transaction.on_commit(lambda: _store_block(name, value + 1, end))
+    return value
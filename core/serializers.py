@@ -67,7 +67,7 @@ class PublicAboutStatsSerializer(serializers.ModelSerializer):
     """Public serializer for about stats - only active stats"""
     class Meta:
         model = AboutStats
-        fields = ['id', 'label', 'value', 'icon', 'display_order']
+        fields = ['id', 'stat_name', 'stat_value', 'stat_description', 'icon_name', 'display_order']
 
 # WhyChooseUs Serializers
 class WhyChooseUsSerializer(serializers.ModelSerializer):
@@ -127,10 +127,7 @@ class PublicHeroSectionSerializer(serializers.ModelSerializer):
     """Public serializer for hero sections - only active hero"""
     class Meta:
         model = HeroSection
-        fields = [
-            'id', 'page', 'headline', 'subheadline', 'cta_text', 'cta_link',
-            'cta_secondary_text', 'cta_secondary_link', 'background_video', 'background_image'
-        ]
+        fields = ['id', 'page', 'heading', 'subheading', 'cta_text', 'cta_link', 'media']
 
 # About Section Serializers
 class AboutSectionSerializer(serializers.ModelSerializer):
@@ -153,7 +150,7 @@ class PublicAboutSectionSerializer(serializers.ModelSerializer):
     """Public serializer for about sections - only active about"""
     class Meta:
         model = AboutSection
-        fields = ['id', 'title', 'description', 'profile_img', 'profile_video', 'quote']
+        fields = ['id', 'title', 'description', 'media', 'socials_urls']
 
 # Complete About Data Serializer
 class CompleteAboutDataSerializer(serializers.Serializer):
@@ -0,0 +1,43 @@
+# core/signals.py
+from django.db.models.signals import post_save, post_delete, m2m_changed
+from django.dispatch import receiver
+
+from wordknox.cache_tags import TAGGED_APPS, model_tags, invalidate_tags
+from wordknox.tracking import FieldTrackerMixin
+from .snapshot import renders_model, schedule_rebuild
+
+
+@receiver(post_save)
+@receiver(post_delete)
+def invalidate_model_cache_tags(sender, instance, created=False, raw=False, **kwargs):
+    """Drop cached values and responses tagged with a content model that changed"""
+    if sender._meta.app_label not in TAGGED_APPS:
+        return
+    if kwargs.get('signal') is post_save and not (created or raw) and _unchanged(instance):
+        return
+    invalidate_tags(*model_tags(instance))
+
+
+@receiver(post_save)
+@receiver(post_delete)
+def rebuild_site_snapshot(sender, instance, created=False, raw=False, **kwargs):
+    """Rebuild the public site snapshot when content it renders changed"""
+    if raw or not renders_model(sender):
+        return
+    if kwargs.get('signal') is post_save and not created and _unchanged(instance):
+        return
+    schedule_rebuild()
+
+
+def _unchanged(instance):
+    """A tracked instance saved without changing any field leaves cached content valid"""
+    return isinstance(instance, FieldTrackerMixin) and instance.is_tracking() and not instance.changed_fields()
+
+
+@receiver(m2m_changed)
+def invalidate_m2m_cache_tags(sender, instance, action, **kwargs):
+    """Treat tag/technology reassignment as a change to the owning instance"""
+    if action.startswith('post_') and instance._meta.app_label in TAGGED_APPS:
+        invalidate_tags(*model_tags(instance))
+    if action.startswith('post_') and renders_model(type(instance)):
+        schedule_rebuild()
@@ -0,0 +1,278 @@
+# core/snapshot.py
+"""
+Prebuilt snapshot of the public site content.
+
+A cold page load used to need a dozen API calls (heroes, about page, featured
+services/products/projects/posts, catalog categories, partners), each of them
+querying and serializing content that rarely changes. build_snapshot() renders
+all of it into one JSON document, versions it by a hash of its content and stores
+it in the cache already compressed, so SiteSnapshotView only picks the stored
+bytes for the client's Accept-Encoding and answers revalidations with 304.
+Brotli is used when the optional `brotli` package is installed; gzip always.
+
+Saving or deleting a model listed in SNAPSHOT_MODELS schedules a rebuild once
+the transaction commits. Rebuilds are debounced per process: a burst of admin
+edits causes one rebuild SITE_SNAPSHOT_DEBOUNCE seconds after the last change,
+and at most SITE_SNAPSHOT_MAX_DELAY seconds after the first. With
+SITE_SNAPSHOT_DEBOUNCE = 0 the rebuild runs in the commit callback (tests).
+A rebuild that renders the same content keeps the stored version and ETag.
+The build_site_snapshot command rebuilds on demand, e.g. after a deploy.
+"""
+import gzip
+import hashlib
+import logging
+import os
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.db.models import Avg, Count
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+
+try:
+    import brotli
+except ImportError:  # optional, gzip is always available
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+
+SNAPSHOT_CACHE_KEY = 'site_snapshot'
+
+# Models whose rows end up in the snapshot, as 'app_label.model_name'
+SNAPSHOT_MODELS = frozenset([
+    'core.herosection', 'core.aboutsection', 'core.workexperience', 'core.aboutstats',
+    'core.whychooseus', 'core.roadmap',
+    'services.service', 'services.servicecategory', 'services.servicepricingtier',
+    'products.product', 'products.producttechnology', 'products.producttag', 'products.productreview',
+    'projects.project', 'projects.technology', 'projects.projecttechnology', 'projects.projectcomment',
+    'blog.blogpost', 'blog.tag', 'blog.blogposttag', 'blog.blogcomment',
+    'accounts.partner',
+])
+
+FEATURED_LIMIT = 6
+
+
+def renders_model(model):
+    """True if rows of `model` are part of the snapshot"""
+    return model._meta.label_lower in SNAPSHOT_MODELS
+
+
+def build_sections():
+    """Render every public section; keys are what the site asks for"""
+    from accounts.models import Partner
+    from accounts.serializers import PartnerPublicSerializer
+    from blog.models import BlogPost
+    from blog.serializers import PublicBlogPostListSerializer
+    from products.models import Product
+    from products.serializers import PublicProductListSerializer
+    from projects.models import Project
+    from projects.serializers import PublicProjectListSerializer
+    from services.models import Service, ServiceCategory
+    from services.serializers import PublicServiceListSerializer, ServiceCategorySerializer
+
+    from .models import AboutSection, HeroSection
+    from .serializers import PublicHeroSectionSerializer
+    from .utils import get_complete_about_data
+
+    # Oldest first, so the newest active hero of a page wins
+    heroes = HeroSection.objects.filter(is_active=True).order_by('date_created')
+    about_section = AboutSection.objects.order_by('-date_created').first()
+
+    return {
+        'hero': {hero.page: PublicHeroSectionSerializer(hero).data for hero in heroes},
+        'about': get_complete_about_data(about_section) if about_section else None,
+        'services': {
+            'featured': PublicServiceListSerializer(
+                Service.objects.filter(active=True, featured=True).for_listing()[:FEATURED_LIMIT], many=True
+            ).data,
+            'categories': ServiceCategorySerializer(
+                ServiceCategory.objects.filter(active=True).with_service_stats(), many=True
+            ).data,
+        },
+        'products': {
+            'featured': PublicProductListSerializer(
+                Product.objects.filter(active=True, featured=True).for_listing()[:FEATURED_LIMIT], many=True
+            ).data,
+            'categories': list(
+                Product.objects.filter(active=True).values('category').annotate(
+                    count=Count('id'),
+                    avg_price=Avg('price')
+                ).order_by('category')
+            ),
+        },
+        'projects': {
+            'featured': PublicProjectListSerializer(
+                Project.objects.filter(
+                    featured=True,
+                    status__in=['completed', 'maintenance']
+                ).select_related('client', 'author').prefetch_related('technologies')[:FEATURED_LIMIT],
+                many=True
+            ).data,
+        },
+        'blog': {
+            'featured': PublicBlogPostListSerializer(
+                BlogPost.objects.filter(
+                    status='published',
+                    featured=True
+                ).select_related('author').prefetch_related('tags')[:FEATURED_LIMIT],
+                many=True
+            ).data,
+        },
+        'partners': PartnerPublicSerializer(
+            Partner.objects.select_related('user').filter(user__is_active=True).order_by('-created_at'),
+            many=True
+        ).data,
+    }
+
+
+def _compress(body):
+    bodies = {'identity': body, 'gzip': gzip.compress(body, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        bodies['br'] = brotli.compress(body, quality=11)
+    return bodies
+
+
+_build_lock = threading.Lock()
+
+
+def build_snapshot():
+    """
+    Render, version and store the snapshot.
+    Returns (snapshot, changed); changed is False when the content was already stored.
+    """
+    with _build_lock:
+        renderer = JSONRenderer()
+        sections = renderer.render(build_sections())
+        version = hashlib.sha256(sections).hexdigest()[:20]
+
+        current = cache.get(SNAPSHOT_CACHE_KEY)
+        if current is not None and current['version'] == version:
+            return current, False
+
+        generated_at = timezone.now().replace(microsecond=0)
+        # The sections are already encoded; splice them in rather than render twice
+        body = b''.join([
+            b'{"version":', renderer.render(version),
+            b',"generated_at":', renderer.render(generated_at),
+            b',"sections":', sections, b'}',
+        ])
+        snapshot = {
+            'version': version,
+            'generated_at': generated_at,
+            'bodies': _compress(body),
+        }
+        cache.set(SNAPSHOT_CACHE_KEY, snapshot, None)
+        logger.info(f"Site snapshot {version} built ({len(body)} bytes)")
+        return snapshot, True
+
+
+def get_snapshot():
+    """The stored snapshot, built on the spot when the cache has none"""
+    snapshot = cache.get(SNAPSHOT_CACHE_KEY)
+    if snapshot is None:
+        snapshot, _ = build_snapshot()
+    return snapshot
+
+
+def preferred_encoding(accept_encoding, bodies):
+    """Best stored encoding the client accepts: br, then gzip, else identity"""
+    accepted = set()
+    for part in accept_encoding.split(','):
+        coding, _, params = part.strip().partition(';')
+        try:
+            quality = float(params.strip()[2:]) if params.strip().startswith('q=') else 1.0
+        except ValueError:
+            quality = 0.0
+        if quality > 0:
+            accepted.add(coding.strip().lower())
+    for encoding in ('br', 'gzip'):
+        if encoding in bodies and (encoding in accepted or '*' in accepted):
+            return encoding
+    return 'identity'
+
+
+class RebuildScheduler:
+    """Per-process debounce of snapshot rebuilds, run on a daemon thread"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._pid = None
+        self._first_change = None
+        self._last_change = None
+
+    @property
+    def debounce(self):
+        return getattr(settings, 'SITE_SNAPSHOT_DEBOUNCE', 2)
+
+    @property
+    def max_delay(self):
+        return getattr(settings, 'SITE_SNAPSHOT_MAX_DELAY', 30)
+
+    def schedule(self):
+        """Note a content change; the rebuild follows once changes settle"""
+        if not self.debounce:
+            self._rebuild()
+            return
+
+        self._ensure_worker()
+        now = time.monotonic()
+        with self._lock:
+            if self._first_change is None:
+                self._first_change = now
+            self._last_change = now
+        self._wakeup.set()
+
+    def _due(self):
+        with self._lock:
+            if self._first_change is None:
+                return None
+            return min(self._last_change + self.debounce, self._first_change + self.max_delay)
+
+    def _rebuild(self):
+        try:
+            build_snapshot()
+        except Exception:
+            logger.exception('Failed to rebuild the site snapshot')
+
+    def _ensure_worker(self):
+        # Threads do not survive a fork, so each worker process starts its own
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            threading.Thread(target=self._run, name='site-snapshot', daemon=True).start()
+
+    def _run(self):
+        while True:
+            self._wakeup.wait()
+            self._wakeup.clear()
+            due = self._due()
+            while due is not None:
+                delay = due - time.monotonic()
+                if delay > 0:
+                    # A later change wakes us early and pushes the deadline out
+                    self._wakeup.wait(delay)
+                    self._wakeup.clear()
+                else:
+                    with self._lock:
+                        self._first_change = self._last_change = None
+                    try:
+                        self._rebuild()
+                    finally:
+                        connection.close()
+                due = self._due()
+
+
+scheduler = RebuildScheduler()
+
+
+def schedule_rebuild():
+    """Rebuild the snapshot after the current transaction commits"""
+    transaction.on_commit(scheduler.schedule)
@@ -1,3 +1,89 @@
-from django.test import TestCase
+import gzip
+import json
+import time
+from unittest import mock
 
-# Create your tests here.
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from services.models import Service
+from .models import AboutSection, AboutStats, HeroSection
+from .snapshot import SNAPSHOT_CACHE_KEY, RebuildScheduler, preferred_encoding
+
+
+@override_settings(SITE_SNAPSHOT_DEBOUNCE=0)
+class SiteSnapshotTests(TestCase):
+    url = '/api/v1/core/snapshot/'
+
+    def setUp(self):
+        cache.delete(SNAPSHOT_CACHE_KEY)
+        self.hero = HeroSection.objects.create(page='home', heading='Welcome')
+        AboutSection.objects.create(title='About us', description='Description')
+        AboutStats.objects.create(stat_name='Projects', stat_value='40+')
+        self.service = Service.objects.create(
+            name='Web Design', slug='web-design', description='Description', pricing_model='fixed', featured=True
+        )
+
+    def fetch(self, **headers):
+        return self.client.get(self.url, **headers)
+
+    def test_snapshot_is_served_compressed_with_validators(self):
+        response = self.fetch(HTTP_ACCEPT_ENCODING='gzip, deflate')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response['Vary'])
+
+        document = json.loads(gzip.decompress(response.content))
+        self.assertEqual(response['ETag'], f'"{document["version"]}-gzip"')
+        self.assertEqual(document['sections']['hero']['home']['heading'], 'Welcome')
+        self.assertEqual(document['sections']['services']['featured'][0]['slug'], 'web-design')
+        self.assertEqual(document['sections']['about']['stats'][0]['stat_value'], '40+')
+
+        with self.assertNumQueries(0):
+            revalidated = self.fetch(HTTP_ACCEPT_ENCODING='gzip', HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(revalidated.status_code, 304)
+        self.assertEqual(revalidated.content, b'')
+
+    def test_identity_without_accept_encoding(self):
+        response = self.fetch()
+        self.assertFalse(response.has_header('Content-Encoding'))
+        document = json.loads(response.content)
+        self.assertEqual(response['ETag'], f'"{document["version"]}"')
+        self.assertEqual(self.fetch(HTTP_IF_MODIFIED_SINCE=response['Last-Modified']).status_code, 304)
+
+    def test_content_change_rebuilds_snapshot(self):
+        etag = self.fetch()['ETag']
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.service.save()  # nothing changed
+        self.assertEqual(self.fetch(HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            self.hero.heading = 'Hello again'
+            self.hero.save()
+        self.assertTrue(callbacks)
+        response = self.fetch(HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(json.loads(response.content)['sections']['hero']['home']['heading'], 'Hello again')
+
+
+class SnapshotSchedulingTests(SimpleTestCase):
+    def test_accept_encoding_negotiation(self):
+        bodies = {'identity': b'', 'gzip': b'', 'br': b''}
+        self.assertEqual(preferred_encoding('gzip, deflate, br', bodies), 'br')
+        self.assertEqual(preferred_encoding('br;q=0, gzip;q=0.5', bodies), 'gzip')
+        self.assertEqual(preferred_encoding('gzip, br', {'identity': b'', 'gzip': b''}), 'gzip')
+        self.assertEqual(preferred_encoding('', bodies), 'identity')
+
+    @override_settings(SITE_SNAPSHOT_DEBOUNCE=0.05, SITE_SNAPSHOT_MAX_DELAY=5)
+    def test_burst_of_changes_rebuilds_once(self):
+        scheduler = RebuildScheduler()
+        with mock.patch('core.snapshot.build_snapshot') as build, mock.patch('core.snapshot.connection'):
+            for _ in range(5):
+                scheduler.schedule()
+            self.assertEqual(build.call_count, 0)
+            deadline = time.monotonic() + 2
+            while not build.call_count and time.monotonic() < deadline:
+                time.sleep(0.02)
+            time.sleep(0.1)
+        self.assertEqual(build.call_count, 1)
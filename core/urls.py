@@ -24,6 +24,7 @@ urlpatterns = [
     # Alternative simple endpoints (optional - you can choose router or these)
     path('hero/<str:page>/', views.ActiveHeroAPIView.as_view(), name='active-hero'),
     path('about/', views.LatestAboutAPIView.as_view(), name='latest-about'),
+    path('snapshot/', views.SiteSnapshotView.as_view(), name='site-snapshot'),
     
     # Newsletter subscription endpoint (public)
     path('newsletter/subscribe/', views.NewsletterSubscriptionAPIView.as_view(), name='newsletter-subscribe'),
@@ -98,4 +99,5 @@ urlpatterns = [
 # Simple alternative endpoints:
 # GET    /api/v1/core/hero/<page>/            - Get active hero for specific page (public)
 # GET    /api/v1/core/about/                  - Get latest about (public)
+# GET    /api/v1/core/snapshot/               - All public site content in one document (public)
 # POST   /api/v1/core/newsletter/subscribe/   - Subscribe to newsletter (public)
\ No newline at end of file
@@ -1,6 +1,7 @@
 # core/utils.py
 from django.core.exceptions import ValidationError
 from django.core.cache import cache
+from wordknox.cache_tags import tagged_key, invalidate_tags
 import re
 
 
@@ -102,7 +103,7 @@ def get_active_hero_section():
     """
     from .models import HeroSection
     
-    cache_key = 'active_hero_section'
+    cache_key = tagged_key('active_hero_section', ['herosection:*'])
     hero = cache.get(cache_key)
     
     if hero is None:
@@ -125,7 +126,7 @@ def get_latest_about_section():
     """
     from .models import AboutSection
     
-    cache_key = 'latest_about_section'
+    cache_key = tagged_key('latest_about_section', ['aboutsection:*'])
     about = cache.get(cache_key)
     
     if about is None:
@@ -139,20 +140,70 @@ def get_latest_about_section():
     return about
 
 
+def get_complete_about_data(about_section):
+    """
+    Build the public about page payload
+    
+    Args:
+        about_section (AboutSection): Section whose show_* flags pick the parts
+    
+    Returns:
+        dict: About section plus work experience, stats, reasons and roadmap
+    """
+    from .models import WorkExperience, AboutStats, WhyChooseUs, Roadmap
+    from .serializers import (
+        PublicAboutSectionSerializer, PublicWorkExperienceSerializer, PublicAboutStatsSerializer,
+        PublicWhyChooseUsSerializer, PublicRoadmapSerializer
+    )
+    
+    data = {
+        'about_section': PublicAboutSectionSerializer(about_section).data,
+        'work_experience': [],
+        'stats': [],
+        'why_choose_us': [],
+        'roadmap': []
+    }
+    
+    # Only include sections that are enabled
+    if about_section.show_work_experience:
+        data['work_experience'] = PublicWorkExperienceSerializer(
+            WorkExperience.objects.filter(is_featured=True), many=True
+        ).data
+    
+    if about_section.show_stats:
+        data['stats'] = PublicAboutStatsSerializer(
+            AboutStats.objects.filter(is_active=True), many=True
+        ).data
+    
+    if about_section.show_why_choose_us:
+        data['why_choose_us'] = PublicWhyChooseUsSerializer(
+            WhyChooseUs.objects.filter(is_active=True), many=True
+        ).data
+    
+    if about_section.show_roadmap:
+        data['roadmap'] = PublicRoadmapSerializer(
+            Roadmap.objects.filter(is_active=True), many=True
+        ).data
+    
+    return data
+
+
 def invalidate_hero_cache():
     """
     Invalidate hero section cache
-    Call this when hero sections are updated
+    Saves and deletes already do this through the cache tag signals;
+    call it after queryset.update() or other writes that bypass signals
     """
-    cache.delete('active_hero_section')
+    invalidate_tags('herosection:*')
 
 
 def invalidate_about_cache():
     """
     Invalidate about section cache
-    Call this when about sections are updated
+    Saves and deletes already do this through the cache tag signals;
+    call it after queryset.update() or other writes that bypass signals
     """
-    cache.delete('latest_about_section')
+    invalidate_tags('aboutsection:*')
 
 
 class CorePermissions:
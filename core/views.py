@@ -3,9 +3,14 @@ from rest_framework import viewsets, permissions, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.views import APIView
+from django.conf import settings
 from django.db import transaction
 from django.utils.decorators import method_decorator
-from django.views.decorators.cache import cache_page
+from wordknox.cache_tags import cache_page_tagged
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date
+from django.views import View
 from django.views.decorators.vary import vary_on_headers
 from rest_framework import generics
 
@@ -27,6 +32,8 @@ from .serializers import (
     SupportTicketListSerializer, SupportAttachmentSerializer,
     FAQSerializer, PublicFAQSerializer
 )
+from .snapshot import get_snapshot, preferred_encoding
+from .utils import get_complete_about_data
 
 # Newsletter Subscription API View
 class NewsletterSubscriptionAPIView(APIView):
@@ -74,7 +81,7 @@ class WorkExperienceViewSet(viewsets.ModelViewSet):
             return WorkExperience.objects.all()
         return WorkExperience.objects.filter(is_featured=True)
     
-    @method_decorator(cache_page(60 * 15))
+    @method_decorator(cache_page_tagged(60 * 15, tags=['workexperience:*']))
     @action(detail=False, methods=['get'])
     def featured(self, request):
         """Get featured work experiences for public display"""
@@ -97,7 +104,7 @@ class AboutStatsViewSet(viewsets.ModelViewSet):
             return AboutStats.objects.all()
         return AboutStats.objects.filter(is_active=True)
     
-    @method_decorator(cache_page(60 * 15))
+    @method_decorator(cache_page_tagged(60 * 15, tags=['aboutstats:*']))
     @action(detail=False, methods=['get'])
     def active(self, request):
         """Get active stats for public display"""
@@ -120,7 +127,7 @@ class WhyChooseUsViewSet(viewsets.ModelViewSet):
             return WhyChooseUs.objects.all()
         return WhyChooseUs.objects.filter(is_active=True)
     
-    @method_decorator(cache_page(60 * 15))
+    @method_decorator(cache_page_tagged(60 * 15, tags=['whychooseus:*']))
     @action(detail=False, methods=['get'])
     def active(self, request):
         """Get active reasons for public display"""
@@ -143,7 +150,7 @@ class RoadmapViewSet(viewsets.ModelViewSet):
             return Roadmap.objects.all()
         return Roadmap.objects.filter(is_active=True)
     
-    @method_decorator(cache_page(60 * 15))
+    @method_decorator(cache_page_tagged(60 * 15, tags=['roadmap:*']))
     @action(detail=False, methods=['get'])
     def active(self, request):
         """Get active roadmap items for public display"""
@@ -186,7 +193,7 @@ class HeroSectionViewSet(viewsets.ModelViewSet):
         # Public users only see active hero sections
         return HeroSection.objects.filter(is_active=True)
     
-    @method_decorator(cache_page(60 * 15))  # Cache for 15 minutes
+    @method_decorator(cache_page_tagged(60 * 15, tags=['herosection:*']))  # Cache for 15 minutes
     @method_decorator(vary_on_headers('Authorization'))
     @action(detail=False, methods=['get'], url_path='active')
     def active_hero(self, request):
@@ -260,7 +267,7 @@ class AboutSectionViewSet(viewsets.ModelViewSet):
             return [permissions.AllowAny()]
         return [permissions.IsAdminUser()]
     
-    @method_decorator(cache_page(60 * 30))  # Cache for 30 minutes
+    @method_decorator(cache_page_tagged(60 * 30, tags=['aboutsection:*']))  # Cache for 30 minutes
     @action(detail=False, methods=['get'])
     def latest(self, request):
         """
@@ -277,7 +284,9 @@ class AboutSectionViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_404_NOT_FOUND
             )
     
-    @method_decorator(cache_page(60 * 30))
+    @method_decorator(cache_page_tagged(60 * 30, tags=[
+        'aboutsection:*', 'workexperience:*', 'aboutstats:*', 'whychooseus:*', 'roadmap:*'
+    ]))
     @action(detail=False, methods=['get'])
     def complete(self, request):
         """
@@ -285,36 +294,7 @@ class AboutSectionViewSet(viewsets.ModelViewSet):
         """
         try:
             about_section = AboutSection.objects.latest('date_created')
-            
-            data = {
-                'about_section': PublicAboutSectionSerializer(about_section).data,
-                'work_experience': [],
-                'stats': [],
-                'why_choose_us': [],
-                'roadmap': []
-            }
-            
-            # Only include sections that are enabled
-            if about_section.show_work_experience:
-                data['work_experience'] = PublicWorkExperienceSerializer(
-                    WorkExperience.objects.filter(is_featured=True), many=True
-                ).data
-            
-            if about_section.show_stats:
-                data['stats'] = PublicAboutStatsSerializer(
-                    AboutStats.objects.filter(is_active=True), many=True
-                ).data
-            
-            if about_section.show_why_choose_us:
-                data['why_choose_us'] = PublicWhyChooseUsSerializer(
-                    WhyChooseUs.objects.filter(is_active=True), many=True
-                ).data
-            
-            if about_section.show_roadmap:
-                data['roadmap'] = PublicRoadmapSerializer(
-                    Roadmap.objects.filter(is_active=True), many=True
-                ).data
-            
+            data = get_complete_about_data(about_section)
             return Response(data)
             
         except AboutSection.DoesNotExist:
@@ -351,6 +331,30 @@ class ActiveHeroAPIView(generics.RetrieveAPIView):
         serializer = self.get_serializer(instance)
         return Response(serializer.data)
 
+class SiteSnapshotView(View):
+    """
+    All public site content in one prebuilt document (see core/snapshot.py)
+    Served pre-compressed with a strong ETag; revalidations get 304
+    """
+    
+    def get(self, request, *args, **kwargs):
+        snapshot = get_snapshot()
+        encoding = preferred_encoding(request.META.get('HTTP_ACCEPT_ENCODING', ''), snapshot['bodies'])
+        etag = f'"{snapshot["version"]}"' if encoding == 'identity' else f'"{snapshot["version"]}-{encoding}"'
+        last_modified = int(snapshot['generated_at'].timestamp())
+        
+        response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if response is None:
+            response = HttpResponse(snapshot['bodies'][encoding], content_type='application/json')
+            if encoding != 'identity':
+                response['Content-Encoding'] = encoding
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(last_modified)
+        patch_vary_headers(response, ['Accept-Encoding'])
+        patch_cache_control(response, public=True, max_age=getattr(settings, 'SITE_SNAPSHOT_MAX_AGE', 60))
+        return response
+
+
 class LatestAboutAPIView(generics.RetrieveAPIView):
     """
     Simple API view to get latest about section
@@ -500,7 +504,7 @@ class FAQViewSet(viewsets.ModelViewSet):
             return FAQSerializer
         return PublicFAQSerializer
     
-    @method_decorator(cache_page(60 * 15))
+    @method_decorator(cache_page_tagged(60 * 15, tags=['faq:*']))
     @action(detail=False, methods=['get'])
     def featured(self, request):
         """Get featured FAQs for public display"""
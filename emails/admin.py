@@ -0,0 +1,27 @@
+# emails/admin.py
+from django.contrib import admin
+from django.utils import timezone
+
+from .models import EmailOutbox
+
+
+@admin.register(EmailOutbox)
+class EmailOutboxAdmin(admin.ModelAdmin):
+    """Inspect queued mail and requeue dead letters"""
+    
+    list_display = ['subject', 'recipients', 'status', 'attempts', 'next_attempt_at', 'sent_at', 'date_created']
+    list_filter = ['status', 'date_created']
+    search_fields = ['subject', 'recipients', 'last_error']
+    readonly_fields = ['id', 'attempts', 'last_error', 'sent_at', 'date_created', 'date_updated']
+    ordering = ['-date_created']
+    actions = ['requeue_emails']
+    
+    def requeue_emails(self, request, queryset):
+        """Send the selected emails again with a fresh retry budget"""
+        updated = queryset.exclude(status='sent').update(
+            status='pending',
+            attempts=0,
+            next_attempt_at=timezone.now()
+        )
+        self.message_user(request, f"Requeued {updated} email(s).")
+    requeue_emails.short_description = "Requeue selected emails"
@@ -10,6 +10,8 @@ from django.utils.html import strip_tags
 
 from django.utils import timezone
 
+from .outbox import enqueue_email
+
 logger = logging.getLogger(__name__)
 
 
@@ -33,8 +35,34 @@ class BaseEmail:
             'support_email': getattr(settings, 'SUPPORT_EMAIL', 'support@wordknox.com'),
         })
 
+    def render(self):
+        """Return (text body, html body); html is empty without a template or if rendering fails"""
+        if not self.template_name:
+            return self.message, ''
+        try:
+            html_content = render_to_string(self.template_name, self.context)
+            return strip_tags(html_content), html_content
+        except Exception as e:
+            logger.error(f"[EMAIL ERROR] Failed to render {self.template_name}, queueing plain text: {e}")
+            return self.message, ''
+    
     def send(self):
-            """Enhanced send method with comprehensive error handling and logging"""
+        """
+        Queue the email in the outbox and return 1 (like send_mail's count).
+        The send_queued_emails worker delivers it, so no SMTP happens in the request.
+        """
+        text_content, html_content = self.render()
+        enqueue_email(
+            subject=self.subject,
+            body=text_content,
+            recipients=[self.recipient],
+            from_email=self.from_email,
+            html_body=html_content
+        )
+        return 1
+    
+    def send_now(self):
+            """Send synchronously over SMTP, bypassing the outbox (diagnostics only)"""
             logger.info(f"[EMAIL] Attempting to send email to {self.recipient}")
             logger.info(f"[EMAIL] Subject: {self.subject}")
             logger.info(f"[EMAIL] From: {self.from_email}")
@@ -0,0 +1,49 @@
+# emails/management/commands/send_queued_emails.py
+import time
+
+from django.core.management.base import BaseCommand
+
+from emails.outbox import drain_outbox
+
+
+class Command(BaseCommand):
+    help = 'Deliver queued EmailOutbox messages in batches, retrying failures with backoff'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            dest='batch_size',
+            default=50,
+            help='Emails sent per SMTP connection (default: 50)'
+        )
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            dest='loop',
+            default=False,
+            help='Keep running and poll the outbox instead of exiting once it is drained'
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            dest='interval',
+            default=5,
+            help='Seconds to wait between polls with --loop (default: 5)'
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        
+        while True:
+            totals = drain_outbox(batch_size)
+            if totals['claimed'] or not options['loop']:
+                self.stdout.write(
+                    self.style.SUCCESS(
+                        f"Sent {totals['sent']}, retrying {totals['retried']}, "
+                        f"dead-lettered {totals['dead']} email(s)"
+                    )
+                )
+            if not options['loop']:
+                return
+            time.sleep(options['interval'])
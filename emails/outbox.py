@@ -0,0 +1,161 @@
+# emails/outbox.py
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import EmailOutbox
+
+logger = logging.getLogger(__name__)
+
+
+def _outbox_row(subject, body, recipients, from_email=None, html_body=''):
+    if isinstance(recipients, str):
+        recipients = [recipients]
+    return EmailOutbox(
+        subject=subject[:255],
+        body=body,
+        html_body=html_body or '',
+        from_email=from_email or settings.DEFAULT_FROM_EMAIL,
+        recipients=list(recipients),
+        max_attempts=getattr(settings, 'EMAIL_OUTBOX_MAX_ATTEMPTS', 5),
+    )
+
+
+def enqueue_email(subject, body, recipients, from_email=None, html_body=''):
+    """
+    Queue an email for the send_queued_emails worker instead of talking SMTP
+    inside the request. Returns the EmailOutbox row.
+    """
+    email = _outbox_row(subject, body, recipients, from_email, html_body)
+    email.save(force_insert=True)
+    logger.info(f"[EMAIL] Queued '{email.subject}' for {', '.join(email.recipients)} ({email.id})")
+    return email
+
+
+def enqueue_emails(emails):
+    """
+    Queue many emails with one bulk INSERT. `emails` are dicts of enqueue_email()
+    keyword arguments. Returns the EmailOutbox rows.
+    """
+    rows = EmailOutbox.objects.bulk_create([_outbox_row(**email) for email in emails], batch_size=200)
+    if rows:
+        logger.info(f"[EMAIL] Queued {len(rows)} email(s)")
+    return rows
+
+
+def retry_delay(attempts):
+    """Exponential backoff: EMAIL_OUTBOX_RETRY_DELAY, then x2 per failed attempt"""
+    base = getattr(settings, 'EMAIL_OUTBOX_RETRY_DELAY', 60)
+    return timedelta(seconds=base * 2 ** max(attempts - 1, 0))
+
+
+def claim_batch(batch_size=50):
+    """
+    Mark up to batch_size due emails as 'sending' and return them.
+    Rows stuck in 'sending' (a worker died mid-batch) are picked up again
+    after EMAIL_OUTBOX_SENDING_TIMEOUT seconds.
+    """
+    now = timezone.now()
+    stale = now - timedelta(seconds=getattr(settings, 'EMAIL_OUTBOX_SENDING_TIMEOUT', 600))
+
+    with transaction.atomic():
+        emails = list(
+            EmailOutbox.objects.select_for_update(skip_locked=True).filter(
+                Q(status='pending', next_attempt_at__lte=now) |
+                Q(status='sending', date_updated__lt=stale)
+            ).order_by('next_attempt_at')[:batch_size]
+        )
+        EmailOutbox.objects.filter(pk__in=[email.pk for email in emails]).update(
+            status='sending',
+            date_updated=now
+        )
+    return emails
+
+
+def build_message(email, connection=None):
+    """Turn an outbox row into an EmailMultiAlternatives bound to `connection`"""
+    message = EmailMultiAlternatives(
+        subject=email.subject,
+        body=email.body,
+        from_email=email.from_email,
+        to=email.recipients,
+        connection=connection
+    )
+    if email.html_body:
+        message.attach_alternative(email.html_body, 'text/html')
+    return message
+
+
+def _record_failure(email, error, stats):
+    attempts = email.attempts + 1
+    changes = {
+        'attempts': attempts,
+        'last_error': f'{type(error).__name__}: {error}',
+    }
+
+    if attempts >= email.max_attempts:
+        changes['status'] = 'dead'
+        stats['dead'] += 1
+        logger.error(f"[EMAIL ERROR] Giving up on {email.id} after {attempts} attempt(s): {error}")
+    else:
+        changes['status'] = 'pending'
+        changes['next_attempt_at'] = timezone.now() + retry_delay(attempts)
+        stats['retried'] += 1
+        logger.warning(f"[EMAIL] Attempt {attempts} for {email.id} failed, retrying later: {error}")
+
+    EmailOutbox.objects.filter(pk=email.pk).update(**changes)
+
+
+def send_batch(batch_size=50):
+    """
+    Deliver one batch of due emails over a single backend connection.
+    Returns {'claimed', 'sent', 'retried', 'dead'} counts.
+    """
+    emails = claim_batch(batch_size)
+    stats = {'claimed': len(emails), 'sent': 0, 'retried': 0, 'dead': 0}
+    if not emails:
+        return stats
+
+    connection = get_connection(fail_silently=False)
+    try:
+        connection.open()
+    except Exception as e:
+        # Mail server unreachable: the whole batch counts as a failed attempt
+        for email in emails:
+            _record_failure(email, e, stats)
+        return stats
+
+    try:
+        for email in emails:
+            try:
+                build_message(email, connection).send()
+            except Exception as e:
+                _record_failure(email, e, stats)
+            else:
+                EmailOutbox.objects.filter(pk=email.pk).update(
+                    status='sent',
+                    attempts=F('attempts') + 1,
+                    last_error='',
+                    sent_at=timezone.now()
+                )
+                stats['sent'] += 1
+    finally:
+        connection.close()
+
+    return stats
+
+
+def drain_outbox(batch_size=50):
+    """Send batches until no due email is left; returns the summed counts"""
+    totals = {'claimed': 0, 'sent': 0, 'retried': 0, 'dead': 0}
+    while True:
+        stats = send_batch(batch_size)
+        for key, value in stats.items():
+            totals[key] += value
+        if stats['claimed'] < batch_size:
+            return totals
@@ -0,0 +1,71 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.core import mail
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from .models import EmailOutbox
+from .outbox import drain_outbox, enqueue_email, enqueue_emails, send_batch
+
+
+@override_settings(EMAIL_OUTBOX_MAX_ATTEMPTS=2, EMAIL_OUTBOX_RETRY_DELAY=60)
+class EmailOutboxTests(TestCase):
+    """Queued email is only delivered by the worker, with retries and dead letters"""
+
+    def test_enqueue_does_not_send(self):
+        email = enqueue_email('Hello', 'Body', 'client@example.com', html_body='<p>Body</p>')
+        self.assertEqual(len(mail.outbox), 0)
+        self.assertEqual(email.status, 'pending')
+        self.assertEqual(email.recipients, ['client@example.com'])
+
+    def test_enqueue_many_with_one_insert(self):
+        with self.assertNumQueries(1):
+            rows = enqueue_emails([
+                {'subject': f'Hello {index}', 'body': 'Body', 'recipients': f'client{index}@example.com'}
+                for index in range(3)
+            ])
+        self.assertEqual(len(rows), 3)
+        self.assertEqual(EmailOutbox.objects.filter(status='pending').count(), 3)
+
+    def test_worker_sends_queued_email(self):
+        enqueue_email('Hello', 'Body', ['client@example.com'], html_body='<p>Body</p>')
+        call_command('send_queued_emails', stdout=mock.Mock())
+
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].alternatives[0][0], '<p>Body</p>')
+        email = EmailOutbox.objects.get()
+        self.assertEqual(email.status, 'sent')
+        self.assertEqual(email.attempts, 1)
+        self.assertIsNotNone(email.sent_at)
+
+    def test_failure_is_retried_with_backoff_then_dead_lettered(self):
+        enqueue_email('Hello', 'Body', ['client@example.com'])
+
+        with mock.patch('django.core.mail.EmailMultiAlternatives.send', side_effect=OSError('refused')):
+            stats = send_batch()
+        self.assertEqual(stats['retried'], 1)
+        email = EmailOutbox.objects.get()
+        self.assertEqual(email.status, 'pending')
+        self.assertGreater(email.next_attempt_at, timezone.now() + timedelta(seconds=50))
+        self.assertIn('refused', email.last_error)
+
+        # Not due yet
+        self.assertEqual(send_batch()['claimed'], 0)
+
+        EmailOutbox.objects.update(next_attempt_at=timezone.now())
+        with mock.patch('django.core.mail.EmailMultiAlternatives.send', side_effect=OSError('refused')):
+            stats = drain_outbox()
+        self.assertEqual(stats['dead'], 1)
+        self.assertEqual(EmailOutbox.objects.get().status, 'dead')
+        self.assertEqual(len(mail.outbox), 0)
+
+    def test_stale_sending_rows_are_reclaimed(self):
+        email = enqueue_email('Hello', 'Body', ['client@example.com'])
+        EmailOutbox.objects.filter(pk=email.pk).update(
+            status='sending',
+            date_updated=timezone.now() - timedelta(hours=1)
+        )
+        self.assertEqual(send_batch()['sent'], 1)
+        self.assertEqual(len(mail.outbox), 1)
@@ -3,7 +3,9 @@ from django.contrib import admin
 from django.utils.html import format_html
 from django.urls import reverse
 from django import forms
+from django.db.models import Count
 from accounts.admin import BaseAdminPermissions
+from . import counters
 from .models import (
     ContactMessage, GeneralMessage, GeneralMessageAttachment,
     Message, MessageAttachment, Conversation
@@ -115,16 +117,19 @@ class GeneralMessageAdmin(BaseAdminPermissions):
     
     def mark_as_lead(self, request, queryset):
         count = queryset.update(status='lead')
+        counters.invalidate('general')
         self.message_user(request, f'{count} messages marked as leads.')
     mark_as_lead.short_description = "Mark as Lead"
     
     def mark_as_client(self, request, queryset):
         count = queryset.update(status='client')
+        counters.invalidate('general')
         self.message_user(request, f'{count} messages marked as clients.')
     mark_as_client.short_description = "Mark as Client"
     
     def mark_as_closed(self, request, queryset):
         count = queryset.update(status='closed')
+        counters.invalidate('general')
         self.message_user(request, f'{count} messages marked as closed.')
     mark_as_closed.short_description = "Mark as Closed"
     
@@ -164,11 +169,15 @@ class ConversationAdmin(BaseAdminPermissions):
     
     list_display = [
         'conversation_type', 'title', 'user_or_session', 'order_link',
-        'status', 'message_count', 'unread_count_display', 'last_message_at', 'created_at', 'view_conversation_link'
+        'status', 'message_count', 'unread_count_display', 'needs_reply', 'last_message_at', 'created_at',
+        'view_conversation_link'
     ]
-    list_filter = ['conversation_type', 'status', 'created_at', 'last_message_at']
+    list_filter = ['needs_reply', 'conversation_type', 'status', 'last_sender', 'created_at', 'last_message_at']
     search_fields = ['title', 'user__email', 'order__order_number', 'session_id']
-    readonly_fields = ['created_at', 'updated_at', 'last_message_at', 'session_id', 'ip_address']
+    readonly_fields = [
+        'created_at', 'updated_at', 'last_message_at', 'session_id', 'ip_address',
+        'last_message_preview', 'last_sender', 'unread_for_user', 'unread_for_support', 'needs_reply'
+    ]
     ordering = ['-last_message_at', '-created_at']
     raw_id_fields = ['user', 'order']
     
@@ -184,12 +193,20 @@ class ConversationAdmin(BaseAdminPermissions):
             'classes': ('collapse',),
             'description': 'Session info for anonymous conversations'
         }),
+        ('Activity', {
+            'fields': ('last_message_preview', 'last_sender', 'needs_reply', 'unread_for_user', 'unread_for_support')
+        }),
         ('Timestamps', {
             'fields': ('created_at', 'updated_at', 'last_message_at'),
             'classes': ('collapse',)
         }),
     )
     
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related('user', 'order').annotate(
+            messages_total=Count('messages')
+        )
+    
     def user_or_session(self, obj):
         """Display user email or session ID for anonymous conversations"""
         if obj.user:
@@ -213,15 +230,17 @@ class ConversationAdmin(BaseAdminPermissions):
     order_link.short_description = 'Order'
     
     def message_count(self, obj):
-        return obj.messages.count()
+        return obj.messages_total
     message_count.short_description = 'Messages'
+    message_count.admin_order_field = 'messages_total'
     
     def unread_count_display(self, obj):
-        count = obj.unread_count
+        count = obj.unread_for_support
         if count > 0:
             return format_html('<span style="color: red; font-weight: bold;">{}</span>', count)
         return '0'
     unread_count_display.short_description = 'Unread'
+    unread_count_display.admin_order_field = 'unread_for_support'
     
     def view_conversation_link(self, obj):
         """Display a link to view the full conversation (goes to first message)"""
@@ -525,12 +544,18 @@ class MessageAdmin(BaseAdminPermissions):
     attachments_count.short_description = 'Files'
     
     def mark_as_read(self, request, queryset):
-        count = queryset.update(is_read=True)
+        user_ids = list(queryset.filter(sender='support').values_list('conversation__user_id', flat=True).distinct())
+        count = queryset.mark_read(is_read=True)
+        counters.invalidate_client(*user_ids)
+        counters.invalidate_admin_recent()
         self.message_user(request, f'{count} message(s) marked as read.')
     mark_as_read.short_description = '✓ Mark as read'
     
     def mark_as_unread(self, request, queryset):
-        count = queryset.update(is_read=False)
+        user_ids = list(queryset.filter(sender='support').values_list('conversation__user_id', flat=True).distinct())
+        count = queryset.mark_read(is_read=False)
+        counters.invalidate_client(*user_ids)
+        counters.invalidate_admin_recent()
         self.message_user(request, f'{count} message(s) marked as unread.')
     mark_as_unread.short_description = '✗ Mark as unread'
 
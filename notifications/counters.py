@@ -0,0 +1,143 @@
+# notifications/counters.py
+"""
+Cached unreplied/unread counters for the admin and client notification dropdowns.
+
+Each counter lives under its own key in the shared cache. On a miss its group is
+recounted with one aggregate query and cached for NOTIFICATION_COUNTS_TIMEOUT
+seconds. Model signals (notifications/signals.py) keep the cached values current:
+- a new contact or general message increments its counters
+- a user message or support reply that flips Conversation.needs_reply moves the
+  count of conversations awaiting a reply
+- other edits and deletes drop the group, so it is recounted on the next read
+The admin "recent messages" list is cached next to the counters and dropped
+whenever any of them changes.
+Code that changes these fields with QuerySet.update() must call invalidate() or
+invalidate_client(), because update() sends no signals.
+
+A miss that races a concurrent increment can cache a value that is off by one.
+The timeout bounds how long that lasts.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import Coalesce
+
+from .models import ContactMessage, Conversation, GeneralMessage, Message
+
+
+KEY_PREFIX = 'notification_counts:'
+ADMIN_RECENT_KEY = f'{KEY_PREFIX}admin_recent'
+
+
+def contact_counts():
+    return ContactMessage.objects.aggregate(
+        contact_unreplied=Count('pk', filter=Q(replied=False)),
+        contact_unread=Count('pk', filter=Q(is_read=False)),
+    )
+
+
+def general_counts():
+    return GeneralMessage.objects.aggregate(
+        general_unreplied=Count('pk', filter=Q(admin_reply='') | Q(admin_reply__isnull=True)),
+        general_unread=Count('pk', filter=Q(status='new')),
+    )
+
+
+def awaiting_reply():
+    """Signed-in users' conversations whose latest user message support has not answered"""
+    return Conversation.objects.filter(needs_reply=True).exclude(conversation_type='anonymous')
+
+
+def unreplied_user_messages():
+    """User messages in conversations awaiting a reply"""
+    return Message.objects.filter(sender='user', conversation__in=awaiting_reply())
+
+
+def user_message_counts():
+    return {'user_messages_unreplied': awaiting_reply().count()}
+
+
+# group -> (counter names, function recounting them)
+ADMIN_COUNTERS = {
+    'contact': (('contact_unreplied', 'contact_unread'), contact_counts),
+    'general': (('general_unreplied', 'general_unread'), general_counts),
+    'user_messages': (('user_messages_unreplied',), user_message_counts),
+}
+
+
+def _timeout():
+    return getattr(settings, 'NOTIFICATION_COUNTS_TIMEOUT', 300)
+
+
+def _key(name):
+    return f'{KEY_PREFIX}{name}'
+
+
+def _client_key(user_id):
+    return f'{KEY_PREFIX}client:{user_id}'
+
+
+def admin_counts():
+    """Return every admin counter; only groups missing from the cache are queried"""
+    names = [name for counter_names, _ in ADMIN_COUNTERS.values() for name in counter_names]
+    found = cache.get_many([_key(name) for name in names])
+
+    counts = {}
+    for counter_names, recount in ADMIN_COUNTERS.values():
+        if all(_key(name) in found for name in counter_names):
+            counts.update({name: found[_key(name)] for name in counter_names})
+            continue
+        values = recount()
+        cache.set_many({_key(name): value for name, value in values.items()}, _timeout())
+        counts.update(values)
+    return counts
+
+
+def adjust(name, delta):
+    """Add `delta` to a cached admin counter; a counter that is not cached is left to be recounted"""
+    if not delta:
+        return
+    try:
+        cache.incr(_key(name), delta)
+    except ValueError:
+        pass
+
+
+def invalidate(*groups):
+    """Drop admin counter groups (default: all) so the next read recounts them"""
+    names = [name for group in groups or ADMIN_COUNTERS for name in ADMIN_COUNTERS[group][0]]
+    cache.delete_many([_key(name) for name in names] + [ADMIN_RECENT_KEY])
+
+
+def admin_recent(producer):
+    """Return the cached admin recent-messages list, building it with `producer` on a miss"""
+    recent = cache.get(ADMIN_RECENT_KEY)
+    if recent is None:
+        recent = producer()
+        cache.set(ADMIN_RECENT_KEY, recent, _timeout())
+    return recent
+
+
+def invalidate_admin_recent():
+    cache.delete(ADMIN_RECENT_KEY)
+
+
+def client_counts(user_id):
+    """Unread support messages in a user's conversations, in total and per conversation type"""
+    key = _client_key(user_id)
+    counts = cache.get(key)
+    if counts is None:
+        counts = Conversation.objects.filter(user_id=user_id).aggregate(
+            unread_support_messages=Coalesce(Sum('unread_for_user'), 0),
+            unread_order_messages=Coalesce(Sum('unread_for_user', filter=Q(conversation_type='order')), 0),
+            unread_general_messages=Coalesce(Sum('unread_for_user', filter=Q(conversation_type='general')), 0),
+        )
+        cache.set(key, counts, _timeout())
+    return counts
+
+
+def invalidate_client(*user_ids):
+    """Drop the cached client counters of `user_ids`"""
+    keys = [_client_key(user_id) for user_id in set(user_ids) if user_id]
+    if keys:
+        cache.delete_many(keys)
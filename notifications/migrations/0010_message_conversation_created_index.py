@@ -0,0 +1,27 @@
+# Generated by Django 5.2.2 on 2026-10-18 15:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        (
+            "notifications",
+            "0009_remove_conversation_unique_general_conversation_per_user_and_more",
+        ),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="message",
+            name="user_messag_convers_14ebd6_idx",
+        ),
+        migrations.AddIndex(
+            model_name="message",
+            index=models.Index(
+                fields=["conversation", "created_at"],
+                name="user_messag_convers_af864e_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,60 @@
+# Generated by Django 5.2.2 on 2026-10-18 16:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("notifications", "0010_message_conversation_created_index"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="conversation",
+            name="last_message_preview",
+            field=models.CharField(
+                blank=True,
+                help_text="Start of the last message in this conversation",
+                max_length=255,
+            ),
+        ),
+        migrations.AddField(
+            model_name="conversation",
+            name="last_sender",
+            field=models.CharField(
+                blank=True,
+                help_text="Sender of the last message in this conversation",
+                max_length=20,
+            ),
+        ),
+        migrations.AddField(
+            model_name="conversation",
+            name="needs_reply",
+            field=models.BooleanField(
+                default=False,
+                help_text="The latest user message has not been answered by support",
+            ),
+        ),
+        migrations.AddField(
+            model_name="conversation",
+            name="unread_for_support",
+            field=models.PositiveIntegerField(
+                default=0, help_text="User messages support has not read"
+            ),
+        ),
+        migrations.AddField(
+            model_name="conversation",
+            name="unread_for_user",
+            field=models.PositiveIntegerField(
+                default=0, help_text="Support and system messages the user has not read"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="conversation",
+            index=models.Index(
+                fields=["needs_reply", "last_message_at"],
+                name="conversatio_needs_r_620ed6_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,65 @@
+# Generated by Django 5.2.2 on 2026-10-18 16:12
+
+from django.db import migrations
+from django.db.models import Count, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+USER_SENDERS = ("user", "anonymous")
+SUPPORT_SENDERS = ("support", "system")
+
+
+def backfill_conversation_state(apps, schema_editor):
+    """Fill the denormalized last message, unread counts and needs_reply of existing conversations"""
+    Conversation = apps.get_model("notifications", "Conversation")
+    Message = apps.get_model("notifications", "Message")
+
+    def unread(senders):
+        rows = (
+            Message.objects.filter(
+                conversation=OuterRef("pk"), is_read=False, sender__in=senders
+            )
+            .order_by()
+            .values("conversation")
+        )
+        return Coalesce(
+            Subquery(rows.annotate(count=Count("pk")).values("count")), Value(0)
+        )
+
+    Conversation.objects.update(
+        unread_for_user=unread(SUPPORT_SENDERS),
+        unread_for_support=unread(USER_SENDERS),
+    )
+
+    conversations = []
+    for conversation in Conversation.objects.only("id").iterator(chunk_size=200):
+        messages = Message.objects.filter(conversation=conversation).order_by(
+            "-created_at", "-pk"
+        )
+        last = messages.only("created_at", "content", "sender").first()
+        if last is None:
+            continue
+        last_exchange = (
+            messages.exclude(sender="system").values_list("sender", flat=True).first()
+        )
+        conversation.last_message_at = last.created_at
+        conversation.last_message_preview = last.content[:255]
+        conversation.last_sender = last.sender
+        conversation.needs_reply = last_exchange in USER_SENDERS
+        conversations.append(conversation)
+    Conversation.objects.bulk_update(
+        conversations,
+        ["last_message_at", "last_message_preview", "last_sender", "needs_reply"],
+        batch_size=200,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("notifications", "0011_conversation_denormalized_state"),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_conversation_state, migrations.RunPython.noop),
+    ]
@@ -1,13 +1,17 @@
 # notifications/models.py
 import uuid
 import os
-from django.db import models
+from django.db import models, transaction
+from django.db.models import Count, F
 from django.conf import settings
 from django.utils import timezone
 from django.core.exceptions import ValidationError
 from django.core.validators import FileExtensionValidator
 import re
 
+from wordknox.aggregates import related_aggregate
+from wordknox.pubsub import publish
+
 
 # Validators
 def validate_word_count(value):
@@ -311,6 +315,13 @@ class GeneralMessageAttachment(models.Model):
         super().save(*args, **kwargs)
 
 
+# Who is on which side of a conversation
+USER_SENDERS = ('user', 'anonymous')
+SUPPORT_SENDERS = ('support', 'system')
+
+PREVIEW_LENGTH = 255
+
+
 # ==================== CONVERSATION MODEL (for tracking chat threads) ====================
 class Conversation(models.Model):
     """
@@ -405,6 +416,30 @@ class Conversation(models.Model):
         help_text="Timestamp of the last message in this conversation"
     )
     
+    # Denormalized from Message, maintained by Message.save() and MessageQuerySet.mark_read()
+    last_message_preview = models.CharField(
+        max_length=PREVIEW_LENGTH,
+        blank=True,
+        help_text="Start of the last message in this conversation"
+    )
+    last_sender = models.CharField(
+        max_length=20,
+        blank=True,
+        help_text="Sender of the last message in this conversation"
+    )
+    unread_for_user = models.PositiveIntegerField(
+        default=0,
+        help_text="Support and system messages the user has not read"
+    )
+    unread_for_support = models.PositiveIntegerField(
+        default=0,
+        help_text="User messages support has not read"
+    )
+    needs_reply = models.BooleanField(
+        default=False,
+        help_text="The latest user message has not been answered by support"
+    )
+    
     class Meta:
         db_table = 'conversation'
         verbose_name = 'Conversation'
@@ -416,6 +451,7 @@ class Conversation(models.Model):
             models.Index(fields=['status']),
             models.Index(fields=['last_message_at']),
             models.Index(fields=['session_id']),
+            models.Index(fields=['needs_reply', 'last_message_at']),  # support inbox
         ]
         # Note: Unique constraints with conditions are not supported by MySQL.
         # Uniqueness is enforced at application level via get_or_create_general()
@@ -437,7 +473,74 @@ class Conversation(models.Model):
     @property
     def unread_count(self):
         """Count of unread messages in this conversation"""
-        return self.messages.filter(is_read=False).exclude(sender='user').count()
+        return self.unread_for_user
+    
+    def record_message(self, message):
+        """
+        Fold a newly created message into the denormalized state.
+        Returns True when the message flipped needs_reply.
+        """
+        changes = {
+            'last_message_at': message.created_at,
+            'last_message_preview': message.content[:PREVIEW_LENGTH],
+            'last_sender': message.sender,
+            'updated_at': timezone.now(),
+        }
+        if not message.is_read:
+            field = 'unread_for_support' if message.sender in USER_SENDERS else 'unread_for_user'
+            changes[field] = F(field) + 1
+        
+        rows = Conversation.objects.filter(pk=self.pk)
+        rows.update(**changes)
+        flipped = 0
+        if message.sender in USER_SENDERS:
+            flipped = rows.filter(needs_reply=False).update(needs_reply=True)
+            self.needs_reply = True
+        elif message.sender == 'support':
+            flipped = rows.filter(needs_reply=True).update(needs_reply=False)
+            self.needs_reply = False
+        
+        for field, value in changes.items():
+            if isinstance(value, F):
+                setattr(self, field, getattr(self, field) + 1)
+            else:
+                setattr(self, field, value)
+        return bool(flipped)
+    
+    @classmethod
+    def refresh_unread_counts(cls, conversation_ids):
+        """Recount unread_for_user/unread_for_support after messages were read-marked"""
+        conversation_ids = {str(conversation_id) for conversation_id in conversation_ids if conversation_id}
+        if conversation_ids:
+            cls.objects.filter(pk__in=conversation_ids).update(
+                unread_for_user=related_aggregate(
+                    Message, 'conversation', Count('pk'), default=0, is_read=False, sender__in=SUPPORT_SENDERS
+                ),
+                unread_for_support=related_aggregate(
+                    Message, 'conversation', Count('pk'), default=0, is_read=False, sender__in=USER_SENDERS
+                ),
+            )
+    
+    @classmethod
+    def rebuild_state(cls, conversation_ids):
+        """Recompute all denormalized fields from the messages, e.g. after messages were deleted"""
+        cls.refresh_unread_counts(conversation_ids)
+        for conversation in cls.objects.filter(pk__in={str(pk) for pk in conversation_ids if pk}):
+            messages = conversation.messages.order_by('-created_at', '-pk')
+            last = messages.first()
+            last_exchange = messages.exclude(sender='system').values_list('sender', flat=True).first()
+            conversation.last_message_at = last.created_at if last else None
+            conversation.last_message_preview = last.content[:PREVIEW_LENGTH] if last else ''
+            conversation.last_sender = last.sender if last else ''
+            conversation.needs_reply = last_exchange in USER_SENDERS
+            conversation.save(update_fields=[
+                'last_message_at', 'last_message_preview', 'last_sender', 'needs_reply'
+            ])
+    
+    @staticmethod
+    def channel_name(conversation_id):
+        """Pub/sub channel woken whenever a message is added to the conversation"""
+        return f'conversation:{conversation_id}'
     
     @classmethod
     def get_or_create_general(cls, user):
@@ -494,6 +597,21 @@ class Conversation(models.Model):
 
 
 # ==================== MESSAGE MODEL (for in-system users and anonymous) ====================
+class MessageQuerySet(models.QuerySet):
+    
+    def mark_read(self, is_read=True):
+        """
+        Bulk-set is_read and recount the unread counters of the affected conversations.
+        Returns the number of messages changed.
+        """
+        rows = self.exclude(is_read=is_read)
+        with transaction.atomic():
+            conversation_ids = list(rows.values_list('conversation_id', flat=True).distinct())
+            count = rows.update(is_read=is_read)
+            Conversation.refresh_unread_counts(conversation_ids)
+        return count
+
+
 class Message(models.Model):
     """
     Messages for both authenticated users and anonymous visitors
@@ -595,6 +713,8 @@ class Message(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    objects = MessageQuerySet.as_manager()
+    
     class Meta:
         db_table = 'user_message'
         verbose_name = 'User Message'
@@ -603,7 +723,7 @@ class Message(models.Model):
         indexes = [
             models.Index(fields=['user', 'message_type']),
             models.Index(fields=['order', 'message_type']),
-            models.Index(fields=['conversation']),
+            models.Index(fields=['conversation', 'created_at']),  # keyset pagination of a thread
             models.Index(fields=['created_at']),
             models.Index(fields=['session_id']),
         ]
@@ -623,11 +743,22 @@ class Message(models.Model):
         return sum(attachment.file_size for attachment in self.attachments.all())
     
     def save(self, *args, **kwargs):
-        """Update conversation's last_message_at on save"""
-        super().save(*args, **kwargs)
-        if self.conversation:
-            self.conversation.last_message_at = self.created_at
-            self.conversation.save(update_fields=['last_message_at', 'updated_at'])
+        """Keep the conversation's denormalized state current and wake streaming listeners"""
+        created = self._state.adding
+        update_fields = kwargs.get('update_fields')
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            if not self.conversation_id:
+                return
+            if created:
+                # Read by the notification counter signals
+                self._needs_reply_changed = self.conversation.record_message(self)
+            elif update_fields is None or 'is_read' in update_fields:
+                Conversation.refresh_unread_counts([self.conversation_id])
+        
+        if created:
+            channel = Conversation.channel_name(self.conversation_id)
+            transaction.on_commit(lambda: publish(channel))
 
 
 class MessageAttachment(models.Model):
@@ -123,10 +123,13 @@ class ConversationSerializer(serializers.ModelSerializer):
         fields = [
             'id', 'conversation_type', 'title', 'status',
             'user', 'user_email', 'order', 'order_number',
-            'unread_count', 'last_message',
+            'unread_count', 'last_message', 'last_message_preview', 'last_sender', 'needs_reply',
             'created_at', 'updated_at', 'last_message_at'
         ]
-        read_only_fields = ['id', 'user', 'order', 'created_at', 'updated_at', 'last_message_at']
+        read_only_fields = [
+            'id', 'user', 'order', 'created_at', 'updated_at', 'last_message_at',
+            'last_message_preview', 'last_sender', 'needs_reply'
+        ]
     
     def get_unread_count(self, obj):
         return obj.unread_count
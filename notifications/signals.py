@@ -0,0 +1,96 @@
+# notifications/signals.py
+"""
+Keep the cached notification counters (see counters.py) in step with the models.
+Cache updates run once the transaction commits, so a rolled-back write never
+moves a counter and a recount never caches uncommitted rows.
+"""
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from . import counters
+from .models import (
+    SUPPORT_SENDERS, USER_SENDERS, Conversation, ContactMessage, GeneralMessage, Message
+)
+
+
+def _conversation_user_id(message):
+    if not message.conversation_id:
+        return None
+    if Message._meta.get_field('conversation').is_cached(message):
+        return message.conversation.user_id
+    return Conversation.objects.filter(pk=message.conversation_id).values_list('user_id', flat=True).first()
+
+
+@receiver(post_save, sender=ContactMessage)
+def count_contact_message(sender, instance, created, raw=False, **kwargs):
+    """Keep the cached contact message counters current"""
+    def update():
+        if raw or not created:
+            counters.invalidate('contact')
+            return
+        counters.adjust('contact_unreplied', 0 if instance.replied else 1)
+        counters.adjust('contact_unread', 0 if instance.is_read else 1)
+        counters.invalidate_admin_recent()
+
+    transaction.on_commit(update)
+
+
+@receiver(post_save, sender=GeneralMessage)
+def count_general_message(sender, instance, created, raw=False, **kwargs):
+    """Keep the cached general message counters current"""
+    def update():
+        if raw or not created:
+            counters.invalidate('general')
+            return
+        counters.adjust('general_unreplied', 0 if instance.admin_reply else 1)
+        counters.adjust('general_unread', 1 if instance.status == 'new' else 0)
+        counters.invalidate_admin_recent()
+
+    transaction.on_commit(update)
+
+
+@receiver(post_save, sender=Message)
+def count_message(sender, instance, created, raw=False, **kwargs):
+    """
+    A conversation awaits a reply from its latest user message until support answers.
+    Message.save() sets _needs_reply_changed after this signal, but before commit.
+    """
+    user_id = _conversation_user_id(instance) if instance.sender in SUPPORT_SENDERS else None
+
+    def update():
+        if raw:
+            counters.invalidate('user_messages')
+            return
+        counters.invalidate_client(user_id)
+        if instance.sender == 'user':
+            counters.invalidate_admin_recent()
+        if created and getattr(instance, '_needs_reply_changed', False):
+            if instance.conversation.conversation_type != 'anonymous':
+                counters.adjust('user_messages_unreplied', 1 if instance.sender in USER_SENDERS else -1)
+                counters.invalidate_admin_recent()
+
+    transaction.on_commit(update)
+
+
+@receiver(post_delete, sender=ContactMessage)
+def uncount_contact_message(sender, instance, **kwargs):
+    transaction.on_commit(lambda: counters.invalidate('contact'))
+
+
+@receiver(post_delete, sender=GeneralMessage)
+def uncount_general_message(sender, instance, **kwargs):
+    transaction.on_commit(lambda: counters.invalidate('general'))
+
+
+@receiver(post_delete, sender=Message)
+def uncount_message(sender, instance, **kwargs):
+    """Recompute the conversation's denormalized state without the deleted message"""
+    Conversation.rebuild_state([instance.conversation_id])
+    user_ids = [instance.user_id, _conversation_user_id(instance)]
+
+    def update():
+        counters.invalidate('user_messages')
+        counters.invalidate_client(*user_ids)
+
+    transaction.on_commit(update)
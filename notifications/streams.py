@@ -0,0 +1,179 @@
+# notifications/streams.py
+"""
+Push delivery of conversation messages (ASGI only).
+
+Instead of re-fetching a whole thread on a timer, chat clients keep one
+connection per conversation:
+- <prefix>/stream/ is a Server-Sent Events stream. Every new message is sent as a
+  `message` event with its id, so EventSource resumes through Last-Event-ID.
+- <prefix>/poll/ is the long-poll fallback. It returns as soon as newer messages
+  exist, or with an empty list after CHAT_LONG_POLL_TIMEOUT seconds.
+
+Both take ?after=<last seen message id>. Without it they start from the newest
+message. The database is only queried on connect and when Message.save() publishes
+to the conversation channel (see wordknox/pubsub.py), so idle connections cost no
+queries.
+"""
+import asyncio
+import json
+import re
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import JsonResponse, StreamingHttpResponse
+from rest_framework.exceptions import AuthenticationFailed, ValidationError
+from rest_framework.throttling import SimpleRateThrottle
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+
+from wordknox.pagination import KeysetPagination
+from wordknox.pubsub import subscribe
+from .models import Conversation, Message
+from .serializers import AnonymousMessageSerializer, MessageListSerializer
+
+
+BATCH_SIZE = 100
+HEARTBEAT_INTERVAL = 15
+
+
+class ChatStreamThrottle(SimpleRateThrottle):
+    """Limit how often one client can open streams or long-polls"""
+    scope = 'chat_stream'
+
+    def get_cache_key(self, request, view):
+        return f'throttle_chat_stream_{self.get_ident(request)}'
+
+
+def _authenticate(request):
+    """Resolve the user from a JWT Authorization header or the session"""
+    try:
+        result = JWTAuthentication().authenticate(request)
+    except (InvalidToken, AuthenticationFailed):
+        return None
+    if result is not None:
+        return result[0]
+    return request.user if request.user.is_authenticated else None
+
+
+class ConversationFeed:
+    """Loads the messages of one conversation that come after a cursor"""
+
+    def __init__(self, conversation, serializer_class, context=None):
+        self.conversation = conversation
+        self.serializer_class = serializer_class
+        self.context = context or {}
+        self.queryset = Message.objects.filter(conversation=conversation).select_related(
+            'user', 'conversation'
+        ).prefetch_related('attachments')
+        self.paginator = KeysetPagination()
+
+    @property
+    def channel(self):
+        return Conversation.channel_name(self.conversation.pk)
+
+    def latest_cursor(self):
+        return self.queryset.order_by('-created_at', '-pk').values_list('pk', flat=True).first()
+
+    def load(self, cursor):
+        """Return (serialized messages, new cursor, more pending)"""
+        queryset = self.queryset
+        if cursor:
+            queryset = queryset.filter(self.paginator.newer_than(self.paginator.get_anchor(queryset, cursor)))
+        rows = list(queryset.order_by('created_at', 'pk')[:BATCH_SIZE])
+        if not rows:
+            return [], cursor, False
+        data = self.serializer_class(rows, many=True, context=self.context).data
+        return data, str(rows[-1].pk), len(rows) == BATCH_SIZE
+
+
+async def _feed_response(request, feed, mode):
+    if not await sync_to_async(ChatStreamThrottle().allow_request)(request, None):
+        return JsonResponse({'error': 'Too many connections, try again later'}, status=429)
+
+    cursor = request.GET.get('after') or request.headers.get('Last-Event-ID')
+    try:
+        if cursor:
+            await sync_to_async(feed.paginator.get_anchor)(feed.queryset, cursor)
+        else:
+            cursor = await sync_to_async(feed.latest_cursor)()
+    except ValidationError:
+        return JsonResponse({'error': 'Invalid cursor'}, status=400)
+
+    if mode == 'poll':
+        return await _long_poll(feed, cursor)
+
+    response = StreamingHttpResponse(_event_stream(feed, cursor), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'  # stop nginx from buffering the stream
+    return response
+
+
+async def _long_poll(feed, cursor):
+    timeout = getattr(settings, 'CHAT_LONG_POLL_TIMEOUT', 25)
+    async with subscribe(feed.channel) as subscription:
+        messages, cursor, _ = await sync_to_async(feed.load)(cursor)
+        if not messages and await subscription.wait(timeout):
+            messages, cursor, _ = await sync_to_async(feed.load)(cursor)
+    return JsonResponse(
+        {'conversation_id': str(feed.conversation.pk), 'messages': messages, 'after': cursor},
+        encoder=DjangoJSONEncoder
+    )
+
+
+async def _event_stream(feed, cursor):
+    """Yield SSE frames until CHAT_STREAM_TIMEOUT; clients reconnect with Last-Event-ID"""
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + getattr(settings, 'CHAT_STREAM_TIMEOUT', 300)
+    async with subscribe(feed.channel) as subscription:
+        yield 'retry: 3000\n\n'
+        pending = True
+        while True:
+            if pending:
+                messages, cursor, pending = await sync_to_async(feed.load)(cursor)
+                for message in messages:
+                    payload = json.dumps(message, cls=DjangoJSONEncoder)
+                    yield f"id: {message['id']}\nevent: message\ndata: {payload}\n\n"
+                if pending:
+                    continue
+
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                return
+            pending = await subscription.wait(min(HEARTBEAT_INTERVAL, remaining))
+            if not pending:
+                yield ': keep-alive\n\n'
+
+
+async def _get_conversation(**filters):
+    return await Conversation.objects.filter(**filters).afirst()
+
+
+async def anonymous_chat_feed(request, mode):
+    """
+    Stream or long-poll an anonymous conversation
+    Requires session_id query parameter
+    """
+    session_id = request.GET.get('session_id', '')
+    conversation = None
+    if re.match(r'^[a-zA-Z0-9\-]{32,64}$', session_id):
+        conversation = await _get_conversation(session_id=session_id, conversation_type='anonymous')
+    if conversation is None:
+        return JsonResponse({'error': 'Conversation not found'}, status=404)
+
+    return await _feed_response(request, ConversationFeed(conversation, AnonymousMessageSerializer), mode)
+
+
+async def conversation_feed(request, conversation_id, mode):
+    """Stream or long-poll a conversation owned by the user"""
+    user = await sync_to_async(_authenticate)(request)
+    if user is None:
+        return JsonResponse({'detail': 'Authentication credentials were not provided.'}, status=401)
+
+    conversation = await _get_conversation(pk=conversation_id)
+    # Same rule as MessageViewSet: owners only. Partners are is_staff too, so staff get no exception
+    if conversation is None or str(conversation.user_id) != str(user.pk):
+        return JsonResponse({'detail': 'Not found.'}, status=404)
+
+    feed = ConversationFeed(conversation, MessageListSerializer, context={'request': request})
+    return await _feed_response(request, feed, mode)
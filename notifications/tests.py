@@ -1,3 +1,267 @@
-from django.test import TestCase
+import asyncio
+from datetime import timedelta
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import AsyncClient, TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from . import counters
+from .models import ContactMessage, Conversation, Message
+
+User = get_user_model()
+
+SESSION_ID = 'a' * 32
+
+
+class MessageKeysetPaginationTests(TestCase):
+    """Chat endpoints page by (created_at, id) cursors instead of offsets"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.conversation, _ = Conversation.get_or_create_anonymous(session_id=SESSION_ID)
+        start = timezone.now() - timedelta(hours=1)
+        cls.messages = []
+        for index in range(7):
+            message = Message.objects.create(
+                conversation=cls.conversation,
+                message_type='anonymous',
+                sender='anonymous',
+                content=f'Message {index}',
+                session_id=SESSION_ID,
+            )
+            # Pairs of messages share a timestamp so the id tie-breaker matters
+            Message.objects.filter(pk=message.pk).update(created_at=start + timedelta(minutes=index // 2))
+            cls.messages.append(message)
+        cls.ordered_ids = list(
+            Message.objects.order_by('created_at', 'pk').values_list('pk', flat=True)
+        )
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def get_chat(self, **params):
+        response = self.client.get('/api/v1/notifications/anonymous-chat/', {'session_id': SESSION_ID, **params})
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def ids(self, data):
+        return [message['id'] for message in data['messages']]
+
+    def test_latest_page_by_default(self):
+        data = self.get_chat(limit=3)
+        self.assertEqual(self.ids(data), self.ordered_ids[-3:])
+        self.assertTrue(data['has_older'])
+        self.assertFalse(data['has_newer'])
+        self.assertEqual(data['before'], self.ordered_ids[-3])
+        self.assertEqual(data['after'], self.ordered_ids[-1])
+
+    def test_walk_back_with_before(self):
+        seen = []
+        before = None
+        while True:
+            data = self.get_chat(limit=3, **({'before': before} if before else {}))
+            seen = self.ids(data) + seen
+            before = data['before']
+            if not data['has_older']:
+                break
+        self.assertEqual(seen, self.ordered_ids)
+
+    def test_poll_with_after_returns_only_new_messages(self):
+        data = self.get_chat(after=self.ordered_ids[3])
+        self.assertEqual(self.ids(data), self.ordered_ids[4:])
+
+        data = self.get_chat(after=self.ordered_ids[-1])
+        self.assertEqual(data['messages'], [])
+        self.assertEqual(data['after'], self.ordered_ids[-1])
+
+    def test_unknown_cursor_is_rejected(self):
+        response = self.client.get(
+            '/api/v1/notifications/anonymous-chat/',
+            {'session_id': SESSION_ID, 'after': 'missing'}
+        )
+        self.assertEqual(response.status_code, 400)
+
+
+class NotificationCounterTests(TestCase):
+    """Summary counters are served from the cache and kept current by signals"""
+
+    def setUp(self):
+        cache.clear()
+        self.admin = User.objects.create_user(email='admin@example.com', password='pass', role='admin')
+        self.user = User.objects.create_user(email='client@example.com', password='pass', role='client')
+        self.conversation, _ = Conversation.get_or_create_general(self.user)
+        self.client = APIClient()
+
+    def send(self, sender, content='Hello'):
+        with self.captureOnCommitCallbacks(execute=True):
+            return Message.objects.create(
+                conversation=self.conversation,
+                message_type='general',
+                sender=sender,
+                user=self.user,
+                content=content,
+            )
+
+    def recount(self):
+        cache.clear()
+        return counters.admin_counts()
+
+    def test_signals_keep_cached_counts_exact(self):
+        counters.admin_counts()
+        with self.captureOnCommitCallbacks(execute=True):
+            ContactMessage.objects.create(name='Visitor', email='visitor@example.com', message='Hi')
+        self.send('user')
+        self.send('user')
+        # Counted per conversation awaiting a reply
+        self.assertEqual(counters.admin_counts()['user_messages_unreplied'], 1)
+        self.assertEqual(counters.admin_counts()['contact_unreplied'], 1)
+
+        self.send('support')
+        self.assertEqual(counters.admin_counts()['user_messages_unreplied'], 0)
+        self.send('user')
+        cached = counters.admin_counts()
+        self.assertEqual(cached['user_messages_unreplied'], 1)
+        self.assertEqual(cached, self.recount())
+
+    def test_admin_summary_is_served_from_cache(self):
+        self.send('user')
+        self.client.force_authenticate(self.admin)
+        url = '/api/v1/notifications/admin-summary/'
+        self.client.get(url)
+
+        with self.assertNumQueries(0):
+            response = self.client.get(url)
+        self.assertEqual(response.data['summary']['user_messages']['unreplied'], 1)
+        self.assertEqual(len(response.data['recent_messages']), 1)
+
+    def test_client_counts_follow_support_replies_and_reads(self):
+        self.assertEqual(counters.client_counts(self.user.pk)['unread_support_messages'], 0)
+        self.send('support')
+        self.assertEqual(counters.client_counts(self.user.pk)['unread_general_messages'], 1)
+
+        self.client.force_authenticate(self.user)
+        self.client.post('/api/v1/notifications/messages/mark-read/', {}, format='json')
+        self.assertEqual(counters.client_counts(self.user.pk)['unread_support_messages'], 0)
+
+
+class ConversationStateTests(TestCase):
+    """Conversation carries its last message, unread counts and needs_reply"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(email='client@example.com', password='pass', role='client')
+        self.conversation, _ = Conversation.get_or_create_general(self.user)
+
+    def send(self, sender, content='Hello'):
+        return Message.objects.create(
+            conversation=self.conversation, message_type='general', sender=sender, user=self.user, content=content
+        )
+
+    def state(self):
+        return Conversation.objects.values(
+            'last_sender', 'last_message_preview', 'unread_for_user', 'unread_for_support', 'needs_reply'
+        ).get(pk=self.conversation.pk)
+
+    def test_new_messages_update_state(self):
+        self.send('user', 'Question')
+        self.send('user', 'Another question')
+        self.assertEqual(self.state(), {
+            'last_sender': 'user', 'last_message_preview': 'Another question',
+            'unread_for_user': 0, 'unread_for_support': 2, 'needs_reply': True,
+        })
+
+        self.send('support', 'Answer')
+        self.send('system', 'Order updated')
+        state = self.state()
+        self.assertEqual(state['last_sender'], 'system')
+        self.assertEqual((state['unread_for_user'], state['needs_reply']), (2, False))
+
+    def test_mark_read_recounts(self):
+        self.send('user')
+        self.send('support')
+        self.send('support')
+
+        self.assertEqual(Message.objects.filter(sender='support').mark_read(), 2)
+        self.assertEqual(self.state()['unread_for_user'], 0)
+        self.assertEqual(self.state()['unread_for_support'], 1)
+
+        message = Message.objects.get(sender='user')
+        message.is_read = True
+        message.save()
+        self.assertEqual(self.state()['unread_for_support'], 0)
+
+    def test_delete_rebuilds_state(self):
+        self.send('user', 'Question')
+        self.send('support', 'Answer').delete()
+        state = self.state()
+        self.assertEqual((state['last_message_preview'], state['needs_reply'], state['unread_for_user']), ('Question', True, 0))
+
+
+@override_settings(CHAT_BROKER_POLL_INTERVAL=0.1, CHAT_LONG_POLL_TIMEOUT=1)
+class ChatLongPollTests(TransactionTestCase):
+    """The long-poll endpoint returns as soon as a committed message is published"""
+
+    url = '/api/v1/notifications/anonymous-chat/poll/'
+
+    def create_message(self, content):
+        conversation, _ = Conversation.get_or_create_anonymous(session_id=SESSION_ID)
+        return Message.objects.create(
+            conversation=conversation,
+            message_type='anonymous',
+            sender='support',
+            content=content,
+            session_id=SESSION_ID,
+        )
+
+    async def test_wakes_up_on_new_message(self):
+        first = await sync_to_async(self.create_message)('Hello')
+
+        async def reply():
+            await asyncio.sleep(0.2)
+            return await sync_to_async(self.create_message)('Reply')
+
+        task = asyncio.ensure_future(reply())
+        response = await AsyncClient().get(self.url, {'session_id': SESSION_ID, 'after': str(first.pk)})
+        reply_message = await task
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([message['content'] for message in response.json()['messages']], ['Reply'])
+        self.assertEqual(response.json()['after'], str(reply_message.pk))
+
+    async def test_times_out_without_messages(self):
+        first = await sync_to_async(self.create_message)('Hello')
+
+        response = await AsyncClient().get(self.url, {'session_id': SESSION_ID, 'after': str(first.pk)})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['messages'], [])
+        self.assertEqual(response.json()['after'], str(first.pk))
+
+    async def test_unknown_conversation(self):
+        response = await AsyncClient().get(self.url, {'session_id': 'c' * 32})
+
+        self.assertEqual(response.status_code, 404)
+
+    async def test_conversation_feed_is_limited_to_its_owner(self):
+        def create_users():
+            owner = User.objects.create_user(email='owner@example.com', password='pass', role='client')
+            partner = User.objects.create_user(email='partner@example.com', password='pass', role='partner')
+            conversation, _ = Conversation.get_or_create_general(owner)
+            Message.objects.create(
+                conversation=conversation, user=owner, message_type='general', sender='user', content='Hello'
+            )
+            return owner, partner, conversation
+
+        owner, partner, conversation = await sync_to_async(create_users)()
+        url = f'/api/v1/notifications/conversations/{conversation.pk}/poll/'
+
+        client = AsyncClient()
+        await client.aforce_login(partner)
+        self.assertEqual((await client.get(url)).status_code, 404)
+
+        await client.aforce_login(owner)
+        response = await client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['conversation_id'], str(conversation.pk))
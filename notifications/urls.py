@@ -1,7 +1,7 @@
 # notifications/urls.py
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from . import views
+from . import streams, views
 
 router = DefaultRouter()
 router.register(r'contact-messages', views.ContactMessageViewSet, basename='contactmessage')
@@ -10,6 +10,11 @@ router.register(r'messages', views.MessageViewSet, basename='message')
 router.register(r'anonymous-chat', views.AnonymousChatViewSet, basename='anonymouschat')
 
 urlpatterns = [
+    # Push delivery (ASGI): SSE streams and long-poll fallbacks, before the router's detail routes
+    path('anonymous-chat/stream/', streams.anonymous_chat_feed, {'mode': 'stream'}, name='anonymous-chat-stream'),
+    path('anonymous-chat/poll/', streams.anonymous_chat_feed, {'mode': 'poll'}, name='anonymous-chat-poll'),
+    path('conversations/<str:conversation_id>/stream/', streams.conversation_feed, {'mode': 'stream'}, name='conversation-stream'),
+    path('conversations/<str:conversation_id>/poll/', streams.conversation_feed, {'mode': 'poll'}, name='conversation-poll'),
     path('', include(router.urls)),
     path('admin-summary/', views.AdminNotificationSummaryView.as_view(), name='admin-notification-summary'),
     path('client-summary/', views.ClientNotificationSummaryView.as_view(), name='client-notification-summary'),
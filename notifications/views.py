@@ -7,8 +7,9 @@ from rest_framework.views import APIView
 from rest_framework.throttling import AnonRateThrottle
 from django_filters.rest_framework import DjangoFilterBackend
 from django.utils import timezone
-from django.db.models import Q, Count, Exists, OuterRef
+from django.db.models import Q, Count
 
+from . import counters
 from .models import (
     ContactMessage, GeneralMessage, GeneralMessageAttachment,
     Message, MessageAttachment, Conversation
@@ -21,6 +22,7 @@ from .serializers import (
 )
 from accounts.permissions import IsDeveloperOrAdmin
 from emails.base import BaseEmail
+from wordknox.pagination import KeysetPagination
 
 
 # Custom throttle classes for anonymous chat
@@ -107,6 +109,7 @@ class ContactMessageViewSet(viewsets.ModelViewSet):
             )
         
         count = ContactMessage.objects.filter(id__in=ids).update(is_read=True)
+        counters.invalidate('contact')
         return Response({'count': count})
 
 
@@ -207,6 +210,7 @@ class MessageViewSet(viewsets.ModelViewSet):
     serializer_class = MessageSerializer
     permission_classes = [permissions.IsAuthenticated]
     parser_classes = [JSONParser, MultiPartParser, FormParser]
+    pagination_class = KeysetPagination  # ?before=/?after=<message id>, newest page by default
     
     def get_queryset(self):
         """Filter messages by authenticated user and conversation context"""
@@ -364,7 +368,7 @@ class MessageViewSet(viewsets.ModelViewSet):
                     id=nid,
                     conversation__user=user,
                     is_read=False
-                ).update(is_read=True)
+                ).mark_read()
                 messages_updated += msg_count
         else:
             # Bulk mark by filters
@@ -376,8 +380,10 @@ class MessageViewSet(viewsets.ModelViewSet):
             if order_id:
                 queryset = queryset.filter(order_id=order_id)
             
-            messages_updated = queryset.update(is_read=True)
+            messages_updated = queryset.mark_read()
         
+        if messages_updated:
+            counters.invalidate_client(user.pk)
         total_updated = messages_updated
         
         return Response({
@@ -427,6 +433,8 @@ class AnonymousChatViewSet(viewsets.ViewSet):
         """
         Get messages for an anonymous conversation
         Requires session_id query parameter
+        Paginated by message id: ?after=<last seen id> returns only newer messages,
+        ?before=<id> loads older history; no cursor returns the latest page
         """
         session_id = request.query_params.get('session_id')
         
@@ -441,22 +449,30 @@ class AnonymousChatViewSet(viewsets.ViewSet):
                 session_id=session_id,
                 conversation_type='anonymous'
             )
-            messages = Message.objects.filter(
-                conversation=conversation
-            ).order_by('created_at')
+            paginator = KeysetPagination()
+            messages = paginator.paginate_queryset(
+                Message.objects.filter(conversation=conversation),
+                request,
+                view=self
+            )
             
             serializer = AnonymousMessageSerializer(messages, many=True)
             return Response({
                 'conversation_id': str(conversation.id),
                 'messages': serializer.data,
-                'status': conversation.status
+                'status': conversation.status,
+                **paginator.get_cursor_data()
             })
         except Conversation.DoesNotExist:
             # No conversation yet - return empty
             return Response({
                 'conversation_id': None,
                 'messages': [],
-                'status': 'new'
+                'status': 'new',
+                'before': None,
+                'after': None,
+                'has_older': False,
+                'has_newer': False
             })
     
     def create(self, request):
@@ -507,10 +523,6 @@ class AnonymousChatViewSet(viewsets.ViewSet):
             is_read=False
         )
         
-        # Update conversation last_message_at
-        conversation.last_message_at = message.created_at
-        conversation.save(update_fields=['last_message_at', 'updated_at'])
-        
         # Send notification to admin
         send_anonymous_message_notification(message, conversation)
         
@@ -541,7 +553,7 @@ class AnonymousChatViewSet(viewsets.ViewSet):
                 conversation=conversation,
                 sender='support',
                 is_read=False
-            ).update(is_read=True)
+            ).mark_read()
             
             return Response({
                 'success': True,
@@ -590,32 +602,32 @@ class AdminNotificationSummaryView(APIView):
     permission_classes = [IsDeveloperOrAdmin]
     
     def get(self, request):
-        # Contact Messages - unreplied
-        contact_unreplied = ContactMessage.objects.filter(replied=False).count()
-        contact_unread = ContactMessage.objects.filter(is_read=False).count()
-        
-        # General Messages - no admin reply
-        general_unreplied = GeneralMessage.objects.filter(
-            Q(admin_reply='') | Q(admin_reply__isnull=True)
-        ).count()
-        general_unread = GeneralMessage.objects.filter(status='new').count()
-        
-        # User Messages - messages from users without any support reply
-        # A message needs reply if sender='user' and no support reply exists in same conversation
-        user_messages_unreplied = Message.objects.filter(
-            sender='user'
-        ).annotate(
-            has_support_reply=Exists(
-                Message.objects.filter(
-                    conversation=OuterRef('conversation'),
-                    sender='support'
-                )
-            )
-        ).filter(has_support_reply=False).count()
-        
-        total_unreplied = contact_unreplied + general_unreplied + user_messages_unreplied
+        # Counters come from the cache, maintained by notifications/signals.py
+        counts = counters.admin_counts()
+        total_unreplied = (
+            counts['contact_unreplied'] + counts['general_unreplied'] + counts['user_messages_unreplied']
+        )
         
-        # Recent unreplied messages (last 10)
+        return Response({
+            'summary': {
+                'contact_messages': {
+                    'unreplied': counts['contact_unreplied'],
+                    'unread': counts['contact_unread'],
+                },
+                'general_messages': {
+                    'unreplied': counts['general_unreplied'],
+                    'unread': counts['general_unread'],
+                },
+                'user_messages': {
+                    'unreplied': counts['user_messages_unreplied'],
+                },
+                'total_unreplied': total_unreplied,
+            },
+            'recent_messages': counters.admin_recent(self.get_recent_messages),
+        })
+    
+    def get_recent_messages(self):
+        """Recent unreplied messages (last 10)"""
         recent_messages = []
         
         # Recent contact messages
@@ -655,16 +667,9 @@ class AdminNotificationSummaryView(APIView):
             })
         
         # Recent user messages needing reply
-        recent_user_msgs = Message.objects.filter(
-            sender='user'
-        ).annotate(
-            has_support_reply=Exists(
-                Message.objects.filter(
-                    conversation=OuterRef('conversation'),
-                    sender='support'
-                )
-            )
-        ).filter(has_support_reply=False).select_related('user', 'order').order_by('-created_at')[:5]
+        recent_user_msgs = counters.unreplied_user_messages().select_related(
+            'user', 'order'
+        ).order_by('-created_at')[:5]
         
         for msg in recent_user_msgs:
             user_name = msg.user.full_name if msg.user and msg.user.full_name else (msg.user.email if msg.user else 'User')
@@ -685,25 +690,7 @@ class AdminNotificationSummaryView(APIView):
         
         # Sort by created_at descending
         recent_messages.sort(key=lambda x: x['created_at'], reverse=True)
-        recent_messages = recent_messages[:10]
-        
-        return Response({
-            'summary': {
-                'contact_messages': {
-                    'unreplied': contact_unreplied,
-                    'unread': contact_unread,
-                },
-                'general_messages': {
-                    'unreplied': general_unreplied,
-                    'unread': general_unread,
-                },
-                'user_messages': {
-                    'unreplied': user_messages_unreplied,
-                },
-                'total_unreplied': total_unreplied,
-            },
-            'recent_messages': recent_messages,
-        })
+        return recent_messages[:10]
 
 
 def send_new_message_notification(message_instance):
@@ -785,31 +772,8 @@ class ClientNotificationSummaryView(APIView):
     def get(self, request):
         user = request.user
         
-        # Count unread support messages in user's conversations
-        # Support messages are Message records with sender='support' in user's conversations
-        unread_support_messages = Message.objects.filter(
-            conversation__user=user,
-            sender='support',
-            is_read=False
-        ).count()
-        
-        # Count unread order messages (from support)
-        unread_order_messages = Message.objects.filter(
-            conversation__user=user,
-            message_type='order',
-            sender='support',
-            is_read=False
-        ).count()
-        
-        # Count unread general messages (from support)
-        unread_general_messages = Message.objects.filter(
-            conversation__user=user,
-            message_type='general',
-            sender='support',
-            is_read=False
-        ).count()
-        
-        total_unread = unread_support_messages
+        # Cached counts, dropped by notifications/signals.py when support replies
+        counts = counters.client_counts(user.pk)
         
         # Recent notifications (support messages in user's conversations)
         recent_notifications = []
@@ -840,10 +804,10 @@ class ClientNotificationSummaryView(APIView):
         
         return Response({
             'summary': {
-                'unread_support_messages': unread_support_messages,
-                'unread_order_messages': unread_order_messages,
-                'unread_general_messages': unread_general_messages,
-                'total_unread': total_unread,
+                'unread_support_messages': counts['unread_support_messages'],
+                'unread_order_messages': counts['unread_order_messages'],
+                'unread_general_messages': counts['unread_general_messages'],
+                'total_unread': counts['unread_support_messages'],
             },
             'recent_notifications': recent_notifications,
         })
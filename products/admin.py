@@ -9,6 +9,7 @@ from .models import (
     Product, ProductGalleryImage, ProductReview, ProductPurchase, 
     ProductTechnology, ProductTag, ProductUpdate
 )
+from .utils import rebuild_product_ratings
 
 
 class ProductGalleryImageInline(admin.TabularInline):
@@ -190,9 +191,8 @@ class ProductAdmin(BaseAdminPermissions):
     
     def average_rating_display(self, obj):
         """Display average rating with stars"""
-        approved_reviews = obj.reviews.filter(approved=True)
-        if approved_reviews.exists():
-            avg_rating = sum(review.rating for review in approved_reviews) / approved_reviews.count()
+        if obj.rating_count:
+            avg_rating = float(obj.rating_average)
             stars = '⭐' * int(avg_rating)
             return format_html('{} {:.1f}', stars, avg_rating)
         return '-'
@@ -353,13 +353,17 @@ class ProductReviewAdmin(BaseAdminPermissions):
     
     def approve_reviews(self, request, queryset):
         """Approve selected reviews"""
+        product_ids = set(queryset.values_list('product_id', flat=True))
         updated = queryset.update(approved=True)
+        rebuild_product_ratings(product_ids)
         self.message_user(request, f"Successfully approved {updated} review(s).")
     approve_reviews.short_description = "Approve selected reviews"
     
     def reject_reviews(self, request, queryset):
         """Reject selected reviews"""
+        product_ids = set(queryset.values_list('product_id', flat=True))
         updated = queryset.update(approved=False)
+        rebuild_product_ratings(product_ids)
         self.message_user(request, f"Successfully rejected {updated} review(s).")
     reject_reviews.short_description = "Reject selected reviews"
     
@@ -0,0 +1,28 @@
+# products/management/commands/rebuild_product_ratings.py
+from django.core.management.base import BaseCommand
+
+from products.models import Product
+from products.utils import rebuild_product_ratings
+
+
+class Command(BaseCommand):
+    help = 'Recompute the denormalized rating summary on Product from approved reviews'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'slugs',
+            nargs='*',
+            help='Only rebuild these products (default: rebuild every product)'
+        )
+
+    def handle(self, *args, **options):
+        slugs = options.get('slugs')
+        product_ids = None
+        if slugs:
+            product_ids = list(Product.objects.filter(slug__in=slugs).values_list('pk', flat=True))
+        
+        updated = rebuild_product_ratings(product_ids)
+        
+        self.stdout.write(
+            self.style.SUCCESS(f'Rebuilt rating summaries for {updated} product(s)')
+        )
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.2 on 2026-10-18 15:47
+
+from django.db import migrations
+from django.db.models import Count
+
+
+def backfill_product_ratings(apps, schema_editor):
+    """Populate the rating summary columns from existing approved reviews"""
+    Product = apps.get_model('products', 'Product')
+    ProductReview = apps.get_model('products', 'ProductReview')
+    
+    summaries = {}
+    rows = ProductReview.objects.filter(approved=True).order_by().values('product_id', 'rating').annotate(
+        count=Count('id')
+    )
+    for row in rows:
+        summary = summaries.setdefault(row['product_id'], {'rating_sum': 0, 'rating_count': 0})
+        summary['rating_sum'] += row['rating'] * row['count']
+        summary['rating_count'] += row['count']
+        if 1 <= row['rating'] <= 5:
+            field = f"rating_{row['rating']}_count"
+            summary[field] = summary.get(field, 0) + row['count']
+    
+    for product_id, summary in summaries.items():
+        summary['rating_average'] = round(summary['rating_sum'] / summary['rating_count'], 2)
+        Product.objects.filter(pk=product_id).update(**summary)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("products", "0002_product_rating_summary"),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_product_ratings, migrations.RunPython.noop),
+    ]
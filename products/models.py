@@ -1,12 +1,52 @@
 # products/models.py
 import uuid
 from django.db import models
+from django.db.models import Count, Sum
 from django.utils import timezone
 from django.utils.text import slugify
 from django.conf import settings
 
+from wordknox.aggregates import related_aggregate
+from wordknox.tracking import FieldTrackerMixin
 
-class Product(models.Model):
+
+class ProductQuerySet(models.QuerySet):
+    """Per-product aggregates as annotations, so list serializers don't query once per row"""
+
+    def with_review_stats(self):
+        """
+        pending_reviews_count; approved review totals are the denormalized
+        rating_count / rating_average columns
+        """
+        return self.annotate(
+            pending_reviews_count=related_aggregate(ProductReview, 'product', Count('id'), default=0, approved=False),
+        )
+
+    def with_gallery_stats(self):
+        """gallery_images_total"""
+        return self.annotate(
+            gallery_images_total=related_aggregate(ProductGalleryImage, 'product', Count('id'), default=0),
+        )
+
+    def with_purchase_stats(self):
+        """completed_purchases_count and completed_purchases_revenue"""
+        return self.annotate(
+            completed_purchases_count=related_aggregate(
+                ProductPurchase, 'product', Count('id'), default=0, status='completed'
+            ),
+            completed_purchases_revenue=related_aggregate(
+                ProductPurchase, 'product', Sum('purchase_amount'), status='completed'
+            ),
+        )
+
+    def for_listing(self):
+        """Related rows and review stats needed by the product list serializers"""
+        return self.select_related('creator', 'base_project').prefetch_related(
+            'technologies', 'tags'
+        ).with_review_stats()
+
+
+class Product(FieldTrackerMixin, models.Model):
     """
     Digital products (templates, themes, tools, etc.)
     Separate from services - these are ready-made digital assets
@@ -82,6 +122,17 @@ class Product(models.Model):
     # Metrics
     download_count = models.IntegerField(default=0)
     
+    # Approved review summary, maintained by products/signals.py
+    # (repair with: python manage.py rebuild_product_ratings)
+    rating_sum = models.PositiveIntegerField(default=0)
+    rating_count = models.PositiveIntegerField(default=0)
+    rating_average = models.DecimalField(max_digits=3, decimal_places=2, default=0)
+    rating_1_count = models.PositiveIntegerField(default=0)
+    rating_2_count = models.PositiveIntegerField(default=0)
+    rating_3_count = models.PositiveIntegerField(default=0)
+    rating_4_count = models.PositiveIntegerField(default=0)
+    rating_5_count = models.PositiveIntegerField(default=0)
+    
     # Product details
     version = models.CharField(max_length=20, default='1.0.0')
     license_type = models.CharField(
@@ -110,6 +161,8 @@ class Product(models.Model):
     date_created = models.DateTimeField(default=timezone.now)
     date_updated = models.DateTimeField(auto_now=True)
     
+    objects = ProductQuerySet.as_manager()
+    
     class Meta:
         db_table = 'product'
         verbose_name = 'Product'
@@ -121,6 +174,7 @@ class Product(models.Model):
             models.Index(fields=['featured', 'active']),
             models.Index(fields=['creator']),
             models.Index(fields=['base_project']),
+            models.Index(fields=['active', 'rating_average']),
         ]
     
     def __str__(self):
@@ -280,9 +334,16 @@ class ProductPurchase(models.Model):
     
     def __str__(self):
         return f"{self.product.name} purchased by {self.client.email}"
+    
+    def save(self, *args, **kwargs):
+        """Auto-generate license_key if not set"""
+        if not self.license_key:
+            from .utils import generate_license_key
+            self.license_key = generate_license_key()
+        super().save(*args, **kwargs)
 
 
-class ProductReview(models.Model):
+class ProductReview(FieldTrackerMixin, models.Model):
     """
     Product reviews and ratings from customers
     """
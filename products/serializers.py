@@ -2,8 +2,10 @@
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
 from django.utils.text import slugify
+from django.db.models import Sum
 from blog.models import Tag  # Shared with blog app
 from projects.models import Technology, Project  # Shared with projects app
+from wordknox.aggregates import annotated
 from .models import (
     Product, ProductGalleryImage, ProductTechnology, ProductReview, 
     ProductPurchase, ProductTag, ProductUpdate
@@ -12,6 +14,36 @@ from .models import (
 User = get_user_model()
 
 
+# Approved review totals come from the denormalized rating columns; the rest
+# read the ProductQuerySet annotations.
+
+def product_average_rating(obj):
+    """Average approved rating rounded to one decimal, 0 without reviews"""
+    return round(float(obj.rating_average), 1) if obj.rating_count else 0
+
+
+def product_reviews_count(obj, approved=True):
+    """Count of approved (or pending) reviews"""
+    if approved:
+        return obj.rating_count
+    return annotated(obj, 'pending_reviews_count', obj.reviews.filter(approved=False).count)
+
+
+def product_gallery_images_count(obj):
+    """Count of gallery images"""
+    return annotated(obj, 'gallery_images_total', obj.gallery_images.count)
+
+
+def product_purchase_totals(obj):
+    """(completed purchases, completed revenue)"""
+    purchases = obj.purchases.filter(status='completed')
+    count = annotated(obj, 'completed_purchases_count', purchases.count)
+    revenue = annotated(
+        obj, 'completed_purchases_revenue', lambda: purchases.aggregate(total=Sum('purchase_amount'))['total']
+    )
+    return count, revenue or 0
+
+
 class CreatorSerializer(serializers.ModelSerializer):
     """
     Serializer for product creators
@@ -179,19 +211,15 @@ class ProductListSerializer(serializers.ModelSerializer):
     
     def get_average_rating(self, obj):
         """Calculate average rating from approved reviews"""
-        approved_reviews = obj.reviews.filter(approved=True)
-        if approved_reviews.exists():
-            total = sum(review.rating for review in approved_reviews)
-            return round(total / approved_reviews.count(), 1)
-        return 0
+        return product_average_rating(obj)
     
     def get_reviews_count(self, obj):
         """Return count of approved reviews"""
-        return obj.reviews.filter(approved=True).count()
+        return product_reviews_count(obj)
     
     def get_gallery_images_count(self, obj):
         """Return count of gallery images"""
-        return obj.gallery_images.count()
+        return product_gallery_images_count(obj)
 
 
 class ProductDetailSerializer(serializers.ModelSerializer):
@@ -260,22 +288,18 @@ class ProductDetailSerializer(serializers.ModelSerializer):
     
     def get_average_rating(self, obj):
         """Calculate average rating from approved reviews"""
-        approved_reviews = obj.reviews.filter(approved=True)
-        if approved_reviews.exists():
-            total = sum(review.rating for review in approved_reviews)
-            return round(total / approved_reviews.count(), 1)
-        return 0
+        return product_average_rating(obj)
     
     def get_reviews_count(self, obj):
         """Return count of approved reviews"""
-        return obj.reviews.filter(approved=True).count()
+        return product_reviews_count(obj)
     
     def get_purchase_stats(self, obj):
         """Get purchase statistics"""
-        purchases = obj.purchases.filter(status='completed')
+        total_purchases, total_revenue = product_purchase_totals(obj)
         return {
-            'total_purchases': purchases.count(),
-            'total_revenue': sum(p.purchase_amount for p in purchases),
+            'total_purchases': total_purchases,
+            'total_revenue': total_revenue,
             'currency': obj.currency
         }
 
@@ -574,15 +598,11 @@ class PublicProductListSerializer(serializers.ModelSerializer):
     
     def get_average_rating(self, obj):
         """Calculate average rating from approved reviews"""
-        approved_reviews = obj.reviews.filter(approved=True)
-        if approved_reviews.exists():
-            total = sum(review.rating for review in approved_reviews)
-            return round(total / approved_reviews.count(), 1)
-        return 0
+        return product_average_rating(obj)
     
     def get_reviews_count(self, obj):
         """Return count of approved reviews"""
-        return obj.reviews.filter(approved=True).count()
+        return product_reviews_count(obj)
 
 
 class PublicProductDetailSerializer(serializers.ModelSerializer):
@@ -650,15 +670,11 @@ class PublicProductDetailSerializer(serializers.ModelSerializer):
     
     def get_average_rating(self, obj):
         """Calculate average rating"""
-        approved_reviews = obj.reviews.filter(approved=True)
-        if approved_reviews.exists():
-            total = sum(review.rating for review in approved_reviews)
-            return round(total / approved_reviews.count(), 1)
-        return 0
+        return product_average_rating(obj)
     
     def get_reviews_count(self, obj):
         """Return count of approved reviews"""
-        return obj.reviews.filter(approved=True).count()
+        return product_reviews_count(obj)
 
 
 class ProductPurchaseSerializer(serializers.ModelSerializer):
@@ -742,33 +758,28 @@ class ProductStatsSerializer(serializers.ModelSerializer):
     
     def get_total_reviews(self, obj):
         """Total reviews count"""
-        return obj.reviews.count()
+        return product_reviews_count(obj) + product_reviews_count(obj, approved=False)
     
     def get_approved_reviews(self, obj):
         """Approved reviews count"""
-        return obj.reviews.filter(approved=True).count()
+        return product_reviews_count(obj)
     
     def get_pending_reviews(self, obj):
         """Pending reviews count"""
-        return obj.reviews.filter(approved=False).count()
+        return product_reviews_count(obj, approved=False)
     
     def get_average_rating(self, obj):
         """Calculate average rating"""
-        approved_reviews = obj.reviews.filter(approved=True)
-        if approved_reviews.exists():
-            total = sum(review.rating for review in approved_reviews)
-            return round(total / approved_reviews.count(), 1)
-        return 0
+        return product_average_rating(obj)
     
     def get_total_purchases(self, obj):
         """Total purchases count"""
-        return obj.purchases.filter(status='completed').count()
+        return product_purchase_totals(obj)[0]
     
     def get_total_revenue(self, obj):
         """Total revenue from purchases"""
-        purchases = obj.purchases.filter(status='completed')
-        return sum(p.purchase_amount for p in purchases)
+        return product_purchase_totals(obj)[1]
     
     def get_technologies_count(self, obj):
         """Technologies count"""
-        return obj.technologies.count()
\ No newline at end of file
+        return len(obj.technologies.all())
\ No newline at end of file
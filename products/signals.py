@@ -0,0 +1,45 @@
+# products/signals.py
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from .models import ProductReview
+from .utils import apply_review_rating, rebuild_product_ratings
+
+
+# Product rating summaries are moved by deltas computed from these
+RATING_FIELDS = ('product', 'rating', 'approved')
+
+
+@receiver(post_save, sender=ProductReview)
+def update_product_rating(sender, instance, created, raw=False, **kwargs):
+    """Move the review's rating in or out of the product's approved rating summary"""
+    if raw:
+        return
+    
+    if created:
+        if instance.approved:
+            apply_review_rating(instance.product_id, instance.rating, 1)
+        return
+    if not any(instance.has_changed(field) for field in RATING_FIELDS):
+        return
+    
+    # The tracker knows the loaded values unless the instance was never loaded or a field was deferred
+    previous = instance.as_loaded()
+    if previous is None:
+        # Recompute rather than guess what changed
+        product_ids = {instance.product_id, instance.old_value('product')} - {None}
+        rebuild_product_ratings(product_ids)
+        return
+    
+    if previous.approved:
+        apply_review_rating(previous.product_id, previous.rating, -1)
+    if instance.approved:
+        apply_review_rating(instance.product_id, instance.rating, 1)
+
+
+@receiver(post_delete, sender=ProductReview)
+def remove_product_rating(sender, instance, **kwargs):
+    """Drop a deleted approved review from the product's rating summary"""
+    review = instance.as_loaded() or instance
+    if review.approved:
+        apply_review_rating(review.product_id, review.rating, -1)
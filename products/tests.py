@@ -1,3 +1,277 @@
-from django.test import TestCase
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from blog.models import Tag
+from projects.models import Technology
+from wordknox.cache_tags import tag_generations
+from wordknox.counters import CounterBuffer, counters
+from .models import Product, ProductGalleryImage, ProductPurchase, ProductReview, ProductTag, ProductTechnology
+from .utils import RATING_COUNT_FIELDS, generate_license_key, rebuild_product_ratings
+
+User = get_user_model()
+
+
+class ProductListQueryCountTests(TestCase):
+    """List endpoints must not issue queries per product"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser(email='admin@example.com', password='pass')
+        cls.technology = Technology.objects.create(name='Django')
+        cls.tag = Tag.objects.create(name='Starter', slug='starter')
+        cls.products = [cls.create_product(index) for index in range(5)]
+
+    @classmethod
+    def create_product(cls, index):
+        product = Product.objects.create(
+            name=f'Product {index}',
+            slug=f'product-{index}',
+            category='templates',
+            type='website_template',
+            description='Description',
+            creator=cls.admin,
+            price=Decimal('10.00'),
+            featured=True,
+        )
+        ProductTechnology.objects.create(product=product, technology=cls.technology)
+        ProductTag.objects.create(product=product, tag=cls.tag)
+        ProductGalleryImage.objects.create(product=product, image_url='https://example.com/image.png')
+        for rating, approved in [(5, True), (3, True), (1, False)]:
+            client = User.objects.create_user(email=f'client{index}-{rating}@example.com', password='pass', role='client')
+            ProductReview.objects.create(product=product, client=client, rating=rating, approved=approved)
+            ProductPurchase.objects.create(
+                product=product,
+                client=client,
+                purchase_amount=Decimal('10.00'),
+                currency='USD',
+                status='completed',
+                license_key=f'KEY-{index}-{rating}',
+            )
+        return product
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def assert_constant_queries(self, url, expected, user=None):
+        if user:
+            self.client.force_authenticate(user)
+        with self.assertNumQueries(expected):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def test_public_product_list(self):
+        response = self.assert_constant_queries('/api/v1/products/products/', 6)
+        product = response.data['results'][0] if 'results' in response.data else response.data[0]
+        self.assertEqual(product['average_rating'], 4.0)
+        self.assertEqual(product['reviews_count'], 2)
+
+    def test_admin_product_list(self):
+        response = self.assert_constant_queries('/api/v1/products/products/', 6, user=self.admin)
+        product = response.data['results'][0] if 'results' in response.data else response.data[0]
+        self.assertEqual(product['gallery_images_count'], 1)
+
+    def test_featured_products(self):
+        self.assert_constant_queries('/api/v1/products/featured/', 4)
+
+    def test_recent_products(self):
+        self.assert_constant_queries('/api/v1/products/recent/', 4)
+
+    def test_related_products(self):
+        self.assert_constant_queries(f'/api/v1/products/products/{self.products[0].slug}/related/', 5)
+
+    def test_stats(self):
+        response = self.assert_constant_queries('/api/v1/products/products/stats/', 2, user=self.admin)
+        self.assertEqual(response.data[0]['total_purchases'], 3)
+        self.assertEqual(response.data[0]['pending_reviews'], 1)
+
+
+@override_settings(COUNTER_FLUSH_INTERVAL=60)
+@mock.patch.object(CounterBuffer, '_ensure_worker')
+class ProductConditionalGetTests(TestCase):
+    """Detail ETags follow counters, reviews and the creator, and revalidations still count"""
+
+    def setUp(self):
+        cache.clear()  # anonymous throttling counts requests across tests
+        # Leave no buffered increments behind for other tests to flush
+        counters.flush()
+        self.addCleanup(counters.flush)
+        self.creator = User.objects.create_user(email='creator@example.com', password='pass', role='admin')
+        self.product = Product.objects.create(
+            name='Starter', slug='starter', type='website_template', description='Description',
+            creator=self.creator, price=Decimal('5.00')
+        )
+        self.url = f'/api/v1/products/products/{self.product.slug}/'
+
+    def revalidate(self, etag):
+        return self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+
+    def test_revalidated_detail_is_counted_as_download(self, ensure_worker):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('Last-Modified', response)
+
+        with self.assertNumQueries(1):
+            revalidated = self.revalidate(response['ETag'])
+        self.assertEqual(revalidated.status_code, 304)
+        counters.flush()
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.download_count, 2)
+
+        # The flushed count is part of the payload
+        updated = self.revalidate(response['ETag'])
+        self.assertEqual(updated.status_code, 200)
+        self.assertEqual(updated.data['download_count'], 3)
+
+    def test_nested_changes_invalidate(self, ensure_worker):
+        etag = self.client.get(self.url)['ETag']
+        self.assertEqual(self.revalidate(etag).status_code, 304)
+
+        client = User.objects.create_user(email='client@example.com', password='pass', role='client')
+        ProductReview.objects.create(product=self.product, client=client, rating=4, approved=True)
+        response = self.revalidate(etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['reviews_count'], 1)
+
+        etag = response['ETag']
+        self.creator.first_name = 'Renamed'
+        self.creator.save()
+        response = self.revalidate(etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['creator_name'], 'Renamed')
+
+        # Rating columns moved without signals (rebuild_product_ratings) are covered too
+        etag = response['ETag']
+        Product.objects.filter(pk=self.product.pk).update(rating_sum=5, rating_count=2)
+        self.assertEqual(self.revalidate(etag).status_code, 200)
+
+
+class RatingSummaryTests(TestCase):
+    """Signal-maintained rating summaries must match a recompute from approved reviews"""
+
+    summary_fields = ['rating_sum', 'rating_count', 'rating_average', *RATING_COUNT_FIELDS.values()]
+
+    def setUp(self):
+        creator = User.objects.create_user(email='creator@example.com', password='pass', role='admin')
+        self.products = [
+            Product.objects.create(
+                name=f'Product {index}', slug=f'product-{index}', type='website_template',
+                description='Description', creator=creator, price=Decimal('5.00')
+            )
+            for index in range(2)
+        ]
+        self.clients = [
+            User.objects.create_user(email=f'client{index}@example.com', password='pass', role='client')
+            for index in range(3)
+        ]
+
+    def review(self, rating, approved=True, product=0, client=0):
+        return ProductReview.objects.create(
+            product=self.products[product], client=self.clients[client], rating=rating, approved=approved
+        )
+
+    def summaries(self):
+        return list(Product.objects.order_by('slug').values_list(*self.summary_fields))
+
+    def assert_matches_rebuild(self):
+        incremental = self.summaries()
+        rebuild_product_ratings()
+        self.assertEqual(incremental, self.summaries())
+        return incremental
+
+    def test_create(self):
+        self.review(5)
+        self.review(4, client=1)
+        self.review(1, approved=False, client=2)
+        summary = self.assert_matches_rebuild()[0]
+        self.assertEqual(summary[:3], (9, 2, Decimal('4.50')))
+
+    def test_edit_rating(self):
+        review = self.review(5)
+        self.review(3, client=1)
+        review.rating = 2
+        review.save()
+        self.assertEqual(self.assert_matches_rebuild()[0][:3], (5, 2, Decimal('2.50')))
+
+        loaded = ProductReview.objects.get(pk=review.pk)
+        loaded.rating = 4
+        loaded.save(update_fields=['rating'])
+        self.assertEqual(self.assert_matches_rebuild()[0][:3], (7, 2, Decimal('3.50')))
+
+    def test_approval_changes(self):
+        review = self.review(4, approved=False)
+        self.assertEqual(self.assert_matches_rebuild()[0][:2], (0, 0))
+
+        review.approved = True
+        review.save()
+        self.assertEqual(self.assert_matches_rebuild()[0][:2], (4, 1))
+
+        loaded = ProductReview.objects.get(pk=review.pk)
+        loaded.approved = False
+        loaded.rating = 2
+        loaded.save()
+        self.assertEqual(self.assert_matches_rebuild()[0][:2], (0, 0))
+
+    def test_moved_to_another_product(self):
+        review = self.review(5)
+        review.product = self.products[1]
+        review.save()
+        summaries = self.assert_matches_rebuild()
+        self.assertEqual([summary[:2] for summary in summaries], [(0, 0), (5, 1)])
+
+    def test_delete(self):
+        approved = self.review(5)
+        pending = self.review(2, approved=False, client=1)
+        pending.delete()
+        self.assertEqual(self.assert_matches_rebuild()[0][:2], (5, 1))
+        approved.delete()
+        self.assertEqual(self.assert_matches_rebuild()[0][:3], (0, 0, Decimal('0.00')))
+
+    def test_text_edit_skips_the_summary_but_invalidates_caches(self):
+        review = ProductReview.objects.get(pk=self.review(5).pk)
+        review.review_text = 'Great'
+        generation = tag_generations(['products:*'])['products:*']
+        with self.assertNumQueries(1), mock.patch('core.signals.schedule_rebuild') as schedule_rebuild:
+            review.save()
+        self.assert_matches_rebuild()
+        # The review text is shown on product pages and in the site snapshot
+        self.assertGreater(tag_generations(['products:*'])['products:*'], generation)
+        schedule_rebuild.assert_called_once_with()
+
+    def test_deferred_fields_fall_back_to_a_rebuild(self):
+        review = self.review(5)
+        deferred = ProductReview.objects.only('id', 'approved').get(pk=review.pk)
+        deferred.approved = False
+        deferred.save()
+        self.assertEqual(self.assert_matches_rebuild()[0][:2], (0, 0))
+
+
+class LicenseKeyTests(TestCase):
+    def test_purchase_gets_unique_sequential_key(self):
+        admin = User.objects.create_user(email='keys-admin@example.com', password='pass', role='admin')
+        client = User.objects.create_user(email='keys-client@example.com', password='pass', role='client')
+        product = Product.objects.create(
+            name='Keyed', type='website_template', description='Description', creator=admin, price=Decimal('5.00')
+        )
+        purchases = [
+            ProductPurchase.objects.create(
+                product=product, client=client, purchase_amount=Decimal('5.00'), currency='USD'
+            )
+            for _ in range(3)
+        ]
+        keys = [purchase.license_key for purchase in purchases]
+        self.assertEqual(len(set(keys)), 3)
+        self.assertEqual([key[:9] for key in keys], ['0000-0001', '0000-0002', '0000-0003'])
+
+    @override_settings(SEQUENCE_BLOCK_SIZES={'license': 10})
+    def test_block_allocation_serves_from_memory(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            first = generate_license_key()
+        with self.assertNumQueries(0):
+            second = generate_license_key()
+        self.assertEqual((first[:9], second[:9]), ('0000-0001', '0000-0002'))
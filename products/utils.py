@@ -2,7 +2,12 @@
 from django.utils.text import slugify
 from django.core.exceptions import ValidationError
 from django.core.cache import cache
-from django.db.models import Count, Q, Avg, Sum
+from wordknox.cache_tags import tagged_key, invalidate_tags
+from core.sequences import next_value
+from django.db import transaction
+from django.db.models import Count, Q, Avg, Sum, F, Case, When, Value, DecimalField, FloatField
+from django.db.models.functions import Cast
+from decimal import Decimal
 import re
 import uuid
 import string
@@ -47,16 +52,25 @@ def generate_license_key():
     """
     Generate a unique license key for product purchases
     
+    The first two segments encode the next value of the license sequence, so keys
+    never collide; the last two are random so keys cannot be guessed from each other.
+    
     Returns:
-        str: Unique license key
+        str: Unique license key (format: XXXX-XXXX-XXXX-XXXX)
     """
-    # Generate a random license key (format: XXXX-XXXX-XXXX-XXXX)
-    segments = []
-    for _ in range(4):
-        segment = ''.join(random.choices(string.ascii_uppercase + string.digits, k=4))
-        segments.append(segment)
-    
-    return '-'.join(segments)
+    serial = _to_base36(next_value('license')).zfill(8)
+    random_part = ''.join(random.choices(string.ascii_uppercase + string.digits, k=8))
+    key = serial + random_part
+    return '-'.join(key[i:i + 4] for i in range(0, 16, 4))
+
+
+def _to_base36(number):
+    digits = string.digits + string.ascii_uppercase
+    encoded = ''
+    while number:
+        number, remainder = divmod(number, 36)
+        encoded = digits[remainder] + encoded
+    return encoded or '0'
 
 
 def validate_product_urls(demo_url, download_url, repository_url, documentation_url):
@@ -122,31 +136,77 @@ def calculate_product_rating(product):
     Returns:
         dict: Rating statistics
     """
-    approved_reviews = product.reviews.filter(approved=True)
-    
-    if not approved_reviews.exists():
-        return {
-            'average_rating': 0,
-            'total_reviews': 0,
-            'rating_distribution': {1: 0, 2: 0, 3: 0, 4: 0, 5: 0}
-        }
-    
-    # Calculate average
-    total_rating = sum(review.rating for review in approved_reviews)
-    average_rating = round(total_rating / approved_reviews.count(), 1)
-    
-    # Calculate distribution
-    rating_distribution = {1: 0, 2: 0, 3: 0, 4: 0, 5: 0}
-    for review in approved_reviews:
-        rating_distribution[review.rating] += 1
-    
     return {
-        'average_rating': average_rating,
-        'total_reviews': approved_reviews.count(),
-        'rating_distribution': rating_distribution
+        'average_rating': round(float(product.rating_average), 1) if product.rating_count else 0,
+        'total_reviews': product.rating_count,
+        'rating_distribution': {
+            rating: getattr(product, field) for rating, field in RATING_COUNT_FIELDS.items()
+        }
     }
 
 
+def _rating_average_expression():
+    return Case(
+        When(rating_count=0, then=Value(Decimal('0'))),
+        default=Cast(F('rating_sum'), FloatField()) / F('rating_count'),
+        output_field=DecimalField(max_digits=3, decimal_places=2)
+    )
+
+
+def apply_review_rating(product_id, rating, delta):
+    """
+    Add (delta=1) or remove (delta=-1) one approved rating from a product's summary.
+    Runs as F() updates, so concurrent reviews never lose increments.
+    """
+    from .models import Product
+    
+    if rating not in RATING_COUNT_FIELDS:
+        rebuild_product_ratings([product_id])
+        return
+    
+    bucket = RATING_COUNT_FIELDS[rating]
+    products = Product.objects.filter(pk=product_id)
+    with transaction.atomic():
+        products.update(
+            rating_sum=F('rating_sum') + rating * delta,
+            rating_count=F('rating_count') + delta,
+            **{bucket: F(bucket) + delta}
+        )
+        # Separate statement: the SET clause does not see new values on every backend
+        products.update(rating_average=_rating_average_expression())
+
+
+def rebuild_product_ratings(product_ids=None):
+    """
+    Recompute rating summaries from approved reviews, for the given products or all of them.
+    Returns the number of products updated.
+    """
+    from .models import Product, ProductReview
+    
+    products = Product.objects.all()
+    reviews = ProductReview.objects.filter(approved=True)
+    if product_ids is not None:
+        products = products.filter(pk__in=product_ids)
+        reviews = reviews.filter(product_id__in=product_ids)
+    
+    empty = {'rating_sum': 0, 'rating_count': 0, **{field: 0 for field in RATING_COUNT_FIELDS.values()}}
+    summaries = {}
+    rows = reviews.order_by().values('product_id', 'rating').annotate(count=Count('id'))
+    for row in rows:
+        summary = summaries.setdefault(row['product_id'], dict(empty))
+        summary['rating_sum'] += row['rating'] * row['count']
+        summary['rating_count'] += row['count']
+        if row['rating'] in RATING_COUNT_FIELDS:
+            summary[RATING_COUNT_FIELDS[row['rating']]] += row['count']
+    
+    updated = 0
+    with transaction.atomic():
+        for product_id in products.values_list('pk', flat=True):
+            updated += Product.objects.filter(pk=product_id).update(**summaries.get(product_id, empty))
+        products.update(rating_average=_rating_average_expression())
+    return updated
+
+
 def get_featured_products(limit=6):
     """
     Get featured products with caching
@@ -159,7 +219,7 @@ def get_featured_products(limit=6):
     """
     from .models import Product
     
-    cache_key = f'featured_products_{limit}'
+    cache_key = tagged_key(f'featured_products_{limit}', ['products:*', 'technology:*'])
     products = cache.get(cache_key)
     
     if products is None:
@@ -186,7 +246,7 @@ def get_recent_products(limit=4):
     """
     from .models import Product
     
-    cache_key = f'recent_products_{limit}'
+    cache_key = tagged_key(f'recent_products_{limit}', ['products:*', 'technology:*'])
     products = cache.get(cache_key)
     
     if products is None:
@@ -213,16 +273,14 @@ def get_top_rated_products(limit=6, min_reviews=3):
     """
     from .models import Product
     
-    cache_key = f'top_rated_products_{limit}_{min_reviews}'
+    cache_key = tagged_key(f'top_rated_products_{limit}_{min_reviews}', ['products:*'])
     products = cache.get(cache_key)
     
     if products is None:
-        products = Product.objects.filter(active=True).annotate(
-            avg_rating=Avg('reviews__rating', filter=Q(reviews__approved=True)),
-            reviews_count=Count('reviews', filter=Q(reviews__approved=True))
-        ).filter(
-            reviews_count__gte=min_reviews
-        ).order_by('-avg_rating')[:limit]
+        products = Product.objects.filter(
+            active=True,
+            rating_count__gte=min_reviews
+        ).order_by('-rating_average')[:limit]
         
         # Cache for 1 hour
         cache.set(cache_key, products, 60 * 60)
@@ -242,7 +300,7 @@ def get_bestselling_products(limit=6):
     """
     from .models import Product
     
-    cache_key = f'bestselling_products_{limit}'
+    cache_key = tagged_key(f'bestselling_products_{limit}', ['products:*'])
     products = cache.get(cache_key)
     
     if products is None:
@@ -267,7 +325,7 @@ def get_product_statistics():
     """
     from .models import Product, ProductReview, ProductPurchase
     
-    cache_key = 'product_statistics'
+    cache_key = tagged_key('product_statistics', ['products:*'])
     stats = cache.get(cache_key)
     
     if stats is None:
@@ -327,18 +385,10 @@ def get_product_statistics():
 def invalidate_product_caches():
     """
     Invalidate all product-related caches
-    Call this when products are updated
-    """
-    cache_keys = [
-        'featured_products_6',
-        'featured_products_4',
-        'recent_products_4',
-        'recent_products_6',
-        'top_rated_products_6_3',
-        'bestselling_products_6',
-        'product_statistics'
-    ]
-    cache.delete_many(cache_keys)
+    Product saves and deletes already do this through the cache tag signals;
+    call it after queryset.update() or other writes that bypass signals
+    """
+    invalidate_tags('products:*', 'product:*')
 
 
 class ProductPermissions:
@@ -538,7 +588,7 @@ def get_product_categories_with_counts():
     """
     from .models import Product
     
-    cache_key = 'product_categories_stats'
+    cache_key = tagged_key('product_categories_stats', ['product:*'])
     stats = cache.get(cache_key)
     
     if stats is None:
@@ -570,7 +620,7 @@ def get_product_types_with_counts():
     """
     from .models import Product
     
-    cache_key = 'product_types_stats'
+    cache_key = tagged_key('product_types_stats', ['product:*'])
     stats = cache.get(cache_key)
     
     if stats is None:
@@ -593,6 +643,14 @@ def get_product_types_with_counts():
 
 
 # Constants for products app
+RATING_COUNT_FIELDS = {
+    1: 'rating_1_count',
+    2: 'rating_2_count',
+    3: 'rating_3_count',
+    4: 'rating_4_count',
+    5: 'rating_5_count',
+}
+
 PRODUCT_SETTINGS = {
     'MAX_GALLERY_IMAGES': 10,
     'MAX_TECHNOLOGIES_PER_PRODUCT': 15,
@@ -2,10 +2,13 @@
 from rest_framework import viewsets, permissions, status, filters
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from django.db.models import Q, F, Avg, Count, Sum
+from django.db.models import Q, Avg, Count, Sum
 from django.db import transaction
 from django.utils.decorators import method_decorator
-from django.views.decorators.cache import cache_page
+from wordknox.cache_tags import cache_page_tagged
+from wordknox.conditional import ConditionalGetMixin
+from wordknox.counters import counters
+from search.filters import IndexedSearchFilter
 from django.views.decorators.vary import vary_on_headers
 from django_filters.rest_framework import DjangoFilterBackend
 
@@ -24,7 +27,7 @@ from .serializers import (
 )
 
 
-class ProductViewSet(viewsets.ModelViewSet):
+class ProductViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     """
     ViewSet for managing products
     
@@ -35,11 +38,18 @@ class ProductViewSet(viewsets.ModelViewSet):
     
     queryset = Product.objects.all()
     lookup_field = 'slug'
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    filter_backends = [DjangoFilterBackend, IndexedSearchFilter, filters.OrderingFilter]
     filterset_fields = ['category', 'type', 'featured', 'active', 'creator', 'license_type', 'technologies__name', 'tags__slug']
     search_fields = ['name', 'description', 'short_description', 'category', 'type']
+    search_index_kind = 'product'  # ?search= goes through the site search index
     ordering_fields = ['name', 'price', 'download_count', 'date_created']
     ordering = ['-featured', '-date_created']
+    # Conditional GET: creator names, download counts and rating summaries, reviews,
+    # gallery images and updates (any products row), base projects and technologies
+    related_modified_fields = ('creator__date_updated',)
+    counter_fields = ('download_count', 'rating_sum', 'rating_count')
+    validator_tags = ('products:*', 'projects:*')
+    revalidation_fields = ('active',)
     
     def get_serializer_class(self):
         """Return appropriate serializer based on action and user"""
@@ -68,28 +78,35 @@ class ProductViewSet(viewsets.ModelViewSet):
     def get_queryset(self):
         """Filter queryset based on user permissions"""
         if self.request.user.is_staff:
-            return Product.objects.select_related('creator', 'base_project').prefetch_related(
-                'technologies', 'tags', 'gallery_images', 'reviews'
-            )
+            return Product.objects.for_listing().with_gallery_stats().prefetch_related('gallery_images')
         
         # Public users only see active products
-        return Product.objects.filter(active=True).select_related(
-            'creator', 'base_project'
-        ).prefetch_related('technologies', 'tags', 'gallery_images', 'reviews')
+        return Product.objects.filter(active=True).for_listing().prefetch_related('gallery_images')
     
     def retrieve(self, request, *args, **kwargs):
         """Override retrieve to increment download count for public users"""
+        # A revalidated copy is answered before loading the product (and counted in revalidated())
+        not_modified = self.lookup_not_modified()
+        if not_modified is not None:
+            return not_modified
+        
         instance = self.get_object()
+        validators = self.object_validators(instance)
         
         # Increment download count for active products (view tracking)
         if instance.active and not request.user.is_staff:
-            Product.objects.filter(pk=instance.pk).update(download_count=F('download_count') + 1)
-            instance.refresh_from_db()
+            counters.increment(Product, instance.pk, 'download_count')
+            counters.apply_pending(instance, 'download_count')
         
         serializer = self.get_serializer(instance)
-        return Response(serializer.data)
+        return self.add_validators(Response(serializer.data), validators)
     
-    @method_decorator(cache_page(60 * 15))  # Cache for 15 minutes
+    def revalidated(self, values):
+        """A revalidated copy is still a view"""
+        if values['active'] and not self.request.user.is_staff:
+            counters.increment(Product, values['pk'], 'download_count')
+    
+    @method_decorator(cache_page_tagged(60 * 15, tags=['products:*', 'technology:*']))  # Cache for 15 minutes
     @action(detail=False, methods=['get'])
     def featured(self, request):
         """Get featured products"""
@@ -239,7 +256,7 @@ class ProductViewSet(viewsets.ModelViewSet):
         if product.price == 0:
             if product.download_url:
                 # Increment download count
-                Product.objects.filter(pk=product.pk).update(download_count=F('download_count') + 1)
+                counters.increment(Product, product.pk, 'download_count')
                 return Response({
                     'download_url': product.download_url,
                     'license_type': product.license_type,
@@ -262,8 +279,7 @@ class ProductViewSet(viewsets.ModelViewSet):
             if purchase:
                 if product.download_url:
                     # Increment purchase download count
-                    purchase.download_count = F('download_count') + 1
-                    purchase.save()
+                    counters.increment(ProductPurchase, purchase.pk, 'download_count')
                     
                     return Response({
                         'download_url': product.download_url,
@@ -336,7 +352,9 @@ class ProductViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_403_FORBIDDEN
             )
         
-        products = Product.objects.all()
+        products = Product.objects.select_related('creator').prefetch_related(
+            'technologies'
+        ).with_review_stats().with_purchase_stats()
         serializer = ProductStatsSerializer(products, many=True)
         return Response(serializer.data)
     
@@ -354,12 +372,9 @@ class ProductViewSet(viewsets.ModelViewSet):
         limit = int(request.query_params.get('limit', 6))
         
         # Get products with highest average ratings
-        products = self.get_queryset().annotate(
-            avg_rating=Avg('reviews__rating', filter=Q(reviews__approved=True)),
-            reviews_count=Count('reviews', filter=Q(reviews__approved=True))
-        ).filter(
-            reviews_count__gte=3  # At least 3 reviews
-        ).order_by('-avg_rating')[:limit]
+        products = self.get_queryset().filter(
+            rating_count__gte=3  # At least 3 reviews
+        ).order_by('-rating_average')[:limit]
         
         serializer = self.get_serializer(products, many=True)
         return Response(serializer.data)
@@ -535,7 +550,7 @@ class FeaturedProductsAPIView(generics.ListAPIView):
         return Product.objects.filter(
             featured=True,
             active=True
-        ).select_related('creator').prefetch_related('technologies', 'tags')[:limit]
+        ).for_listing()[:limit]
 
 
 class RecentProductsAPIView(generics.ListAPIView):
@@ -550,7 +565,7 @@ class RecentProductsAPIView(generics.ListAPIView):
         limit = int(self.request.query_params.get('limit', 4))
         return Product.objects.filter(
             active=True
-        ).select_related('creator').prefetch_related('technologies', 'tags').order_by('-date_created')[:limit]
+        ).for_listing().order_by('-date_created')[:limit]
 
 
 class ProductCategoriesAPIView(generics.ListAPIView):
@@ -610,7 +625,7 @@ class RelatedProductsAPIView(generics.ListAPIView):
                 Q(technologies__in=current_product.technologies.all()) | 
                 Q(category=current_product.category),
                 active=True
-            ).exclude(id=current_product.id).distinct()[:4]
+            ).exclude(id=current_product.id).distinct().for_listing()[:4]
             return related_products
         except Product.DoesNotExist:
             return Product.objects.none()
\ No newline at end of file
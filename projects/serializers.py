@@ -6,10 +6,18 @@ from .models import (
     Technology, Project, ProjectGalleryImage, ProjectSection,
     ProjectTechnology, ProjectComment
 )
+from wordknox.comment_tree import load_comment_tree
 
 User = get_user_model()
 
 
+def approved_project_comments(project):
+    """(approved comments, count) of a project, loaded with one query per serialization"""
+    if not hasattr(project, '_approved_comments'):
+        project._approved_comments = load_comment_tree(project.comments.filter(approved=True))
+    return project._approved_comments
+
+
 class TechnologySerializer(serializers.ModelSerializer):
     """
     Serializer for Technology model
@@ -255,12 +263,12 @@ class ProjectDetailSerializer(serializers.ModelSerializer):
     
     def get_comments(self, obj):
         """Get approved comments"""
-        approved_comments = obj.comments.filter(approved=True).order_by('date_created')
+        approved_comments, _ = approved_project_comments(obj)
         return ProjectCommentSerializer(approved_comments, many=True, context=self.context).data
     
     def get_comments_count(self, obj):
         """Return count of approved comments"""
-        return obj.comments.filter(approved=True).count()
+        return approved_project_comments(obj)[1]
 
 
 class ProjectCreateUpdateSerializer(serializers.ModelSerializer):
@@ -542,12 +550,12 @@ class PublicProjectDetailSerializer(serializers.ModelSerializer):
     
     def get_comments(self, obj):
         """Get approved comments"""
-        approved_comments = obj.comments.filter(approved=True).order_by('date_created')
+        approved_comments, _ = approved_project_comments(obj)
         return ProjectCommentSerializer(approved_comments, many=True, context=self.context).data
     
     def get_comments_count(self, obj):
         """Return count of approved comments"""
-        return obj.comments.filter(approved=True).count()
+        return approved_project_comments(obj)[1]
 
     def get_author_name(self, obj):
         """Return author's display name if available."""
@@ -2,10 +2,14 @@
 from rest_framework import viewsets, permissions, status, filters
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from django.db.models import Q, F, Count
+from django.db.models import Q, Count
 from django.db import transaction
 from django.utils.decorators import method_decorator
-from django.views.decorators.cache import cache_page
+from wordknox.cache_tags import cache_page_tagged
+from wordknox.conditional import ConditionalGetMixin
+from wordknox.counters import counters
+from wordknox.comment_tree import load_comment_tree
+from search.filters import IndexedSearchFilter
 from django.views.decorators.vary import vary_on_headers
 from django_filters.rest_framework import DjangoFilterBackend
 
@@ -52,7 +56,7 @@ class TechnologyViewSet(viewsets.ModelViewSet):
             return [permissions.AllowAny()]
         return [permissions.IsAdminUser()]
     
-    @method_decorator(cache_page(60 * 30))  # Cache for 30 minutes
+    @method_decorator(cache_page_tagged(60 * 30, tags=['technology:*']))  # Cache for 30 minutes
     @action(detail=False, methods=['get'])
     def by_category(self, request):
         """Get technologies grouped by category"""
@@ -67,7 +71,7 @@ class TechnologyViewSet(viewsets.ModelViewSet):
         serializer = TechnologyListSerializer(technologies, many=True)
         return Response(serializer.data)
     
-    @method_decorator(cache_page(60 * 30))
+    @method_decorator(cache_page_tagged(60 * 30, tags=['projects:*']))
     @action(detail=False, methods=['get'])
     def popular(self, request):
         """Get most popular technologies based on project usage"""
@@ -92,9 +96,10 @@ class ProjectViewSet(viewsets.ModelViewSet):
     
     queryset = Project.objects.all()
     lookup_field = 'slug'
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    filter_backends = [DjangoFilterBackend, IndexedSearchFilter, filters.OrderingFilter]
     filterset_fields = ['category', 'domain', 'status', 'featured', 'client', 'technologies__name']
     search_fields = ['title', 'description', 'content', 'category', 'domain']
+    search_index_kind = 'project'  # ?search= goes through the site search index
     ordering_fields = ['date_created', 'completion_date', 'likes', 'title']
     ordering = ['-date_created']
     
@@ -116,7 +121,7 @@ class ProjectViewSet(viewsets.ModelViewSet):
     
     def get_permissions(self):
         """Set permissions based on action"""
-        if self.action in ['list', 'retrieve', 'featured', 'by_category', 'by_technology']:
+        if self.action in ['list', 'retrieve', 'featured', 'by_category', 'by_technology', 'comments']:
             return [permissions.AllowAny()]
         elif self.action in ['like', 'add_comment']:
             return [permissions.AllowAny()]  # Allow anonymous interactions
@@ -132,7 +137,7 @@ class ProjectViewSet(viewsets.ModelViewSet):
             status__in=['completed', 'maintenance']
         ).select_related('client').prefetch_related('technologies', 'gallery_images')
     
-    @method_decorator(cache_page(60 * 15))  # Cache for 15 minutes
+    @method_decorator(cache_page_tagged(60 * 15, tags=['projects:*']))  # Cache for 15 minutes
     @action(detail=False, methods=['get'])
     def featured(self, request):
         """Get featured projects"""
@@ -203,8 +208,8 @@ class ProjectViewSet(viewsets.ModelViewSet):
         project = self.get_object()
         
         # Simple like increment (you could implement user-based likes later)
-        Project.objects.filter(pk=project.pk).update(likes=F('likes') + 1)
-        project.refresh_from_db()
+        counters.increment(Project, project.pk, 'likes')
+        counters.apply_pending(project, 'likes')
         
         return Response(
             {
@@ -249,6 +254,20 @@ class ProjectViewSet(viewsets.ModelViewSet):
             status=status.HTTP_200_OK
         )
     
+    @action(detail=True, methods=['get'])
+    def comments(self, request, slug=None):
+        """Approved comments of a project, paginated, loaded with one query"""
+        project = self.get_object()
+        comments, _ = load_comment_tree(project.comments.filter(approved=True))
+        
+        page = self.paginate_queryset(comments)
+        if page is not None:
+            serializer = ProjectCommentSerializer(page, many=True, context=self.get_serializer_context())
+            return self.get_paginated_response(serializer.data)
+        
+        serializer = ProjectCommentSerializer(comments, many=True, context=self.get_serializer_context())
+        return Response(serializer.data)
+    
     @action(detail=True, methods=['post'])
     def add_comment(self, request, slug=None):
         """Add a comment to a project"""
@@ -406,13 +425,17 @@ class ProjectGalleryImageViewSet(viewsets.ModelViewSet):
 from rest_framework import generics
 
 
-class FeaturedProjectsAPIView(generics.ListAPIView):
+class FeaturedProjectsAPIView(ConditionalGetMixin, generics.ListAPIView):
     """
     Get featured projects
     """
     
     serializer_class = PublicProjectListSerializer
     permission_classes = [permissions.AllowAny]
+    # Conditional GET: client and author names, likes, and technologies and comments (any projects row)
+    related_modified_fields = ('client__date_updated', 'author__date_updated')
+    counter_fields = ('likes',)
+    validator_tags = ('projects:*',)
     
     def get_queryset(self):
         limit = int(self.request.query_params.get('limit', 6))
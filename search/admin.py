@@ -0,0 +1,20 @@
+# search/admin.py
+from django.contrib import admin
+
+from .models import SearchDocument
+
+
+@admin.register(SearchDocument)
+class SearchDocumentAdmin(admin.ModelAdmin):
+    """Read-only view of the search index; rebuild with `manage.py rebuild_search_index`"""
+    
+    list_display = ['title', 'kind', 'public', 'length', 'date_updated']
+    list_filter = ['kind', 'public']
+    search_fields = ['title', 'object_id']
+    readonly_fields = ['id', 'kind', 'object_id', 'title', 'slug', 'body', 'public', 'length', 'content_hash', 'date_updated']
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
@@ -0,0 +1,31 @@
+# search/filters.py
+from rest_framework import filters
+
+from .index import parse_query, term_filter
+from .models import SearchDocument, SearchTerm
+
+
+class IndexedSearchFilter(filters.SearchFilter):
+    """
+    SearchFilter that resolves ?search= through the search index instead of
+    LIKE '%term%' scans. Views opt in with `search_index_kind`; without it
+    this behaves exactly like SearchFilter. Until the index holds documents
+    of that kind (e.g. after restoring a dump with raw saves) it also falls back
+    to SearchFilter, so searches are slow rather than empty, and so do queries
+    made only of stop words.
+    """
+    
+    def filter_queryset(self, request, queryset, view):
+        kind = getattr(view, 'search_index_kind', None)
+        terms = parse_query(request.query_params.get(self.search_param, ''))
+        # Queries of stop words only ("the") have no indexed terms; LIKE still narrows them
+        if kind is None or not terms or not SearchDocument.objects.filter(kind=kind).exists():
+            return super().filter_queryset(request, queryset, view)
+        
+        for term in terms:
+            matching = SearchTerm.objects.filter(
+                term_filter(term),
+                document__kind=kind
+            ).values('document__object_id')
+            queryset = queryset.filter(pk__in=matching)
+        return queryset
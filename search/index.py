@@ -0,0 +1,337 @@
+# search/index.py
+"""
+Site-wide full-text search over blog posts, projects, products and services.
+
+Every indexed object gets a SearchDocument (title, plain-text body, visibility)
+and one SearchTerm row per distinct term, so a query only touches the postings of
+its own terms through the (term, document) index instead of scanning TEXT columns
+with LIKE '%term%'. Results are ranked with BM25, title terms count TITLE_WEIGHT
+times, and every query term of MIN_PREFIX_LENGTH characters or more also matches
+longer terms ("djan" finds "django"). All query terms must match.
+"""
+import hashlib
+import heapq
+import math
+import re
+from collections import Counter, defaultdict
+from functools import lru_cache
+from html import unescape
+
+from django.apps import apps
+from django.db import transaction
+from django.db.models import Avg, Count, Q
+from django.utils.html import escape, strip_tags
+
+from .models import SearchDocument, SearchTerm
+
+
+TITLE_WEIGHT = 3
+MIN_PREFIX_LENGTH = 2
+MAX_TERM_LENGTH = 64
+MAX_QUERY_TERMS = 8
+SNIPPET_LENGTH = 200
+
+# BM25 parameters
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+STOP_WORDS = frozenset([
+    'a', 'an', 'and', 'are', 'as', 'at', 'be', 'by', 'for', 'from', 'has', 'in',
+    'is', 'it', 'its', 'of', 'on', 'or', 'that', 'the', 'to', 'was', 'were', 'will', 'with',
+])
+
+TOKEN_RE = re.compile(r'\w+')
+
+# kind -> how to index a model. `fields` may follow relations with dots;
+# `public` mirrors the public querysets of the corresponding viewsets.
+SEARCH_SOURCES = {
+    'blog': {
+        'model': 'blog.BlogPost',
+        'title': 'title',
+        'fields': ['excerpt', 'content', 'category'],
+        'public': {'status__in': ['published']},
+    },
+    'project': {
+        'model': 'projects.Project',
+        'title': 'title',
+        'fields': ['description', 'content', 'category', 'domain'],
+        'public': {'status__in': ['completed', 'maintenance']},
+    },
+    'product': {
+        'model': 'products.Product',
+        'title': 'name',
+        'fields': ['short_description', 'description', 'category', 'type'],
+        'public': {'active__in': [True]},
+    },
+    'service': {
+        'model': 'services.Service',
+        'title': 'name',
+        'fields': ['short_description', 'description', 'service_category.name'],
+        'public': {'active__in': [True]},
+    },
+}
+
+
+def tokenize(text):
+    """Lowercase word tokens of `text` (HTML allowed), without stop words"""
+    if not text:
+        return []
+    return [
+        token for token in TOKEN_RE.findall(unescape(strip_tags(text)).lower())
+        if token not in STOP_WORDS and len(token) <= MAX_TERM_LENGTH
+    ]
+
+
+def parse_query(query):
+    """Distinct query terms in order, capped at MAX_QUERY_TERMS"""
+    return list(dict.fromkeys(tokenize(query)))[:MAX_QUERY_TERMS]
+
+
+def term_filter(term, prefix='term'):
+    """Q matching postings for a query term, expanding it as a prefix when long enough"""
+    if len(term) >= MIN_PREFIX_LENGTH:
+        # istartswith is a plain LIKE 'abc%' on MySQL, which can use the term index
+        return Q(**{f'{prefix}__istartswith': term})
+    return Q(**{prefix: term})
+
+
+def get_source(kind):
+    return SEARCH_SOURCES[kind]
+
+
+def source_for_model(model):
+    """Return (kind, source) for an indexed model class, or (None, None)"""
+    label = model._meta.label
+    for kind, source in SEARCH_SOURCES.items():
+        if source['model'] == label:
+            return kind, source
+    return None, None
+
+
+def watched_fields(source):
+    """Model fields whose change requires re-indexing"""
+    fields = {source['title'], 'slug'}
+    fields.update(field.split('.')[0] for field in source['fields'])
+    fields.update(lookup.split('__')[0] for lookup in source['public'])
+    # Relations are saved as <name>_id with update_fields
+    return fields | {f'{field}_id' for field in fields}
+
+
+@lru_cache(maxsize=None)
+def related_sources(model):
+    """
+    [(kind, lookup, fields)] for the sources that index fields of `model` through
+    a relation, e.g. the services whose text includes `service_category.name`.
+    `lookup` filters the indexed model down to the objects related to one instance.
+    """
+    dependents = []
+    for kind, source in SEARCH_SOURCES.items():
+        indexed_model = apps.get_model(source['model'])
+        relations = defaultdict(set)
+        for path in source['fields']:
+            if '.' not in path:
+                continue
+            relation, field = path.rsplit('.', 1)
+            target = indexed_model
+            for name in relation.split('.'):
+                target = target._meta.get_field(name).related_model
+            if target is model:
+                relations[relation.replace('.', '__')].add(field)
+        dependents.extend((kind, lookup, fields) for lookup, fields in relations.items())
+    return dependents
+
+
+def reindex_related(instance, kind, lookup):
+    """Re-index the `kind` objects whose indexed text includes fields of `instance`"""
+    source = get_source(kind)
+    queryset = apps.get_model(source['model'])._default_manager.filter(**{lookup: instance.pk})
+    related = [field.rsplit('.', 1)[0].replace('.', '__') for field in source['fields'] if '.' in field]
+    for obj in queryset.select_related(*related).iterator(chunk_size=200):
+        index_object(obj, kind)
+
+
+def _resolve(obj, path):
+    for attr in path.split('.'):
+        obj = getattr(obj, attr, None)
+        if obj is None:
+            return ''
+    return obj
+
+
+def is_public(source, obj):
+    for lookup, values in source['public'].items():
+        if getattr(obj, lookup.split('__')[0]) not in values:
+            return False
+    return True
+
+
+def index_object(obj, kind=None):
+    """
+    Create or refresh the search document for `obj`.
+    Unchanged objects are skipped, so saves that do not touch indexed text are cheap.
+    """
+    if kind is None:
+        kind, source = source_for_model(type(obj))
+    else:
+        source = get_source(kind)
+
+    title = str(_resolve(obj, source['title']))
+    body = ' '.join(
+        str(value) for value in (_resolve(obj, field) for field in source['fields']) if value
+    )
+    body = re.sub(r'\s+', ' ', unescape(strip_tags(body))).strip()
+    public = is_public(source, obj)
+    content_hash = hashlib.sha256(f'{public}|{obj.slug}|{title}|{body}'.encode('utf-8')).hexdigest()
+
+    document = SearchDocument.objects.filter(kind=kind, object_id=str(obj.pk)).first()
+    if document and document.content_hash == content_hash:
+        return document
+
+    frequencies = Counter(tokenize(body))
+    for token in tokenize(title):
+        frequencies[token] += TITLE_WEIGHT
+
+    with transaction.atomic():
+        if document is None:
+            document = SearchDocument(kind=kind, object_id=str(obj.pk))
+        document.title = title[:255]
+        document.slug = obj.slug
+        document.body = body
+        document.public = public
+        document.length = sum(frequencies.values())
+        document.content_hash = content_hash
+        document.save()
+
+        document.terms.all().delete()
+        SearchTerm.objects.bulk_create(
+            [SearchTerm(document=document, term=term, frequency=count) for term, count in frequencies.items()],
+            batch_size=500
+        )
+    return document
+
+
+def remove_object(obj, kind=None):
+    """Drop the search document of a deleted object"""
+    if kind is None:
+        kind, _ = source_for_model(type(obj))
+    SearchDocument.objects.filter(kind=kind, object_id=str(obj.pk)).delete()
+
+
+def rebuild_index(kinds=None):
+    """Re-index every object of `kinds` (default: all) and drop orphaned documents"""
+    indexed = 0
+    for kind in kinds or SEARCH_SOURCES:
+        source = get_source(kind)
+        model = apps.get_model(source['model'])
+        queryset = model._default_manager.all()
+        related = [field.rsplit('.', 1)[0].replace('.', '__') for field in source['fields'] if '.' in field]
+        if related:
+            queryset = queryset.select_related(*related)
+
+        object_ids = set()
+        for obj in queryset.iterator(chunk_size=200):
+            index_object(obj, kind)
+            object_ids.add(str(obj.pk))
+            indexed += 1
+        SearchDocument.objects.filter(kind=kind).exclude(object_id__in=object_ids).delete()
+    return indexed
+
+
+def search(query, kinds=None, public_only=True, limit=20, offset=0):
+    """
+    Rank documents matching every term of `query`.
+    Returns (documents, total); each document carries `score`, `snippet` and `highlighted_title`.
+    """
+    terms = parse_query(query)
+    if not terms:
+        return [], 0
+
+    documents = SearchDocument.objects.all()
+    if kinds:
+        documents = documents.filter(kind__in=kinds)
+    if public_only:
+        documents = documents.filter(public=True)
+
+    stats = documents.aggregate(total=Count('id'), avg_length=Avg('length'))
+    total_documents = stats['total']
+    avg_length = stats['avg_length'] or 1
+
+    scores = None
+    for term in terms:
+        frequencies = defaultdict(int)
+        lengths = {}
+        postings = SearchTerm.objects.filter(
+            term_filter(term),
+            document__in=documents.values('id')
+        ).values_list('document_id', 'frequency', 'document__length')
+        for document_id, frequency, length in postings:
+            frequencies[document_id] += frequency
+            lengths[document_id] = length
+
+        # Terms are ANDed: stop as soon as one matches nothing in common
+        if scores is not None:
+            frequencies = {document_id: tf for document_id, tf in frequencies.items() if document_id in scores}
+        if not frequencies:
+            return [], 0
+
+        document_frequency = len(lengths)
+        idf = math.log(1 + (total_documents - document_frequency + 0.5) / (document_frequency + 0.5))
+        term_scores = {
+            document_id: idf * tf * (BM25_K1 + 1) / (
+                tf + BM25_K1 * (1 - BM25_B + BM25_B * lengths[document_id] / avg_length)
+            )
+            for document_id, tf in frequencies.items()
+        }
+        scores = term_scores if scores is None else {
+            document_id: scores[document_id] + score for document_id, score in term_scores.items()
+        }
+
+    ranked = heapq.nlargest(offset + limit, scores.items(), key=lambda item: (item[1], item[0]))[offset:]
+    found = SearchDocument.objects.in_bulk([document_id for document_id, _ in ranked])
+
+    results = []
+    for document_id, score in ranked:
+        document = found[document_id]
+        document.score = score
+        document.snippet = build_snippet(document.body, terms)
+        document.highlighted_title = highlight(document.title, terms)
+        results.append(document)
+    return results, len(scores)
+
+
+def _term_pattern(terms):
+    return re.compile(r'\b(?:%s)\w*' % '|'.join(re.escape(term) for term in terms), re.IGNORECASE)
+
+
+def highlight(text, terms, pattern=None):
+    """HTML-escape `text` and wrap words matching `terms` in <mark>"""
+    pattern = pattern or _term_pattern(terms)
+    parts = []
+    last = 0
+    for match in pattern.finditer(text):
+        parts.append(escape(text[last:match.start()]))
+        parts.append(f'<mark>{escape(match.group())}</mark>')
+        last = match.end()
+    parts.append(escape(text[last:]))
+    return ''.join(parts)
+
+
+def build_snippet(text, terms, length=SNIPPET_LENGTH):
+    """Highlighted window of `text` around the first matching term"""
+    if not text:
+        return ''
+    pattern = _term_pattern(terms)
+    match = pattern.search(text)
+    start = 0
+    if match and match.start() > length // 3:
+        start = text.rfind(' ', 0, match.start() - length // 3) + 1
+    end = start + length
+    if end < len(text):
+        end = text.rfind(' ', start, end) if text.rfind(' ', start, end) > start else end
+
+    snippet = highlight(text[start:end], terms, pattern)
+    if start > 0:
+        snippet = '…' + snippet
+    if end < len(text):
+        snippet += '…'
+    return snippet
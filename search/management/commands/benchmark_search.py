@@ -0,0 +1,75 @@
+# search/management/commands/benchmark_search.py
+import time
+from functools import reduce
+from operator import and_, or_
+
+from django.apps import apps
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+from django.utils.module_loading import import_string
+
+from search.index import SEARCH_SOURCES, parse_query, search
+
+
+# The LIKE-based SearchFilter configuration each index kind replaces
+SEARCH_FILTER_VIEWS = {
+    'blog': 'blog.views.BlogPostViewSet',
+    'project': 'projects.views.ProjectViewSet',
+    'product': 'products.views.ProductViewSet',
+    'service': 'services.views.ServiceViewSet',
+}
+
+
+class Command(BaseCommand):
+    help = 'Compare search index queries against the LIKE scans issued by DRF SearchFilter'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'queries',
+            nargs='+',
+            help='Search strings to benchmark'
+        )
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            dest='repeat',
+            default=20,
+            help='Runs per query and method (default: 20)'
+        )
+
+    def time_call(self, func, repeat):
+        started = time.perf_counter()
+        for _ in range(repeat):
+            result = func()
+        return (time.perf_counter() - started) * 1000 / repeat, result
+
+    def like_search(self, kind, query):
+        """The queryset SearchFilter builds: every term must match one field with icontains"""
+        model = apps.get_model(SEARCH_SOURCES[kind]['model'])
+        search_fields = import_string(SEARCH_FILTER_VIEWS[kind]).search_fields
+        conditions = [
+            reduce(or_, [Q(**{f'{field}__icontains': term}) for field in search_fields])
+            for term in query.split()
+        ]
+        return list(model._default_manager.filter(reduce(and_, conditions)).distinct().values_list('pk', flat=True))
+
+    def handle(self, *args, **options):
+        repeat = options['repeat']
+        
+        self.stdout.write(f"{'query':<24} {'type':<8} {'LIKE ms':>9} {'rows':>5} {'index ms':>9} {'rows':>5}")
+        for query in options['queries']:
+            if not parse_query(query):
+                self.stdout.write(self.style.WARNING(f'Skipping "{query}": only stop words'))
+                continue
+            for kind in SEARCH_SOURCES:
+                like_ms, like_rows = self.time_call(lambda: self.like_search(kind, query), repeat)
+                index_ms, (_, index_total) = self.time_call(
+                    lambda: search(query, [kind], public_only=False, limit=20), repeat
+                )
+                self.stdout.write(
+                    f'{query[:24]:<24} {kind:<8} {like_ms:>9.2f} {len(like_rows):>5} {index_ms:>9.2f} {index_total:>5}'
+                )
+        
+        self.stdout.write(
+            self.style.SUCCESS('Row counts can differ: the index prefix-matches whole words, LIKE matches substrings')
+        )
@@ -0,0 +1,27 @@
+# search/management/commands/rebuild_search_index.py
+from django.core.management.base import BaseCommand, CommandError
+
+from search.index import SEARCH_SOURCES, rebuild_index
+
+
+class Command(BaseCommand):
+    help = 'Re-index blog posts, projects, products and services for site search'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'types',
+            nargs='*',
+            help=f"Only rebuild these types ({', '.join(SEARCH_SOURCES)}; default: all)"
+        )
+
+    def handle(self, *args, **options):
+        kinds = options.get('types') or None
+        invalid = [kind for kind in kinds or [] if kind not in SEARCH_SOURCES]
+        if invalid:
+            raise CommandError(f"Unknown type(s): {', '.join(invalid)}")
+        
+        indexed = rebuild_index(kinds)
+        
+        self.stdout.write(
+            self.style.SUCCESS(f'Indexed {indexed} object(s)')
+        )
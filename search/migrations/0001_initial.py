@@ -0,0 +1,106 @@
+# Generated by Django 5.2.2 on 2026-10-18 15:56
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = []
+
+    operations = [
+        migrations.CreateModel(
+            name="SearchDocument",
+            fields=[
+                (
+                    "id",
+                    models.CharField(
+                        default=uuid.uuid4,
+                        editable=False,
+                        max_length=36,
+                        primary_key=True,
+                        serialize=False,
+                    ),
+                ),
+                (
+                    "kind",
+                    models.CharField(
+                        choices=[
+                            ("blog", "Blog Post"),
+                            ("project", "Project"),
+                            ("product", "Product"),
+                            ("service", "Service"),
+                        ],
+                        max_length=20,
+                    ),
+                ),
+                ("object_id", models.CharField(max_length=36)),
+                ("title", models.CharField(max_length=255)),
+                ("slug", models.SlugField(max_length=255)),
+                (
+                    "body",
+                    models.TextField(
+                        blank=True, help_text="Plain text used for result snippets"
+                    ),
+                ),
+                (
+                    "public",
+                    models.BooleanField(
+                        default=False, help_text="Visible to anonymous users"
+                    ),
+                ),
+                (
+                    "length",
+                    models.PositiveIntegerField(
+                        default=0, help_text="Weighted term count used for ranking"
+                    ),
+                ),
+                ("content_hash", models.CharField(max_length=64)),
+                ("date_updated", models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                "verbose_name": "Search Document",
+                "verbose_name_plural": "Search Documents",
+                "db_table": "search_document",
+                "indexes": [
+                    models.Index(
+                        fields=["kind", "public"], name="search_docu_kind_9a47a6_idx"
+                    )
+                ],
+                "unique_together": {("kind", "object_id")},
+            },
+        ),
+        migrations.CreateModel(
+            name="SearchTerm",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("term", models.CharField(max_length=64)),
+                ("frequency", models.PositiveIntegerField(default=1)),
+                (
+                    "document",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="terms",
+                        to="search.searchdocument",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Search Term",
+                "verbose_name_plural": "Search Terms",
+                "db_table": "search_term",
+                "unique_together": {("term", "document")},
+            },
+        ),
+    ]
@@ -0,0 +1,133 @@
+# Generated by Django 5.2.2 on 2026-10-18 16:40
+
+import hashlib
+import re
+from collections import Counter
+from html import unescape
+
+from django.db import migrations
+from django.utils.html import strip_tags
+
+
+# Frozen copy of search.index as of this migration, so later changes to the
+# live indexer do not change what this backfill writes. Documents it builds
+# differently from the live indexer hash differently and are refreshed by the
+# next save or `manage.py rebuild_search_index`.
+TITLE_WEIGHT = 3
+MAX_TERM_LENGTH = 64
+
+STOP_WORDS = frozenset([
+    'a', 'an', 'and', 'are', 'as', 'at', 'be', 'by', 'for', 'from', 'has', 'in',
+    'is', 'it', 'its', 'of', 'on', 'or', 'that', 'the', 'to', 'was', 'were', 'will', 'with',
+])
+
+TOKEN_RE = re.compile(r'\w+')
+
+SEARCH_SOURCES = {
+    'blog': {
+        'model': ('blog', 'BlogPost'),
+        'title': 'title',
+        'fields': ['excerpt', 'content', 'category'],
+        'public': {'status': ['published']},
+    },
+    'project': {
+        'model': ('projects', 'Project'),
+        'title': 'title',
+        'fields': ['description', 'content', 'category', 'domain'],
+        'public': {'status': ['completed', 'maintenance']},
+    },
+    'product': {
+        'model': ('products', 'Product'),
+        'title': 'name',
+        'fields': ['short_description', 'description', 'category', 'type'],
+        'public': {'active': [True]},
+    },
+    'service': {
+        'model': ('services', 'Service'),
+        'title': 'name',
+        'fields': ['short_description', 'description', 'service_category.name'],
+        'public': {'active': [True]},
+    },
+}
+
+
+def tokenize(text):
+    if not text:
+        return []
+    return [
+        token for token in TOKEN_RE.findall(unescape(strip_tags(text)).lower())
+        if token not in STOP_WORDS and len(token) <= MAX_TERM_LENGTH
+    ]
+
+
+def resolve(obj, path):
+    for attr in path.split('.'):
+        obj = getattr(obj, attr, None)
+        if obj is None:
+            return ''
+    return obj
+
+
+def backfill_search_index(apps, schema_editor):
+    """Index existing blog posts, projects, products and services"""
+    SearchDocument = apps.get_model('search', 'SearchDocument')
+    SearchTerm = apps.get_model('search', 'SearchTerm')
+    
+    for kind, source in SEARCH_SOURCES.items():
+        queryset = apps.get_model(*source['model']).objects.all()
+        related = [field.rsplit('.', 1)[0].replace('.', '__') for field in source['fields'] if '.' in field]
+        if related:
+            queryset = queryset.select_related(*related)
+        
+        for obj in queryset.iterator(chunk_size=200):
+            title = str(resolve(obj, source['title']))
+            body = ' '.join(
+                str(value) for value in (resolve(obj, field) for field in source['fields']) if value
+            )
+            body = re.sub(r'\s+', ' ', unescape(strip_tags(body))).strip()
+            public = all(getattr(obj, field) in values for field, values in source['public'].items())
+            
+            frequencies = Counter(tokenize(body))
+            for token in tokenize(title):
+                frequencies[token] += TITLE_WEIGHT
+            
+            document, _ = SearchDocument.objects.update_or_create(
+                kind=kind,
+                object_id=str(obj.pk),
+                defaults={
+                    'title': title[:255],
+                    'slug': obj.slug,
+                    'body': body,
+                    'public': public,
+                    'length': sum(frequencies.values()),
+                    'content_hash': hashlib.sha256(
+                        f'{public}|{obj.slug}|{title}|{body}'.encode('utf-8')
+                    ).hexdigest(),
+                }
+            )
+            SearchTerm.objects.filter(document=document).delete()
+            SearchTerm.objects.bulk_create(
+                [SearchTerm(document=document, term=term, frequency=count) for term, count in frequencies.items()],
+                batch_size=500
+            )
+
+
+def reverse_backfill(apps, schema_editor):
+    """Reverse backfill - clear the search index"""
+    SearchDocument = apps.get_model('search', 'SearchDocument')
+    SearchDocument.objects.all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("search", "0001_initial"),
+        ("blog", "0007_backfill_blogpost_rendered_content"),
+        ("products", "0003_backfill_product_ratings"),
+        ("projects", "0008_remove_projectsection_media_url_projectsection_media"),
+        ("services", "0005_service_service_image_alter_service_img_url"),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_search_index, reverse_backfill),
+    ]
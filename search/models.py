@@ -0,0 +1,67 @@
+# search/models.py
+import uuid
+from django.db import models
+
+
+class SearchDocument(models.Model):
+    """
+    One indexed blog post, project, product or service.
+    Maintained by search/signals.py; rebuild with `manage.py rebuild_search_index`.
+    """
+    
+    KIND_CHOICES = [
+        ('blog', 'Blog Post'),
+        ('project', 'Project'),
+        ('product', 'Product'),
+        ('service', 'Service'),
+    ]
+    
+    id = models.CharField(
+        max_length=36, 
+        primary_key=True, 
+        default=uuid.uuid4,
+        editable=False
+    )
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    object_id = models.CharField(max_length=36)
+    title = models.CharField(max_length=255)
+    slug = models.SlugField(max_length=255)
+    body = models.TextField(blank=True, help_text="Plain text used for result snippets")
+    public = models.BooleanField(default=False, help_text="Visible to anonymous users")
+    length = models.PositiveIntegerField(default=0, help_text="Weighted term count used for ranking")
+    content_hash = models.CharField(max_length=64)
+    date_updated = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        db_table = 'search_document'
+        verbose_name = 'Search Document'
+        verbose_name_plural = 'Search Documents'
+        unique_together = ('kind', 'object_id')
+        indexes = [
+            models.Index(fields=['kind', 'public']),
+        ]
+    
+    def __str__(self):
+        return f"{self.get_kind_display()}: {self.title}"
+
+
+class SearchTerm(models.Model):
+    """Posting list entry: how often a term occurs in a document (title terms weighted)"""
+    
+    document = models.ForeignKey(
+        SearchDocument,
+        on_delete=models.CASCADE,
+        related_name='terms'
+    )
+    term = models.CharField(max_length=64)
+    frequency = models.PositiveIntegerField(default=1)
+    
+    class Meta:
+        db_table = 'search_term'
+        verbose_name = 'Search Term'
+        verbose_name_plural = 'Search Terms'
+        # Leading `term` column serves exact and prefix (LIKE 'abc%') lookups
+        unique_together = ('term', 'document')
+    
+    def __str__(self):
+        return f"{self.term} ({self.frequency})"
@@ -0,0 +1,31 @@
+# search/serializers.py
+from rest_framework import serializers
+
+from .models import SearchDocument
+
+
+class SearchResultSerializer(serializers.ModelSerializer):
+    """
+    Serializer for ranked search results
+    `highlighted_title` and `snippet` are HTML-escaped with matches wrapped in <mark>
+    """
+    
+    type = serializers.CharField(source='kind', read_only=True)
+    highlighted_title = serializers.ReadOnlyField()
+    snippet = serializers.ReadOnlyField()
+    score = serializers.SerializerMethodField()
+    
+    class Meta:
+        model = SearchDocument
+        fields = [
+            'type',
+            'object_id',
+            'title',
+            'highlighted_title',
+            'slug',
+            'snippet',
+            'score'
+        ]
+    
+    def get_score(self, obj):
+        return round(obj.score, 4)
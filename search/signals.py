@@ -0,0 +1,43 @@
+# search/signals.py
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from wordknox.tracking import FieldTrackerMixin
+from .index import index_object, reindex_related, related_sources, remove_object, source_for_model, watched_fields
+
+
+@receiver(post_save)
+def index_saved_object(sender, instance, raw=False, update_fields=None, **kwargs):
+    """Keep the search index in step with indexed models"""
+    kind, source = source_for_model(sender)
+    if kind is None or raw:
+        return
+    # Counter and flag updates (view counts, featured, ...) do not change indexed text
+    if update_fields is not None and not set(update_fields) & watched_fields(source):
+        return
+    if isinstance(instance, FieldTrackerMixin) and instance.is_tracking() and not kwargs.get('created'):
+        if not set(instance.changed_fields()) & watched_fields(source):
+            return
+    index_object(instance, kind)
+
+
+@receiver(post_save)
+def reindex_related_objects(sender, instance, raw=False, created=False, update_fields=None, **kwargs):
+    """Re-index objects whose indexed text includes fields of the saved instance (e.g. a renamed service category)"""
+    if raw or created:
+        return
+    for kind, lookup, fields in related_sources(sender):
+        if update_fields is not None and not set(update_fields) & fields:
+            continue
+        if isinstance(instance, FieldTrackerMixin) and instance.is_tracking():
+            if not any(instance.has_changed(field) for field in fields):
+                continue
+        reindex_related(instance, kind, lookup)
+
+
+@receiver(post_delete)
+def remove_deleted_object(sender, instance, **kwargs):
+    """Drop deleted objects from the search index"""
+    kind, _ = source_for_model(sender)
+    if kind is not None:
+        remove_object(instance, kind)
@@ -0,0 +1,155 @@
+from decimal import Decimal
+from importlib import import_module
+
+from django.apps import apps
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from blog.models import BlogPost
+from products.models import Product
+from services.models import Service, ServiceCategory
+from .index import build_snippet, rebuild_index, search
+from .models import SearchDocument, SearchTerm
+
+User = get_user_model()
+
+
+class SiteSearchTests(TestCase):
+    """The index follows model saves and ranks, prefix-matches and highlights results"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_superuser(email='admin@example.com', password='pass')
+        cls.django_post = cls.create_post('Deploying Django', 'A guide to shipping web apps with gunicorn.')
+        cls.mention_post = cls.create_post('Weekly notes', 'Mostly React this week, a little Django at the end.')
+        cls.draft = cls.create_post('Django drafts', 'Unpublished Django notes.', status='draft')
+        cls.product = Product.objects.create(
+            name='Django Starter Kit',
+            slug='django-starter-kit',
+            category='templates',
+            type='website_template',
+            description='Boilerplate for new <b>Django</b> projects.',
+            creator=cls.author,
+            price=Decimal('10.00'),
+        )
+
+    @classmethod
+    def create_post(cls, title, content, status='published'):
+        return BlogPost.objects.create(
+            title=title,
+            excerpt=title,
+            content=f'<p>{content}</p>',
+            author=cls.author,
+            status=status,
+        )
+
+    def test_title_matches_rank_first_and_drafts_are_hidden(self):
+        results, total = search('django')
+        self.assertEqual(total, 3)
+        self.assertEqual(
+            {(document.kind, document.object_id) for document in results},
+            {('blog', str(self.django_post.pk)), ('blog', str(self.mention_post.pk)), ('product', str(self.product.pk))}
+        )
+        self.assertEqual(results[-1].object_id, str(self.mention_post.pk))
+
+        _, total = search('django', public_only=False)
+        self.assertEqual(total, 4)
+
+    def test_prefix_matching_requires_every_term(self):
+        results, _ = search('gunic djan', kinds=['blog'])
+        self.assertEqual([document.object_id for document in results], [str(self.django_post.pk)])
+        self.assertEqual(search('gunicorn react')[1], 0)
+
+    def test_index_follows_updates_and_deletes(self):
+        self.django_post.content = '<p>Now about Flask only.</p>'
+        self.django_post.save()
+        self.assertEqual(search('gunicorn')[1], 0)
+        self.assertEqual(search('flask')[1], 1)
+
+        self.product.delete()
+        self.assertFalse(SearchDocument.objects.filter(kind='product').exists())
+
+        SearchDocument.objects.all().delete()
+        self.assertEqual(rebuild_index(['blog']), 3)
+        self.assertEqual(search('flask')[1], 1)
+
+    def test_untouched_saves_do_not_reindex(self):
+        terms = set(SearchTerm.objects.values_list('pk', flat=True))
+        self.django_post.featured = True
+        self.django_post.save()
+        self.assertEqual(set(SearchTerm.objects.values_list('pk', flat=True)), terms)
+
+    def test_snippet_is_escaped_and_highlighted(self):
+        snippet = build_snippet('<script> then Django and djangonauts', ['django'])
+        self.assertEqual(snippet, '&lt;script&gt; then <mark>Django</mark> and <mark>djangonauts</mark>')
+
+    def test_search_endpoint(self):
+        client = APIClient()
+        response = client.get('/api/v1/search/', {'q': 'django', 'type': 'product'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['count'], 1)
+        self.assertIn('<mark>Django</mark>', response.data['results'][0]['snippet'])
+        self.assertEqual(client.get('/api/v1/search/', {'q': 'django', 'type': 'user'}).status_code, 400)
+
+    def test_viewset_search_uses_index(self):
+        response = APIClient().get('/api/v1/blog/posts/', {'search': 'gunic'})
+        slugs = [post['slug'] for post in response.data['results']]
+        self.assertEqual(slugs, [self.django_post.slug])
+
+    def test_viewset_search_falls_back_while_the_index_is_empty(self):
+        cache.clear()  # anonymous throttling counts requests across tests
+        SearchDocument.objects.filter(kind='blog').delete()
+        response = APIClient().get('/api/v1/blog/posts/', {'search': 'gunicorn'})
+        self.assertEqual([post['slug'] for post in response.data['results']], [self.django_post.slug])
+
+    def test_viewset_search_of_stop_words_still_filters(self):
+        cache.clear()  # anonymous throttling counts requests across tests
+        response = APIClient().get('/api/v1/blog/posts/', {'search': 'with'})
+        self.assertEqual([post['slug'] for post in response.data['results']], [self.django_post.slug])
+
+    def test_backfill_migration(self):
+        SearchDocument.objects.all().delete()
+        migration = import_module('search.migrations.0002_backfill_search_index')
+        migration.backfill_search_index(apps, None)
+        self.assertEqual(SearchDocument.objects.count(), 4)
+        self.assertEqual(search('django')[1], 3)
+        self.assertEqual(search('gunic djan', kinds=['blog'])[0][0].object_id, str(self.django_post.pk))
+
+
+class RelatedReindexTests(TestCase):
+    """Services are re-indexed when the category name in their document changes"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.category = ServiceCategory.objects.create(name='Web Development', slug='web-development')
+        cls.other = ServiceCategory.objects.create(name='Design', slug='design')
+        for index in range(2):
+            Service.objects.create(
+                name=f'Service {index}', slug=f'service-{index}', service_category=cls.category,
+                description='Description', pricing_model='fixed', starting_at=Decimal('100.00')
+            )
+
+    def test_category_rename_reindexes_its_services(self):
+        self.assertEqual(search('development')[1], 2)
+        category = ServiceCategory.objects.get(pk=self.category.pk)
+        category.name = 'Web Engineering'
+        category.save()
+        self.assertEqual(search('development')[1], 0)
+        self.assertEqual(search('engineering')[1], 2)
+
+        self.other.name = 'Branding'
+        self.other.save(update_fields=['name'])
+        self.assertEqual(search('branding')[1], 0)
+
+    def test_other_category_saves_do_not_reindex(self):
+        terms = set(SearchTerm.objects.values_list('pk', flat=True))
+        category = ServiceCategory.objects.get(pk=self.category.pk)
+        category.sort_order = 5
+        with self.assertNumQueries(1):
+            category.save()
+        category.short_desc = 'Sites and apps'
+        with self.assertNumQueries(1):
+            category.save(update_fields=['short_desc'])
+        self.assertEqual(set(SearchTerm.objects.values_list('pk', flat=True)), terms)
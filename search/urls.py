@@ -0,0 +1,9 @@
+# search/urls.py
+from django.urls import path
+from . import views
+
+urlpatterns = [
+    path('', views.SiteSearchAPIView.as_view(), name='site-search'),
+]
+
+# GET /api/v1/search/?q=django&type=blog,project&limit=20&offset=0 - Ranked site-wide search
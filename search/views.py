@@ -0,0 +1,52 @@
+# search/views.py
+from rest_framework import permissions, status
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from .index import SEARCH_SOURCES, search
+from .serializers import SearchResultSerializer
+
+
+class SiteSearchAPIView(APIView):
+    """
+    Ranked full-text search across published blog posts, projects, products and services
+    
+    Query parameters:
+    - q: search text (required, 2+ characters); words are prefix-matched and all must match
+    - type: comma-separated subset of blog, project, product, service
+    - limit (default 20, max 50), offset
+    """
+    
+    permission_classes = [permissions.AllowAny]
+    
+    def get(self, request):
+        query = request.query_params.get('q', '').strip()
+        if len(query) < 2:
+            return Response(
+                {'detail': 'Search query must be at least 2 characters.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        kinds = [kind.strip() for kind in request.query_params.get('type', '').split(',') if kind.strip()]
+        invalid = [kind for kind in kinds if kind not in SEARCH_SOURCES]
+        if invalid:
+            return Response(
+                {'detail': f"Invalid type: {', '.join(invalid)}. Choose from {', '.join(SEARCH_SOURCES)}."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        try:
+            limit = min(max(int(request.query_params.get('limit', 20)), 1), 50)
+            offset = max(int(request.query_params.get('offset', 0)), 0)
+        except ValueError:
+            return Response(
+                {'detail': 'limit and offset must be integers.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        results, total = search(query, kinds or None, limit=limit, offset=offset)
+        return Response({
+            'query': query,
+            'count': total,
+            'results': SearchResultSerializer(results, many=True).data
+        })
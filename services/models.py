@@ -1,10 +1,14 @@
 # services/models.py
 import uuid
 from django.db import models
+from django.db.models import Count, Min, Prefetch
 from django.utils import timezone
 from django.utils.text import slugify
 from django.core.exceptions import ValidationError
 
+from wordknox.aggregates import related_aggregate
+from wordknox.tracking import FieldTrackerMixin
+
 
 def validate_image_size(image):
     """Validate that image file size is under 3MB"""
@@ -16,7 +20,37 @@ def validate_image_size(image):
             )
 
 
-class Service(models.Model):
+class ServiceQuerySet(models.QuerySet):
+    """
+    List views read tier aggregates from annotations; detail views prefetch
+    every nested relation, including the features of each pricing tier.
+    """
+
+    def with_tier_stats(self):
+        """pricing_tiers_total and min_tier_price (None without tiers)"""
+        return self.annotate(
+            pricing_tiers_total=related_aggregate(ServicePricingTier, 'service', Count('id'), default=0),
+            min_tier_price=related_aggregate(ServicePricingTier, 'service', Min('price')),
+        )
+
+    def for_listing(self):
+        """Category and tier stats needed by the service list serializers"""
+        return self.select_related('service_category').with_tier_stats()
+
+    def for_detail(self):
+        """Everything the service detail serializers render, in a fixed number of queries"""
+        return self.select_related('service_category').prefetch_related(
+            Prefetch(
+                'pricing_tiers__pricingtierfeature_set',
+                queryset=PricingTierFeature.objects.select_related('feature').order_by(
+                    'feature__category', 'feature__title'
+                ),
+            ),
+            'process_steps', 'deliverables', 'tools', 'popular_usecases', 'faqs'
+        )
+
+
+class Service(FieldTrackerMixin, models.Model):
     """
     Service offerings with flexible pricing models
     """
@@ -91,6 +125,8 @@ class Service(models.Model):
     # Timestamps
     date_created = models.DateTimeField(default=timezone.now)
     date_updated = models.DateTimeField(auto_now=True)
+
+    objects = ServiceQuerySet.as_manager()
     
     class Meta:
         db_table = 'service'
@@ -420,7 +456,27 @@ class ServicePopularUseCase(models.Model):
         return f"{self.service.name} - {self.use_case}"
     
 # This is what we are current extending
-class ServiceCategory(models.Model):
+class ServiceCategoryQuerySet(models.QuerySet):
+    """Service totals and the active service list for the category serializers"""
+
+    def with_service_stats(self):
+        """services_total, counting inactive services too"""
+        return self.annotate(
+            services_total=related_aggregate(Service, 'service_category', Count('id'), default=0),
+        )
+
+    def with_services(self):
+        """Service stats plus active_services, prefetched in display order"""
+        return self.with_service_stats().prefetch_related(
+            Prefetch(
+                'services',
+                queryset=Service.objects.filter(active=True).order_by('sort_order', 'name'),
+                to_attr='active_services',
+            )
+        )
+
+
+class ServiceCategory(FieldTrackerMixin, models.Model):
     """
     Service categories with optional subcategories
     """
@@ -460,6 +516,8 @@ class ServiceCategory(models.Model):
     # Timestamps
     date_created = models.DateTimeField(default=timezone.now)
     date_updated = models.DateTimeField(auto_now=True)
+
+    objects = ServiceCategoryQuerySet.as_manager()
     
     class Meta:
         db_table = 'service_category'
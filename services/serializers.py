@@ -1,13 +1,46 @@
 # services/serializers.py
 from rest_framework import serializers
 from django.utils.text import slugify
+from wordknox.aggregates import annotated
 from .models import (
-    Service, ServiceCategory, ServicePricingTier, ServiceFeature, PricingTierFeature,
+    Service, ServiceCategory, ServicePricingTier, ServiceFeature,
     ServiceProcessStep, ServiceDeliverable, ServiceTool, 
     ServicePopularUseCase, ServiceFAQ
 )
 
 
+# Related data read the ServiceQuerySet / ServiceCategoryQuerySet annotations and prefetches.
+
+def category_services_count(obj):
+    """Count of all services in the category"""
+    return annotated(obj, 'services_total', obj.services.count)
+
+
+def category_active_services(obj):
+    """Active services of the category in display order"""
+    return annotated(obj, 'active_services', lambda: obj.services.filter(active=True).order_by('sort_order', 'name'))
+
+
+def service_pricing_tiers_count(obj):
+    """Count of pricing tiers"""
+    return annotated(obj, 'pricing_tiers_total', obj.pricing_tiers.count)
+
+
+def service_min_price(obj):
+    """Lowest tier price, or starting_at for services without tiers"""
+    min_price = annotated(
+        obj, 'min_tier_price', lambda: obj.pricing_tiers.order_by('price').values_list('price', flat=True).first()
+    )
+    return min_price if min_price is not None else obj.starting_at
+
+
+def tier_features(obj):
+    """PricingTierFeature rows of a tier with their features"""
+    if 'pricingtierfeature_set' in getattr(obj, '_prefetched_objects_cache', {}):
+        return obj.pricingtierfeature_set.all()
+    return obj.pricingtierfeature_set.select_related('feature').order_by('feature__category', 'feature__title')
+
+
 class ServiceCategorySerializer(serializers.ModelSerializer):
     """
     Basic serializer for service categories
@@ -27,7 +60,7 @@ class ServiceCategorySerializer(serializers.ModelSerializer):
     
     def get_services_count(self, obj):
         """Get count of services in this category"""
-        return obj.services.count()
+        return category_services_count(obj)
     
     def get_subcategories_count(self, obj):
         """Get count of subcategories"""
@@ -82,7 +115,7 @@ class ServiceCategoryWithServicesSerializer(serializers.ModelSerializer):
     
     def get_services_count(self, obj):
         """Get count of services in this category"""
-        return obj.services.count()
+        return category_services_count(obj)
     
     def get_subcategories_count(self, obj):
         """Get count of subcategories"""
@@ -92,7 +125,7 @@ class ServiceCategoryWithServicesSerializer(serializers.ModelSerializer):
     
     def get_services(self, obj):
         """Get services in this category"""
-        active_services = obj.services.filter(active=True).order_by('sort_order', 'name')
+        active_services = category_active_services(obj)
         # Use a simplified service representation to avoid circular imports
         return [
             {
@@ -145,20 +178,16 @@ class ServicePricingTierSerializer(serializers.ModelSerializer):
     
     def get_features(self, obj):
         """Get features for this pricing tier"""
-        tier_features = PricingTierFeature.objects.filter(
-            pricing_tier=obj
-        ).select_related('feature')
-        
         return [
             {
                 'id': tf.feature.id,
-                'name': tf.feature.name,
+                'name': tf.feature.title,
                 'description': tf.feature.description,
-                'icon_url': tf.feature.icon_url,
-                'included': tf.included,
-                'sort_order': tf.sort_order
+                'icon_class': tf.feature.icon_class,
+                'category': tf.feature.category,
+                'included': tf.feature.included
             }
-            for tf in tier_features
+            for tf in tier_features(obj)
         ]
     
     def validate_price(self, value):
@@ -284,12 +313,11 @@ class ServiceListSerializer(serializers.ModelSerializer):
     
     def get_pricing_tiers_count(self, obj):
         """Return count of pricing tiers"""
-        return obj.pricing_tiers.count()
+        return service_pricing_tiers_count(obj)
     
     def get_min_price(self, obj):
         """Return minimum price from pricing tiers"""
-        min_tier = obj.pricing_tiers.order_by('price').first()
-        return min_tier.price if min_tier else obj.starting_at
+        return service_min_price(obj)
 
 
 class ServiceDetailSerializer(serializers.ModelSerializer):
@@ -656,12 +684,11 @@ class PublicServiceListSerializer(serializers.ModelSerializer):
     
     def get_min_price(self, obj):
         """Return minimum price from pricing tiers"""
-        min_tier = obj.pricing_tiers.order_by('price').first()
-        return min_tier.price if min_tier else obj.starting_at
+        return service_min_price(obj)
     
     def get_pricing_tiers_count(self, obj):
         """Return count of pricing tiers"""
-        return obj.pricing_tiers.count()
+        return service_pricing_tiers_count(obj)
 
 
 class PublicServiceDetailSerializer(serializers.ModelSerializer):
@@ -750,7 +777,7 @@ class ServiceStatsSerializer(serializers.ModelSerializer):
     
     def get_pricing_tiers_count(self, obj):
         """Count of pricing tiers"""
-        return obj.pricing_tiers.count()
+        return service_pricing_tiers_count(obj)
     
     def get_process_steps_count(self, obj):
         """Count of process steps"""
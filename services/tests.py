@@ -1,3 +1,210 @@
+from decimal import Decimal
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
 from django.test import TestCase
+from rest_framework.test import APIClient
+
+from .models import (
+    PricingTierFeature, Service, ServiceCategory, ServiceDeliverable, ServiceFAQ, ServiceFeature,
+    ServicePopularUseCase, ServicePricingTier, ServiceProcessStep, ServiceTool
+)
+from .serializers import ServiceListSerializer
+from wordknox.cache_tags import tag_generations
+
+User = get_user_model()
+
+
+class ServiceCatalogQueryCountTests(TestCase):
+    """Service and category endpoints must not issue queries per service or pricing tier"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser(email='admin@example.com', password='pass')
+        cls.category = ServiceCategory.objects.create(name='Web Development', slug='web-development')
+        ServiceCategory.objects.create(name='Design', slug='design')
+        cls.features = [
+            ServiceFeature.objects.create(title=f'Feature {index}', category='core') for index in range(3)
+        ]
+        cls.services = [cls.create_service(index) for index in range(4)]
+        Service.objects.create(
+            name='Retired', slug='retired', service_category=cls.category, description='Description',
+            pricing_model='fixed', starting_at=Decimal('50.00'), active=False
+        )
+
+    @classmethod
+    def create_service(cls, index):
+        service = Service.objects.create(
+            name=f'Service {index}',
+            slug=f'service-{index}',
+            service_category=cls.category,
+            description='Description',
+            pricing_model='tiered',
+            starting_at=Decimal('100.00'),
+            featured=True,
+            sort_order=index,
+        )
+        for tier_index, price in enumerate(['300.00', '150.00', '500.00']):
+            tier = ServicePricingTier.objects.create(
+                service=service, name=f'Tier {tier_index}', price=Decimal(price), unit='project',
+                sort_order=tier_index
+            )
+            for feature in cls.features:
+                PricingTierFeature.objects.create(pricing_tier=tier, feature=feature)
+        ServiceProcessStep.objects.create(service=service, title='Discovery', description='Kick-off', step_order=1)
+        ServiceDeliverable.objects.create(service=service, description='Source code')
+        ServiceTool.objects.create(service=service, tool_name='Django')
+        ServicePopularUseCase.objects.create(service=service, use_case='Company site', description='Marketing')
+        ServiceFAQ.objects.create(service=service, question='How long?', answer='About two weeks for most projects.')
+        return service
+
+    def setUp(self):
+        cache.clear()  # anonymous throttling counts requests across tests
+        self.client = APIClient()
+
+    def assert_constant_queries(self, url, expected, user=None):
+        if user:
+            self.client.force_authenticate(user)
+        with self.assertNumQueries(expected):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def results(self, response):
+        return response.data['results'] if 'results' in response.data else response.data
+
+    def test_public_service_list(self):
+        response = self.assert_constant_queries('/api/v1/services/services/', 3)
+        service = self.results(response)[0]
+        self.assertEqual(service['pricing_tiers_count'], 3)
+        self.assertEqual(service['min_price'], Decimal('150.00'))
+        self.assertEqual(service['category'], 'Web Development')
+
+    def test_admin_service_list(self):
+        response = self.assert_constant_queries('/api/v1/services/services/', 3, user=self.admin)
+        self.assertEqual(len(self.results(response)), 5)
+
+    def test_service_detail(self):
+        response = self.assert_constant_queries('/api/v1/services/services/service-0/', 9)
+        tiers = response.data['pricing_tiers']
+        self.assertEqual([tier['name'] for tier in tiers], ['Tier 0', 'Tier 1', 'Tier 2'])
+        self.assertEqual([feature['name'] for feature in tiers[0]['features']], ['Feature 0', 'Feature 1', 'Feature 2'])
+        self.assertEqual(response.data['service_category']['services_count'], 5)
+
+    def test_featured_services(self):
+        response = self.assert_constant_queries('/api/v1/services/featured/', 2)
+        self.assertEqual(self.results(response)[0]['min_price'], Decimal('150.00'))
+
+    def test_category_list(self):
+        response = self.assert_constant_queries('/api/v1/services/categories/', 3)
+        category = next(item for item in self.results(response) if item['slug'] == 'web-development')
+        self.assertEqual(category['services_count'], 5)
+        self.assertEqual([service['slug'] for service in category['services']], [f'service-{i}' for i in range(4)])
+
+    def test_category_detail(self):
+        response = self.assert_constant_queries('/api/v1/services/categories/web-development/', 2)
+        self.assertEqual(len(response.data['services']), 4)
+
+    def test_serializers_fall_back_without_annotations(self):
+        service = Service.objects.get(slug='service-1')
+        data = ServiceListSerializer(service).data
+        self.assertEqual(data['pricing_tiers_count'], 3)
+        self.assertEqual(data['min_price'], Decimal('150.00'))
+
+
+class ServiceConditionalGetTests(TestCase):
+    """List and detail answer revalidations with 304 before serializing, and follow nested rows"""
+
+    def setUp(self):
+        cache.clear()  # anonymous throttling counts requests across tests
+        self.client = APIClient()
+        self.services = [
+            Service.objects.create(
+                name=f'Service {index}', slug=f'service-{index}', description='Description',
+                pricing_model='fixed', starting_at=Decimal('100.00')
+            )
+            for index in range(3)
+        ]
+
+    def test_list_revalidation(self):
+        url = '/api/v1/services/services/?pricing_model=fixed&page=1'
+        response = self.client.get(url)
+        self.assertTrue(response['ETag'].startswith('W/"'))
+        # Nested rows have no timestamp the date could follow
+        self.assertNotIn('Last-Modified', response)
+
+        with self.assertNumQueries(1):
+            revalidated = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(revalidated.status_code, 304)
+        self.assertEqual(revalidated['ETag'], response['ETag'])
+
+        # Another page or filter is another representation
+        other = self.client.get('/api/v1/services/services/?pricing_model=tiered', HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(other.status_code, 200)
+
+        self.services[1].delete()
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag']).status_code, 200)
+
+    def test_detail_revalidation(self):
+        url = '/api/v1/services/services/service-0/'
+        response = self.client.get(url)
+
+        with self.assertNumQueries(1):
+            revalidated = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(revalidated.status_code, 304)
+
+        service = Service.objects.get(slug='service-0')
+        service.timeline = '3 weeks'
+        service.save()
+        updated = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(updated.status_code, 200)
+        self.assertEqual(updated.data['timeline'], '3 weeks')
+        self.assertNotEqual(updated['ETag'], response['ETag'])
+
+    def test_nested_changes_invalidate_detail(self):
+        category = ServiceCategory.objects.create(name='Web Development', slug='web-development')
+        service = self.services[0]
+        service.service_category = category
+        service.save()
+        tier = ServicePricingTier.objects.create(service=service, name='Basic', price=Decimal('100.00'), unit='project')
+        url = '/api/v1/services/services/service-0/'
+
+        def changed(change):
+            etag = self.client.get(url)['ETag']
+            self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+            change()
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, 200)
+            return response.data
+
+        tier.price = Decimal('120.00')
+        self.assertEqual(changed(tier.save)['pricing_tiers'][0]['price'], '120.00')
+
+        feature = ServiceFeature.objects.create(title='Hosting', category='core')
+        data = changed(lambda: PricingTierFeature.objects.create(pricing_tier=tier, feature=feature))
+        self.assertEqual(data['pricing_tiers'][0]['features'][0]['name'], 'Hosting')
+
+        data = changed(lambda: ServiceFAQ.objects.create(service=service, question='How long?', answer='Two weeks.'))
+        self.assertEqual(len(data['faqs']), 1)
+
+        category.name = 'Web Engineering'
+        self.assertEqual(changed(category.save)['service_category']['name'], 'Web Engineering')
+
+    def test_staff_and_public_copies_differ(self):
+        url = '/api/v1/services/services/service-0/'
+        public_etag = self.client.get(url)['ETag']
+        admin = User.objects.create_superuser(email='admin@example.com', password='pass')
+        self.client.force_authenticate(admin)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=public_etag).status_code, 200)
 
-# Create your tests here.
+    def test_any_category_change_invalidates(self):
+        category = ServiceCategory.objects.create(name='Web Development', slug='web-development')
+        for field, value in [('active', False), ('sort_order', 3), ('short_desc', 'Sites'), ('slug', 'web')]:
+            category = ServiceCategory.objects.get(pk=category.pk)
+            generation = tag_generations(['services:*'])['services:*']
+            setattr(category, field, value)
+            with mock.patch('core.signals.schedule_rebuild') as schedule_rebuild:
+                category.save()
+            self.assertGreater(tag_generations(['services:*'])['services:*'], generation, field)
+            schedule_rebuild.assert_called_once_with()
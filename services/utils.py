@@ -2,6 +2,7 @@
 from django.utils.text import slugify
 from django.core.exceptions import ValidationError
 from django.core.cache import cache
+from wordknox.cache_tags import tagged_key, invalidate_tags
 from django.db.models import Count, Q, Min, Max, Avg
 import re
 
@@ -161,7 +162,7 @@ def get_featured_services(limit=6):
     """
     from .models import Service
     
-    cache_key = f'featured_services_{limit}'
+    cache_key = tagged_key(f'featured_services_{limit}', ['services:*'])
     services = cache.get(cache_key)
     
     if services is None:
@@ -189,7 +190,7 @@ def get_services_by_category(category, limit=None):
     """
     from .models import Service
     
-    cache_key = f'services_category_{category}_{limit or "all"}'
+    cache_key = tagged_key(f'services_category_{category}_{limit or "all"}', ['services:*'])
     services = cache.get(cache_key)
     
     if services is None:
@@ -216,7 +217,7 @@ def get_service_categories_with_counts():
     """
     from .models import Service
     
-    cache_key = 'service_categories_stats'
+    cache_key = tagged_key('service_categories_stats', ['service:*'])
     stats = cache.get(cache_key)
     
     if stats is None:
@@ -248,7 +249,7 @@ def get_pricing_models_stats():
     """
     from .models import Service
     
-    cache_key = 'pricing_models_stats'
+    cache_key = tagged_key('pricing_models_stats', ['service:*'])
     stats = cache.get(cache_key)
     
     if stats is None:
@@ -279,7 +280,7 @@ def get_service_statistics():
     """
     from .models import Service, ServicePricingTier
     
-    cache_key = 'service_statistics'
+    cache_key = tagged_key('service_statistics', ['services:*'])
     stats = cache.get(cache_key)
     
     if stats is None:
@@ -323,25 +324,10 @@ def get_service_statistics():
 def invalidate_service_caches():
     """
     Invalidate all service-related caches
-    Call this when services are updated
-    """
-    cache_keys = [
-        'featured_services_6',
-        'featured_services_4',
-        'service_categories_stats',
-        'pricing_models_stats',
-        'service_statistics'
-    ]
-    cache.delete_many(cache_keys)
-    
-    # Also clear category-specific caches (we'll use a pattern)
-    from django.core.cache.utils import make_template_fragment_key
-    from .models import Service
-    
-    categories = Service.objects.values_list('category', flat=True).distinct()
-    for category in categories:
-        cache.delete(f'services_category_{category}_all')
-        cache.delete(f'services_category_{category}_None')
+    Service saves and deletes already do this through the cache tag signals;
+    call it after queryset.update() or other writes that bypass signals
+    """
+    invalidate_tags('services:*', 'service:*')
 
 
 class ServicePermissions:
@@ -5,7 +5,9 @@ from rest_framework.response import Response
 from django.db.models import Q, Min, Max, Avg, Count
 from django.db import transaction
 from django.utils.decorators import method_decorator
-from django.views.decorators.cache import cache_page
+from wordknox.cache_tags import cache_page_tagged
+from wordknox.conditional import ConditionalGetMixin
+from search.filters import IndexedSearchFilter
 from django.views.decorators.vary import vary_on_headers
 from django_filters.rest_framework import DjangoFilterBackend
 
@@ -60,9 +62,12 @@ class ServiceCategoryViewSet(viewsets.ModelViewSet):
         Return service categories based on user permissions.
         Authenticated users can see all categories, anonymous users see only active ones.
         """
-        if self.request.user.is_authenticated:
-            return ServiceCategory.objects.all()
-        return ServiceCategory.objects.filter(active=True)
+        categories = ServiceCategory.objects.all()
+        if not self.request.user.is_authenticated:
+            categories = categories.filter(active=True)
+        if self.action in ['list', 'retrieve']:
+            return categories.with_services()
+        return categories
 
     @action(detail=True, methods=['get'])
     def services(self, request, pk=None):
@@ -70,7 +75,7 @@ class ServiceCategoryViewSet(viewsets.ModelViewSet):
         Get all services for a specific category.
         """
         category = self.get_object()
-        services = category.services.filter(active=True)
+        services = category.services.filter(active=True).for_listing()
         
         if request.user.is_authenticated:
             serializer = ServiceListSerializer(services, many=True, context={'request': request})
@@ -93,7 +98,7 @@ class ServiceCategoryViewSet(viewsets.ModelViewSet):
         return Response(stats)
 
 
-class ServiceViewSet(viewsets.ModelViewSet):
+class ServiceViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     """
     ViewSet for managing services
     
@@ -104,11 +109,14 @@ class ServiceViewSet(viewsets.ModelViewSet):
     
     queryset = Service.objects.all()
     lookup_field = 'slug'
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    filter_backends = [DjangoFilterBackend, IndexedSearchFilter, filters.OrderingFilter]
     filterset_fields = ['service_category', 'pricing_model', 'featured', 'active']
     search_fields = ['name', 'description', 'service_category__name']
+    search_index_kind = 'service'  # ?search= goes through the site search index
     ordering_fields = ['name', 'starting_at', 'date_created', 'timeline']
     ordering = ['-featured', 'starting_at']
+    # Conditional GET: categories, pricing tiers, features, FAQs... (any services row)
+    validator_tags = ('services:*',)
     
     def get_serializer_class(self):
         """Return appropriate serializer based on action and user"""
@@ -133,20 +141,20 @@ class ServiceViewSet(viewsets.ModelViewSet):
         return [permissions.IsAdminUser()]
     
     def get_queryset(self):
-        """Filter queryset based on user permissions"""
-        if self.request.user.is_staff:
-            return Service.objects.prefetch_related(
-                'pricing_tiers', 'process_steps', 'deliverables', 
-                'tools', 'popular_usecases', 'faqs'
-            )
-        
-        # Public users only see active services
-        return Service.objects.filter(active=True).prefetch_related(
-            'pricing_tiers', 'process_steps', 'deliverables', 
-            'tools', 'popular_usecases', 'faqs'
-        )
+        """Filter queryset based on user permissions, shaped for the action's serializer"""
+        services = Service.objects.all()
+        if not self.request.user.is_staff:
+            # Public users only see active services
+            services = services.filter(active=True)
+
+        if self.action == 'list':
+            return services.for_listing()
+        if self.action in ['pricing_overview', 'toggle_featured', 'toggle_active', 'destroy']:
+            return services
+        # Everything else renders the detail serializers
+        return services.for_detail()
     
-    @method_decorator(cache_page(60 * 30))  # Cache for 30 minutes
+    @method_decorator(cache_page_tagged(60 * 30, tags=['services:*']))  # Cache for 30 minutes
     @action(detail=False, methods=['get'])
     def featured(self, request):
         """Get featured services"""
@@ -271,7 +279,7 @@ class ServiceViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_403_FORBIDDEN
             )
         
-        services = Service.objects.all()
+        services = Service.objects.select_related('service_category').with_tier_stats()
         serializer = ServiceStatsSerializer(services, many=True)
         return Response(serializer.data)
     
@@ -514,7 +522,7 @@ class FeaturedServicesAPIView(generics.ListAPIView):
         return Service.objects.filter(
             featured=True,
             active=True
-        ).prefetch_related('pricing_tiers')[:limit]
+        ).for_listing()[:limit]
 
 
 class ServicesByCategoryAPIView(generics.ListAPIView):
@@ -530,7 +538,7 @@ class ServicesByCategoryAPIView(generics.ListAPIView):
         return Service.objects.filter(
             service_category__name__iexact=category,
             active=True
-        ).prefetch_related('pricing_tiers')
+        ).for_listing()
 
 
 class ServiceCategoriesAPIView(generics.ListAPIView):
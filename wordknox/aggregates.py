@@ -0,0 +1,32 @@
+# wordknox/aggregates.py
+"""
+Per-row aggregates of related rows for list querysets and their serializers.
+
+related_aggregate() builds a correlated subquery, e.g. the review count of each
+product, for QuerySet.annotate() or update(). Each aggregate is its own
+subquery: joining several related tables in one query would multiply the rows
+and inflate the counts and sums.
+
+Serializers read the annotation through annotated(), which falls back to a
+query for the one object when the view's queryset did not provide it.
+"""
+from django.db.models import OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def related_aggregate(model, fk, aggregate, default=None, **filters):
+    """
+    Correlated subquery aggregating the `model` rows that point at the outer row
+    through `fk`, filtered by `filters`. Without matching rows it is NULL, or
+    `default` when given (0 for counts).
+    """
+    rows = model.objects.filter(**{fk: OuterRef('pk')}, **filters).order_by().values(fk)
+    subquery = Subquery(rows.annotate(value=aggregate).values('value'))
+    return subquery if default is None else Coalesce(subquery, Value(default))
+
+
+def annotated(obj, name, fallback):
+    """The `name` attribute annotated or prefetched onto obj by its queryset, else fallback()"""
+    if hasattr(obj, name):
+        return getattr(obj, name)
+    return fallback()
@@ -2,6 +2,8 @@
 ASGI config for wordknox project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+The chat stream and long-poll endpoints (notifications/streams.py) need an ASGI
+server, e.g. gunicorn -k uvicorn.workers.UvicornWorker wordknox.asgi:application.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
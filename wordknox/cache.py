@@ -0,0 +1,338 @@
+# wordknox/cache.py
+import os
+import pickle
+import sqlite3
+import threading
+import time
+
+from django.core.cache import caches
+from django.core.cache.backends.base import BaseCache, DEFAULT_TIMEOUT
+from django.core.cache.backends.locmem import LocMemCache
+
+
+class SQLiteCache(BaseCache):
+    """
+    Cache stored in a SQLite file so every worker process on the same host shares it.
+    Intended as the fallback shared backend for single-host deployments without Redis.
+
+    LOCATION is the database file path; the directory is created on first use.
+    """
+    pickle_protocol = pickle.HIGHEST_PROTOCOL
+    cull_every = 50
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        self._path = location
+        self._local = threading.local()
+        self._writes = 0
+
+    def _connection(self):
+        connection = getattr(self._local, 'connection', None)
+        # SQLite connections must not cross a fork (e.g. gunicorn --preload)
+        if connection is None or self._local.pid != os.getpid():
+            directory = os.path.dirname(self._path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            connection = sqlite3.connect(self._path, timeout=5, isolation_level=None)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            connection.execute(
+                'CREATE TABLE IF NOT EXISTS cache_entries '
+                '(key TEXT PRIMARY KEY, value BLOB NOT NULL, expires REAL)'
+            )
+            connection.execute('CREATE INDEX IF NOT EXISTS cache_entries_expires ON cache_entries (expires)')
+            self._local.connection = connection
+            self._local.pid = os.getpid()
+        return connection
+
+    def _read(self, connection, key):
+        row = connection.execute('SELECT value, expires FROM cache_entries WHERE key = ?', (key,)).fetchone()
+        if row is None:
+            return None
+        if row[1] is not None and row[1] <= time.time():
+            connection.execute('DELETE FROM cache_entries WHERE key = ?', (key,))
+            return None
+        return row
+
+    def _write(self, connection, key, value, timeout):
+        connection.execute(
+            'INSERT OR REPLACE INTO cache_entries (key, value, expires) VALUES (?, ?, ?)',
+            (key, pickle.dumps(value, self.pickle_protocol), self.get_backend_timeout(timeout))
+        )
+
+    def _cull(self, connection):
+        self._writes += 1
+        if self._writes % self.cull_every:
+            return
+        connection.execute('DELETE FROM cache_entries WHERE expires IS NOT NULL AND expires <= ?', (time.time(),))
+        count = connection.execute('SELECT COUNT(*) FROM cache_entries').fetchone()[0]
+        if count > self._max_entries:
+            if self._cull_frequency == 0:
+                connection.execute('DELETE FROM cache_entries')
+            else:
+                connection.execute(
+                    'DELETE FROM cache_entries WHERE key IN '
+                    '(SELECT key FROM cache_entries ORDER BY expires IS NULL, expires LIMIT ?)',
+                    (count // self._cull_frequency,)
+                )
+
+    def get(self, key, default=None, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        row = self._read(self._connection(), key)
+        if row is None:
+            return default
+        return pickle.loads(row[0])
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        connection = self._connection()
+        self._write(connection, key, value, timeout)
+        self._cull(connection)
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        connection = self._connection()
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            if self._read(connection, key) is not None:
+                added = False
+            else:
+                self._write(connection, key, value, timeout)
+                added = True
+            connection.execute('COMMIT')
+        except Exception:
+            connection.execute('ROLLBACK')
+            raise
+        if added:
+            self._cull(connection)
+        return added
+
+    def incr(self, key, delta=1, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        connection = self._connection()
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            row = self._read(connection, key)
+            if row is None:
+                raise ValueError("Key '%s' not found" % key)
+            new_value = pickle.loads(row[0]) + delta
+            connection.execute(
+                'UPDATE cache_entries SET value = ? WHERE key = ?',
+                (pickle.dumps(new_value, self.pickle_protocol), key)
+            )
+            connection.execute('COMMIT')
+        except Exception:
+            connection.execute('ROLLBACK')
+            raise
+        return new_value
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        cursor = self._connection().execute(
+            'UPDATE cache_entries SET expires = ? WHERE key = ? AND (expires IS NULL OR expires > ?)',
+            (self.get_backend_timeout(timeout), key, time.time())
+        )
+        return cursor.rowcount > 0
+
+    def delete(self, key, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        cursor = self._connection().execute('DELETE FROM cache_entries WHERE key = ?', (key,))
+        return cursor.rowcount > 0
+
+    def has_key(self, key, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        return self._read(self._connection(), key) is not None
+
+    def clear(self):
+        self._connection().execute('DELETE FROM cache_entries')
+
+
+_MISSING = object()
+
+
+def _new_generation():
+    # Time-based, so a generation recreated after a clear or eviction never reuses an old stamp
+    return int(time.time() * 1000)
+
+
+class TwoTierCache(BaseCache):
+    """
+    In-process L1 cache layered over a shared L2 cache alias.
+
+    Only keys starting with one of LOCAL_PREFIXES are kept in L1; everything else
+    (throttle counters, verification codes) goes straight to the shared cache.
+    L1 keys are stamped with the generation of their prefix, stored in L2. A delete
+    or incr bumps only that prefix's generation (a clear resets all of them), so each
+    worker drops its stale L1 entries under that prefix the next time it syncs
+    (at most SYNC_INTERVAL seconds later) and keeps the rest.
+
+    OPTIONS:
+        SHARED          alias of the shared cache in CACHES (required)
+        LOCAL_PREFIXES  key prefixes eligible for L1 (default: none)
+        LOCAL_TIMEOUT   seconds an L1 entry is trusted (default: 5)
+        SYNC_INTERVAL   seconds between generation checks (default: 1)
+        LOCAL_MAX_ENTRIES  size of the L1 cache (default: 1000)
+    """
+    generation_key = 'two_tier_cache_generation'
+
+    def __init__(self, location, params):
+        options = dict(params.get('OPTIONS', {}))
+        self._shared_alias = options.pop('SHARED')
+        self._local_prefixes = tuple(options.pop('LOCAL_PREFIXES', ()))
+        self._local_timeout = options.pop('LOCAL_TIMEOUT', 5)
+        self._sync_interval = options.pop('SYNC_INTERVAL', 1)
+        local_max_entries = options.pop('LOCAL_MAX_ENTRIES', 1000)
+        super().__init__({**params, 'OPTIONS': options})
+
+        self._local = LocMemCache(
+            f'two-tier-l1:{location or self._shared_alias}',
+            {'TIMEOUT': self._local_timeout, 'OPTIONS': {'MAX_ENTRIES': local_max_entries}}
+        )
+        self._generations = {}
+        self._synced_at = 0
+
+    @property
+    def shared(self):
+        return caches[self._shared_alias]
+
+    def _prefix(self, key):
+        """The LOCAL_PREFIXES entry `key` falls under, or None if it bypasses L1"""
+        for prefix in self._local_prefixes:
+            if key.startswith(prefix):
+                return prefix
+        return None
+
+    def _is_local(self, key):
+        return self._prefix(key) is not None
+
+    def _generation_key(self, prefix):
+        return f'{self.generation_key}:{prefix}'
+
+    def _sync_generations(self):
+        """Read every prefix generation from L2 in one get_many, creating missing ones"""
+        keys = {prefix: self._generation_key(prefix) for prefix in self._local_prefixes}
+        found = self.shared.get_many(list(keys.values()))
+        generations = {}
+        for prefix, key in keys.items():
+            if key not in found:
+                self.shared.add(key, _new_generation(), None)
+                found[key] = self.shared.get(key)
+            generations[prefix] = found[key]
+        self._generations = generations
+        self._synced_at = time.monotonic()
+
+    def _current_generation(self, prefix):
+        if not self._generations or time.monotonic() - self._synced_at >= self._sync_interval:
+            self._sync_generations()
+        return self._generations[prefix]
+
+    def _bump_generation(self, prefix):
+        key = self._generation_key(prefix)
+        try:
+            generation = self.shared.incr(key)
+        except ValueError:
+            self.shared.add(key, _new_generation(), None)
+            generation = self.shared.incr(key)
+        if self._generations:
+            self._generations[prefix] = generation
+
+    def _local_key(self, key):
+        return f'{self._current_generation(self._prefix(key))}:{key}'
+
+    def _local_timeout_for(self, timeout):
+        if timeout is DEFAULT_TIMEOUT or timeout is None:
+            return self._local_timeout
+        return min(timeout, self._local_timeout)
+
+    def get(self, key, default=None, version=None):
+        if not self._is_local(key):
+            return self.shared.get(key, default, version=version)
+
+        local_key = self._local_key(key)
+        value = self._local.get(local_key, _MISSING, version=version)
+        if value is not _MISSING:
+            return value
+
+        value = self.shared.get(key, _MISSING, version=version)
+        if value is _MISSING:
+            return default
+        self._local.set(local_key, value, self._local_timeout, version=version)
+        return value
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self.shared.set(key, value, timeout, version=version)
+        if self._is_local(key):
+            if timeout is not DEFAULT_TIMEOUT and timeout is not None and timeout <= 0:
+                self._local.delete(self._local_key(key), version=version)
+            else:
+                self._local.set(self._local_key(key), value, self._local_timeout_for(timeout), version=version)
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        added = self.shared.add(key, value, timeout, version=version)
+        if added and self._is_local(key):
+            self._local.set(self._local_key(key), value, self._local_timeout_for(timeout), version=version)
+        return added
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        return self.shared.touch(key, timeout, version=version)
+
+    def delete(self, key, version=None):
+        deleted = self.shared.delete(key, version=version)
+        if self._is_local(key):
+            self._local.delete(self._local_key(key), version=version)
+            self._bump_generation(self._prefix(key))
+        return deleted
+
+    def has_key(self, key, version=None):
+        if self._is_local(key) and self._local.has_key(self._local_key(key), version=version):
+            return True
+        return self.shared.has_key(key, version=version)
+
+    def incr(self, key, delta=1, version=None):
+        value = self.shared.incr(key, delta, version=version)
+        if self._is_local(key):
+            self._local.delete(self._local_key(key), version=version)
+            self._bump_generation(self._prefix(key))
+        return value
+
+    def get_many(self, keys, version=None):
+        found = {}
+        for key in keys:
+            value = self.get(key, _MISSING, version=version)
+            if value is not _MISSING:
+                found[key] = value
+        return found
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        failed = self.shared.set_many(data, timeout, version=version)
+        for key, value in data.items():
+            if key not in failed and self._is_local(key):
+                self._local.set(self._local_key(key), value, self._local_timeout_for(timeout), version=version)
+        return failed
+
+    def delete_many(self, keys, version=None):
+        keys = list(keys)
+        self.shared.delete_many(keys, version=version)
+        local_keys = [key for key in keys if self._is_local(key)]
+        if local_keys:
+            self._local.delete_many([self._local_key(key) for key in local_keys], version=version)
+            for prefix in {self._prefix(key) for key in local_keys}:
+                self._bump_generation(prefix)
+
+    def clear(self):
+        if self._local_prefixes and not self._generations:
+            self._sync_generations()
+        previous = self._generations
+        self.shared.clear()
+        self._local.clear()
+        # The clear dropped the generation keys; recreate them past every stamp handed out so far
+        self._generations = {
+            prefix: max(_new_generation(), previous.get(prefix, 0) + 1) for prefix in self._local_prefixes
+        }
+        self.shared.set_many(
+            {self._generation_key(prefix): generation for prefix, generation in self._generations.items()}, None
+        )
+        self._synced_at = time.monotonic()
+
+    def close(self, **kwargs):
+        self.shared.close(**kwargs)
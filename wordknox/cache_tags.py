@@ -0,0 +1,109 @@
+# wordknox/cache_tags.py
+"""
+Tag-based cache invalidation.
+
+Cached values and responses declare the tags they depend on:
+    '<model_name>:*'     any row of a model changed, e.g. 'product:*'
+    '<model_name>:<pk>'  one row changed, e.g. 'blogpost:42'
+    '<app_label>:*'      any model in an app changed, e.g. 'services:*'
+
+Each tag has a generation number in the cache. Keys are stamped with the current
+generations of their tags, so bumping a tag makes every dependent entry unreachable
+at once; the orphaned entries simply expire. Model signals in core/signals.py bump
+the tags of every model in TAGGED_APPS on save and delete.
+"""
+import hashlib
+import time
+from functools import lru_cache, wraps
+
+from django.core.cache import cache
+from django.middleware.cache import CacheMiddleware
+
+
+TAG_KEY_PREFIX = 'cache_tag:'
+
+TAGGED_APPS = ('core', 'blog', 'projects', 'products', 'services')
+
+
+def _tag_key(tag):
+    return f'{TAG_KEY_PREFIX}{tag}'
+
+
+def _new_generation():
+    # Time-based, so a tag recreated after eviction never reuses an old stamp
+    return int(time.time() * 1000)
+
+
+def model_tags(instance):
+    """Return the tags a saved or deleted model instance invalidates"""
+    opts = instance._meta
+    tags = [f'{opts.model_name}:*', f'{opts.app_label}:*']
+    if instance.pk is not None:
+        tags.append(f'{opts.model_name}:{instance.pk}')
+    return tags
+
+
+def tag_generations(tags):
+    """Return the current generation of each tag, creating missing ones"""
+    keys = {tag: _tag_key(tag) for tag in tags}
+    found = cache.get_many(list(keys.values()))
+
+    generations = {}
+    for tag, key in keys.items():
+        if key not in found:
+            cache.add(key, _new_generation(), None)
+            found[key] = cache.get(key)
+        generations[tag] = found[key]
+    return generations
+
+
+def tagged_key(key, tags):
+    """Stamp a cache key with the current generations of its tags"""
+    generations = tag_generations(sorted(set(tags)))
+    stamp = '.'.join(f'{tag}={generations[tag]}' for tag in sorted(generations))
+    return f"{key}:{hashlib.md5(stamp.encode('utf-8')).hexdigest()}"
+
+
+def invalidate_tags(*tags):
+    """Bump the generation of each tag so everything stamped with it is dropped"""
+    for tag in set(tags):
+        key = _tag_key(tag)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.add(key, _new_generation(), None)
+
+
+def cache_page_tagged(timeout, tags, key_prefix=''):
+    """
+    Like cache_page, but the cached response is dropped as soon as one of `tags` is bumped.
+    Use with method_decorator on viewset actions, like cache_page.
+    """
+    @lru_cache(maxsize=16)
+    def middleware_for(prefix):
+        # One CacheMiddleware per tag stamp; a bump moves requests on to a new one.
+        # Built here rather than per request, since method_decorator re-applies the
+        # inner decorator on every call.
+        return CacheMiddleware(_no_response, page_timeout=timeout, key_prefix=prefix)
+
+    def decorator(view_func):
+        @wraps(view_func)
+        def wrapped_view(request, *args, **kwargs):
+            middleware = middleware_for(
+                tagged_key(f'{key_prefix}{view_func.__module__}.{view_func.__qualname__}', tags)
+            )
+            response = middleware.process_request(request)
+            if response is not None:
+                return response
+            response = view_func(request, *args, **kwargs)
+            if hasattr(response, 'render') and callable(response.render):
+                response.add_post_render_callback(lambda rendered: middleware.process_response(request, rendered))
+                return response
+            return middleware.process_response(request, response)
+        return wrapped_view
+    return decorator
+
+
+def _no_response(request):
+    # CacheMiddleware requires get_response, but only its process_* hooks are called
+    raise NotImplementedError
@@ -0,0 +1,61 @@
+# wordknox/comment_tree.py
+"""
+Load a whole comment thread with one query and assemble it in memory.
+
+Each comment comes back with a `thread_replies` list, ordered by date_created,
+and a `thread_depth` (0 for top-level comments). Comment serializers render
+`thread_replies` when it is present instead of querying replies per node.
+Models without a `parent` field (flat comments) simply produce top-level nodes.
+"""
+
+
+def build_comment_tree(comments, max_depth=None):
+    """
+    Link comments (ordered by date_created) into a tree in O(n).
+    Replies deeper than `max_depth` are dropped; so are replies whose parent is
+    not in `comments` (e.g. an unapproved parent). Returns the top-level comments.
+    """
+    by_id = {}
+    roots = []
+    for comment in comments:
+        comment.thread_replies = []
+        by_id[comment.pk] = comment
+
+    for comment in comments:
+        parent_id = getattr(comment, 'parent_id', None)
+        if parent_id is None:
+            comment.thread_depth = 0
+            roots.append(comment)
+        elif parent_id in by_id:
+            by_id[parent_id].thread_replies.append(comment)
+
+    # Depths are only known once parents are linked; walk down from the roots
+    stack = list(roots)
+    while stack:
+        comment = stack.pop()
+        if max_depth is not None and comment.thread_depth >= max_depth:
+            comment.thread_replies = []
+            continue
+        for reply in comment.thread_replies:
+            reply.thread_depth = comment.thread_depth + 1
+            stack.append(reply)
+
+    return roots
+
+
+def load_comment_tree(queryset, max_depth=None):
+    """
+    Fetch every comment in `queryset` with one query and return (top-level comments, total count).
+    Pass an already-filtered queryset, e.g. post.comments.filter(approved=True).
+    """
+    comments = list(queryset.order_by('date_created'))
+    return build_comment_tree(comments, max_depth), len(comments)
+
+
+def parse_max_depth(value, default=None):
+    """Read a ?max_depth= query parameter; invalid or negative values fall back to `default`"""
+    try:
+        depth = int(value)
+    except (TypeError, ValueError):
+        return default
+    return depth if depth >= 0 else default
@@ -0,0 +1,181 @@
+# wordknox/conditional.py
+"""
+Conditional GET (ETag / Last-Modified) for DRF list and retrieve actions.
+
+Validators are computed from row metadata instead of the rendered payload, so a
+revalidation costs one small query and never runs the serializer:
+    list      one aggregate over the filtered queryset: the max of each modified
+              field, the row count (a deleted row lowers the count) and the sum of
+              each counter field
+    retrieve  the object's modified and counter fields; a conditional request reads
+              them with one narrow query first, so a 304 skips get_object() and its
+              prefetches
+The ETag also covers the path, the sorted query parameters (filters, ordering,
+page) and get_validator_variant(), which by default is the serializer class and
+the requesting user, since staff and public callers get different payloads.
+
+Everything else the payload contains has to be declared by the view:
+    related_modified_fields  timestamps of related rows shown in the payload,
+                             e.g. 'author__date_updated' for author names
+    counter_fields           columns moved with F() updates (wordknox.counters,
+                             rating summaries) that leave last_modified_field alone
+    validator_tags           cache tags (wordknox.cache_tags) whose generations are
+                             bumped when nested rows change, e.g. 'blog:*' for
+                             comments and tags
+Counters are read as stored, so buffered increments show up in the ETag when they
+are flushed; the served copy may be up to COUNTER_FLUSH_INTERVAL ahead of it, which
+is why ETags are weak. Counters and tags have no timestamp, so views that declare
+either only send an ETag: a Last-Modified date could not see those changes.
+"""
+import hashlib
+
+from django.db.models import Count, Max, Sum
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date
+from rest_framework.response import Response
+
+from .cache_tags import tag_generations
+
+
+class ConditionalGetMixin:
+    """
+    Answers If-None-Match / If-Modified-Since on list and retrieve with 304
+    before the queryset is serialized. Views that override retrieve() call
+    lookup_not_modified() first and add_validators() to their response; work a
+    revalidated retrieve must still do (e.g. counting the view) goes in revalidated().
+    The 304 shortcut skips object-level permission checks; use it on public
+    read endpoints only.
+    """
+
+    last_modified_field = 'date_updated'
+    related_modified_fields = ()
+    counter_fields = ()
+    validator_tags = ()
+    # Extra fields read by the retrieve lookup and passed to revalidated()
+    revalidation_fields = ()
+
+    def get_validator_variant(self):
+        """Anything besides the rows that changes the payload"""
+        user = self.request.user
+        return self.get_serializer_class().__name__, user.pk if user.is_authenticated else None
+
+    def _modified_fields(self):
+        return (self.last_modified_field, *self.related_modified_fields)
+
+    def _validators(self, modified, *state):
+        request = self.request
+        params = sorted((key, sorted(values)) for key, values in request.query_params.lists())
+        if self.validator_tags:
+            state += (sorted(tag_generations(self.validator_tags).items()),)
+        fingerprint = repr((request.path, params, self.get_validator_variant(), modified, state))
+        etag = f'W/"{hashlib.md5(fingerprint.encode("utf-8")).hexdigest()}"'
+
+        if self.counter_fields or self.validator_tags:
+            return etag, None
+        timestamps = [value for value in modified if value is not None]
+        return etag, int(max(timestamps).timestamp()) if timestamps else None
+
+    def list_validators(self, queryset):
+        """(etag, last_modified timestamp or None) of a filtered queryset"""
+        if not queryset.query.is_sliced:
+            queryset = queryset.order_by()
+        modified = {f'modified_{index}': Max(field) for index, field in enumerate(self._modified_fields())}
+        counters = {f'counter_{index}': Sum(field) for index, field in enumerate(self.counter_fields)}
+        stats = queryset.aggregate(count=Count('pk'), **modified, **counters)
+        return self._validators(
+            tuple(stats[name] for name in modified), stats['count'], tuple(stats[name] for name in counters)
+        )
+
+    def object_validators(self, instance):
+        """
+        (etag, last_modified timestamp or None) of one object.
+        Call it before adding pending counter increments to the instance.
+        """
+        return self._validators(
+            tuple(_resolve(instance, field) for field in self._modified_fields()),
+            str(instance.pk),
+            tuple(getattr(instance, field) for field in self.counter_fields)
+        )
+
+    def lookup_values(self):
+        """The looked-up validator and revalidation fields of the object retrieve() would return, or None"""
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        queryset = self.filter_queryset(self.get_queryset()).prefetch_related(None)
+        fields = [*self._modified_fields(), *self.counter_fields, 'pk', *self.revalidation_fields]
+        return queryset.filter(**{self.lookup_field: self.kwargs[lookup_url_kwarg]}).values(*fields).first()
+
+    def lookup_validators(self, values):
+        return self._validators(
+            tuple(values[field] for field in self._modified_fields()),
+            str(values['pk']),
+            tuple(values[field] for field in self.counter_fields)
+        )
+
+    def is_conditional(self):
+        meta = self.request.META
+        return 'HTTP_IF_NONE_MATCH' in meta or 'HTTP_IF_MODIFIED_SINCE' in meta
+
+    def lookup_not_modified(self):
+        """304 for a conditional retrieve whose copy is current, checked before loading the object"""
+        if not self.is_conditional():
+            return None
+        values = self.lookup_values()
+        if values is None:
+            return None
+        response = self.not_modified(self.lookup_validators(values))
+        if response is not None:
+            self.revalidated(values)
+        return response
+
+    def revalidated(self, values):
+        """Called with lookup_values() when a retrieve is answered with 304"""
+
+    def not_modified(self, validators):
+        """A 304 response carrying the validators if the client's copy is current, else None"""
+        etag, last_modified = validators
+        response = get_conditional_response(self.request, etag=etag, last_modified=last_modified)
+        if response is not None:
+            return self.add_validators(response, validators)
+        return None
+
+    def add_validators(self, response, validators):
+        etag, last_modified = validators
+        response['ETag'] = etag
+        if last_modified is not None:
+            response['Last-Modified'] = http_date(last_modified)
+        # Validators depend on who is asking
+        patch_vary_headers(response, ['Authorization', 'Cookie'])
+        return response
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        validators = self.list_validators(queryset)
+        response = self.not_modified(validators)
+        if response is not None:
+            return response
+
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            serializer = self.get_serializer(page, many=True)
+            response = self.get_paginated_response(serializer.data)
+        else:
+            serializer = self.get_serializer(queryset, many=True)
+            response = Response(serializer.data)
+        return self.add_validators(response, validators)
+
+    def retrieve(self, request, *args, **kwargs):
+        response = self.lookup_not_modified()
+        if response is not None:
+            return response
+        instance = self.get_object()
+        serializer = self.get_serializer(instance)
+        return self.add_validators(Response(serializer.data), self.object_validators(instance))
+
+
+def _resolve(instance, path):
+    """Follow a related lookup such as 'author__date_updated' on a loaded instance"""
+    for attr in path.split('__'):
+        instance = getattr(instance, attr, None)
+        if instance is None:
+            return None
+    return instance
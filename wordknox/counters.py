@@ -0,0 +1,147 @@
+# wordknox/counters.py
+"""
+Write-behind buffer for hot integer counters (view counts, likes, downloads).
+
+increment() only adds to an in-process buffer; repeated increments of one row
+merge into a single delta. The buffer is written back with one
+`UPDATE ... SET field = field + n WHERE pk IN (...)` per model, field and delta:
+    - by a daemon thread every COUNTER_FLUSH_INTERVAL seconds, or as soon as the
+      buffer holds COUNTER_MAX_PENDING rows
+    - at the end of a request once the last flush is an interval old, for servers
+      that run no background threads (uWSGI without enable-threads)
+    - at interpreter exit, which covers a graceful worker shutdown (SIGTERM, max_requests)
+
+The buffer is per process. Readers add pending() to the value loaded from the
+database, so the worker that took an increment shows it right away; other workers
+see it after the next flush. Increments still buffered when a worker dies without
+running exit handlers (SIGKILL, OOM kill, a timed-out worker) are lost, at most
+one flush interval's worth. That is acceptable for these counters.
+
+Set COUNTER_FLUSH_INTERVAL = 0 to write every increment straight through (tests).
+"""
+import atexit
+import logging
+import os
+import threading
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.signals import request_finished
+from django.db import connection
+from django.db.models import F
+
+logger = logging.getLogger(__name__)
+
+
+class CounterBuffer:
+    """Per-process buffer of pending counter deltas keyed by (model, field, pk)"""
+
+    def __init__(self):
+        self._pending = defaultdict(int)
+        self._lock = threading.Lock()
+        self._pid = None
+        self._wakeup = threading.Event()
+        self._flushed_at = time.monotonic()
+
+    @property
+    def flush_interval(self):
+        return getattr(settings, 'COUNTER_FLUSH_INTERVAL', 5)
+
+    @property
+    def max_pending(self):
+        return getattr(settings, 'COUNTER_MAX_PENDING', 1000)
+
+    def increment(self, model, pk, field, delta=1):
+        """Add `delta` to model.field for the row `pk`"""
+        if not self.flush_interval:
+            model._default_manager.filter(pk=pk).update(**{field: F(field) + delta})
+            return
+
+        self._ensure_worker()
+        with self._lock:
+            self._pending[(model, field, pk)] += delta
+            full = len(self._pending) >= self.max_pending
+        if full:
+            self._wakeup.set()
+
+    def pending(self, model, pk, field):
+        """Return the delta not yet written to the database"""
+        with self._lock:
+            return self._pending.get((model, field, pk), 0)
+
+    def apply_pending(self, instance, *fields):
+        """Add pending deltas to counter attributes loaded from the database"""
+        for field in fields:
+            setattr(instance, field, getattr(instance, field) + self.pending(type(instance), instance.pk, field))
+        return instance
+
+    def flush(self):
+        """Write all pending deltas to the database; returns the number of rows updated"""
+        with self._lock:
+            pending, self._pending = self._pending, defaultdict(int)
+            self._flushed_at = time.monotonic()
+        if not pending:
+            return 0
+
+        batches = defaultdict(list)
+        for (model, field, pk), delta in pending.items():
+            if delta:
+                batches[(model, field, delta)].append(pk)
+
+        updated = 0
+        for (model, field, delta), pks in batches.items():
+            try:
+                updated += model._default_manager.filter(pk__in=pks).update(**{field: F(field) + delta})
+            except Exception:
+                logger.exception('Failed to flush %s.%s counters', model._meta.label, field)
+                with self._lock:
+                    for pk in pks:
+                        self._pending[(model, field, pk)] += delta
+        return updated
+
+    def flush_if_due(self):
+        """Flush if deltas are pending and the last flush is an interval old; True if it ran"""
+        if not self._pending or time.monotonic() - self._flushed_at < self.flush_interval:
+            return False
+        self.flush()
+        return True
+
+    def _ensure_worker(self):
+        # Threads do not survive a fork, so each worker process starts its own
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            threading.Thread(target=self._run, name='counter-flush', daemon=True).start()
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            finally:
+                connection.close()
+
+
+counters = CounterBuffer()
+
+
+def _flush_after_request(**kwargs):
+    # Runs after the request's connection was released; the one a flush opens is
+    # closed by close_old_connections when this worker's next request starts
+    counters.flush_if_due()
+
+
+request_finished.connect(_flush_after_request, dispatch_uid='counters_flush_after_request')
+
+
+@atexit.register
+def _flush_on_exit():
+    try:
+        counters.flush()
+    except Exception:
+        logger.exception('Failed to flush counters at exit')
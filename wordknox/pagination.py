@@ -0,0 +1,106 @@
+# wordknox/pagination.py
+"""
+Keyset (cursor) pagination over (created_at, id) for chat messages and timelines.
+
+Cursors are plain row ids. `?after=<id>` returns rows newer than that row, which is
+how chat clients poll for messages since the last one they have seen.
+`?before=<id>` returns the page of older rows just before it. Without a cursor,
+the newest page is returned. Each page costs one indexed range query, however deep
+it is, unlike the growing OFFSET of page-number pagination. It needs an index on
+(<parent>, created_at).
+"""
+from django.db.models import Q
+from rest_framework.exceptions import ValidationError
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+
+
+class KeysetPagination(BasePagination):
+    """Pages rows oldest-first (chat order) using before/after row-id cursors"""
+
+    cursor_field = 'created_at'
+    page_size = 50
+    max_page_size = 100
+    page_size_query_param = 'limit'
+    before_query_param = 'before'
+    after_query_param = 'after'
+    newest_first = False
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params.get(self.page_size_query_param, self.page_size))
+        except (TypeError, ValueError):
+            return self.page_size
+        return min(max(size, 1), self.max_page_size)
+
+    def get_anchor(self, queryset, cursor):
+        """Resolve a cursor id to its (created_at, id) key within `queryset`"""
+        value = queryset.filter(pk=cursor).values_list(self.cursor_field, flat=True).first()
+        if value is None:
+            raise ValidationError({'detail': 'Invalid cursor.'})
+        return value, cursor
+
+    def newer_than(self, anchor):
+        value, pk = anchor
+        return Q(**{f'{self.cursor_field}__gt': value}) | Q(**{self.cursor_field: value, 'pk__gt': pk})
+
+    def older_than(self, anchor):
+        value, pk = anchor
+        return Q(**{f'{self.cursor_field}__lt': value}) | Q(**{self.cursor_field: value, 'pk__lt': pk})
+
+    def paginate_queryset(self, queryset, request, view=None):
+        size = self.get_page_size(request)
+        after = request.query_params.get(self.after_query_param)
+        before = request.query_params.get(self.before_query_param)
+        ascending = (self.cursor_field, 'pk')
+        descending = (f'-{self.cursor_field}', '-pk')
+        self.after_cursor = after
+
+        if after:
+            rows = list(
+                queryset.filter(self.newer_than(self.get_anchor(queryset, after))).order_by(*ascending)[:size + 1]
+            )
+            self.has_newer = len(rows) > size
+            self.has_older = True
+            rows = rows[:size]
+        else:
+            if before:
+                queryset = queryset.filter(self.older_than(self.get_anchor(queryset, before)))
+            rows = list(queryset.order_by(*descending)[:size + 1])
+            self.has_older = len(rows) > size
+            self.has_newer = bool(before)
+            rows = rows[:size]
+            rows.reverse()
+
+        self.rows = rows
+        return rows[::-1] if self.newest_first else rows
+
+    def get_cursor_data(self):
+        """Cursors for the neighbouring pages; `after` is what a poller sends next"""
+        return {
+            'before': str(self.rows[0].pk) if self.rows and self.has_older else None,
+            'after': str(self.rows[-1].pk) if self.rows else self.after_cursor,
+            'has_older': self.has_older,
+            'has_newer': self.has_newer,
+        }
+
+    def get_paginated_response(self, data):
+        return Response({**self.get_cursor_data(), 'results': data})
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'properties': {
+                'before': {'type': 'string', 'nullable': True},
+                'after': {'type': 'string', 'nullable': True},
+                'has_older': {'type': 'boolean'},
+                'has_newer': {'type': 'boolean'},
+                'results': schema,
+            },
+        }
+
+
+class NewestFirstKeysetPagination(KeysetPagination):
+    """KeysetPagination that returns each page newest-first (activity timelines)"""
+
+    newest_first = True
@@ -0,0 +1,209 @@
+# wordknox/pubsub.py
+"""
+Wake-up notifications for long-lived streaming and long-poll connections.
+
+Writers call publish(channel) once their transaction commits. Every subscriber of
+the channel is woken and reloads what changed from the database itself, so a
+duplicated or coalesced notification is harmless. Notifications carry no payload.
+
+CHAT_BROKER selects how notifications reach subscribers:
+    'local' - only subscribers in the publishing process are woken (single worker)
+    'cache' - also bumps a per-channel sequence number in the shared cache; every
+              worker checks the channels it has subscribers for with one get_many
+              per CHAT_BROKER_POLL_INTERVAL seconds
+A dotted path to another Broker subclass plugs in a different transport.
+
+Subscribers must run in an asyncio event loop (ASGI). Publishers may be sync code on
+any thread.
+"""
+import asyncio
+import logging
+import threading
+from collections import defaultdict
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+
+BROKERS = {
+    'local': 'wordknox.pubsub.LocalBroker',
+    'cache': 'wordknox.pubsub.CacheBroker',
+}
+
+
+class Subscription:
+    """Async context manager; wait() returns True once the channel was published to"""
+
+    def __init__(self, broker, channel):
+        self.broker = broker
+        self.channel = channel
+        self.event = asyncio.Event()
+        self.loop = None
+
+    async def __aenter__(self):
+        self.loop = asyncio.get_running_loop()
+        await self.broker.add_subscription(self)
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self.broker.remove_subscription(self)
+
+    def notify(self):
+        try:
+            self.loop.call_soon_threadsafe(self.event.set)
+        except RuntimeError:
+            # Event loop already closed; the connection is gone
+            pass
+
+    async def wait(self, timeout):
+        try:
+            await asyncio.wait_for(self.event.wait(), timeout)
+        except asyncio.TimeoutError:
+            return False
+        self.event.clear()
+        return True
+
+
+class LocalBroker:
+    """In-process fan-out; subscribers in other worker processes are not woken"""
+
+    def __init__(self):
+        self._subscriptions = defaultdict(set)
+        self._lock = threading.Lock()
+
+    def subscribe(self, channel):
+        return Subscription(self, channel)
+
+    async def add_subscription(self, subscription):
+        with self._lock:
+            self._subscriptions[subscription.channel].add(subscription)
+
+    def remove_subscription(self, subscription):
+        with self._lock:
+            subscriptions = self._subscriptions.get(subscription.channel)
+            if subscriptions is not None:
+                subscriptions.discard(subscription)
+                if not subscriptions:
+                    del self._subscriptions[subscription.channel]
+
+    def notify_local(self, channel):
+        with self._lock:
+            targets = list(self._subscriptions.get(channel, ()))
+        for subscription in targets:
+            subscription.notify()
+
+    def publish(self, channel):
+        self.notify_local(channel)
+
+
+class CacheBroker(LocalBroker):
+    """Cross-worker broker over the shared cache (Redis or the SQLite file cache)"""
+
+    key_prefix = 'pubsub_seq:'
+
+    def __init__(self):
+        super().__init__()
+        self._sequences = {}
+        self._watchers = {}
+
+    @property
+    def poll_interval(self):
+        return getattr(settings, 'CHAT_BROKER_POLL_INTERVAL', 1)
+
+    def _key(self, channel):
+        return f'{self.key_prefix}{channel}'
+
+    def publish(self, channel):
+        key = self._key(channel)
+        try:
+            sequence = cache.incr(key)
+        except ValueError:
+            sequence = 1 if cache.add(key, 1, None) else cache.incr(key)
+
+        # Local subscribers are woken right away; skip the watcher's second wake-up
+        # unless another worker published in between
+        previous = sequence - 1 if sequence > 1 else None
+        with self._lock:
+            for subscription in self._subscriptions.get(channel, ()):
+                if self._sequences.get(subscription) == previous:
+                    self._sequences[subscription] = sequence
+        super().publish(channel)
+
+    async def add_subscription(self, subscription):
+        # Record the sequence before the subscriber reads the database, so a
+        # publish in another worker between the two is not lost
+        sequence = await sync_to_async(cache.get)(self._key(subscription.channel))
+        with self._lock:
+            self._sequences[subscription] = sequence
+        await super().add_subscription(subscription)
+
+        loop = subscription.loop
+        watcher = self._watchers.get(loop)
+        if watcher is None or watcher.done():
+            self._watchers[loop] = loop.create_task(self._watch(loop))
+
+    def remove_subscription(self, subscription):
+        super().remove_subscription(subscription)
+        with self._lock:
+            self._sequences.pop(subscription, None)
+
+    async def _watch(self, loop):
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            with self._lock:
+                subscriptions = [
+                    subscription for subscription in self._sequences if subscription.loop is loop
+                ]
+            if not subscriptions:
+                del self._watchers[loop]
+                return
+
+            keys = {subscription.channel: self._key(subscription.channel) for subscription in subscriptions}
+            try:
+                current = await sync_to_async(cache.get_many)(list(set(keys.values())))
+            except Exception:
+                logger.exception('Failed to read pub/sub sequences')
+                continue
+
+            changed = []
+            with self._lock:
+                for subscription in subscriptions:
+                    sequence = current.get(keys[subscription.channel])
+                    if subscription in self._sequences and self._sequences[subscription] != sequence:
+                        self._sequences[subscription] = sequence
+                        changed.append(subscription)
+            for subscription in changed:
+                subscription.notify()
+
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_broker():
+    """Return the process-wide broker configured by CHAT_BROKER"""
+    global _broker
+    if _broker is None:
+        with _broker_lock:
+            if _broker is None:
+                name = getattr(settings, 'CHAT_BROKER', 'local')
+                _broker = import_string(BROKERS.get(name, name))()
+    return _broker
+
+
+def publish(channel):
+    """Wake every subscriber of `channel`; call after the write has committed"""
+    try:
+        get_broker().publish(channel)
+    except Exception:
+        # Subscribers still catch up on their next timeout or reconnect
+        logger.exception('Failed to publish to %s', channel)
+
+
+def subscribe(channel):
+    """`async with subscribe(channel) as subscription: await subscription.wait(timeout)`"""
+    return get_broker().subscribe(channel)
@@ -22,6 +22,17 @@ PAYPAL_MODE = env('PAYPAL_MODE', default='sandbox')
 PAYPAL_API_URL = env('PAYPAL_API_URL', default='https://api-m.sandbox.paypal.com')
 PAYPAL_WEBHOOK_ID = env('PAYPAL_WEBHOOK_ID', default='')
 PAYPAL_WEBHOOK_URL = env('PAYPAL_WEBHOOK_URL', default='https://77a37ec095b1.ngrok-free.app/api/v1/business/paypal/webhook/')
+# Shared PayPal client (business/paypal.py): timeouts in seconds, retries on 429/5xx
+PAYPAL_CONNECT_TIMEOUT = env.float('PAYPAL_CONNECT_TIMEOUT', default=5)
+PAYPAL_READ_TIMEOUT = env.float('PAYPAL_READ_TIMEOUT', default=30)
+PAYPAL_MAX_RETRIES = env.int('PAYPAL_MAX_RETRIES', default=3)
+PAYPAL_RETRY_BACKOFF = env.float('PAYPAL_RETRY_BACKOFF', default=0.5)
+PAYPAL_POOL_SIZE = env.int('PAYPAL_POOL_SIZE', default=10)
+PAYPAL_TOKEN_REFRESH_MARGIN = env.int('PAYPAL_TOKEN_REFRESH_MARGIN', default=300)
+# Queued webhook events (business/webhooks.py): retry backoff base in seconds, attempts before dead-lettering
+PAYPAL_WEBHOOK_RETRY_DELAY = env.int('PAYPAL_WEBHOOK_RETRY_DELAY', default=30)
+PAYPAL_WEBHOOK_MAX_ATTEMPTS = env.int('PAYPAL_WEBHOOK_MAX_ATTEMPTS', default=8)
+PAYPAL_WEBHOOK_PROCESSING_TIMEOUT = env.int('PAYPAL_WEBHOOK_PROCESSING_TIMEOUT', default=600)
 
 
 # SECURITY WARNING: keep the secret key used in production secret!
@@ -66,6 +77,7 @@ INSTALLED_APPS = [
     'products.apps.ProductsConfig',
     'business.apps.BusinessConfig',
     'notifications.apps.NotificationsConfig',
+    'search.apps.SearchConfig',
     'emails',
 ]
 
@@ -202,6 +214,7 @@ REST_FRAMEWORK = {
         'anon_chat_read': '30/minute', # Anonymous chat - reading messages (more permissive)
         'anon_chat_write': '10/minute',# Anonymous chat - sending messages (stricter)
         'user_chat': '60/minute',      # Authenticated chat messages
+        'chat_stream': '20/minute',    # Opening chat streams / long-polls (see notifications/streams.py)
     }
 }
 # CORS Configuration (for frontend)
@@ -274,6 +287,11 @@ EMAIL_USE_SSL = env('EMAIL_USE_SSL', default=False, cast=bool)
 # Email timeout settings
 EMAIL_TIMEOUT = 10
 
+# Email outbox: request handlers queue mail, `python manage.py send_queued_emails --loop` delivers it
+EMAIL_OUTBOX_MAX_ATTEMPTS = env.int('EMAIL_OUTBOX_MAX_ATTEMPTS', default=5)
+EMAIL_OUTBOX_RETRY_DELAY = env.int('EMAIL_OUTBOX_RETRY_DELAY', default=60)  # seconds, doubled per failed attempt
+EMAIL_OUTBOX_SENDING_TIMEOUT = 600  # seconds before a row stuck in 'sending' is retried
+
 
 # For API testing - disable CSRF on API endpoints
 CSRF_COOKIE_SECURE = False
@@ -294,14 +312,80 @@ SESSION_ENGINE = 'django.contrib.sessions.backends.db'  # Store in database
 # Run: python manage.py clearsessions periodically to remove expired sessions
 
 
-#  Add cache configuration for verification codes
-CACHES = {
-    'default': {
+# ==================== CACHE CONFIGURATION ====================
+# CACHE_BACKEND picks the shared cache every gunicorn worker talks to:
+#   'redis'  - Redis at CACHE_REDIS_URL (needs the `redis` package)
+#   'sqlite' - SQLite file at CACHE_SQLITE_PATH, shared by all workers on one host
+#   'local'  - per-process LocMemCache (single-process development only)
+# The default alias adds a short-lived in-process L1 on top of the shared cache for
+# read-mostly content keys; throttle counters and verification codes always hit the shared cache.
+CACHE_BACKEND = env('CACHE_BACKEND', default='sqlite')
+
+SHARED_CACHES = {
+    'redis': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': env('CACHE_REDIS_URL', default='redis://127.0.0.1:6379/1'),
+    },
+    'sqlite': {
+        'BACKEND': 'wordknox.cache.SQLiteCache',
+        'LOCATION': env('CACHE_SQLITE_PATH', default=str(BASE_DIR / 'cache' / 'shared_cache.sqlite3')),
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    },
+    'local': {
         'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
         'LOCATION': 'portfolio-cache',
-    }
+    },
 }
 
+CACHES = {
+    'default': {
+        'BACKEND': 'wordknox.cache.TwoTierCache',
+        'OPTIONS': {
+            'SHARED': 'shared',
+            'LOCAL_TIMEOUT': env.int('CACHE_LOCAL_TIMEOUT', default=5),
+            'LOCAL_PREFIXES': [
+                'views.decorators.cache.',  # cache_page responses
+                'cache_tag:',  # tag generations, see wordknox/cache_tags.py
+                'featured_', 'recent_products_', 'top_rated_products_', 'bestselling_products_',
+                'product_', 'services_category_', 'service_', 'pricing_models_stats',
+                'active_hero_section', 'latest_about_section', 'site_snapshot',
+            ],
+        },
+    },
+    'shared': SHARED_CACHES[CACHE_BACKEND],
+}
+
+# ==================== COUNTER BUFFER ====================
+# View counts, likes and downloads are buffered per worker and written back in batches
+# (see wordknox/counters.py). 0 writes every increment straight through. Pending
+# increments are flushed on graceful worker exit; a SIGKILLed worker loses them.
+COUNTER_FLUSH_INTERVAL = env.int('COUNTER_FLUSH_INTERVAL', default=5)
+COUNTER_MAX_PENDING = env.int('COUNTER_MAX_PENDING', default=1000)
+
+# ==================== SITE SNAPSHOT ====================
+# Public site content prebuilt into one compressed JSON document (see core/snapshot.py).
+# Content changes rebuild it SITE_SNAPSHOT_DEBOUNCE seconds after the last change, at most
+# SITE_SNAPSHOT_MAX_DELAY seconds after the first. 0 rebuilds on every commit.
+SITE_SNAPSHOT_DEBOUNCE = env.int('SITE_SNAPSHOT_DEBOUNCE', default=2)
+SITE_SNAPSHOT_MAX_DELAY = env.int('SITE_SNAPSHOT_MAX_DELAY', default=30)
+SITE_SNAPSHOT_MAX_AGE = 60  # seconds browsers and CDNs may reuse it before revalidating
+
+# ==================== CHAT PUSH DELIVERY ====================
+# Conversation streams and long-polls (notifications/streams.py) need an ASGI server,
+# e.g. `gunicorn wordknox.asgi:application -k uvicorn.workers.UvicornWorker`.
+# CHAT_BROKER carries "new message" wake-ups between workers (see wordknox/pubsub.py):
+#   'local' - single process only
+#   'cache' - through the shared cache above; required with more than one worker
+CHAT_BROKER = env('CHAT_BROKER', default='cache')
+CHAT_BROKER_POLL_INTERVAL = 1  # seconds between cross-worker sequence checks
+CHAT_STREAM_TIMEOUT = 300  # seconds before an SSE stream is closed; EventSource reconnects
+CHAT_LONG_POLL_TIMEOUT = 25  # seconds a long-poll waits for a new message
+
+# ==================== NOTIFICATION COUNTERS ====================
+# Unreplied/unread counts behind the notification dropdowns are cached and kept
+# current by signals (see notifications/counters.py); this bounds any drift.
+NOTIFICATION_COUNTS_TIMEOUT = env.int('NOTIFICATION_COUNTS_TIMEOUT', default=300)
+
 JAZZMIN_SETTINGS = {
     # Site branding
     "site_title": "WordKnox Admin",
@@ -0,0 +1,421 @@
+import os
+import shutil
+import tempfile
+import time
+from decimal import Decimal
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.db.models import Count, Min
+from django.core.cache import cache, caches
+from django.core.signals import request_finished
+from django.http import HttpResponse
+from django.middleware.cache import CacheMiddleware
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.utils.decorators import method_decorator
+from rest_framework.test import APIClient
+
+from blog.models import BlogPost
+from services.models import Service, ServicePricingTier
+from .aggregates import annotated, related_aggregate
+from .cache import SQLiteCache, TwoTierCache
+from .cache_tags import cache_page_tagged, invalidate_tags, model_tags, tag_generations, tagged_key
+from .counters import CounterBuffer, _flush_on_exit, counters
+
+
+class SharedCacheMixin:
+    """Each test gets an empty shared L2 under the alias `shared_alias`"""
+
+    shared_alias = None
+
+    @classmethod
+    def setUpClass(cls):
+        cls.cache_dir = tempfile.mkdtemp()
+        cls.settings_override = override_settings(CACHES={
+            'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'tests-default'},
+            # One store for every instance in the process, as a Redis server is for every worker
+            'redis_standin': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'redis-standin'},
+            'sqlite': {'BACKEND': 'wordknox.cache.SQLiteCache', 'LOCATION': os.path.join(cls.cache_dir, 'cache.sqlite3')},
+        })
+        cls.settings_override.enable()
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        cls.settings_override.disable()
+        shutil.rmtree(cls.cache_dir, ignore_errors=True)
+
+    def setUp(self):
+        self.shared = caches[self.shared_alias]
+        self.shared.clear()
+
+    def later(self, seconds):
+        """Move wall-clock time forward, which is what cache expiry is checked against"""
+        return mock.patch('time.time', return_value=time.time() + seconds)
+
+
+class TwoTierCacheMixin(SharedCacheMixin):
+    """L1 read-through, expiry and invalidation across workers, run against each L2 backend"""
+
+    def setUp(self):
+        super().setUp()
+        self.worker_a = self.worker('a')
+        self.worker_b = self.worker('b')
+        self.worker_a.clear()
+
+    def worker(self, name, **options):
+        # A distinct LOCATION gives each instance its own L1, like separate processes
+        options = {
+            'SHARED': self.shared_alias,
+            'LOCAL_PREFIXES': ['content_', 'listing_'],
+            'LOCAL_TIMEOUT': 5,
+            'SYNC_INTERVAL': 0,
+            **options,
+        }
+        return TwoTierCache(f'{self.shared_alias}-{name}-{self.id()}', {'OPTIONS': options})
+
+    def test_read_through_fills_l1(self):
+        self.worker_a.set('content_page', 'v1')
+        self.assertEqual(self.shared.get('content_page'), 'v1')
+        self.assertEqual(self.worker_b.get('content_page'), 'v1')
+
+        # Changed behind the worker's back: L1 keeps answering until it expires
+        self.shared.set('content_page', 'v2')
+        self.assertEqual(self.worker_b.get('content_page'), 'v1')
+        with self.later(6):
+            self.assertEqual(self.worker_b.get('content_page'), 'v2')
+
+    def test_other_keys_bypass_l1(self):
+        self.worker_a.set('throttle_anon', 1)
+        self.assertEqual(self.worker_b.get('throttle_anon'), 1)
+        self.shared.set('throttle_anon', 2)
+        self.assertEqual(self.worker_b.get('throttle_anon'), 2)
+        self.assertEqual(self.worker_b.incr('throttle_anon'), 3)
+
+    def test_missing_key_returns_default(self):
+        self.assertIsNone(self.worker_b.get('content_missing'))
+        self.assertEqual(self.worker_b.get('content_missing', 'default'), 'default')
+
+    def test_expiry(self):
+        self.worker_a.set('content_page', 'v1', 60)
+        self.worker_a.set('throttle_anon', 1, 60)
+        self.assertEqual(self.worker_b.get('content_page'), 'v1')
+        with self.later(61):
+            self.assertIsNone(self.worker_a.get('content_page'))
+            self.assertIsNone(self.worker_b.get('content_page'))
+            self.assertIsNone(self.worker_b.get('throttle_anon'))
+
+    def test_l1_never_outlives_a_short_timeout(self):
+        self.worker_a.set('content_page', 'v1', 2)
+        with self.later(3):
+            self.assertIsNone(self.worker_a.get('content_page'))
+
+    def test_delete_reaches_other_workers(self):
+        self.worker_a.set('content_page', 'v1')
+        self.assertEqual(self.worker_b.get('content_page'), 'v1')
+        self.worker_a.delete('content_page')
+        self.assertIsNone(self.worker_b.get('content_page'))
+
+    def test_incr_reaches_other_workers(self):
+        self.worker_a.set('content_version', 1)
+        self.assertEqual(self.worker_b.get('content_version'), 1)
+        self.assertEqual(self.worker_a.incr('content_version'), 2)
+        self.assertEqual(self.worker_b.get('content_version'), 2)
+
+    def test_set_many_and_delete_many(self):
+        self.worker_a.set_many({'content_one': 1, 'listing_two': 2, 'throttle_three': 3})
+        self.assertEqual(
+            self.worker_b.get_many(['content_one', 'listing_two', 'throttle_three', 'content_missing']),
+            {'content_one': 1, 'listing_two': 2, 'throttle_three': 3}
+        )
+        self.worker_a.delete_many(['content_one', 'listing_two'])
+        self.assertEqual(self.worker_b.get_many(['content_one', 'listing_two', 'throttle_three']), {'throttle_three': 3})
+
+    def test_invalidation_is_scoped_to_the_key_prefix(self):
+        self.worker_a.set('content_page', 'v1')
+        self.worker_a.set('listing_page', 'v1')
+        self.worker_b.get('content_page')
+        self.worker_b.get('listing_page')
+        self.shared.set('content_page', 'v2')
+        self.shared.set('listing_page', 'v2')
+
+        self.worker_a.delete('content_other')
+        # The content_ generation moved, so worker b rereads L2; its listing_ L1 entries survive
+        self.assertEqual(self.worker_b.get('content_page'), 'v2')
+        self.assertEqual(self.worker_b.get('listing_page'), 'v1')
+
+    def test_stale_copy_is_served_until_the_next_sync(self):
+        worker_b = self.worker('b-synced', SYNC_INTERVAL=60)
+        self.worker_a.set('content_page', 'v1')
+        self.assertEqual(worker_b.get('content_page'), 'v1')
+        self.worker_a.delete('content_page')
+        self.assertEqual(worker_b.get('content_page'), 'v1')
+        with mock.patch('wordknox.cache.time.monotonic', return_value=time.monotonic() + 61):
+            self.assertIsNone(worker_b.get('content_page'))
+
+    def test_clear_reaches_other_workers(self):
+        self.worker_a.set('content_page', 'v1')
+        self.assertEqual(self.worker_b.get('content_page'), 'v1')
+        self.worker_a.clear()
+        self.assertIsNone(self.worker_b.get('content_page'))
+
+    def test_add(self):
+        self.assertTrue(self.worker_a.add('content_page', 'v1'))
+        self.assertFalse(self.worker_b.add('content_page', 'v2'))
+        self.assertEqual(self.worker_b.get('content_page'), 'v1')
+
+
+class TwoTierOverRedisStandInTests(TwoTierCacheMixin, SimpleTestCase):
+    shared_alias = 'redis_standin'
+
+
+class TwoTierOverSQLiteTests(TwoTierCacheMixin, SimpleTestCase):
+    shared_alias = 'sqlite'
+
+
+class SQLiteCacheTests(SharedCacheMixin, SimpleTestCase):
+    shared_alias = 'sqlite'
+
+    def other_process(self):
+        """A second backend instance on the same file, as another worker would open it"""
+        return SQLiteCache(self.shared._path, {})
+
+    def test_shared_between_instances(self):
+        other = self.other_process()
+        self.shared.set('key', {'value': 1})
+        self.assertEqual(other.get('key'), {'value': 1})
+        other.delete('key')
+        self.assertIsNone(self.shared.get('key'))
+
+    def test_add_incr_and_touch(self):
+        self.assertTrue(self.shared.add('counter', 1))
+        self.assertFalse(self.other_process().add('counter', 5))
+        self.assertEqual(self.shared.incr('counter', 2), 3)
+        self.assertEqual(self.other_process().get('counter'), 3)
+        with self.assertRaises(ValueError):
+            self.shared.incr('missing')
+        self.assertTrue(self.shared.touch('counter', 10))
+        self.assertFalse(self.shared.touch('missing', 10))
+
+    def test_expiry(self):
+        self.shared.set('short', 1, 10)
+        self.shared.set('forever', 1, None)
+        self.assertTrue(self.shared.has_key('short'))
+        with self.later(11):
+            self.assertIsNone(self.shared.get('short'))
+            self.assertFalse(self.shared.add('forever', 2))
+            self.assertTrue(self.shared.add('short', 2))
+
+    def test_cull_keeps_the_table_bounded(self):
+        cache = SQLiteCache(self.shared._path, {'OPTIONS': {'MAX_ENTRIES': 20, 'CULL_FREQUENCY': 2}})
+        cache.cull_every = 5
+        for index in range(60):
+            cache.set(f'key-{index}', index)
+        count = cache._connection().execute('SELECT COUNT(*) FROM cache_entries').fetchone()[0]
+        self.assertLessEqual(count, 25)
+        self.assertEqual(cache.get('key-59'), 59)
+
+
+class TaggedView:
+    def __init__(self):
+        self.calls = 0
+
+    @method_decorator(cache_page_tagged(60, tags=['test:*']))
+    def get(self, request):
+        self.calls += 1
+        return HttpResponse(f'call {self.calls}')
+
+
+class CacheTagTests(TestCase):
+    """Bumping a tag makes every value and response stamped with it unreachable"""
+
+    def setUp(self):
+        cache.clear()
+
+    def test_bump_changes_only_keys_stamped_with_the_tag(self):
+        product_key = tagged_key('featured_products', ['product:*'])
+        service_key = tagged_key('featured_services', ['service:*'])
+        self.assertEqual(tagged_key('featured_products', ['product:*']), product_key)
+
+        invalidate_tags('product:*')
+        self.assertNotEqual(tagged_key('featured_products', ['product:*']), product_key)
+        self.assertEqual(tagged_key('featured_services', ['service:*']), service_key)
+
+    def test_saving_a_model_bumps_its_tags(self):
+        service = Service.objects.create(name='Web Design', slug='web-design', description='Description')
+        tags = model_tags(service)
+        self.assertEqual(tags, ['service:*', 'services:*', f'service:{service.pk}'])
+        before = tag_generations(tags)
+
+        service.description = 'Updated'
+        service.save()
+        after = tag_generations(tags)
+        self.assertTrue(all(after[tag] != before[tag] for tag in tags))
+
+    def test_cached_response_is_dropped_when_a_tag_is_bumped(self):
+        view = TaggedView()
+        with mock.patch('wordknox.cache_tags.CacheMiddleware', wraps=CacheMiddleware) as middleware:
+            for _ in range(3):
+                self.assertEqual(view.get(RequestFactory().get('/tagged/')).content, b'call 1')
+            # Built once for the tag stamp, not once per request
+            self.assertEqual(middleware.call_count, 1)
+
+            invalidate_tags('test:*')
+            for _ in range(2):
+                self.assertEqual(view.get(RequestFactory().get('/tagged/')).content, b'call 2')
+            self.assertEqual(middleware.call_count, 2)
+
+    def test_cached_endpoint_reflects_model_changes(self):
+        url = '/api/v1/services/services/featured/'
+        service = Service.objects.create(
+            name='Web Design', slug='web-design', description='Description', pricing_model='fixed',
+            starting_at=Decimal('100.00'), featured=True
+        )
+        client = APIClient()
+        self.assertEqual([item['name'] for item in client.get(url).data], ['Web Design'])
+        with self.assertNumQueries(0):
+            self.assertEqual(client.get(url).status_code, 200)
+
+        service.name = 'Web Design & Hosting'
+        service.save()
+        self.assertEqual([item['name'] for item in client.get(url).data], ['Web Design & Hosting'])
+
+
+@override_settings(COUNTER_FLUSH_INTERVAL=60, COUNTER_MAX_PENDING=10)
+@mock.patch.object(CounterBuffer, '_ensure_worker')
+class CounterBufferTests(TestCase):
+    """Buffered increments merge per row and reach the database on every flush path"""
+
+    @classmethod
+    def setUpTestData(cls):
+        author = get_user_model().objects.create_user(email='author@example.com', password='pass')
+        cls.posts = [
+            BlogPost.objects.create(title=f'Post {index}', slug=f'post-{index}', excerpt='Excerpt', author=author)
+            for index in range(3)
+        ]
+
+    def setUp(self):
+        self.buffer = CounterBuffer()
+
+    def view_counts(self):
+        return list(BlogPost.objects.filter(pk__in=[post.pk for post in self.posts]).order_by('slug').values_list(
+            'view_count', flat=True
+        ))
+
+    def test_increments_merge_and_flush_in_one_update_per_delta(self, ensure_worker):
+        first, second, third = self.posts
+        for _ in range(3):
+            self.buffer.increment(BlogPost, first.pk, 'view_count')
+            self.buffer.increment(BlogPost, second.pk, 'view_count')
+        self.buffer.increment(BlogPost, third.pk, 'view_count')
+        self.assertEqual(self.buffer.pending(BlogPost, first.pk, 'view_count'), 3)
+        self.assertEqual(self.view_counts(), [0, 0, 0])
+
+        # first and second share a delta of 3, third has 1
+        with self.assertNumQueries(2):
+            self.assertEqual(self.buffer.flush(), 3)
+        self.assertEqual(self.view_counts(), [3, 3, 1])
+        self.assertEqual(self.buffer.pending(BlogPost, first.pk, 'view_count'), 0)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.buffer.flush(), 0)
+
+    def test_flush_adds_to_concurrent_writes(self, ensure_worker):
+        post = self.posts[0]
+        self.buffer.increment(BlogPost, post.pk, 'view_count', 2)
+        BlogPost.objects.filter(pk=post.pk).update(view_count=10)
+        self.buffer.flush()
+        post.refresh_from_db()
+        self.assertEqual(post.view_count, 12)
+
+    def test_apply_pending(self, ensure_worker):
+        post = BlogPost.objects.get(pk=self.posts[0].pk)
+        self.buffer.increment(BlogPost, post.pk, 'view_count')
+        self.buffer.increment(BlogPost, post.pk, 'view_count')
+        self.assertEqual(self.buffer.apply_pending(post, 'view_count').view_count, 2)
+
+    def test_failed_flush_keeps_the_deltas(self, ensure_worker):
+        post = self.posts[0]
+        self.buffer.increment(BlogPost, post.pk, 'view_count')
+        with mock.patch('django.db.models.QuerySet.update', side_effect=RuntimeError('database gone')):
+            with self.assertLogs('wordknox.counters', level='ERROR'):
+                self.assertEqual(self.buffer.flush(), 0)
+        self.buffer.increment(BlogPost, post.pk, 'view_count')
+        self.assertEqual(self.buffer.pending(BlogPost, post.pk, 'view_count'), 2)
+        self.buffer.flush()
+        post.refresh_from_db()
+        self.assertEqual(post.view_count, 2)
+
+    def test_full_buffer_wakes_the_flush_thread(self, ensure_worker):
+        for post in self.posts:
+            self.buffer.increment(BlogPost, post.pk, 'view_count')
+        self.assertFalse(self.buffer._wakeup.is_set())
+        with self.settings(COUNTER_MAX_PENDING=3):
+            self.buffer.increment(BlogPost, self.posts[0].pk, 'view_count')
+        self.assertTrue(self.buffer._wakeup.is_set())
+
+    def test_flush_if_due(self, ensure_worker):
+        post = self.posts[0]
+        self.buffer.increment(BlogPost, post.pk, 'view_count')
+        self.assertFalse(self.buffer.flush_if_due())
+        with mock.patch('wordknox.counters.time.monotonic', return_value=time.monotonic() + 61):
+            self.assertTrue(self.buffer.flush_if_due())
+        post.refresh_from_db()
+        self.assertEqual(post.view_count, 1)
+
+    def test_request_finished_and_exit_flush_the_shared_buffer(self, ensure_worker):
+        post = self.posts[0]
+        self.addCleanup(counters.flush)
+        counters.increment(BlogPost, post.pk, 'view_count')
+        with mock.patch('wordknox.counters.time.monotonic', return_value=time.monotonic() + 61):
+            request_finished.send(sender=self.__class__)
+        post.refresh_from_db()
+        self.assertEqual(post.view_count, 1)
+
+        counters.increment(BlogPost, post.pk, 'view_count')
+        _flush_on_exit()
+        post.refresh_from_db()
+        self.assertEqual(post.view_count, 2)
+
+    @override_settings(COUNTER_FLUSH_INTERVAL=0)
+    def test_interval_zero_writes_through(self, ensure_worker):
+        post = self.posts[0]
+        self.buffer.increment(BlogPost, post.pk, 'view_count')
+        self.assertEqual(self.buffer.pending(BlogPost, post.pk, 'view_count'), 0)
+        post.refresh_from_db()
+        self.assertEqual(post.view_count, 1)
+        ensure_worker.assert_not_called()
+
+
+class RelatedAggregateTests(TestCase):
+    """Per-row aggregates stay separate subqueries and serializers fall back without them"""
+
+    def setUp(self):
+        self.service = Service.objects.create(name='Web Design', slug='web-design', description='Description')
+        self.empty = Service.objects.create(name='Hosting', slug='hosting', description='Description')
+        for name, price in (('Basic', '100.00'), ('Pro', '250.00'), ('Agency', '900.00')):
+            ServicePricingTier.objects.create(service=self.service, name=name, price=Decimal(price), unit='project')
+
+    def test_aggregates_each_row(self):
+        services = Service.objects.annotate(
+            tiers=related_aggregate(ServicePricingTier, 'service', Count('id'), default=0),
+            large_tiers=related_aggregate(
+                ServicePricingTier, 'service', Count('id'), default=0, price__gte=Decimal('200.00')
+            ),
+            lowest=related_aggregate(ServicePricingTier, 'service', Min('price')),
+        )
+        rows = {str(service.pk): (service.tiers, service.large_tiers, service.lowest) for service in services}
+        self.assertEqual(rows[str(self.service.pk)], (3, 2, Decimal('100.00')))
+        # Without rows counts use the default and other aggregates are None
+        self.assertEqual(rows[str(self.empty.pk)], (0, 0, None))
+
+    def test_annotated_falls_back_to_a_query(self):
+        service = Service.objects.annotate(
+            tiers=related_aggregate(ServicePricingTier, 'service', Count('id'), default=0)
+        ).get(pk=self.service.pk)
+        with self.assertNumQueries(0):
+            self.assertEqual(annotated(service, 'tiers', service.pricing_tiers.count), 3)
+
+        service = Service.objects.get(pk=self.service.pk)
+        with self.assertNumQueries(1):
+            self.assertEqual(annotated(service, 'tiers', service.pricing_tiers.count), 3)
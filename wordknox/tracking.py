@@ -0,0 +1,100 @@
+# wordknox/tracking.py
+"""
+Old-value tracking for model instances without re-reading the row.
+
+FieldTrackerMixin keeps the values of `tracked_fields` as they were loaded from
+the database (from_db) or last saved. Signal handlers and save() can then ask
+what a save is about to change without a SELECT:
+
+    class Order(FieldTrackerMixin, models.Model):
+        tracked_fields = ('status', 'total_amount')
+
+    order.has_changed('status'), order.old_value('status'), order.changed_fields()
+
+Snapshots are refreshed after save() returns, so post_save handlers still see
+the old values. Foreign keys are tracked by their id. A field that was deferred
+when the row was loaded has no old value and always counts as changed.
+"""
+import copy
+
+
+class FieldTrackerMixin:
+    """
+    Snapshot tracked field values at load time
+    `tracked_fields = None` tracks every concrete field except auto_now(_add) timestamps
+    """
+
+    tracked_fields = None
+
+    @classmethod
+    def _tracked_attnames(cls):
+        if '_tracked_attname_map' not in cls.__dict__:
+            # auto_now timestamps change on every save, so they would mask real changes
+            fields = [
+                field for field in cls._meta.concrete_fields
+                if not (getattr(field, 'auto_now', False) or getattr(field, 'auto_now_add', False))
+            ]
+            if cls.tracked_fields is not None:
+                fields = [cls._meta.get_field(name) for name in cls.tracked_fields]
+            cls._tracked_attname_map = {field.name: field.attname for field in fields}
+        return cls._tracked_attname_map
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_values = {}
+        instance._snapshot()
+        return instance
+
+    def _snapshot(self, fields=None):
+        for name, attname in self._tracked_attnames().items():
+            if (fields is None or name in fields or attname in fields) and attname in self.__dict__:
+                # Copy so in-place edits of JSON lists and dicts show up as changes
+                self._loaded_values[name] = copy.deepcopy(self.__dict__[attname])
+
+    def is_tracking(self):
+        """False for instances that were never loaded or saved"""
+        return hasattr(self, '_loaded_values')
+
+    def has_changed(self, field):
+        """True when `field` differs from its loaded value (always True for unsaved instances)"""
+        if not self.is_tracking() or field not in self._loaded_values:
+            return True
+        attname = self._tracked_attnames()[field]
+        return self._loaded_values[field] != self.__dict__.get(attname)
+
+    def old_value(self, field):
+        """The loaded value of `field`, or None if it is unknown"""
+        return self._loaded_values.get(field) if self.is_tracking() else None
+
+    def changed_fields(self):
+        """{field name: old value} for every tracked field that changed since loading"""
+        return {
+            name: self.old_value(name) for name in self._tracked_attnames() if self.has_changed(name)
+        }
+
+    def as_loaded(self):
+        """
+        A copy of the instance with the tracked fields as loaded, e.g. to compute
+        what the row looked like before this save. None for unsaved instances and
+        when a tracked field was deferred.
+        """
+        if not self.is_tracking() or len(self._loaded_values) < len(self._tracked_attnames()):
+            return None
+        previous = copy.copy(self)
+        previous.__dict__.update({
+            attname: self._loaded_values[name] for name, attname in self._tracked_attnames().items()
+        })
+        return previous
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        if not self.is_tracking():
+            self._loaded_values = {}
+        self._snapshot(kwargs.get('update_fields'))
+
+    def refresh_from_db(self, using=None, fields=None, from_queryset=None):
+        super().refresh_from_db(using=using, fields=fields, from_queryset=from_queryset)
+        if not self.is_tracking():
+            self._loaded_values = {}
+        self._snapshot(fields)
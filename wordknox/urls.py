@@ -35,6 +35,7 @@ urlpatterns = [
     path(f'api/{API_VERSION}/products/', include('products.urls')),
     path(f'api/{API_VERSION}/business/', include('business.urls')),
     path(f'api/{API_VERSION}/notifications/', include('notifications.urls')),
+    path(f'api/{API_VERSION}/search/', include('search.urls')),
 ]
 
 # Serve media files in development